@@ -0,0 +1,313 @@
+"""
+Пакетное распознавание архива ТТН без GUI.
+
+Обходит каталоги, распознаёт документы в пуле процессов (по одному
+OCRService на процесс) и дописывает результаты в JSONL: одна строка —
+один документ. Повторный запуск с --resume пропускает уже обработанные
+файлы. С --create-receptions приёмки создаются на сервере пачками.
+
+Запуск:
+    python -m client.src.batch_ocr archive/ -o results.jsonl --workers 4
+    python -m client.src.batch_ocr archive/ -o results.jsonl --resume --create-receptions
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from client.src.services.ocr_service import OCRService, SUPPORTED_EXTENSIONS
+from common.models import OCRResult, ReceptionCreate
+
+logger = logging.getLogger(__name__)
+
+# Статусы записей в JSONL
+STATUS_OK = "ok"
+STATUS_EMPTY = "empty"                  # документ прочитан, но ничего не распознано
+STATUS_ERROR = "error"                  # исключение при распознавании
+STATUS_UPLOAD_FAILED = "upload_failed"  # распознан, но приёмка не создана на сервере
+RETRYABLE_STATUSES = {STATUS_ERROR, STATUS_UPLOAD_FAILED}
+
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# Состояние процесса-воркера
+_service: Optional[OCRService] = None
+_build_receptions = False
+
+
+def collect_documents(inputs: Iterable[Path]) -> List[Path]:
+    """Файлы поддерживаемых форматов из указанных путей (каталоги — рекурсивно), отсортированные."""
+    found: Set[Path] = set()
+    for path in inputs:
+        path = Path(path)
+        if path.is_dir():
+            candidates = (p for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            candidates = [path]
+        else:
+            logger.warning(f"Path not found: {path}")
+            continue
+        found.update(p.resolve() for p in candidates if p.suffix.lower() in SUPPORTED_EXTENSIONS)
+    return sorted(found)
+
+
+def load_processed(output_path: Path, retry_failed: bool = False) -> Set[str]:
+    """Пути, уже записанные в JSONL (с retry_failed — кроме завершившихся ошибкой)."""
+    processed: Set[str] = set()
+    if not output_path.exists():
+        return processed
+
+    with open(output_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Обрыв записи при аварийной остановке — документ будет обработан заново
+                logger.warning(f"{output_path.name}:{line_number}: broken record skipped")
+                continue
+            if retry_failed and record.get("status") in RETRYABLE_STATUSES:
+                processed.discard(record["path"])
+            else:
+                processed.add(record["path"])
+    return processed
+
+
+def _init_worker(build_receptions: bool, log_level: int = logging.WARNING):
+    """Инициализация процесса пула: свой OCRService, приглушённое логирование."""
+    logging.basicConfig(level=log_level, format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s")
+    _setup_service(build_receptions)
+
+
+def _setup_service(build_receptions: bool):
+    global _service, _build_receptions
+    _service = OCRService()
+    _build_receptions = build_receptions
+
+
+def _process_one(path: str) -> Dict[str, Any]:
+    """Распознать один документ. Исключения не пробрасываются — попадают в запись."""
+    started_at = time.perf_counter()
+    record: Dict[str, Any] = {"path": path, "status": STATUS_OK, "result": None, "error": None}
+
+    try:
+        result = _service.process_document(Path(path))
+        record["result"] = result.model_dump(mode="json")
+        if not result.ttn_number and not result.items:
+            record["status"] = STATUS_EMPTY
+        elif _build_receptions:
+            record["reception"], record["reception_skipped"] = _to_reception(result)
+    except Exception as e:
+        logger.exception(f"Failed to process {path}")
+        record["status"] = STATUS_ERROR
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["timings"] = {stage: round(seconds, 4) for stage, seconds in _service.last_timings.items()}
+    record["elapsed"] = round(time.perf_counter() - started_at, 4)
+    return record
+
+
+def _to_reception(result: OCRResult) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(данные приёмки для сервера, None) или (None, причина пропуска)."""
+    missing = [field for field in ("ttn_number", "ttn_date", "supplier") if not getattr(result, field)]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    try:
+        reception = ReceptionCreate(
+            ttn_number=result.ttn_number,
+            ttn_date=result.ttn_date,
+            supplier=result.supplier,
+            items=_service.ocr_items_to_reception_items(result.items),
+            ocr_engine="batch_ocr",
+        )
+    except ValidationError as e:
+        return None, f"invalid reception: {e.error_count()} errors"
+    return reception.model_dump(mode="json"), None
+
+
+class BatchStats:
+    """Счётчики пакетной обработки: статусы, документы/с и время по этапам."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.statuses: Counter = Counter()
+        self.stage_totals: Dict[str, float] = {}
+        self.stage_counts: Counter = Counter()
+        self.started_at = time.perf_counter()
+        self._last_progress = self.started_at
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add(self, record: Dict[str, Any]):
+        self.done += 1
+        self.statuses[record["status"]] += 1
+        stages = dict(record.get("timings", {}), total=record.get("elapsed", 0.0))
+        for stage, seconds in stages.items():
+            self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+            self.stage_counts[stage] += 1
+
+    def add_stage(self, stage: str, seconds: float):
+        """Этап, выполняемый в главном процессе (например, загрузка на сервер)."""
+        self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+        self.stage_counts[stage] += 1
+
+    def maybe_log_progress(self):
+        now = time.perf_counter()
+        if now - self._last_progress >= PROGRESS_INTERVAL_SECONDS or self.done == self.total:
+            self._last_progress = now
+            logger.info(f"[{self.done}/{self.total}] {self.docs_per_second:.2f} docs/s")
+
+    def report(self) -> str:
+        lines = [
+            f"Processed {self.done} documents in {self.elapsed:.1f}s ({self.docs_per_second:.2f} docs/s)",
+            "Statuses: " + (", ".join(f"{s}={n}" for s, n in sorted(self.statuses.items())) or "-"),
+            f"{'Stage':<14}{'Calls':>7}{'Total, s':>11}{'Mean, ms':>11}",
+        ]
+        for stage in sorted(self.stage_totals, key=self.stage_totals.get, reverse=True):
+            total, count = self.stage_totals[stage], self.stage_counts[stage]
+            lines.append(f"{stage:<14}{count:>7}{total:>11.2f}{total / count * 1000:>11.1f}")
+        return "\n".join(lines)
+
+
+class _ReceptionUploader:
+    """Буферизует распознанные документы и создаёт приёмки на сервере пачками."""
+
+    def __init__(self, sync, bulk_size: int, write, stats: BatchStats):
+        self.sync = sync
+        self.bulk_size = max(1, bulk_size)
+        self.write = write
+        self.stats = stats
+        self._pending: List[Dict[str, Any]] = []
+
+    def add(self, record: Dict[str, Any]):
+        if not record.get("reception"):
+            record.pop("reception", None)
+            self.write(record)
+            return
+        self._pending.append(record)
+        if len(self._pending) >= self.bulk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        started_at = time.perf_counter()
+        ids = self.sync.create_receptions_bulk([ReceptionCreate(**r["reception"]) for r in batch])
+        self.stats.add_stage("upload", time.perf_counter() - started_at)
+
+        for index, record in enumerate(batch):
+            record.pop("reception")
+            if ids is None:
+                record["status"] = STATUS_UPLOAD_FAILED
+                record["reception_id"] = None
+            else:
+                record["reception_id"] = ids[index]
+            # Запись в JSONL только после ответа сервера: --resume не потеряет несозданные приёмки
+            self.write(record)
+
+
+def run_batch(paths: List[Path], output_path: Path, workers: int = 1,
+              sync=None, bulk_size: int = 50) -> BatchStats:
+    """
+    Распознать документы и дописать результаты в output_path.
+
+    Args:
+        paths: Документы для обработки
+        output_path: JSONL-файл результатов (дописывается)
+        workers: Число процессов; 0 или 1 — в текущем процессе
+        sync: SyncService для создания приёмок (None — не создавать)
+        bulk_size: Размер пачки приёмок для сервера
+    """
+    stats = BatchStats(len(paths))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    build_receptions = sync is not None
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        uploader = _ReceptionUploader(sync, bulk_size, write, stats) if build_receptions else None
+        jobs = [str(path) for path in paths]
+
+        def consume(records: Iterable[Dict[str, Any]]):
+            for record in records:
+                stats.add(record)
+                if uploader:
+                    uploader.add(record)
+                else:
+                    write(record)
+                stats.maybe_log_progress()
+
+        if workers <= 1:
+            _setup_service(build_receptions)
+            consume(map(_process_one, jobs))
+        else:
+            # spawn: не наследовать потоки/соединения главного процесса
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(workers, initializer=_init_worker, initargs=(build_receptions,)) as pool:
+                consume(pool.imap_unordered(_process_one, jobs))
+
+        if uploader:
+            uploader.flush()
+
+    return stats
+
+
+def main(argv: Optional[List[str]] = None, sync=None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетное распознавание ТТН")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Каталоги и/или файлы документов")
+    parser.add_argument("-o", "--output", type=Path, default=Path("ocr_results.jsonl"), help="JSONL-файл результатов")
+    parser.add_argument("-w", "--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Число процессов (0/1 — без пула)")
+    parser.add_argument("--resume", action="store_true", help="Пропустить документы, уже записанные в output")
+    parser.add_argument("--retry-failed", action="store_true", help="С --resume: повторить документы с ошибками")
+    parser.add_argument("--create-receptions", action="store_true", help="Создать приёмки на сервере")
+    parser.add_argument("--bulk-size", type=int, default=50, help="Приёмок в одном запросе к серверу")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Подробный лог")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    paths = collect_documents(args.inputs)
+    if args.resume:
+        processed = load_processed(args.output, retry_failed=args.retry_failed)
+        skipped = sum(1 for path in paths if str(path) in processed)
+        paths = [path for path in paths if str(path) not in processed]
+        logger.info(f"Resume: {skipped} documents already processed")
+    logger.info(f"Documents to process: {len(paths)}")
+
+    if args.create_receptions and sync is None:
+        from client.src.services.sync_service import SyncService
+        sync = SyncService()
+        if not sync.check_health():
+            logger.error("Server is not available. Receptions can't be created.")
+            return 1
+
+    stats = run_batch(paths, args.output, workers=args.workers,
+                      sync=sync if args.create_receptions else None, bulk_size=args.bulk_size)
+    print(stats.report())
+    return 1 if stats.statuses[STATUS_ERROR] or stats.statuses[STATUS_UPLOAD_FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,4 +3,6 @@ from .ocr_service import OCRService
 from .camera_service import CameraService
 from .validator_service import ValidatorService
 from .storage_service import StorageService
+from .segment_uploader import SegmentUploader
 from .llm_service import LLMService
+from .product_catalog import ProductCatalog, get_product_catalog
@@ -0,0 +1,328 @@
+"""Асинхронный транспорт для LLM-провайдеров: лимит параллелизма, ретраи, circuit breaker."""
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import httpx
+
+from client.src.config import get_config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Провайдер временно отключён circuit breaker'ом."""
+
+
+class RetryableStatusError(Exception):
+    """HTTP-ответ с кодом, после которого имеет смысл повторить запрос."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class RequestCancelledError(Exception):
+    """Запрос отменён через CancelToken (например, проиграл гонку провайдеров)."""
+
+
+class CancelToken:
+    """Отмена запросов, запущенных в cancel_scope, из другого потока."""
+
+    def __init__(self):
+        self._cancelled = False
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def _register(self, future: Future):
+        with self._lock:
+            if not self._cancelled:
+                self._futures.add(future)
+                return
+        future.cancel()
+
+    def _unregister(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+
+_cancel_token: ContextVar[Optional[CancelToken]] = ContextVar("llm_cancel_token", default=None)
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Привязать запросы текущего потока к токену отмены."""
+    reset = _cancel_token.set(token)
+    try:
+        yield token
+    finally:
+        _cancel_token.reset(reset)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker: closed -> open после N ошибок подряд,
+    open -> half_open через recovery_seconds (одна пробная попытка).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Запросы сейчас отклоняются без обращения к сети."""
+        return self.state == self.OPEN
+
+    def allow_request(self) -> bool:
+        """Можно ли выполнить запрос (в half_open — только один пробный)."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_progress = False
+            if self._trial_in_progress:
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def release_trial(self):
+        """Вернуть пробный слот half_open без оценки результата (запрос отменён)."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_progress = False
+
+
+class _EventLoopThread:
+    """Фоновый event loop, общий для всех LLM-клиентов (вызовы идут из синхронного кода)."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="llm-event-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread: Optional[_EventLoopThread] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_clients: Dict[str, "AsyncLLMClient"] = {}
+_lock = threading.Lock()
+
+
+def _get_loop_thread() -> _EventLoopThread:
+    global _loop_thread
+    with _lock:
+        if _loop_thread is None:
+            _loop_thread = _EventLoopThread()
+        return _loop_thread
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Глобальный семафор на все провайдеры (создаётся внутри общего event loop)."""
+    global _semaphore
+    if _semaphore is None:
+        max_concurrency = get_config().get("llm", {}).get("http", {}).get("max_concurrency", 4)
+        _semaphore = asyncio.Semaphore(max_concurrency)
+    return _semaphore
+
+
+class AsyncLLMClient:
+    """
+    Клиент одного LLM-провайдера.
+
+    Переиспользует соединения (httpx.AsyncClient), ограничивает число
+    одновременных запросов глобальным семафором, ограничивает каждую
+    попытку и весь вызов (попытки + задержки) дедлайнами, повторяет
+    с экспоненциальной задержкой и jitter, а после серии ошибок
+    открывает circuit breaker.
+    """
+
+    def __init__(self, name: str, verify: bool = True, settings: Optional[Dict[str, Any]] = None):
+        settings = settings or {}
+        self.name = name
+        self.verify = verify
+        self.max_concurrency = settings.get("max_concurrency", 4)
+        self.connect_timeout = settings.get("connect_timeout", 5.0)
+        self.attempt_timeout = settings.get("attempt_timeout", 30.0)
+        self.vision_attempt_timeout = settings.get("vision_attempt_timeout", 60.0)
+        self.total_timeout = settings.get("total_timeout", 60.0)
+        self.max_attempts = settings.get("max_attempts", 3)
+        self.backoff_base = settings.get("backoff_base", 0.5)
+        self.backoff_max = settings.get("backoff_max", 4.0)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.get("breaker_failure_threshold", 5),
+            recovery_seconds=settings.get("breaker_recovery_seconds", 30.0),
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Общий пул соединений провайдера (используется только в фоновом loop)."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                verify=self.verify,
+                timeout=httpx.Timeout(self.attempt_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+        return self._http
+
+    def run(self, request: Callable[[], Awaitable[Any]], attempt_timeout: Optional[float] = None) -> Any:
+        """
+        Синхронно выполнить запрос через общий event loop (с ретраями и breaker'ом).
+
+        attempt_timeout переопределяет дедлайн одной попытки (например, для Vision);
+        весь вызов в любом случае ограничен total_timeout.
+        """
+        token = _cancel_token.get()
+        if token and token.cancelled:
+            raise RequestCancelledError(f"{self.name}: request cancelled")
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name}: circuit breaker is open")
+
+        future = _get_loop_thread().submit(self._call(request, attempt_timeout or self.attempt_timeout))
+        if token is None:
+            return future.result()
+
+        token._register(future)
+        try:
+            return future.result()
+        except CancelledError:
+            raise RequestCancelledError(f"{self.name}: request cancelled")
+        finally:
+            token._unregister(future)
+
+    def post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                  attempt_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST с JSON-телом, ответ — JSON."""
+        timeout = httpx.Timeout(attempt_timeout or self.attempt_timeout, connect=self.connect_timeout)
+
+        async def request():
+            response = await self.http.post(url, json=payload, headers=headers, timeout=timeout)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise RetryableStatusError(response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+        return self.run(request, attempt_timeout)
+
+    async def _call(self, request: Callable[[], Awaitable[Any]], attempt_timeout: float) -> Any:
+        semaphore = _get_semaphore()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                # Full jitter: равномерно в [0, min(max, base * 2^n)]
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 2)))
+                if loop.time() + delay >= deadline:
+                    logger.warning(f"{self.name}: total deadline {self.total_timeout}s reached "
+                                   f"after {attempt - 1} attempt(s)")
+                    break
+                if not self.breaker.allow_request():
+                    raise CircuitOpenError(f"{self.name}: circuit breaker is open")
+                await asyncio.sleep(delay)
+
+            try:
+                async with semaphore:
+                    # Попытка не выходит за общий дедлайн вызова (ожидание семафора тоже считается)
+                    timeout = min(attempt_timeout, deadline - loop.time())
+                    result = await asyncio.wait_for(request(), timeout=timeout)
+            except asyncio.CancelledError:
+                # Запрос отменён вызывающим: провайдер не виноват, пробный слот освобождается
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # Ошибка запроса (4xx, разбор ответа) — провайдер жив
+                    self.breaker.record_success()
+                    raise
+                last_error = e
+                self.breaker.record_failure()
+                logger.warning(f"{self.name}: attempt {attempt}/{self.max_attempts} failed: {e!r}")
+                continue
+
+            self.breaker.record_success()
+            return result
+
+        raise last_error
+
+    @staticmethod
+    def _is_retryable(error: BaseException) -> bool:
+        if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, RetryableStatusError)):
+            return True
+        # Исключения OpenAI SDK: APIConnectionError/APITimeoutError и ответы 429/5xx
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def get_async_llm_client(name: str, verify: bool = True) -> AsyncLLMClient:
+    """Получить клиент провайдера (один на имя, настройки из llm.http)."""
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            settings = get_config().get("llm", {}).get("http", {})
+            client = AsyncLLMClient(name, verify=verify, settings=settings)
+            _clients[name] = client
+        return client
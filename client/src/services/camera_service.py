@@ -1,7 +1,11 @@
 """Сервис для работы с веб-камерой."""
 import logging
+import math
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import List, Optional
+from typing import Deque, List, Optional, Tuple
 from datetime import datetime
 
 import cv2
@@ -10,16 +14,290 @@ from PySide6.QtCore import QObject, Signal, QThread, QMutex
 from PySide6.QtGui import QImage
 
 from client.src.config import get_config
+from client.src.services.video_writer import BACKEND_OPENCV, DEFAULT_PRESET, open_video_writer
 
 logger = logging.getLogger(__name__)
 
 
+# Кадров в кольце захвата и кадров превью, ещё не показанных интерфейсом
+FRAME_RING_SIZE = 6
+MAX_PREVIEW_IN_FLIGHT = 2
+
+# Частота превью в интерфейсе (не зависит от частоты захвата и записи)
+PREVIEW_FPS = 15
+
+# Очередь кадров на кодирование (~0.5 с при 30 fps) и что делать, когда она полна
+ENCODER_QUEUE_SIZE = 15
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# Длина сегмента записи по умолчанию (0 — запись одним файлом)
+SEGMENT_SECONDS = 30
+
+
+class FrameRing:
+    """
+    Кольцо заранее выделенных кадров BGR с обёртками QImage над той же памятью.
+
+    Захват пишет кадр в свободный слот, превью и снапшоты держат слот
+    (hold/release), пока читают его, — кадры не копируются и не выделяются заново.
+    """
+
+    def __init__(self, width: int, height: int, size: int = FRAME_RING_SIZE):
+        self.width = width
+        self.height = height
+        self.frames = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(size)]
+        # Format_BGR888 читает кадр OpenCV как есть, без конвертации в RGB
+        self.images = [
+            QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888) for frame in self.frames
+        ]
+        self._holds = [0] * size
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def acquire(self) -> Optional[int]:
+        """Следующий по кругу слот, который никто не держит, или None."""
+        with self._lock:
+            for step in range(len(self.frames)):
+                index = (self._next + step) % len(self.frames)
+                if self._holds[index] == 0:
+                    self._next = index + 1
+                    return index
+            return None
+
+    def hold(self, index: int):
+        with self._lock:
+            self._holds[index] += 1
+
+    def release(self, index: int):
+        with self._lock:
+            self._holds[index] -= 1
+
+
+# Окно замера FPS/джиттера (интервалов между кадрами) и период отправки замера в интерфейс
+STATS_WINDOW = 60
+STATS_INTERVAL = 1.0
+
+
+class FrameScheduler:
+    """
+    Расписание кадров по монотонным часам.
+
+    Сроки кадров идут с шагом 1/fps от первого кадра, пауза — до следующего
+    срока, поэтому время захвата и обработки не добавляется к интервалу
+    и ошибка не накапливается. Отставание больше чем на кадр не догоняется
+    серией кадров подряд: расписание начинается заново от текущего момента.
+    """
+
+    def __init__(self, fps: float, clock=time.monotonic):
+        self.interval = 1.0 / fps
+        self.clock = clock
+        self._deadline: Optional[float] = None
+
+    def next_delay(self) -> float:
+        """Сколько ждать до срока следующего кадра (вызывать после обработки кадра)."""
+        now = self.clock()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.interval
+        if self._deadline < now - self.interval:
+            self._deadline = now
+        return max(0.0, self._deadline - now)
+
+
+class FrameStats:
+    """Фактический FPS и джиттер (СКО интервала между кадрами) по скользящему окну."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self._times: Deque[float] = deque(maxlen=window + 1)
+
+    def add(self, timestamp: float):
+        self._times.append(timestamp)
+
+    def fps(self) -> float:
+        if len(self._times) < 2 or self._times[-1] == self._times[0]:
+            return 0.0
+        return (len(self._times) - 1) / (self._times[-1] - self._times[0])
+
+    def jitter_ms(self) -> float:
+        if len(self._times) < 3:
+            return 0.0
+        times = list(self._times)
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        mean = sum(intervals) / len(intervals)
+        return math.sqrt(sum((i - mean) ** 2 for i in intervals) / len(intervals)) * 1000
+
+
+class FrameEncoder:
+    """
+    Кодирование видео в отдельном потоке из ограниченной очереди кадров.
+
+    Захват только ставит слот кольца в очередь (submit не ждёт), поэтому
+    медленное кодирование не тормозит захват и превью. Когда очередь полна,
+    кадр отбрасывается по drop_policy: DROP_OLDEST — самый старый в очереди,
+    DROP_NEWEST — новый. Слоты в очереди удерживаются до записи в файл.
+
+    Файл объявляется с частотой fps; кадры с меткой времени ставятся в свой
+    интервал 1/fps от начала записи: пропуск заполняется повтором кадра,
+    лишний кадр в уже записанном интервале не пишется. Так длительность
+    видео совпадает с реальной при любом фактическом FPS захвата.
+
+    Сам файл пишет writer из video_writer: OpenCV (FOURCC) или ffmpeg (H.264/VP9).
+    """
+
+    def __init__(self, output_path: Path, codec: str, fps: float, frame_size: Tuple[int, int],
+                 queue_size: int = ENCODER_QUEUE_SIZE, drop_policy: str = DROP_OLDEST,
+                 backend: str = BACKEND_OPENCV, writer_options: Optional[dict] = None):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.output_path = output_path
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.writer = open_video_writer(output_path, codec, fps, frame_size, backend, **(writer_options or {}))
+
+        self.fps = fps
+        self.encoded = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.skipped = 0
+        self._frames_written = 0
+        self._start_time: Optional[float] = None
+        self._queue: Deque[Tuple[FrameRing, int, Optional[float]]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="video-encoder", daemon=True)
+        self._thread.start()
+
+    def submit(self, ring: FrameRing, index: int, timestamp: Optional[float] = None) -> bool:
+        """
+        Поставить кадр в очередь (из потока захвата). False — кадр отброшен.
+
+        timestamp — время захвата по time.monotonic(); без него кадр занимает
+        следующий интервал.
+        """
+        evicted = None
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.queue_size:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                evicted = self._queue.popleft()
+            ring.hold(index)
+            self._queue.append((ring, index, timestamp))
+            self._cond.notify()
+        if evicted:
+            evicted[0].release(evicted[1])
+        return True
+
+    def stats(self) -> dict:
+        """
+        Счётчики: закодировано и отброшено кадров захвата, ждут в очереди,
+        повторено (заполнение пропусков) и не записано (лишние в интервале).
+        """
+        with self._cond:
+            return {
+                "encoded": self.encoded, "dropped": self.dropped, "queued": len(self._queue),
+                "duplicated": self.duplicated, "skipped": self.skipped,
+            }
+
+    def duration(self) -> float:
+        """Длительность записанного видео в секундах (по числу записанных кадров)."""
+        return self._frames_written / self.fps
+
+    def close(self, timeout: Optional[float] = None):
+        """Дописать кадры из очереди и закрыть файл."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                ring, index, timestamp = self._queue.popleft()
+            try:
+                repeats = self._repeats(timestamp)
+                for _ in range(repeats):
+                    self.writer.write(ring.frames[index])
+                self._frames_written += repeats
+                if repeats:
+                    self.encoded += 1
+                    self.duplicated += repeats - 1
+                else:
+                    self.skipped += 1
+            except Exception as e:
+                logger.error(f"Failed to encode frame: {e}")
+            finally:
+                ring.release(index)
+        self.writer.release()
+        logger.info(
+            f"Encoder finished {self.output_path}: {self.encoded} frames encoded, {self.dropped} dropped, "
+            f"{self.duplicated} duplicated, {self.skipped} skipped"
+        )
+
+    def _repeats(self, timestamp: Optional[float]) -> int:
+        """Сколько раз записать кадр, чтобы он попал в свой интервал 1/fps."""
+        if timestamp is None:
+            return 1
+        if self._start_time is None:
+            self._start_time = timestamp
+        slot = round((timestamp - self._start_time) * self.fps)
+        # Длинный пропуск (зависание камеры) заполняется не больше чем на секунду
+        return max(0, min(slot - self._frames_written + 1, int(self.fps) + 1))
+
+
+def segment_path(base: Path, number: int) -> Path:
+    """Путь сегмента записи: video_120000.mp4 -> video_120000_003.mp4."""
+    return base.with_name(f"{base.stem}_{number:03d}{base.suffix}")
+
+
+def video_writer_options(config: dict) -> dict:
+    """Параметры кодировщика ffmpeg из конфига (для backend=ffmpeg)."""
+    camera_config = config["camera"]
+    if camera_config.get("backend", BACKEND_OPENCV) == BACKEND_OPENCV:
+        return {}
+    return {
+        "ffmpeg_path": config.get("ffmpeg", {}).get("path", "ffmpeg"),
+        "crf": camera_config.get("crf"),
+        "bitrate_kbps": camera_config.get("bitrate_kbps"),
+        "preset": camera_config.get("preset", DEFAULT_PRESET),
+        "threads": camera_config.get("encoder_threads", 0),
+    }
+
+
 class CameraWorker(QThread):
-    """Поток для захвата видео с камеры."""
+    """
+    Поток для захвата видео с камеры.
+
+    Кадры пишутся в кольцо FrameRing, в превью уходит QImage над тем же
+    буфером (или над уменьшенной до размера виджета копией, не чаще preview_fps). Интерфейс подтверждает показ кадра (frame_consumed), пока
+    не подтверждены MAX_PREVIEW_IN_FLIGHT кадров, новые в превью не отправляются.
+    Запись — через FrameEncoder в своём потоке; кольцо рассчитано так, чтобы
+    полная очередь кодировщика не занимала слоты, нужные захвату.
+
+    С segment_seconds > 0 запись режется на сегменты: по метке времени кадра
+    открывается новый кодировщик (новый файл), прежний дописывается и
+    закрывается в отдельном потоке, готовый сегмент — сигнал segment_finished.
+    """
     frame_ready = Signal(QImage)
+    stats_updated = Signal(float, float)  # фактический FPS, джиттер (мс)
+    segment_finished = Signal(str, int, float)  # путь, номер сегмента, длительность (с)
     error = Signal(str)
 
-    def __init__(self, camera_index: int, resolution: tuple, fps: int):
+    def __init__(self, camera_index: int, resolution: tuple, fps: int,
+                 encoder_queue_size: int = ENCODER_QUEUE_SIZE, drop_policy: str = DROP_OLDEST,
+                 preview_fps: float = PREVIEW_FPS, preview_size: Optional[Tuple[int, int]] = None,
+                 segment_seconds: float = 0):
         super().__init__()
         self.camera_index = camera_index
         self.resolution = resolution
@@ -30,11 +308,42 @@ class CameraWorker(QThread):
 
         # Для записи
         self.recording = False
-        self.video_writer = None
-        self.output_path = None
+        self.encoder: Optional[FrameEncoder] = None
+        self.encoder_queue_size = encoder_queue_size
+        self.drop_policy = drop_policy
+        self.last_recording_stats: Optional[dict] = None
+
+        # Сегменты записи: базовый путь, номер и начало текущего, готовые (путь, номер, длительность)
+        self.segment_seconds = segment_seconds
+        self._segment_base: Optional[Path] = None
+        self._segment_number = 0
+        self._segment_start: Optional[float] = None
+        self._segment_closers: List[threading.Thread] = []
+        # Следующий сегмент открывается заранее в своём потоке: запуск ffmpeg не держит мьютекс
+        self._next_encoder: Optional[FrameEncoder] = None
+        self._segment_opener: Optional[threading.Thread] = None
+        self._recording_generation = 0
+        self._segments_lock = threading.Lock()
+        self.finished_segments: List[Tuple[Path, int, float]] = []
         
-        # Для снапшотов
-        self.last_frame = None
+        # Слоты: очередь кодировщика, кадры превью, последний кадр и кадр, который пишется
+        self.ring = FrameRing(
+            resolution[0], resolution[1], max(FRAME_RING_SIZE, encoder_queue_size + MAX_PREVIEW_IN_FLIGHT + 2)
+        )
+        # Кадры превью, отправленные в интерфейс и ещё не показанные: (кольцо, слот)
+        self._preview_in_flight: Deque[Tuple[FrameRing, int]] = deque()
+        self.preview_dropped = 0
+        self.capture_dropped = 0
+        self.frame_stats = FrameStats()
+        
+        # Превью: своя частота и уменьшенные кадры в отдельном маленьком кольце
+        self.preview_fps = preview_fps
+        self.preview_size: Optional[Tuple[int, int]] = preview_size
+        self._preview_ring: Optional[FrameRing] = None
+        self._preview_due = 0.0
+        
+        # Для снапшотов: последний кадр (кольцо, слот), слот удерживается
+        self.last_frame: Optional[Tuple[FrameRing, int]] = None
         self.last_frame_mutex = QMutex()
 
     def run(self):
@@ -70,107 +379,308 @@ class CameraWorker(QThread):
             self.capture.set(cv2.CAP_PROP_FPS, self.fps)
 
         self.running = True
+        scheduler = FrameScheduler(self.fps)
+        stats_time = time.monotonic()
 
         while self.running:
-            if self.camera_index == -1:
-                # Mock frame generation
-                frame = np.zeros((self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
-                # Random noise background
-                noise = np.random.randint(0, 256, (self.resolution[1], self.resolution[0], 3), dtype=np.uint8)
-                frame = cv2.addWeighted(frame, 0.5, noise, 0.5, 0)
-                
-                # Add timestamp text
-                cv2.putText(
-                    frame, 
-                    f"NO CAMERA FOUND (MOCK)", 
-                    (50, 50), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 
-                    1, 
-                    (0, 0, 255), 
-                    2
-                )
-                cv2.putText(
-                    frame, 
-                    f"{datetime.now().strftime('%H:%M:%S')}", 
-                    (50, 100), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 
-                    1, 
-                    (0, 255, 0), 
-                    2
-                )
-                
-                # Add recording indicator
-                if self.recording:
-                    cv2.circle(frame, (30, 30), 10, (0, 0, 255), -1)
-            else:
-                ret, frame = self.capture.read()
-                if not ret:
-                    continue
+            index = self.ring.acquire()
+            if index is None:
+                # Все слоты заняты: кадр с камеры всё равно забираем, чтобы не копилась задержка
+                self.capture_dropped += 1
+                if self.capture:
+                    self.capture.grab()
+            elif self._read_frame(index):
+                timestamp = time.monotonic()
+                self.frame_stats.add(timestamp)
+                self._process_frame(index, timestamp)
+                if timestamp - stats_time >= STATS_INTERVAL:
+                    stats_time = timestamp
+                    self.stats_updated.emit(self.frame_stats.fps(), self.frame_stats.jitter_ms())
+
+            # Пауза до срока следующего кадра с учётом времени захвата и обработки
+            time.sleep(scheduler.next_delay())
 
-            # Записать кадр если идёт запись (protected by mutex)
-            self.mutex.lock()
-            try:
-                if self.recording and self.video_writer:
-                    self.video_writer.write(frame)
-            finally:
-                self.mutex.unlock()
-                
-            # Сохранить последний кадр для снапшотов
-            self.last_frame_mutex.lock()
-            self.last_frame = frame.copy()
-            self.last_frame_mutex.unlock()
+        # Очистка
+        self.stop_recording()
+            
+        if self.capture:
+            self.capture.release()
+        logger.info("Camera worker stopped")
 
-            # Конвертировать в QImage для отображения
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            q_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.frame_ready.emit(q_image.copy())
+    def _read_frame(self, index: int) -> bool:
+        """Записать очередной кадр в слот кольца (без выделения памяти)."""
+        frame = self.ring.frames[index]
+        if self.camera_index == -1:
+            self._draw_mock_frame(frame)
+            return True
+
+        ret, captured = self.capture.read(frame)
+        if not ret:
+            return False
+        if captured is not frame:
+            # Камера отдаёт другой размер кадра: кольцо под фактический размер
+            height, width = captured.shape[:2]
+            logger.warning(f"Camera frame size {width}x{height} differs from requested, reallocating frame ring")
+            self.ring = FrameRing(width, height, len(self.ring))
+            index = self.ring.acquire()
+            np.copyto(self.ring.frames[index], captured)
+            self._process_frame(index, time.monotonic())
+            return False
+        return True
+
+    def _draw_mock_frame(self, frame: np.ndarray):
+        """Кадр-заглушка без камеры: шум и время, рисуется прямо в слот."""
+        # Random noise background
+        cv2.randu(frame, 0, 128)
+        
+        # Add timestamp text
+        cv2.putText(
+            frame, 
+            f"NO CAMERA FOUND (MOCK)", 
+            (50, 50), 
+            cv2.FONT_HERSHEY_SIMPLEX, 
+            1, 
+            (0, 0, 255), 
+            2
+        )
+        cv2.putText(
+            frame, 
+            f"{datetime.now().strftime('%H:%M:%S')}", 
+            (50, 100), 
+            cv2.FONT_HERSHEY_SIMPLEX, 
+            1, 
+            (0, 255, 0), 
+            2
+        )
+        
+        # Add recording indicator
+        if self.recording:
+            cv2.circle(frame, (30, 30), 10, (0, 0, 255), -1)
 
-            # Ограничить FPS
-            self.msleep(int(1000 / self.fps))
+    def _process_frame(self, index: int, timestamp: Optional[float] = None):
+        """Записать кадр в видео, запомнить для снапшотов и отправить в превью."""
+        ring = self.ring
 
-        # Очистка
+        # Поставить кадр в очередь кодировщика, если идёт запись (без ожидания)
         self.mutex.lock()
         try:
-            if self.video_writer:
-                self.video_writer.release()
-                self.video_writer = None
+            if self.recording and self.encoder:
+                # Следующий файл ещё не открыт — кадр идёт в текущий сегмент
+                if self._segment_due(timestamp) and self._next_encoder is not None:
+                    self._next_segment(timestamp)
+                self.encoder.submit(ring, index, timestamp)
         finally:
             self.mutex.unlock()
             
-        if self.capture:
-            self.capture.release()
-        logger.info("Camera worker stopped")
-
-    def start_recording(self, output_path: Path):
-        """Начать запись видео."""
+        # Сохранить последний кадр для снапшотов: слот держится, пока кадр последний
+        ring.hold(index)
+        self.last_frame_mutex.lock()
+        previous, self.last_frame = self.last_frame, (ring, index)
+        self.last_frame_mutex.unlock()
+        if previous:
+            previous[0].release(previous[1])
+
+        self._send_preview(ring, index, timestamp)
+
+    def _send_preview(self, ring: FrameRing, index: int, timestamp: Optional[float]):
+        """
+        Отправить кадр в превью: не чаще preview_fps и уменьшенным до размера
+        виджета (preview_size). QImage — над буфером кольца, слот держится
+        до подтверждения показа.
+        """
+        if timestamp is not None and self.preview_fps:
+            # Полкадра захвата допуска: при 30 -> 15 fps уходит ровно каждый второй кадр
+            if timestamp + 0.5 / self.fps < self._preview_due:
+                return
+            self._preview_due = max(self._preview_due, timestamp) + 1.0 / self.preview_fps
+
+        if len(self._preview_in_flight) >= MAX_PREVIEW_IN_FLIGHT:
+            self.preview_dropped += 1
+            return
+
+        target = self._preview_target(ring)
+        if target is not None:
+            preview_ring = self._preview_ring
+            if preview_ring is None or (preview_ring.width, preview_ring.height) != target:
+                preview_ring = self._preview_ring = FrameRing(*target, size=MAX_PREVIEW_IN_FLIGHT + 2)
+            preview_index = preview_ring.acquire()
+            if preview_index is None:
+                self.preview_dropped += 1
+                return
+            # INTER_LINEAR: на слабых ПК в разы дешевле INTER_AREA при дробном масштабе
+            cv2.resize(ring.frames[index], target, dst=preview_ring.frames[preview_index],
+                       interpolation=cv2.INTER_LINEAR)
+            ring, index = preview_ring, preview_index
+
+        ring.hold(index)
+        self._preview_in_flight.append((ring, index))
+        self.frame_ready.emit(ring.images[index])
+
+    def _preview_target(self, ring: FrameRing) -> Optional[Tuple[int, int]]:
+        """Размер превью по размеру виджета с сохранением пропорций или None — кадр как есть."""
+        size = self.preview_size
+        if not size:
+            return None
+        scale = min(size[0] / ring.width, size[1] / ring.height)
+        if scale >= 1:
+            return None
+        return max(1, round(ring.width * scale)), max(1, round(ring.height * scale))
+
+    def set_preview_size(self, width: int, height: int):
+        """Размер области показа превью в пикселях (из GUI-потока); 0 — без уменьшения."""
+        self.preview_size = (width, height) if width > 0 and height > 0 else None
+
+    def frame_consumed(self):
+        """Интерфейс показал кадр превью (вызывается из GUI-потока по порядку кадров)."""
+        if self._preview_in_flight:
+            ring, index = self._preview_in_flight.popleft()
+            ring.release(index)
+
+    def start_recording(self, output_path: Path) -> Path:
+        """Начать запись видео; возвращает путь к файлу (первому сегменту)."""
+        if self.segment_seconds > 0:
+            self._segment_base = output_path
+            output_path = segment_path(output_path, 0)
+        encoder = self._open_encoder(output_path)
         self.mutex.lock()
+        previous, self.encoder = self.encoder, encoder
+        unused, self._next_encoder = self._next_encoder, None
+        self.recording = True
+        self._segment_number = 0
+        self._segment_start = None
+        self._recording_generation += 1
+        if self.segment_seconds > 0:
+            self._prepare_segment()
+        self.mutex.unlock()
+        with self._segments_lock:
+            self.finished_segments = []
+        if previous:
+            previous.close()
+        if unused:
+            self._discard_encoder(unused)
+        logger.info(f"Started recording to {output_path}")
+        return output_path
+
+    def _open_encoder(self, output_path: Path) -> FrameEncoder:
         config = get_config()
-        codec = cv2.VideoWriter_fourcc(*config["camera"]["codec"])
-        self.output_path = output_path
-        self.video_writer = cv2.VideoWriter(
-            str(output_path),
-            codec,
+        camera_config = config["camera"]
+        return FrameEncoder(
+            output_path,
+            camera_config["codec"],
             self.fps,
-            self.resolution
+            (self.ring.width, self.ring.height),
+            queue_size=self.encoder_queue_size,
+            drop_policy=self.drop_policy,
+            backend=camera_config.get("backend", BACKEND_OPENCV),
+            writer_options=video_writer_options(config)
         )
-        self.recording = True
+
+    def _segment_due(self, timestamp: Optional[float]) -> bool:
+        """Пора ли начать новый сегмент (вызывается под мьютексом записи)."""
+        if self.segment_seconds <= 0 or timestamp is None:
+            return False
+        if self._segment_start is None:
+            self._segment_start = timestamp
+            return False
+        return timestamp - self._segment_start >= self.segment_seconds
+
+    def _next_segment(self, timestamp: float):
+        """
+        Переключить запись на заранее открытый файл (под мьютексом записи):
+        прежний закрывается, а следующий открывается в отдельных потоках.
+        """
+        finished, number = self.encoder, self._segment_number
+        self._segment_number += 1
+        self._segment_start = timestamp
+        self.encoder, self._next_encoder = self._next_encoder, None
+        closer = threading.Thread(target=self._finish_segment, args=(finished, number),
+                                  name="segment-close", daemon=True)
+        self._segment_closers = [thread for thread in self._segment_closers if thread.is_alive()] + [closer]
+        closer.start()
+        self._prepare_segment()
+
+    def _prepare_segment(self):
+        """Открыть файл следующего сегмента в фоновом потоке (под мьютексом записи)."""
+        generation, number = self._recording_generation, self._segment_number + 1
+        path = segment_path(self._segment_base, number)
+        self._segment_opener = threading.Thread(target=self._open_segment, args=(generation, number, path),
+                                                name="segment-open", daemon=True)
+        self._segment_opener.start()
+
+    def _open_segment(self, generation: int, number: int, path: Path):
+        try:
+            encoder = self._open_encoder(path)
+        except Exception as e:
+            logger.error(f"Failed to open segment {path}: {e}")
+            return
+        self.mutex.lock()
+        current = self.recording and generation == self._recording_generation and number == self._segment_number + 1
+        if current:
+            self._next_encoder = encoder
         self.mutex.unlock()
-        logger.info(f"Started recording to {output_path}")
+        if not current:
+            # Запись остановлена, пока файл открывался
+            self._discard_encoder(encoder)
+
+    @staticmethod
+    def _discard_encoder(encoder: FrameEncoder):
+        """Закрыть открытый заранее, но не понадобившийся сегмент и удалить его файл."""
+        encoder.close()
+        encoder.output_path.unlink(missing_ok=True)
+
+    def _finish_segment(self, encoder: FrameEncoder, number: int):
+        encoder.close()
+        with self._segments_lock:
+            self.finished_segments.append((encoder.output_path, number, encoder.duration()))
+            self.finished_segments.sort(key=lambda segment: segment[1])
+        logger.info(f"Segment {number} finished: {encoder.output_path} ({encoder.duration():.1f}s)")
+        self.segment_finished.emit(str(encoder.output_path), number, encoder.duration())
 
     def stop_recording(self) -> Optional[Path]:
-        """Остановить запись и вернуть путь к файлу."""
+        """
+        Остановить запись, дождаться кодирования очереди и вернуть путь к файлу
+        (последнему сегменту: к возврату все сегменты закрыты и есть в finished_segments).
+        """
         self.mutex.lock()
         self.recording = False
-        if self.video_writer:
-            self.video_writer.release()
-            self.video_writer = None
-        path = self.output_path
-        self.output_path = None
+        self._recording_generation += 1
+        encoder, self.encoder = self.encoder, None
+        unused, self._next_encoder = self._next_encoder, None
+        opener, self._segment_opener = self._segment_opener, None
+        number = self._segment_number
+        closers, self._segment_closers = self._segment_closers, []
         self.mutex.unlock()
-        logger.info(f"Stopped recording: {path}")
-        return path
+        # Файлы закрываются вне мьютекса: захват и превью продолжаются
+        if opener:
+            opener.join()
+        if unused:
+            self._discard_encoder(unused)
+        if not encoder:
+            return None
+        for closer in closers:
+            closer.join()
+        if self.segment_seconds > 0:
+            self._finish_segment(encoder, number)
+        else:
+            encoder.close()
+        self.last_recording_stats = encoder.stats()
+        logger.info(f"Stopped recording: {encoder.output_path} ({self.last_recording_stats})")
+        return encoder.output_path
+
+    def current_output_path(self) -> Optional[Path]:
+        """Файл, в который сейчас идёт запись (текущий сегмент)."""
+        encoder = self.encoder
+        return encoder.output_path if encoder else None
+
+    def recording_segments(self) -> List[Tuple[Path, int, float]]:
+        """Готовые сегменты текущей или последней записи: (путь, номер, длительность)."""
+        with self._segments_lock:
+            return list(self.finished_segments)
+
+    def recording_stats(self) -> Optional[dict]:
+        """Счётчики текущей записи (или последней завершённой)."""
+        encoder = self.encoder
+        return encoder.stats() if encoder else self.last_recording_stats
 
     def stop(self):
         """Остановить захват."""
@@ -183,17 +693,26 @@ class CameraWorker(QThread):
         try:
             if self.last_frame is None:
                 return None
-            _, buffer = cv2.imencode('.jpg', self.last_frame)
+            ring, index = self.last_frame
+            _, buffer = cv2.imencode('.jpg', ring.frames[index])
             return buffer.tobytes()
         finally:
             self.last_frame_mutex.unlock()
 
 
 class CameraService(QObject):
-    """Сервис управления камерой."""
+    """
+    Сервис управления камерой.
+
+    При camera.segment_seconds > 0 запись идёт сегментами: каждый готовый
+    сегмент — сигнал segment_finished (его можно загружать, пока запись
+    продолжается), recording_stopped получает путь последнего сегмента.
+    """
     frame_ready = Signal(QImage)
+    capture_stats = Signal(float, float)  # фактический FPS, джиттер (мс)
     recording_started = Signal()
     recording_stopped = Signal(str)  # путь к файлу
+    segment_finished = Signal(str, int, float)  # путь, номер сегмента, длительность (с)
     recording_size_updated = Signal(int)  # размер файла в байтах
     recording_limit_exceeded = Signal(str)  # причина остановки
     error = Signal(str)
@@ -207,6 +726,11 @@ class CameraService(QObject):
         self.container = config["camera"]["container"]
         self.max_duration_seconds = config["camera"].get("max_duration_seconds", 300)
         self.max_size_mb = config["camera"].get("max_size_mb", 100)
+        self.encoder_queue_size = config["camera"].get("encoder_queue_size", ENCODER_QUEUE_SIZE)
+        self.drop_policy = config["camera"].get("drop_policy", DROP_OLDEST)
+        self.preview_fps = config["camera"].get("preview_fps", PREVIEW_FPS)
+        self.preview_size: Optional[Tuple[int, int]] = None
+        self.segment_seconds = config["camera"].get("segment_seconds", 0)
         
         self.worker: Optional[CameraWorker] = None
         self.current_video_path: Optional[Path] = None
@@ -262,11 +786,32 @@ class CameraService(QObject):
                 logger.warning(f"Camera {index} not found. Switching to MOCK mode.")
                 index = -1
         
-        self.worker = CameraWorker(index, self.resolution, self.fps)
-        self.worker.frame_ready.connect(self.frame_ready.emit)
+        self.worker = CameraWorker(
+            index, self.resolution, self.fps,
+            encoder_queue_size=self.encoder_queue_size, drop_policy=self.drop_policy,
+            preview_fps=self.preview_fps, preview_size=self.preview_size, segment_seconds=self.segment_seconds
+        )
+        self.worker.frame_ready.connect(self._on_worker_frame)
+        self.worker.stats_updated.connect(self.capture_stats.emit)
+        self.worker.segment_finished.connect(self.segment_finished.emit)
         self.worker.error.connect(self.error.emit)
         self.worker.start()
 
+    def _on_worker_frame(self, image: QImage):
+        """Передать кадр превью подписчикам и вернуть его слот кольцу захвата."""
+        worker = self.sender()
+        try:
+            self.frame_ready.emit(image)
+        finally:
+            if isinstance(worker, CameraWorker):
+                worker.frame_consumed()
+
+    def set_preview_size(self, width: int, height: int):
+        """Размер области показа превью: кадры уменьшаются до него в потоке захвата."""
+        self.preview_size = (width, height) if width > 0 and height > 0 else None
+        if self.worker:
+            self.worker.set_preview_size(width, height)
+
     def stop_preview(self):
         """Остановить превью."""
         if self.worker:
@@ -280,9 +825,8 @@ class CameraService(QObject):
 
         output_dir.mkdir(parents=True, exist_ok=True)
         filename = f"video_{datetime.now().strftime('%H%M%S')}.{self.container}"
-        output_path = output_dir / filename
+        output_path = self.worker.start_recording(output_dir / filename)
 
-        self.worker.start_recording(output_path)
         self.current_video_path = output_path
         self.recording_start_time = datetime.now()
         self.size_update_timer.start()
@@ -302,15 +846,31 @@ class CameraService(QObject):
             self.recording_stopped.emit(str(path))
         return path
 
+    def recording_stats(self) -> Optional[dict]:
+        """Счётчики записи: закодировано и отброшено кадров, в очереди кодировщика."""
+        return self.worker.recording_stats() if self.worker else None
+
+    def recording_segments(self) -> List[Tuple[Path, int, float]]:
+        """Готовые сегменты записи (путь, номер, длительность); пусто, если запись одним файлом."""
+        return self.worker.recording_segments() if self.worker else []
+
     def is_recording(self) -> bool:
         """Проверить идёт ли запись."""
         return self.worker is not None and self.worker.recording
     
+    def _recorded_size(self) -> int:
+        """Размер записи: готовые сегменты и текущий файл."""
+        paths = [path for path, _, _ in self.recording_segments()]
+        current = self.worker.current_output_path() if self.worker else None
+        if current:
+            paths.append(current)
+        return sum(path.stat().st_size for path in paths if path.exists())
+
     def _update_video_size(self):
         """Обновить размер видеофайла и отправить сигнал."""
         if self.current_video_path and self.current_video_path.exists():
             try:
-                size = self.current_video_path.stat().st_size
+                size = self._recorded_size()
                 self.recording_size_updated.emit(size)
                 
                 # Проверка лимитов
@@ -1,13 +1,20 @@
 """Сервис для взаимодействия с ChatBotHub API."""
+import asyncio
 import logging
 import base64
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any
 import json
 
-import requests
+import httpx
+import numpy as np
 
 from client.src.config import get_config
+from client.src.services.async_llm_client import (
+    CircuitOpenError, RequestCancelledError, RetryableStatusError, get_async_llm_client
+)
+from client.src.services.llm_cache import LLMResponseCache, get_llm_cache
+from client.src.services.vision_image_service import PreparedImage, VisionImageService
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +32,28 @@ class ChatBotHubService:
         self.guest_id = chatbothub_config.get("guest_id", "tmc_warehouse_client")
         self.model = chatbothub_config.get("model", "gpt-4o-mini")
         self.verify_ssl = chatbothub_config.get("verify_ssl", False)
+        self.cache = get_llm_cache()
+        self.image_service = VisionImageService()
+        self.http = get_async_llm_client("chatbothub", verify=self.verify_ssl)
         
         logger.info(f"ChatBotHub Service initialized with base_url: {self.base_url}")
 
+    @property
+    def circuit_open(self) -> bool:
+        """Провайдер временно отключён после серии ошибок."""
+        return self.http.breaker.is_open
+
+    def _cached(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ответ из общего кэша. Отмена запроса (проигрыш гонки) проходит через
+        кэш исключением, чтобы ожидающие того же ключа не получили пустой ответ.
+        """
+        try:
+            return self.cache.get_or_compute(key, compute)
+        except RequestCancelledError as e:
+            logger.warning(f"ChatBotHub request skipped: {e}")
+            return {}
+
     def parse_ttn_text(self, text: str) -> Dict[str, Any]:
         """
         Парсинг текста ТТН с помощью ChatBotHub API.
@@ -52,28 +78,30 @@ class ChatBotHubService:
             }
         """
         logger.info("Parsing TTN text via ChatBotHub API")
-        
+
+        key = LLMResponseCache.make_key(
+            "chatbothub", self.model, f"{self.schema_name}/{self.bot_name}/text", text.encode("utf-8")
+        )
+        return self._cached(key, lambda: self._request_text(text))
+
+    def _request_text(self, text: str) -> Dict[str, Any]:
+        """Запрос generate_structured к ChatBotHub API."""
         try:
-            response = requests.post(
+            data = self.http.post_json(
                 f"{self.base_url}/guest/llm/generate_structured",
                 headers={
                     "Content-Type": "application/json",
                     "X-Guest-ID": self.guest_id
                 },
-                json={
+                payload={
                     "schema_name": self.schema_name,
                     "user_input": text,
                     "bot_name": self.bot_name,
                     "temperature": 0.1,
                     "model": self.model
-                },
-                timeout=30,
-                verify=self.verify_ssl
+                }
             )
             
-            response.raise_for_status()
-            data = response.json()
-            
             if data.get("status") == "error":
                 logger.error(f"ChatBotHub API error: {data.get('message')}")
                 return {}
@@ -86,8 +114,13 @@ class ChatBotHubService:
             
             return result
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"ChatBotHub API request failed: {e}")
+        except RequestCancelledError:
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"ChatBotHub API skipped: {e}")
+            return {}
+        except (httpx.HTTPError, RetryableStatusError, asyncio.TimeoutError) as e:
+            logger.error(f"ChatBotHub API request failed: {e!r}")
             return {}
         except Exception as e:
             logger.error(f"ChatBotHub text parsing failed: {e}")
@@ -107,39 +140,54 @@ class ChatBotHubService:
         
         try:
             with open(image_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-            
-            ext = image_path.suffix.lower()
-            mime_types = {
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.webp': 'image/webp'
-            }
-            mime_type = mime_types.get(ext, 'image/jpeg')
-            
-            image_uri = f"data:{mime_type};base64,{base64_image}"
+                image_bytes = image_file.read()
+        except Exception as e:
+            logger.error(f"ChatBotHub Vision parsing failed: {e}")
+            return {}
+
+        prompt_version = f"{self.schema_name}/{self.bot_name}/vision/{self.image_service.signature}"
+        key = LLMResponseCache.make_key("chatbothub", self.model, prompt_version, image_bytes)
+        return self._cached(
+            key, lambda: self._request_image(self.image_service.prepare(image_bytes, image_path.suffix))
+        )
+
+    def parse_ttn_image_array(self, image: np.ndarray) -> Dict[str, Any]:
+        """Парсинг уже декодированного изображения (страница PDF, кадр) без временных файлов."""
+        logger.info("Parsing TTN image via ChatBotHub Vision API (in-memory)")
+
+        try:
+            prepared = self.image_service.prepare_array(image)
+        except Exception as e:
+            logger.error(f"ChatBotHub Vision parsing failed: {e}")
+            return {}
+
+        prompt_version = f"{self.schema_name}/{self.bot_name}/vision"
+        key = LLMResponseCache.make_key("chatbothub", self.model, prompt_version, prepared.data)
+        return self._cached(key, lambda: self._request_image(prepared))
+
+    def _request_image(self, image: PreparedImage) -> Dict[str, Any]:
+        """Запрос generate_structured_vision к ChatBotHub API."""
+        try:
+            base64_image = base64.b64encode(image.data).decode('ascii')
+
+            image_uri = f"data:{image.mime_type};base64,{base64_image}"
             
-            response = requests.post(
+            data = self.http.post_json(
                 f"{self.base_url}/guest/llm/generate_structured_vision",
                 headers={
                     "Content-Type": "application/json",
                     "X-Guest-ID": self.guest_id
                 },
-                json={
+                payload={
                     "schema_name": self.schema_name,
                     "user_input": image_uri,
                     "bot_name": self.bot_name,
                     "temperature": 0.1,
                     "model": self.model
                 },
-                timeout=60,
-                verify=self.verify_ssl
+                attempt_timeout=self.http.vision_attempt_timeout
             )
             
-            response.raise_for_status()
-            data = response.json()
-            
             if data.get("status") == "error":
                 logger.error(f"ChatBotHub Vision API error: {data.get('message')}")
                 return {}
@@ -152,8 +200,13 @@ class ChatBotHubService:
             
             return result
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"ChatBotHub Vision API request failed: {e}")
+        except RequestCancelledError:
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"ChatBotHub Vision API skipped: {e}")
+            return {}
+        except (httpx.HTTPError, RetryableStatusError, asyncio.TimeoutError) as e:
+            logger.error(f"ChatBotHub Vision API request failed: {e!r}")
             return {}
         except Exception as e:
             logger.error(f"ChatBotHub Vision parsing failed: {e}")
@@ -0,0 +1,120 @@
+"""Хеджированный разбор ТТН: LLM-провайдеры наперегонки."""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from client.src.services.async_llm_client import CancelToken, cancel_scope
+from common.models import OCRResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HedgeCandidate:
+    """Участник гонки: имя, функция разбора и задержка старта (секунды)."""
+    name: str
+    call: Callable[[], Optional[OCRResult]]
+    delay: float = 0.0
+
+
+class LatencyTracker:
+    """Скользящее окно задержек успешных ответов по провайдерам."""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, name: str, q: float, min_samples: int = 5) -> Optional[float]:
+        """q-перцентиль задержки (0..1) или None, если данных мало."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(q * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgedExecutor:
+    """
+    Запускает кандидатов параллельно (с задержками хеджирования) и
+    возвращает первый результат, прошедший проверку. Проигравшие LLM-запросы
+    отменяются через CancelToken.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-hedge")
+        self.latency = LatencyTracker()
+
+    def race(self, candidates: List[HedgeCandidate], is_valid: Callable[[OCRResult], bool],
+             timeout: float) -> Tuple[Optional[Tuple[str, OCRResult]], List[Tuple[str, OCRResult]]]:
+        """
+        Returns:
+            (победитель (имя, результат) или None,
+             все непустые результаты в порядке завершения)
+        """
+        started_at = time.monotonic()
+        waiting = sorted(candidates, key=lambda c: c.delay)
+        pending: Dict[Future, Tuple[HedgeCandidate, CancelToken, float]] = {}
+        completed: List[Tuple[str, OCRResult]] = []
+
+        try:
+            while waiting or pending:
+                elapsed = time.monotonic() - started_at
+                while waiting and waiting[0].delay <= elapsed:
+                    candidate = waiting.pop(0)
+                    token = CancelToken()
+                    if candidate.delay:
+                        logger.info(f"Hedging: starting '{candidate.name}' after {elapsed:.2f}s")
+                    future = self._pool.submit(self._run, candidate.call, token)
+                    pending[future] = (candidate, token, time.monotonic())
+
+                remaining = timeout - elapsed
+                if remaining <= 0:
+                    logger.warning(f"Hedging: no valid result within {timeout:.1f}s")
+                    break
+
+                wait_for = remaining
+                if waiting:
+                    wait_for = min(wait_for, max(0.0, waiting[0].delay - elapsed))
+                if not pending:
+                    time.sleep(wait_for)
+                    continue
+
+                done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate, _, submitted_at = pending.pop(future)
+                    result = self._result_of(candidate, future)
+                    if result is None:
+                        continue
+                    self.latency.record(candidate.name, time.monotonic() - submitted_at)
+                    completed.append((candidate.name, result))
+                    if is_valid(result):
+                        logger.info(f"Hedging: '{candidate.name}' won after {time.monotonic() - started_at:.2f}s")
+                        return (candidate.name, result), completed
+        finally:
+            for _, token, _ in pending.values():
+                token.cancel()
+
+        return None, completed
+
+    @staticmethod
+    def _run(call: Callable[[], Optional[OCRResult]], token: CancelToken) -> Optional[OCRResult]:
+        with cancel_scope(token):
+            return call()
+
+    @staticmethod
+    def _result_of(candidate: HedgeCandidate, future: Future) -> Optional[OCRResult]:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Hedging: '{candidate.name}' failed: {e}")
+            return None
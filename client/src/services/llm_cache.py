@@ -0,0 +1,189 @@
+"""Общий кэш ответов LLM с дедупликацией одновременных запросов."""
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from client.src.config import get_config
+from client.src.services.async_llm_client import RequestCancelledError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    LRU-кэш ответов LLM с TTL.
+
+    Ключ строится из провайдера, модели, версии промпта и хэша входных данных.
+    Одновременные запросы с одинаковым ключом ждут один общий вызов.
+    Если задан directory, ответы дополнительно сохраняются на диск
+    (можно указать общую сетевую папку для нескольких рабочих мест).
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, max_entries: int = 256,
+                 directory: Optional[Path] = None, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt_version: str, payload: bytes) -> str:
+        """Ключ кэша: провайдер, модель, версия промпта и SHA-256 входа."""
+        digest = hashlib.sha256(payload).hexdigest()
+        return hashlib.sha256(f"{provider}|{model}|{prompt_version}|{digest}".encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Вернуть ответ из кэша или выполнить compute() один раз для всех ожидающих.
+
+        Пустые ответы (ошибка запроса) не кэшируются. Если запрос владельца
+        отменён (RequestCancelledError), ожидающие выполняют compute() сами.
+        Под блокировкой — только словари; чтение и запись файлов кэша идут
+        вне её (файл ключа читает только владелец запроса).
+        """
+        if not self.enabled:
+            return compute()
+
+        while True:
+            with self._lock:
+                cached = self._get_locked(key)
+                if cached is not None:
+                    self.hits += 1
+                    return copy.deepcopy(cached)
+
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+
+            if owner:
+                break
+            logger.debug(f"LLM cache: waiting for in-flight request {key[:12]}")
+            try:
+                return copy.deepcopy(future.result())
+            except RequestCancelledError:
+                # Отменён запрос владельца, а не этого вызова: выполнить заново
+                logger.debug(f"LLM cache: in-flight request {key[:12]} cancelled, retrying")
+
+        entry = self._load_from_disk(key)
+        if entry is not None and self._is_fresh(entry):
+            with self._lock:
+                self.hits += 1
+                self._store_locked(key, entry)
+                self._in_flight.pop(key, None)
+            future.set_result(entry[1])
+            return copy.deepcopy(entry[1])
+
+        with self._lock:
+            self.misses += 1
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        entry = (time.time(), copy.deepcopy(result))
+        with self._lock:
+            if result:
+                self._store_locked(key, entry)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        if result:
+            self._save_to_disk(key, entry)
+        return result
+
+    def clear(self):
+        """Очистить память кэша (файлы на диске не удаляются)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _is_fresh(self, entry: Tuple[float, Dict[str, Any]]) -> bool:
+        return time.time() - entry[0] <= self.ttl_seconds
+
+    def _get_locked(self, key: str) -> Optional[Dict[str, Any]]:
+        """Найти живую запись в памяти."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry):
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store_locked(self, key: str, entry: Tuple[float, Dict[str, Any]]):
+        """Сохранить запись в памяти и вытеснить самые старые."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict_locked()
+
+    def _evict_locked(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if not self.directory:
+            return None
+        path = self.directory / f"{key}.json"
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return data["stored_at"], data["value"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"LLM cache: failed to read {path.name}: {e}")
+            return None
+
+    def _save_to_disk(self, key: str, entry: Tuple[float, Dict[str, Any]]):
+        if not self.directory:
+            return
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(
+                json.dumps({"stored_at": entry[0], "value": entry[1]}, ensure_ascii=False),
+                encoding="utf-8"
+            )
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"LLM cache: failed to write {path.name}: {e}")
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Получить общий для всех LLM-сервисов кэш (создаётся по конфигу)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache_config = get_config().get("llm", {}).get("cache", {})
+            directory = cache_config.get("directory") or None
+            _cache = LLMResponseCache(
+                ttl_seconds=cache_config.get("ttl_seconds", 86400),
+                max_entries=cache_config.get("max_entries", 256),
+                directory=Path(directory) if directory else None,
+                enabled=cache_config.get("enabled", True),
+            )
+        return _cache
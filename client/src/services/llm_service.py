@@ -2,21 +2,31 @@
 import logging
 import base64
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
 import json
 
+import numpy as np
+
 try:
-    from openai import OpenAI  # type: ignore
+    from openai import AsyncOpenAI  # type: ignore
 except Exception:  # OpenAI SDK may be unavailable in test/runtime environments
-    OpenAI = None  # type: ignore
+    AsyncOpenAI = None  # type: ignore
 
 from client.src.config import get_config
+from client.src.services.async_llm_client import (
+    CircuitOpenError, RequestCancelledError, get_async_llm_client
+)
+from client.src.services.llm_cache import LLMResponseCache, get_llm_cache
+from client.src.services.vision_image_service import PreparedImage, VisionImageService
 
 import os
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
+# Версия промптов: увеличивать при любом изменении текста промпта (сбрасывает кэш)
+PROMPT_VERSION = "1"
+
 load_dotenv()  # Load environment variables from .env file
 
 
@@ -37,15 +47,22 @@ class LLMService:
             
         self.base_url = config.get("llm", {}).get("base_url", "https://api.openai.com/v1")
         
-        self.client: Optional[OpenAI] = None
+        self.client: Optional[AsyncOpenAI] = None
+        self.cache = get_llm_cache()
+        self.image_service = VisionImageService()
+        self.http = get_async_llm_client("openai")
         
-        if OpenAI is None:
+        if AsyncOpenAI is None:
             logger.warning("OpenAI SDK is not installed. LLM features will be disabled.")
         elif self.api_key:
             try:
-                self.client = OpenAI(
+                # Ретраи и таймауты выполняет AsyncLLMClient, соединения общие с ним
+                self.client = AsyncOpenAI(
                     api_key=self.api_key,
-                    base_url=self.base_url
+                    base_url=self.base_url,
+                    max_retries=0,
+                    timeout=self.http.attempt_timeout,
+                    http_client=self.http.http
                 )
                 logger.info(f"LLM Service initialized with model {self.model}")
             except Exception as e:
@@ -53,6 +70,19 @@ class LLMService:
         else:
             logger.warning("LLM API key is missing. LLM features will be disabled.")
 
+    @property
+    def circuit_open(self) -> bool:
+        """Провайдер временно отключён после серии ошибок."""
+        return self.http.breaker.is_open
+
+    def _cached(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Ответ из общего кэша; отменённый запрос этого вызова — пустой ответ."""
+        try:
+            return self.cache.get_or_compute(key, compute)
+        except RequestCancelledError as e:
+            logger.warning(f"LLM request skipped: {e}")
+            return {}
+
     def parse_ttn_text(self, text: str) -> Dict[str, Any]:
         """Парсинг текста ТТН с помощью LLM."""
         if not self.client:
@@ -89,8 +119,13 @@ class LLMService:
         Текст документа:
         """
 
+        key = LLMResponseCache.make_key("openai", self.model, f"text-{PROMPT_VERSION}", text.encode("utf-8"))
+        return self._cached(key, lambda: self._request_text(prompt, text))
+
+    def _request_text(self, prompt: str, text: str) -> Dict[str, Any]:
+        """Запрос к LLM для текста ТТН."""
         try:
-            response = self.client.chat.completions.create(
+            response = self.http.run(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts data from documents to JSON."},
@@ -98,13 +133,18 @@ class LLMService:
                 ],
                 response_format={"type": "json_object"},
                 temperature=0.1
-            )
+            ))
             
             content = response.choices[0].message.content
             logger.info("LLM response received")
             logger.debug(f"LLM raw response: {content}")
             
             return json.loads(content)
+        except RequestCancelledError:
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"LLM request skipped: {e}")
+            return {}
         except Exception as e:
             logger.error(f"LLM parsing failed: {e}")
             return {}
@@ -117,7 +157,36 @@ class LLMService:
 
         try:
             with open(image_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+                image_bytes = image_file.read()
+        except Exception as e:
+            logger.error(f"LLM Vision parsing failed: {e}")
+            return {}
+
+        prompt_version = f"vision-{PROMPT_VERSION}-{self.image_service.signature}"
+        key = LLMResponseCache.make_key("openai", self.model, prompt_version, image_bytes)
+        return self._cached(
+            key, lambda: self._request_image(self.image_service.prepare(image_bytes, image_path.suffix))
+        )
+
+    def parse_ttn_image_array(self, image: np.ndarray) -> Dict[str, Any]:
+        """Парсинг уже декодированного изображения (страница PDF, кадр) без временных файлов."""
+        if not self.client:
+            logger.warning("LLM client not initialized")
+            return {}
+
+        try:
+            prepared = self.image_service.prepare_array(image)
+        except Exception as e:
+            logger.error(f"LLM Vision parsing failed: {e}")
+            return {}
+
+        key = LLMResponseCache.make_key("openai", self.model, f"vision-{PROMPT_VERSION}", prepared.data)
+        return self._cached(key, lambda: self._request_image(prepared))
+
+    def _request_image(self, image: PreparedImage) -> Dict[str, Any]:
+        """Запрос к Vision LLM для изображения ТТН."""
+        try:
+            base64_image = base64.b64encode(image.data).decode('ascii')
 
             prompt = """
             Проанализируй изображение ТТН и извлеки данные в JSON.
@@ -125,7 +194,7 @@ class LLMService:
             Игнорируй рукописные пометки, если они не относятся к количеству.
             """
 
-            response = self.client.chat.completions.create(
+            response = self.http.run(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -135,19 +204,25 @@ class LLMService:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:{image.mime_type};base64,{base64_image}"
                                 }
                             }
                         ]
                     }
                 ],
                 response_format={"type": "json_object"},
-                max_tokens=2000
-            )
+                max_tokens=2000,
+                timeout=self.http.vision_attempt_timeout
+            ), attempt_timeout=self.http.vision_attempt_timeout)
             
             content = response.choices[0].message.content
             logger.info("LLM Vision response received")
             return json.loads(content)
+        except RequestCancelledError:
+            raise
+        except CircuitOpenError as e:
+            logger.warning(f"LLM Vision request skipped: {e}")
+            return {}
         except Exception as e:
             logger.error(f"LLM Vision parsing failed: {e}")
             return {}
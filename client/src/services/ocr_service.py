@@ -1,9 +1,12 @@
 """OCR сервис для распознавания документов ТТН."""
 import re
+import time
 import logging
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Iterator, List, Optional, Tuple, Dict, Any, Callable
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import cv2
 import numpy as np
@@ -15,16 +18,20 @@ from client.src.config import get_config
 from common.models import OCRResult, OCRItem, ReceptionItemCreate
 from client.src.services.llm_service import LLMService
 from client.src.services.chatbothub_service import ChatBotHubService
+from client.src.services.pdf_table_service import PDFTableService
+from client.src.services.hedged_ocr import HedgeCandidate, HedgedExecutor
 
 logger = logging.getLogger(__name__)
 
-# Паттерны для извлечения данных (Regex fallback)
+# Паттерны для извлечения данных (Regex fallback).
+# Компилируются один раз при импорте модуля, флаги зашиты в паттерн.
 PATTERNS = {
-    "ttn_number": r"(?:ТТН|накладная|товарн\w*\s*накладн\w*)[^\d]*[№#]?\s*(\d[\d\-/]+)",
-    "date": r"(\d{2})[./](\d{2})[./](\d{2,4})",
-    "supplier": r"(?:поставщик|грузоотправитель|от(?:правитель)?)[:\s]+([А-Яа-яЁё\s\"\-]+(?:ООО|ИП|АО|ЗАО)?[А-Яа-яЁё\s\"\-]*)",
-    "article": r"(?:арт(?:икул)?\.?|art\.?)[:\s]*([A-Za-zА-Яа-я0-9\-]+)",
-    "quantity": r"(\d+(?:[.,]\d+)?)\s*(шт|кг|м|л|уп|ед)?\.?",
+    "ttn_number": re.compile(r"(?:ТТН|накладная|товарн\w*\s*накладн\w*)[^\d]*[№#]?\s*(\d[\d\-/]+)", re.IGNORECASE),
+    "date": re.compile(r"(\d{2})[./](\d{2})[./](\d{2,4})"),
+    "supplier": re.compile(r"(?:поставщик|грузоотправитель|от(?:правитель)?)[:\s]+([А-Яа-яЁё\s\"\-]+(?:ООО|ИП|АО|ЗАО)?[А-Яа-яЁё\s\"\-]*)", re.IGNORECASE),
+    "supplier_fallback": re.compile(r'((?:ООО|ИП|АО|ЗАО)\s+[«"][^»"]+[»"])'),
+    "article": re.compile(r"(?:арт(?:икул)?\.?|art\.?)[:\s]*([A-Za-zА-Яа-я0-9\-]+)", re.IGNORECASE),
+    "quantity": re.compile(r"(\d+(?:[.,]\d+)?)\s*(шт|кг|м|л|уп|ед)?\.?"),
 }
 
 # Паттерны строк-мусора
@@ -45,6 +52,12 @@ SKIP_PATTERNS = [
     r'^\s*«[^»]+»\s*$',
 ]
 
+# Все паттерны мусора одной альтернацией: одна проверка на строку вместо 14.
+# Каждая ветка в своей группе, чтобы якоря ^/$ относились только к ней.
+SKIP_RE = re.compile("|".join(f"(?:{p})" for p in SKIP_PATTERNS), re.IGNORECASE)
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
+
 
 class OCRService:
     """Сервис распознавания документов (Hybrid: PDF Text + LLM + Tesseract)."""
@@ -63,6 +76,34 @@ class OCRService:
         self.llm_service = LLMService()
         self.chatbothub_service = ChatBotHubService()
 
+        # Нативный разбор таблицы позиций в текстовых PDF (без LLM)
+        self.table_extraction = config.get("ocr", {}).get("table_extraction", True)
+        self.pdf_table_service = PDFTableService()
+
+        # Хеджированный режим: Regex и LLM-провайдеры наперегонки
+        hedging = config.get("ocr", {}).get("hedging", {})
+        self.hedging_enabled = hedging.get("enabled", False)
+        self.hedge_secondary = hedging.get("secondary_provider", True)
+        self.hedge_percentile = hedging.get("percentile", 0.9)
+        self.hedge_initial_delay = hedging.get("initial_delay_seconds", 3.0)
+        self.hedge_min_delay = hedging.get("min_delay_seconds", 0.5)
+        self.hedge_max_delay = hedging.get("max_delay_seconds", 10.0)
+        self.hedge_timeout = hedging.get("timeout_seconds", 90.0)
+        self.hedge_min_confidence = hedging.get("min_confidence", 0.75)
+        self.hedged_executor = HedgedExecutor()
+
+        # Разбор длинных многостраничных ТТН частями
+        chunking = config.get("ocr", {}).get("chunking", {})
+        self.chunking_enabled = chunking.get("enabled", False)
+        self.chunk_min_pages = chunking.get("min_pages", 4)
+        self.chunk_pages = chunking.get("pages_per_chunk", 2)
+        self.chunk_overlap_lines = chunking.get("overlap_lines", 3)
+        self._chunk_pool = ThreadPoolExecutor(max_workers=chunking.get("max_workers", 4),
+                                              thread_name_prefix="ocr-chunk")
+
+        # Время этапов последнего process_document (секунды), для пакетной обработки
+        self.last_timings: Dict[str, float] = {}
+
         # Настройка pytesseract
         pytesseract.pytesseract.tesseract_cmd = self.tesseract_path
         
@@ -71,49 +112,81 @@ class OCRService:
     def process_document(self, file_path: Path) -> OCRResult:
         """Обработать документ."""
         logger.info(f"Processing document: {file_path}")
+        self.last_timings = {}
         
         if not file_path.exists():
             logger.error(f"File not found: {file_path}")
             return OCRResult()
 
         # Check supported extensions
-        supported_exts = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
-        if file_path.suffix.lower() not in supported_exts:
+        if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
             logger.warning(f"Unsupported file format: {file_path.suffix}")
             return OCRResult()
 
         # 1. Попытка извлечь текст из PDF (если это PDF)
         if file_path.suffix.lower() == ".pdf":
-            text_content = self._extract_text_from_pdf(file_path)
+            with self._stage("pdf_extract"):
+                pages, table_items = self._extract_pdf_content(file_path)
+            text_content = "".join(page + "\n" for page in pages) if pages is not None else None
             if text_content and len(text_content.strip()) > 50:
+                if table_items:
+                    logger.info(f"PDF item table parsed natively ({len(table_items)} items). Skipping LLM.")
+                    with self._stage("regex"):
+                        result = self._parse_ttn_header_regex(text_content)
+                    result.items = table_items
+                    return result
                 logger.info("PDF text extracted successfully. Using LLM/Regex parsing.")
-                return self._process_text_content(text_content)
+                with self._stage("text_parse"):
+                    return self._process_text_content(text_content, pages)
             else:
                 logger.info("PDF text extraction failed or empty. Falling back to Vision/OCR.")
 
         # 2. Если текст не извлечен или это картинка -> Vision / OCR
         return self._process_image_content(file_path)
 
-    def _extract_text_from_pdf(self, pdf_path: Path) -> Optional[str]:
-        """Извлечь текст из PDF с помощью pdfplumber."""
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """Добавить время выполнения блока к этапу name в last_timings."""
+        started_at = time.perf_counter()
         try:
-            text = ""
+            yield
+        finally:
+            self.last_timings[name] = self.last_timings.get(name, 0.0) + time.perf_counter() - started_at
+
+    def _extract_pdf_content(self, pdf_path: Path) -> Tuple[Optional[List[str]], List[OCRItem]]:
+        """Извлечь текст страниц и табличные позиции из PDF за одно открытие файла."""
+        try:
+            pages: List[str] = []
+            table_items: List[OCRItem] = []
             with pdfplumber.open(pdf_path) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n"
-            return text
+                        pages.append(page_text)
+                if self.table_extraction:
+                    table_items = self.pdf_table_service.extract_items(pdf)
+            return pages, table_items
         except Exception as e:
             logger.error(f"pdfplumber extraction failed: {e}")
-            return None
+            return None, []
 
-    def _process_text_content(self, text: str) -> OCRResult:
+    def _process_text_content(self, text: str, pages: Optional[List[str]] = None) -> OCRResult:
         """Обработка текстового контента (LLM или Regex)."""
+        if pages and self.chunking_enabled and len(pages) >= self.chunk_min_pages:
+            result = self._process_text_chunked(pages)
+            if result:
+                return result
+            logger.warning("Chunked LLM parsing failed. Falling back to single-shot parsing.")
+
+        if self.hedging_enabled:
+            return self._process_text_hedged(text)
+
         llm_result = None
         
         # Выбор провайдера LLM
-        if self.llm_provider == "chatbothub":
+        if self._llm_circuit_open():
+            logger.warning("LLM provider circuit is open. Skipping LLM.")
+        elif self.llm_provider == "chatbothub":
             logger.info("Using ChatBotHub for text parsing")
             llm_result = self.chatbothub_service.parse_ttn_text(text)
         elif self.llm_service.client:
@@ -130,57 +203,209 @@ class OCRService:
         logger.info("Using Regex for text parsing")
         return self._parse_ttn_regex(text)
 
+    def _process_text_hedged(self, text: str) -> OCRResult:
+        """
+        Хеджированный разбор: основной LLM-провайдер сразу, второй — если
+        основной не ответил за перцентиль своей обычной задержки. Побеждает
+        первый результат, прошедший проверку; остальные запросы отменяются.
+        Regex в гонке не участвует (его позиции — сырые строки, проверку
+        уверенности он не проходит) и остаётся запасным вариантом.
+        """
+        providers = self._text_providers()
+        if not self.hedge_secondary:
+            providers = providers[:1]
+        candidates = [
+            HedgeCandidate(name, lambda parse=parse: self._llm_to_result(parse(text)),
+                           self._hedge_delay(providers[0][0]) if index else 0.0)
+            for index, (name, parse) in enumerate(providers)
+        ]
+
+        if candidates:
+            winner, completed = self.hedged_executor.race(candidates, self._is_acceptable_result, self.hedge_timeout)
+            if winner:
+                return winner[1]
+            # Никто не прошёл проверку: непустой ответ LLM лучше Regex
+            if completed:
+                name, result = completed[0]
+                logger.warning(f"No result passed validation. Using '{name}' result.")
+                return result
+
+        logger.info("Using Regex for text parsing")
+        return self._parse_ttn_regex(text)
+
+    def _process_text_chunked(self, pages: List[str]) -> Optional[OCRResult]:
+        """
+        Разбор длинной ТТН по частям: первая страница (реквизиты и первые позиции)
+        и группы следующих страниц отправляются основному провайдеру параллельно,
+        позиции склеиваются с удалением дублей на стыках.
+        """
+        providers = self._text_providers()
+        if not providers:
+            return None
+
+        name, parse = providers[0]
+        chunks = self._split_pages(pages)
+        logger.info(f"Chunked LLM parsing via {name}: {len(pages)} pages, {len(chunks)} chunks")
+
+        responses = list(self._chunk_pool.map(parse, chunks))
+        if not all(responses):
+            failed = sum(1 for response in responses if not response)
+            logger.warning(f"Chunked LLM parsing: {failed}/{len(chunks)} chunks returned empty result")
+            return None
+
+        # Реквизиты берутся только из первой страницы
+        result = self._convert_llm_result(responses[0])
+        overlaps = [self._page_tail(pages[start - 1]) for start in range(1, len(pages), self.chunk_pages)]
+        result.items = self._merge_chunk_items([self._convert_llm_result(r).items for r in responses], overlaps)
+        return result
+
+    def _split_pages(self, pages: List[str]) -> List[str]:
+        """Первая страница отдельно, остальные группами по pages_per_chunk."""
+        chunks = [pages[0]]
+        for start in range(1, len(pages), self.chunk_pages):
+            # Хвост предыдущей страницы: строка таблицы может быть разорвана переносом страницы
+            chunks.append("\n".join(self._page_tail(pages[start - 1]) + pages[start:start + self.chunk_pages]))
+        return chunks
+
+    def _page_tail(self, page: str) -> List[str]:
+        """Строки перекрытия: последние overlap_lines строк страницы."""
+        return page.split("\n")[-self.chunk_overlap_lines:] if self.chunk_overlap_lines else []
+
+    def _merge_chunk_items(self, chunk_items: List[List[OCRItem]], overlaps: List[List[str]]) -> List[OCRItem]:
+        """
+        Склеить позиции частей, убрав повторы строк перекрытия в начале части.
+
+        Позиция в начале части считается повтором, только если такая же
+        завершает уже склеенный список и встречается в строках перекрытия
+        (не больше раз, чем там встречается): настоящие одинаковые строки
+        ТТН по разные стороны переноса страницы сохраняются.
+        """
+        def key(item: OCRItem) -> Tuple:
+            return (item.article or "", (item.name or "").strip().lower(), item.quantity, item.unit or "")
+
+        def occurrences(item: OCRItem, lines: List[str]) -> int:
+            needle = (item.article or item.name or "").strip().lower()
+            return sum(1 for line in lines if needle in line.lower()) if needle else 0
+
+        merged: List[OCRItem] = list(chunk_items[0]) if chunk_items else []
+        window = max(1, self.chunk_overlap_lines)
+        for items, overlap in zip(chunk_items[1:], overlaps):
+            tail = {key(item) for item in merged[-window:]}
+            budget: Dict[Tuple, int] = {}
+            skip = 0
+            while skip < len(items) and key(items[skip]) in tail:
+                item_key = key(items[skip])
+                if item_key not in budget:
+                    budget[item_key] = occurrences(items[skip], overlap)
+                if budget[item_key] == 0:
+                    break
+                budget[item_key] -= 1
+                skip += 1
+            merged.extend(items[skip:])
+        return merged
+
+    def _text_providers(self) -> List[Tuple[str, Callable[[str], Dict[str, Any]]]]:
+        """Доступные LLM-провайдеры текста, основной (по конфигу) первым."""
+        providers = []
+        if not self.chatbothub_service.circuit_open:
+            providers.append(("chatbothub", self.chatbothub_service.parse_ttn_text))
+        if self.llm_service.client and not self.llm_service.circuit_open:
+            providers.append(("openai", self.llm_service.parse_ttn_text))
+        providers.sort(key=lambda provider: provider[0] != self.llm_provider)
+        return providers
+
+    def _hedge_delay(self, primary: str) -> float:
+        """Через сколько секунд отправлять запрос второму провайдеру."""
+        delay = self.hedged_executor.latency.percentile(primary, self.hedge_percentile)
+        if delay is None:
+            delay = self.hedge_initial_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, delay))
+
+    def _llm_to_result(self, data: Dict[str, Any]) -> Optional[OCRResult]:
+        return self._convert_llm_result(data) if data else None
+
+    def _is_acceptable_result(self, result: OCRResult) -> bool:
+        """Результат достаточно полный и уверенный, чтобы не ждать остальных."""
+        if not result.ttn_number or not result.items:
+            return False
+        if any(not item.name or not item.quantity or item.quantity <= 0 for item in result.items):
+            return False
+        confidences = [value for item in result.items for value in item.field_confidence.values()]
+        return bool(confidences) and sum(confidences) / len(confidences) >= self.hedge_min_confidence
+
     def _process_image_content(self, file_path: Path) -> OCRResult:
-        """Обработка изображения (LLM Vision или Tesseract)."""
+        """
+        Обработка изображения (LLM Vision или Tesseract).
+
+        Страница растеризуется/декодируется один раз, и тот же буфер
+        используется для Vision и для Tesseract; временные файлы не пишутся.
+        """
         llm_result = None
-        
-        # Подготовка изображения (конвертация PDF в JPG если нужно)
-        image_path = file_path
-        temp_image = None
-        
-        if file_path.suffix.lower() == ".pdf":
-            try:
-                images = convert_from_path(str(file_path), poppler_path=self.poppler_path, first_page=1, last_page=1)
-                if images:
-                    temp_image = file_path.parent / f"temp_vision_{file_path.stem}.jpg"
-                    images[0].save(temp_image, "JPEG")
-                    image_path = temp_image
-            except Exception as e:
-                logger.error(f"Failed to convert PDF for Vision: {e}")
-        
+        is_pdf = file_path.suffix.lower() == ".pdf"
+
+        with self._stage("rasterize"):
+            if is_pdf:
+                first_page = self._pdf_to_images(file_path, first_page=1, last_page=1)
+            else:
+                first_page = [image for image in [self._read_image(file_path)] if image is not None]
+
         # Выбор провайдера Vision
-        if image_path.exists():
-            if self.llm_provider == "chatbothub":
+        if first_page:
+            if self._llm_circuit_open():
+                logger.warning("LLM provider circuit is open. Skipping Vision.")
+            elif self.llm_provider == "chatbothub":
                 logger.info("Using ChatBotHub Vision for image parsing")
-                llm_result = self.chatbothub_service.parse_ttn_image(image_path)
+                with self._stage("vision"):
+                    llm_result = self.chatbothub_service.parse_ttn_image_array(first_page[0])
             elif self.llm_service.client:
                 logger.info("Using OpenAI Vision for image parsing")
-                llm_result = self.llm_service.parse_ttn_image(image_path)
-            
-            # Cleanup temp image
-            if temp_image and temp_image.exists():
-                temp_image.unlink()
-                
+                with self._stage("vision"):
+                    llm_result = self.llm_service.parse_ttn_image_array(first_page[0])
+
             if llm_result:
                 return self._convert_llm_result(llm_result)
-            
+
             logger.warning("LLM Vision failed. Falling back to Tesseract.")
 
-        # Fallback to Tesseract
+        # Fallback to Tesseract: первая страница уже в памяти, растеризуем только остальные
         logger.info("Using Tesseract OCR")
-        # Конвертация в изображения для Tesseract
-        if file_path.suffix.lower() == ".pdf":
-            images = self._pdf_to_images(file_path)
-        else:
-            images = [cv2.imread(str(file_path))]
+        images = list(first_page)
+        if is_pdf and first_page:
+            with self._stage("rasterize"):
+                images += self._pdf_to_images(file_path, first_page=2)
 
         full_text = ""
-        for img in images:
-            processed = self._preprocess_image(img)
-            text = self._extract_text_tesseract(processed)
-            full_text += text + "\n"
+        with self._stage("tesseract"):
+            for img in images:
+                processed = self._preprocess_image(img)
+                text = self._extract_text_tesseract(processed)
+                full_text += text + "\n"
+
+        with self._stage("regex"):
+            return self._parse_ttn_regex(full_text)
+
+    def _read_image(self, file_path: Path) -> Optional[np.ndarray]:
+        """
+        Декодировать изображение из файла (BGR) или None.
+
+        Байты читаются средствами Python: cv2.imread на Windows не открывает
+        пути с не-ASCII символами (кириллические имена файлов ТТН).
+        """
+        try:
+            data = np.fromfile(file_path, np.uint8)
+        except OSError as e:
+            logger.error(f"Failed to read image {file_path}: {e}")
+            return None
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            logger.error(f"Failed to decode image {file_path}")
+        return image
 
-        return self._parse_ttn_regex(full_text)
+    def _llm_circuit_open(self) -> bool:
+        """Активный LLM-провайдер отключён circuit breaker'ом."""
+        if self.llm_provider == "chatbothub":
+            return self.chatbothub_service.circuit_open
+        return self.llm_service.circuit_open
 
     def _convert_llm_result(self, data: Dict[str, Any]) -> OCRResult:
         """Конвертация ответа LLM в OCRResult."""
@@ -220,9 +445,11 @@ class OCRService:
 
     # --- Tesseract & Regex Methods (Legacy/Fallback) ---
 
-    def _pdf_to_images(self, pdf_path: Path) -> List[np.ndarray]:
+    def _pdf_to_images(self, pdf_path: Path, first_page: Optional[int] = None,
+                       last_page: Optional[int] = None) -> List[np.ndarray]:
         try:
-            pil_images = convert_from_path(str(pdf_path), poppler_path=self.poppler_path, dpi=300)
+            pil_images = convert_from_path(str(pdf_path), poppler_path=self.poppler_path, dpi=300,
+                                           first_page=first_page, last_page=last_page)
             return [cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR) for img in pil_images]
         except Exception as e:
             logger.error(f"Failed to convert PDF: {e}")
@@ -246,15 +473,21 @@ class OCRService:
 
     def _parse_ttn_regex(self, text: str) -> OCRResult:
         """Парсинг текста с помощью Regex (старая логика)."""
+        result = self._parse_ttn_header_regex(text)
+        result.items = self._extract_items_regex(text)
+        return result
+
+    def _parse_ttn_header_regex(self, text: str) -> OCRResult:
+        """Извлечь реквизиты ТТН (номер, дата, поставщик) без позиций."""
         result = OCRResult()
         
         # TTN
-        match = re.search(PATTERNS["ttn_number"], text, re.IGNORECASE)
+        match = PATTERNS["ttn_number"].search(text)
         if match:
             result.ttn_number = match.group(1).strip()
 
         # Date
-        match = re.search(PATTERNS["date"], text)
+        match = PATTERNS["date"].search(text)
         if match:
             day, month, year = match.groups()
             if len(year) == 2: year = "20" + year
@@ -263,43 +496,48 @@ class OCRService:
             except ValueError: pass
 
         # Supplier
-        match = re.search(PATTERNS["supplier"], text, re.IGNORECASE)
+        match = PATTERNS["supplier"].search(text)
         if match:
             result.supplier = match.group(1).strip()
         else:
             # Fallback supplier
-            alt_match = re.search(r'((?:ООО|ИП|АО|ЗАО)\s+[«"][^»"]+[»"])', text)
+            alt_match = PATTERNS["supplier_fallback"].search(text)
             if alt_match:
                 result.supplier = alt_match.group(1).strip()
 
-        # Items
-        result.items = self._extract_items_regex(text)
         return result
 
     def _extract_items_regex(self, text: str) -> List[OCRItem]:
+        """Однопроходный разбор строк ТТН в позиции."""
+        article_re = PATTERNS["article"]
+        quantity_re = PATTERNS["quantity"]
+        skip_search = SKIP_RE.search
+
         items = []
-        lines = text.split("\n")
-        for line in lines:
+        for line in text.split("\n"):
             line = line.strip()
-            if not line or len(line) < 5: continue
-            if self._is_metadata_line(line): continue
+            if len(line) < 5: continue
+            if skip_search(line): continue
+
+            article_match = article_re.search(line)
+            quantity_match = quantity_re.search(line)
+            # Без артикула и без числа позицию не собрать - не создаём OCRItem
+            if not article_match and not quantity_match: continue
 
             item = OCRItem(raw_text=line)
             confidence = {}
 
-            match = re.search(PATTERNS["article"], line, re.IGNORECASE)
-            if match:
-                item.article = match.group(1).strip()
+            if article_match:
+                item.article = article_match.group(1).strip()
                 confidence["article"] = 0.7
 
-            match = re.search(PATTERNS["quantity"], line)
-            if match:
+            if quantity_match:
                 try:
-                    item.quantity = float(match.group(1).replace(",", "."))
+                    item.quantity = float(quantity_match.group(1).replace(",", "."))
                     confidence["quantity"] = 0.8
                 except ValueError: pass
-                if match.group(2):
-                    item.unit = match.group(2)
+                if quantity_match.group(2):
+                    item.unit = quantity_match.group(2)
                     confidence["unit"] = 0.9
 
             if item.article or item.quantity:
@@ -311,7 +549,7 @@ class OCRService:
         return items
 
     def _is_metadata_line(self, line: str) -> bool:
-        return any(re.search(pattern, line, re.IGNORECASE) for pattern in SKIP_PATTERNS)
+        return SKIP_RE.search(line) is not None
 
     def _is_valid_item(self, item: OCRItem) -> bool:
         fields_present = sum([
@@ -0,0 +1,169 @@
+"""Извлечение табличной части ТТН из текстовых PDF (pdfplumber)."""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from common.models import OCRItem
+
+logger = logging.getLogger(__name__)
+
+# Ключевые слова заголовков колонок (после нормализации: нижний регистр, без пробелов).
+# Порядок важен: колонка достаётся первому полю, чьё ключевое слово в ней нашлось.
+HEADER_KEYWORDS = {
+    "article": ("артикул", "арт.", "кодтовара"),
+    "quantity": ("количеств", "кол-во", "ол-во"),
+    "unit": ("ед.изм", "едизм", "единиц"),
+    "package": ("упаковк",),
+    "document": ("документ",),
+    "name": ("наименован", "товар"),
+}
+
+# Строки итогов / подвала таблицы
+TOTAL_ROW_RE = re.compile(r"^\s*(?:итого|всего)", re.IGNORECASE)
+# Артикул «чистой» ячейки: одно слово из букв, цифр и разделителей
+ARTICLE_CELL_RE = re.compile(r"^[\w\-./]+$")
+# Номер в колонке сопроводительных документов: «Тов. накл. от 15.06.2022 № 512»
+DOCUMENT_NUMBER_RE = re.compile(r"№\s*([\w\-/]+)\s*$")
+NUMBER_CELL_RE = re.compile(r"^\d+(?:\.\d+)?$")
+NUMBER_IN_TEXT_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(шт|кг|м|л|уп|ед)?\.?")
+KNOWN_UNITS = {"шт", "шт.", "кг", "г", "т", "м", "м2", "м3", "л", "уп", "уп.", "ед", "ед.",
+               "мешок", "паллета", "тонна", "компл", "компл."}
+
+# Уверенность по полям в зависимости от того, насколько «чисто» ячейка разобрана
+CONFIDENCE_CLEAN = 0.95
+CONFIDENCE_DERIVED = 0.8
+CONFIDENCE_PARTIAL = 0.6
+CONFIDENCE_WEAK = 0.4
+
+
+class PDFTableService:
+    """Разбор таблицы позиций ТТН по геометрии pdfplumber без LLM."""
+
+    def extract_items(self, pdf) -> List[OCRItem]:
+        """
+        Извлечь позиции из таблиц открытого pdfplumber-документа.
+
+        Args:
+            pdf: Открытый pdfplumber.PDF
+
+        Returns:
+            Список позиций (пустой, если таблица позиций не найдена)
+        """
+        items: List[OCRItem] = []
+        column_map: Optional[Dict[str, int]] = None
+        column_count = 0
+
+        for page_number, page in enumerate(pdf.pages, 1):
+            try:
+                tables = page.extract_tables()
+            except Exception as e:
+                logger.warning(f"Table extraction failed on page {page_number}: {e}")
+                continue
+
+            for table in tables:
+                rows = [[self._clean_cell(cell) for cell in row] for row in table if row]
+                if not rows:
+                    continue
+
+                header_index, header_map = self._find_header(rows)
+                if header_map:
+                    column_map, column_count = header_map, len(rows[header_index])
+                    data_rows = rows[header_index + 1:]
+                elif column_map and len(rows[0]) == column_count:
+                    # Продолжение таблицы с предыдущей страницы без повтора шапки
+                    data_rows = rows
+                else:
+                    continue
+
+                for row in data_rows:
+                    item = self._row_to_item(row, column_map)
+                    if item:
+                        items.append(item)
+
+        logger.info(f"PDF table extraction: {len(items)} items")
+        return items
+
+    @staticmethod
+    def _clean_cell(cell: Optional[str]) -> str:
+        """Склеить перенос строк внутри ячейки и убрать лишние пробелы."""
+        if not cell:
+            return ""
+        return " ".join(cell.split())
+
+    def _find_header(self, rows: List[List[str]]) -> Tuple[int, Optional[Dict[str, int]]]:
+        """Найти строку-шапку в первых строках таблицы."""
+        for index, row in enumerate(rows[:3]):
+            mapping = self._map_columns(row)
+            if "name" in mapping and "quantity" in mapping:
+                return index, mapping
+        return -1, None
+
+    @staticmethod
+    def _map_columns(header: List[str]) -> Dict[str, int]:
+        """Сопоставить колонки шапки полям позиции."""
+        mapping: Dict[str, int] = {}
+        for col, title in enumerate(header):
+            normalized = "".join(title.lower().split())
+            if not normalized:
+                continue
+            for field, keywords in HEADER_KEYWORDS.items():
+                if field not in mapping and any(k in normalized for k in keywords):
+                    mapping[field] = col
+                    break
+        return mapping
+
+    def _row_to_item(self, row: List[str], column_map: Dict[str, int]) -> Optional[OCRItem]:
+        """Преобразовать строку таблицы в OCRItem с уверенностью по полям."""
+        def cell(field: str) -> str:
+            col = column_map.get(field)
+            return row[col] if col is not None and col < len(row) else ""
+
+        if any(TOTAL_ROW_RE.match(c) for c in row if c):
+            return None
+
+        name = cell("name")
+        if not name:
+            return None
+
+        item = OCRItem(raw_text=" | ".join(c for c in row if c))
+        confidence = {}
+
+        item.name = name[:255]
+        confidence["name"] = CONFIDENCE_CLEAN if len(name) > 2 else CONFIDENCE_WEAK
+
+        quantity_text = cell("quantity").replace(" ", "").replace(",", ".")
+        inline_unit = None
+        if NUMBER_CELL_RE.match(quantity_text):
+            item.quantity = float(quantity_text)
+            confidence["quantity"] = CONFIDENCE_CLEAN
+        else:
+            match = NUMBER_IN_TEXT_RE.search(cell("quantity"))
+            if not match:
+                return None
+            item.quantity = float(match.group(1).replace(",", "."))
+            confidence["quantity"] = CONFIDENCE_PARTIAL
+            inline_unit = match.group(2)
+
+        article = cell("article")
+        if article:
+            item.article = article
+            confidence["article"] = CONFIDENCE_CLEAN if ARTICLE_CELL_RE.match(article) else CONFIDENCE_PARTIAL
+        else:
+            match = DOCUMENT_NUMBER_RE.search(cell("document"))
+            if match:
+                item.article = match.group(1)
+                confidence["article"] = CONFIDENCE_PARTIAL
+
+        unit = cell("unit")
+        if unit:
+            item.unit = unit
+            confidence["unit"] = CONFIDENCE_CLEAN if unit.lower() in KNOWN_UNITS else CONFIDENCE_DERIVED
+        elif inline_unit:
+            item.unit = inline_unit
+            confidence["unit"] = CONFIDENCE_DERIVED
+        elif cell("package"):
+            item.unit = cell("package")
+            confidence["unit"] = CONFIDENCE_PARTIAL
+
+        item.field_confidence = confidence
+        return item
@@ -0,0 +1,347 @@
+"""Локальная копия справочника товаров с индексами по артикулу и наименованию."""
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from client.src.config import get_config
+from common.models import ProductRead, ProductTombstoneRead
+from common.product_matcher import ProductMatch, ProductMatcher, match_status
+
+logger = logging.getLogger(__name__)
+
+# Сервер отдаёт не больше 1000 товаров за запрос
+MAX_PAGE_SIZE = 1000
+
+# Начальный курсор полной синхронизации
+_EPOCH = datetime(2000, 1, 1)
+
+
+class CatalogReplica:
+    """Копия справочника на диске (SQLite): товары и курсоры синхронизации."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS products (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path))
+
+    def load(self) -> Tuple[Dict[int, ProductRead], Dict[str, str]]:
+        """Прочитать товары и метаданные."""
+        with closing(self._connect()) as connection:
+            products = {
+                product_id: ProductRead.model_validate_json(data)
+                for product_id, data in connection.execute("SELECT id, data FROM products")
+            }
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+        return products, meta
+
+    def save(self, upserted: List[ProductRead], deleted_ids: List[int], meta: Dict[str, Optional[str]],
+             replace: bool = False):
+        """Записать изменения одной транзакцией (replace — заменить копию целиком)."""
+        with closing(self._connect()) as connection, connection:
+            if replace:
+                connection.execute("DELETE FROM products")
+            connection.executemany(
+                "INSERT OR REPLACE INTO products (id, data) VALUES (?, ?)",
+                [(product.id, product.model_dump_json()) for product in upserted]
+            )
+            connection.executemany("DELETE FROM products WHERE id = ?", [(product_id,) for product_id in deleted_ids])
+            connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
+
+
+class ProductCatalog:
+    """
+    Справочник товаров в памяти клиента.
+
+    Полностью скачивается один раз, дальше запрашиваются только изменения:
+    товары с updated_at позже курсора и отметки об удалении. Неизменный
+    справочник стоит одного ответа 304 (If-None-Match). Копия хранится на
+    диске (replica_path), поэтому после перезапуска догружается только дельта.
+    Поиск — ProductMatcher: артикулы в словаре, наименования в триграммном индексе.
+    При недоступности сервера остаётся последняя загруженная копия. Поиск
+    не ждёт идущую синхронизацию: отвечает копия, а пока справочник пуст — сервер.
+    """
+
+    def __init__(self, sync_service=None, refresh_seconds: float = 300,
+                 retry_seconds: float = 30, page_size: int = MAX_PAGE_SIZE,
+                 replica_path: Optional[Path] = None, overlap_seconds: float = 5):
+        if sync_service is None:
+            from client.src.services.sync_service import SyncService
+            sync_service = SyncService()
+        self.sync_service = sync_service
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        # Повторно запрашиваем изменения за последние секунды: запись с более
+        # ранним updated_at могла быть зафиксирована на сервере позже
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.replica = CatalogReplica(replica_path) if replica_path else None
+
+        self._products: Dict[int, ProductRead] = {}
+        self._index = ProductMatcher([])
+        self._etag: Optional[str] = None
+        self._updated_cursor: Optional[datetime] = None
+        self._deleted_cursor: Optional[datetime] = None
+        self._replica_loaded = self.replica is None
+        self._next_check = 0.0
+        self._lock = threading.Lock()  # синхронизация с сервером
+        self._replica_lock = threading.Lock()  # чтение копии с диска
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def products(self) -> List[ProductRead]:
+        """Все товары справочника (в порядке ID)."""
+        self._ensure_fresh()
+        return list(self._index.products)
+
+    def get_by_article(self, article: Optional[str]) -> Optional[ProductRead]:
+        """Найти товар по артикулу."""
+        if not article or not article.strip():
+            return None
+        self._ensure_fresh()
+        return self._index.get_by_article(article)
+
+    def find_by_name(self, name: Optional[str]) -> Optional[ProductRead]:
+        """Найти самый похожий по наименованию товар (None, если похожих нет)."""
+        matches = self.match(None, name, k=2)
+        return matches[0].product if match_status(matches) != "none" else None
+
+    def match(self, article: Optional[str], name: Optional[str], k: int = 5) -> List[ProductMatch]:
+        """Топ-k кандидатов для позиции ТТН с оценками (товар по артикулу — первым)."""
+        if not (article and article.strip()) and not (name and name.strip()):
+            return []
+        self._ensure_fresh()
+        if not self._index.products:
+            found = self._lookup_on_server([(article, name)], k)
+            if found is not None:
+                return found[0]
+        return self._index.match(article, name, k=k)
+
+    def match_many(self, queries: List[Tuple[Optional[str], Optional[str]]], k: int = 5) -> List[List[ProductMatch]]:
+        """
+        Кандидаты для всех позиций ТТН (пары артикул, наименование).
+
+        Пока справочник не загружен (первая синхронизация ещё идёт), позиции
+        ищутся на сервере одним запросом, а не по одной.
+        """
+        if not queries:
+            return []
+        self._load_replica()
+        if not self._index.products:
+            found = self._lookup_on_server(queries, k)
+            if found is not None:
+                return found
+        self._ensure_fresh()
+        return [self._index.match(article, name, k=k) for article, name in queries]
+
+    def lookup(self, article: Optional[str], name: Optional[str]) -> Optional[ProductRead]:
+        """Найти товар позиции ТТН: по артикулу, затем по наименованию."""
+        matches = self.match(article, name, k=2)
+        return matches[0].product if match_status(matches) != "none" else None
+
+    def start(self):
+        """Синхронизировать сейчас и затем раз в refresh_seconds в фоновом потоке."""
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="product-catalog-sync", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Остановить фоновую синхронизацию."""
+        self._stop.set()
+        self._worker = None
+
+    def refresh(self, force: bool = False, wait: bool = False) -> bool:
+        """
+        Догрузить изменения справочника с сервера.
+
+        Если синхронизация уже идёт в другом потоке, сразу возвращает False.
+
+        Args:
+            force: скачать справочник целиком, не используя курсоры и ETag
+            wait: дождаться идущей синхронизации (только не в GUI-потоке)
+
+        Returns:
+            True, если копия справочника изменилась
+        """
+        if not self._lock.acquire(blocking=wait):
+            logger.debug("Product catalog sync already in progress")
+            return False
+        try:
+            self._load_replica()
+            changed = self._sync(force)
+            self._next_check = time.monotonic() + self.refresh_seconds
+            return changed
+        except requests.RequestException as e:
+            logger.error(f"Failed to refresh product catalog: {e}")
+            self._next_check = time.monotonic() + self.retry_seconds
+            return False
+        finally:
+            self._lock.release()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(max(0.0, self._next_check - time.monotonic()))
+
+    def _ensure_fresh(self):
+        self._load_replica()
+        if self._worker is not None and self._index.products:
+            # Обновляет фоновый поток, поиск не ждёт сеть
+            return
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+
+    def _load_replica(self):
+        if self._replica_loaded:
+            return
+        with self._replica_lock:
+            if self._replica_loaded:
+                return
+            try:
+                products, meta = self.replica.load()
+            except (sqlite3.Error, ValueError) as e:
+                logger.error(f"Failed to load product catalog replica {self.replica.path}: {e}")
+                products, meta = {}, {}
+            if products or meta.get("updated_cursor"):
+                self._products = products
+                self._etag = meta.get("etag")
+                self._updated_cursor = _parse_datetime(meta.get("updated_cursor"))
+                self._deleted_cursor = _parse_datetime(meta.get("deleted_cursor"))
+                self._index = ProductMatcher(sorted(products.values(), key=lambda p: p.id))
+                logger.info(f"Product catalog replica loaded: {len(products)} products")
+            self._replica_loaded = True
+
+    def _lookup_on_server(self, queries: List[Tuple[Optional[str], Optional[str]]],
+                          k: int) -> Optional[List[List[ProductMatch]]]:
+        try:
+            return self.sync_service.lookup_products(list(queries), limit=k)
+        except requests.RequestException as e:
+            logger.error(f"Failed to look up products on server: {e}")
+            return None
+
+    def _sync(self, force: bool) -> bool:
+        full = force or self._updated_cursor is None
+        if full:
+            products: Dict[int, ProductRead] = {}
+            etag, updated_since, deleted_since = None, _EPOCH, _EPOCH
+        else:
+            products = dict(self._products)
+            etag = self._etag
+            updated_since = self._updated_cursor - self.overlap
+            deleted_since = (self._deleted_cursor or _EPOCH) - self.overlap
+
+        changed, etag, total = self._download_products(updated_since, etag)
+        if changed is None:
+            logger.debug("Product catalog not modified")
+            return False
+        tombstones = self._download_tombstones(deleted_since)
+
+        for product in changed:
+            products[product.id] = product
+        deleted_ids = []
+        for tombstone in tombstones:
+            current = products.get(tombstone.product_id)
+            # ID мог быть выдан заново после удаления — удаляем только более старую запись
+            if current is not None and (current.updated_at or _EPOCH) <= tombstone.deleted_at:
+                del products[tombstone.product_id]
+                deleted_ids.append(tombstone.product_id)
+
+        if not full and total is not None and len(products) != total:
+            logger.warning(f"Product catalog replica has {len(products)} products, server {total}: full resync")
+            return self._sync(force=True)
+
+        updated_cursor = max([updated_since if full else self._updated_cursor]
+                             + [p.updated_at or _EPOCH for p in changed])
+        # Удаления раньше последнего изменения уже получены (отметки запрашиваются после товаров)
+        deleted_cursor = max([deleted_since if full else self._deleted_cursor or _EPOCH, updated_cursor]
+                             + [t.deleted_at for t in tombstones])
+
+        self._products = products
+        self._etag = etag
+        self._updated_cursor = updated_cursor
+        self._deleted_cursor = deleted_cursor
+        self._index = ProductMatcher(sorted(products.values(), key=lambda p: p.id))
+        self._save_replica(changed, deleted_ids, replace=full)
+        logger.info(
+            f"Product catalog {'loaded' if full else 'updated'}: {len(changed)} changed, "
+            f"{len(deleted_ids)} deleted, {len(products)} total"
+        )
+        return True
+
+    def _download_products(self, updated_since: datetime, etag: Optional[str]):
+        page, etag, total = self.sync_service.get_products_page(
+            self.page_size, etag=etag, updated_since=updated_since
+        )
+        if page is None:
+            return None, etag, None
+        changed = list(page)
+        while len(page) == self.page_size:
+            last = page[-1]
+            page, _, total = self.sync_service.get_products_page(
+                self.page_size, updated_since=last.updated_at, after_id=last.id
+            )
+            changed.extend(page)
+        return changed, etag, total
+
+    def _download_tombstones(self, deleted_since: datetime) -> List[ProductTombstoneRead]:
+        page = self.sync_service.get_product_tombstones(deleted_since, limit=self.page_size)
+        tombstones = list(page)
+        while len(page) == self.page_size:
+            last = page[-1]
+            page = self.sync_service.get_product_tombstones(last.deleted_at, after_id=last.id, limit=self.page_size)
+            tombstones.extend(page)
+        return tombstones
+
+    def _save_replica(self, upserted: List[ProductRead], deleted_ids: List[int], replace: bool):
+        if self.replica is None:
+            return
+        meta = {
+            "etag": self._etag,
+            "updated_cursor": self._updated_cursor.isoformat(),
+            "deleted_cursor": self._deleted_cursor.isoformat(),
+        }
+        try:
+            self.replica.save(upserted, deleted_ids, meta, replace=replace)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save product catalog replica {self.replica.path}: {e}")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+_catalog: Optional[ProductCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog() -> ProductCatalog:
+    """Получить общий для всех окон справочник товаров (создаётся по конфигу)."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            catalog_config = get_config().get("catalog", {})
+            replica_path = catalog_config.get("replica_path")
+            if replica_path and not Path(replica_path).is_absolute():
+                replica_path = Path.cwd() / replica_path
+            _catalog = ProductCatalog(
+                refresh_seconds=catalog_config.get("refresh_seconds", 300),
+                retry_seconds=catalog_config.get("retry_seconds", 30),
+                page_size=catalog_config.get("page_size", MAX_PAGE_SIZE),
+                replica_path=Path(replica_path) if replica_path else None,
+                overlap_seconds=catalog_config.get("overlap_seconds", 5),
+            )
+        return _catalog
@@ -0,0 +1,78 @@
+"""Фоновая загрузка готовых сегментов видеозаписи на сервер."""
+import logging
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from common.models import VideoSegment
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentUploader:
+    """
+    Загрузка сегментов записи, пока запись продолжается.
+
+    Сегменты уходят по одному в фоновом потоке (по порядку готовности) под
+    общим upload_id; приёмки на сервере к этому моменту может ещё не быть.
+    finish() дозагружает оставшееся (обычно только последний сегмент),
+    повторяет неудачные загрузки и прикрепляет сегменты к приёмке.
+    """
+
+    def __init__(self, sync_service, upload_id: Optional[str] = None):
+        self.sync_service = sync_service
+        self.upload_id = upload_id or uuid.uuid4().hex
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-upload")
+        self._lock = threading.Lock()
+        self._segments: Dict[int, Tuple[Path, float]] = {}
+        self._uploads: Dict[int, Future] = {}
+
+    def add(self, path: Path, index: int, duration: float):
+        """Поставить готовый сегмент в очередь загрузки (повторный вызов для того же номера ничего не делает)."""
+        with self._lock:
+            if index in self._uploads:
+                return
+            self._segments[index] = (Path(path), duration)
+            self._uploads[index] = self._executor.submit(self._upload, index)
+
+    def uploaded_count(self) -> int:
+        """Сколько сегментов уже загружено."""
+        with self._lock:
+            futures = list(self._uploads.values())
+        return sum(1 for future in futures if future.done() and future.result())
+
+    def finish(self, reception_id: int, segments: Iterable[Tuple[Path, int, float]] = ()) -> bool:
+        """
+        Дождаться загрузки всех сегментов (segments — полный список записи,
+        ещё не добавленные ставятся в очередь), повторить неудачные
+        и прикрепить видео к приёмке. False — видео на сервер не попало целиком.
+        """
+        for path, index, duration in segments:
+            self.add(path, index, duration)
+        with self._lock:
+            uploads = sorted(self._uploads.items())
+        if not uploads:
+            return False
+
+        for index, future in uploads:
+            if not future.result() and not self._upload(index):
+                logger.error(f"Video segment {index} of {self.upload_id} was not uploaded")
+                return False
+        return self.sync_service.finalize_video_segments(
+            reception_id, self.upload_id,
+            [VideoSegment(index=index, duration=self._segments[index][1]) for index, _ in uploads]
+        )
+
+    def shutdown(self):
+        """Отменить ещё не начатые загрузки (запись отменена)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _upload(self, index: int) -> bool:
+        path, _ = self._segments[index]
+        try:
+            return self.sync_service.upload_video_segment(self.upload_id, index, path)
+        except OSError as e:
+            logger.error(f"Failed to read video segment {path}: {e}")
+            return False
@@ -2,6 +2,7 @@
 import shutil
 from pathlib import Path
 from datetime import date
+from typing import Optional
 
 from client.src.config import get_config
 
@@ -35,11 +36,13 @@ class StorageService:
         shutil.copy2(source_path, target_path)
         return target_path
 
-    def move_video(self, source_path: Path, reception_id: int, ttn_date: date) -> Path:
-        """Переместить видео в папку приёмки."""
+    def move_video(self, source_path: Path, reception_id: int, ttn_date: date,
+                   segment: Optional[int] = None) -> Path:
+        """Переместить видео (или сегмент записи с номером segment) в папку приёмки."""
         folder = self.get_reception_folder(reception_id, ttn_date)
         ext = source_path.suffix or ".avi"
-        target_path = folder / f"video{ext}"
+        name = "video" if segment is None else f"video_{segment:03d}"
+        target_path = folder / f"{name}{ext}"
         
         shutil.move(str(source_path), str(target_path))
         return target_path
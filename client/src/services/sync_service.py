@@ -1,15 +1,17 @@
 """HTTP клиент для взаимодействия с сервером."""
 import logging
+from datetime import date, datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 
 import requests
 
 from client.src.config import get_config
+from common.product_matcher import ProductMatch
 from common.models import (
-    HealthResponse, ProductRead,
+    HealthResponse, ProductLookupResult, ProductRead, ProductTombstoneRead,
     ReceptionCreate, ReceptionRead, ReceptionShort,
-    ReceptionItemControlUpdate, ReceptionStatus
+    ReceptionItemControlUpdate, ReceptionStatus, VideoSegment, VideoSegmentsFinalize
 )
 
 logger = logging.getLogger(__name__)
@@ -49,9 +51,102 @@ class SyncService:
             logger.error(f"Failed to get products: {e}")
             return []
 
-    def get_all_products(self) -> List[ProductRead]:
-        """Получить все товары (алиас для get_products)."""
-        return self.get_products(limit=1000)
+    def get_products_page(
+        self,
+        limit: int = 1000,
+        offset: int = 0,
+        etag: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[Optional[List[ProductRead]], Optional[str], Optional[int]]:
+        """
+        Страница справочника с условным запросом.
+
+        С updated_since — только изменённые товары (keyset-пагинация по after_id).
+
+        Returns:
+            (товары или None, если справочник не изменился (304), ETag справочника,
+            число товаров в справочнике)
+
+        Raises:
+            requests.RequestException: сервер недоступен или вернул ошибку
+        """
+        params = {"limit": limit, "offset": offset}
+        if updated_since is not None:
+            params["updated_since"] = updated_since.isoformat()
+        if after_id is not None:
+            params["after_id"] = after_id
+        headers = {"If-None-Match": etag} if etag else {}
+        response = requests.get(
+            f"{self.base_url}/products",
+            params=params,
+            headers=headers,
+            timeout=self.timeout
+        )
+        if response.status_code == 304:
+            return None, etag, None
+        response.raise_for_status()
+        total = response.headers.get("X-Total-Count")
+        return (
+            [ProductRead(**p) for p in response.json()],
+            response.headers.get("ETag"),
+            int(total) if total is not None else None
+        )
+
+    def get_product_tombstones(
+        self,
+        deleted_since: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[ProductTombstoneRead]:
+        """
+        Отметки об удалении товаров.
+
+        Raises:
+            requests.RequestException: сервер недоступен или вернул ошибку
+        """
+        params = {"limit": limit}
+        if deleted_since is not None:
+            params["deleted_since"] = deleted_since.isoformat()
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = requests.get(
+            f"{self.base_url}/products/tombstones",
+            params=params,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return [ProductTombstoneRead(**t) for t in response.json()]
+
+    def lookup_products(
+        self,
+        queries: List[Tuple[Optional[str], Optional[str]]],
+        limit: int = 5
+    ) -> List[List[ProductMatch]]:
+        """
+        Найти позиции ТТН в справочнике на сервере одним запросом.
+
+        Args:
+            queries: пары (артикул, наименование)
+            limit: сколько кандидатов вернуть на позицию
+
+        Returns:
+            Кандидаты для каждой позиции (в порядке queries) по убыванию оценки
+
+        Raises:
+            requests.RequestException: сервер недоступен или вернул ошибку
+        """
+        response = requests.post(
+            f"{self.base_url}/products/lookup",
+            json={"items": [{"article": a, "name": n} for a, n in queries], "limit": limit},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        results = [ProductLookupResult(**r) for r in response.json()]
+        return [
+            [ProductMatch(c.product, c.score, by_article=c.by_article) for c in result.candidates]
+            for result in results
+        ]
 
     def get_product_by_article(self, article: str) -> Optional[ProductRead]:
         """Получить товар по артикулу."""
@@ -85,6 +180,23 @@ class SyncService:
             logger.error(f"Failed to create reception: {e}")
             return None
 
+    def create_receptions_bulk(self, receptions: List[ReceptionCreate]) -> Optional[List[int]]:
+        """Создать несколько приёмок одним запросом. Возвращает ID или None при ошибке."""
+        logger.info(f"Creating {len(receptions)} receptions in bulk")
+        try:
+            response = requests.post(
+                f"{self.base_url}/receptions/bulk",
+                json=[data.model_dump(mode="json") for data in receptions],
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            ids = response.json()["ids"]
+            logger.info(f"Bulk receptions created: {len(ids)}")
+            return ids
+        except requests.RequestException as e:
+            logger.error(f"Failed to create receptions in bulk: {e}")
+            return None
+
     def get_receptions(
         self,
         status: Optional[ReceptionStatus] = None,
@@ -106,6 +218,103 @@ class SyncService:
             logger.error(f"Failed to get receptions: {e}")
             return []
 
+    def get_receptions_page(
+        self,
+        limit: int = 100,
+        status: Optional[ReceptionStatus] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier: Optional[str] = None,
+        before: Optional[datetime] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[ReceptionShort], Optional[int]]:
+        """
+        Страница истории приёмок (новые первыми) с фильтрами на сервере.
+
+        Следующая страница — before/before_id последней полученной приёмки.
+
+        Returns:
+            (приёмки, число приёмок под фильтрами)
+
+        Raises:
+            requests.RequestException: сервер недоступен или вернул ошибку
+        """
+        params = {"limit": limit}
+        if status:
+            params["status"] = status.value
+        if date_from:
+            params["date_from"] = date_from.isoformat()
+        if date_to:
+            params["date_to"] = date_to.isoformat()
+        if supplier:
+            params["supplier"] = supplier
+        if before is not None:
+            params["before"] = before.isoformat()
+        if before_id is not None:
+            params["before_id"] = before_id
+        response = requests.get(
+            f"{self.base_url}/receptions",
+            params=params,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        total = response.headers.get("X-Total-Count")
+        return [ReceptionShort(**r) for r in response.json()], int(total) if total is not None else None
+
+    def export_receptions(
+        self,
+        save_path: Path,
+        fmt: str = "csv",
+        status: Optional[ReceptionStatus] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> bool:
+        """
+        Скачать выгрузку приёмок с позициями (csv или xlsx) под фильтрами.
+
+        Файл формирует сервер, клиент пишет его по мере получения во временный
+        файл рядом с save_path и заменяет save_path только после полной загрузки.
+        progress (если задан) получает число уже полученных байт.
+        """
+        logger.info(f"Exporting receptions to {save_path} ({fmt})")
+        params = {"format": fmt}
+        if status:
+            params["status"] = status.value
+        if date_from:
+            params["from"] = date_from.isoformat()
+        if date_to:
+            params["to"] = date_to.isoformat()
+        if supplier:
+            params["supplier"] = supplier
+        tmp_path = save_path.with_name(save_path.name + ".part")
+        try:
+            response = requests.get(
+                f"{self.base_url}/receptions/export",
+                params=params,
+                timeout=self.timeout,
+                stream=True
+            )
+            response.raise_for_status()
+
+            received = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    if chunk:
+                        f.write(chunk)
+                        received += len(chunk)
+                        if progress:
+                            progress(received)
+            tmp_path.replace(save_path)
+
+            logger.info(f"Receptions exported successfully: {save_path}")
+            return True
+        except (requests.RequestException, OSError) as e:
+            logger.error(f"Failed to export receptions: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
     def get_reception(self, reception_id: int) -> Optional[ReceptionRead]:
         """Получить приёмку по ID."""
         try:
@@ -155,6 +364,38 @@ class SyncService:
             logger.error(f"Failed to upload video: {e}")
             return False
 
+    def upload_video_segment(self, upload_id: str, index: int, file_path: Path) -> bool:
+        """Загрузить сегмент видео (приёмки может ещё не быть: сегменты ждут на сервере)."""
+        logger.info(f"Uploading video segment {index} of {upload_id}: {file_path.name} ({file_path.stat().st_size} bytes)")
+        try:
+            with open(file_path, "rb") as f:
+                response = requests.post(
+                    f"{self.base_url}/receptions/video-uploads/{upload_id}/segments/{index}",
+                    files={"file": (file_path.name, f)},
+                    timeout=self.timeout * 5
+                )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"Failed to upload video segment {index}: {e}")
+            return False
+
+    def finalize_video_segments(self, reception_id: int, upload_id: str, segments: List[VideoSegment]) -> bool:
+        """Прикрепить загруженные сегменты к приёмке (сервер склеивает их или пишет плейлист)."""
+        logger.info(f"Finalizing video for reception {reception_id}: {len(segments)} segments of {upload_id}")
+        try:
+            response = requests.post(
+                f"{self.base_url}/receptions/{reception_id}/video/segments",
+                json=VideoSegmentsFinalize(upload_id=upload_id, segments=segments).model_dump(mode="json"),
+                timeout=self.timeout * 5  # Склейка на сервере
+            )
+            response.raise_for_status()
+            logger.info(f"Video segments attached to reception {reception_id}: {response.json().get('video_path')}")
+            return True
+        except requests.RequestException as e:
+            logger.error(f"Failed to finalize video segments: {e}")
+            return False
+
     def upload_photo(self, reception_id: int, item_id: int, file_path: Path) -> bool:
         """Загрузить фото товара."""
         logger.info(f"Uploading photo for item {item_id}: {file_path.name}")
@@ -280,6 +521,29 @@ class SyncService:
             logger.error(f"Failed to download photo: {e}")
             return False
 
+    def get_photo(
+        self, reception_id: int, item_id: int, photo_index: int, etag: Optional[str] = None
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Фотография товара с условным запросом.
+
+        Returns:
+            (содержимое или None, если фото не изменилось (304), ETag фото)
+
+        Raises:
+            requests.RequestException: сервер недоступен или вернул ошибку
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        response = requests.get(
+            f"{self.base_url}/receptions/{reception_id}/items/{item_id}/photos/{photo_index}",
+            headers=headers,
+            timeout=self.timeout
+        )
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return response.content, response.headers.get("ETag")
+
     def delete_reception(self, reception_id: int) -> bool:
         """Удалить приёмку."""
         logger.info(f"Deleting reception {reception_id}")
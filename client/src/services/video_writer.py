@@ -0,0 +1,168 @@
+"""Запись видео: OpenCV VideoWriter или внешний ffmpeg (H.264/VP9) через канал."""
+import logging
+import shutil
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_OPENCV = "opencv"
+BACKEND_FFMPEG = "ffmpeg"
+BACKENDS = (BACKEND_OPENCV, BACKEND_FFMPEG)
+
+# Кодеки ffmpeg (только программные, без GPU) и замена для OpenCV, если ffmpeg не найден.
+# Встроенный в OpenCV VP9 для замены не годится: без настройки скорости он
+# кодирует во много раз медленнее реального времени.
+FFMPEG_CODECS = {"h264": "libx264", "vp9": "libvpx-vp9"}
+OPENCV_FALLBACK = {"h264": "mp4v"}
+
+# Качество по умолчанию (CRF): у VP9 шкала другая, 32 примерно соответствует 28 у H.264
+DEFAULT_CRF = {"h264": 28, "vp9": 32}
+
+# ultrafast: меньше процессорного времени, чем MJPG, при файле в десятки раз меньше
+DEFAULT_PRESET = "ultrafast"
+
+# Ключевой кадр раз в столько секунд: фрагменты MP4 и перемотка
+KEYFRAME_INTERVAL_SECONDS = 2
+
+# Сколько последних строк stderr ffmpeg попадает в лог при ошибке
+STDERR_TAIL_LINES = 20
+
+
+class OpenCVVideoWriter:
+    """cv2.VideoWriter с кодеком по FOURCC (MJPG, mp4v, VP90...)."""
+
+    def __init__(self, output_path: Path, fourcc: str, fps: float, frame_size: Tuple[int, int]):
+        self.writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*fourcc), fps, frame_size)
+        if not self.writer.isOpened():
+            logger.error(f"OpenCV failed to open video writer {output_path} ({fourcc})")
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class FFmpegVideoWriter:
+    """
+    Кодирование во внешнем процессе ffmpeg: кадры BGR идут в stdin без сжатия.
+
+    H.264 (libx264) пишется во фрагментированный MP4 — файл читается и после
+    аварийного завершения записи, VP9 (libvpx-vp9) — в WebM. Качество задаётся
+    CRF или битрейтом (bitrate_kbps, приоритетнее CRF). stderr читается
+    отдельным потоком (хранятся последние строки): переполненный канал
+    не останавливает ffmpeg посреди записи.
+    """
+
+    def __init__(self, output_path: Path, codec: str, fps: float, frame_size: Tuple[int, int],
+                 ffmpeg_path: str = "ffmpeg", crf: Optional[int] = None, bitrate_kbps: Optional[int] = None,
+                 preset: str = DEFAULT_PRESET, threads: int = 0):
+        self.output_path = output_path
+        command = ffmpeg_command(output_path, codec, fps, frame_size, ffmpeg_path=ffmpeg_path, crf=crf,
+                                 bitrate_kbps=bitrate_kbps, preset=preset, threads=threads)
+        logger.info(f"Starting ffmpeg: {' '.join(command)}")
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE)
+        self.broken = False
+        self._stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, name="ffmpeg-stderr", daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self):
+        for line in self.process.stderr:
+            self._stderr_tail.append(line)
+        self.process.stderr.close()
+
+    def write(self, frame: np.ndarray):
+        if self.broken:
+            return
+        try:
+            # Слот кольца — непрерывный массив: байты уходят в канал без копии
+            self.process.stdin.write(frame.data)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg завершился: причина будет в stderr при release()
+            self.broken = True
+            logger.error(f"ffmpeg stopped accepting frames for {self.output_path}")
+
+    def release(self):
+        # Закрытый stdin — конец видео; ждём, пока ffmpeg допишет файл
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        self._stderr_thread.join()
+        if self.process.returncode != 0:
+            stderr = b"".join(self._stderr_tail).decode(errors="replace").strip()
+            logger.error(f"ffmpeg exited with code {self.process.returncode} for {self.output_path}: {stderr[-500:]}")
+
+
+def ffmpeg_command(output_path: Path, codec: str, fps: float, frame_size: Tuple[int, int],
+                   ffmpeg_path: str = "ffmpeg", crf: Optional[int] = None, bitrate_kbps: Optional[int] = None,
+                   preset: str = DEFAULT_PRESET, threads: int = 0) -> List[str]:
+    """Командная строка ffmpeg: сырые кадры bgr24 из stdin -> H.264/MP4 или VP9/WebM."""
+    if codec not in FFMPEG_CODECS:
+        raise ValueError(f"Unknown ffmpeg codec: {codec}")
+    width, height = frame_size
+    command = [
+        ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps:g}", "-i", "-",
+        "-an", "-c:v", FFMPEG_CODECS[codec], "-pix_fmt", "yuv420p",
+        "-g", str(max(1, round(fps * KEYFRAME_INTERVAL_SECONDS))), "-threads", str(threads),
+    ]
+    if crf is None and bitrate_kbps is None:
+        crf = DEFAULT_CRF[codec]
+
+    if codec == "h264":
+        command += ["-preset", preset]
+        if bitrate_kbps:
+            command += ["-b:v", f"{bitrate_kbps}k", "-maxrate", f"{bitrate_kbps}k",
+                        "-bufsize", f"{bitrate_kbps * 2}k"]
+        else:
+            command += ["-crf", str(crf)]
+        command += ["-movflags", "+frag_keyframe+empty_moov+default_base_moof", "-f", "mp4"]
+    else:
+        # realtime + cpu-used 8: иначе VP9 на CPU не успевает за камерой
+        command += ["-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1"]
+        if bitrate_kbps:
+            command += ["-b:v", f"{bitrate_kbps}k"]
+        else:
+            command += ["-crf", str(crf), "-b:v", "0"]
+        command += ["-f", "webm"]
+    return command + [str(output_path)]
+
+
+def resolve_ffmpeg(ffmpeg_path: str = "ffmpeg") -> Optional[str]:
+    """Полный путь к ffmpeg (путь из конфига или поиск в PATH) или None."""
+    return shutil.which(ffmpeg_path)
+
+
+def open_video_writer(output_path: Path, codec: str, fps: float, frame_size: Tuple[int, int],
+                      backend: str = BACKEND_OPENCV, **options):
+    """
+    Открыть запись видео. backend=opencv: codec — FOURCC; backend=ffmpeg:
+    codec — h264 или vp9, options — ffmpeg_path, crf, bitrate_kbps, preset, threads.
+
+    Без ffmpeg H.264 заменяется на MPEG-4 Part 2 в том же MP4 средствами
+    OpenCV (без настройки качества); VP9 без ffmpeg не записывается.
+    """
+    if backend == BACKEND_OPENCV:
+        return OpenCVVideoWriter(output_path, codec, fps, frame_size)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown video backend: {backend}")
+
+    ffmpeg_path = resolve_ffmpeg(options.pop("ffmpeg_path", None) or "ffmpeg")
+    if ffmpeg_path is None:
+        fourcc = OPENCV_FALLBACK.get(codec)
+        if fourcc is None:
+            raise RuntimeError(f"ffmpeg not found, cannot record {codec}")
+        logger.warning(f"ffmpeg not found, recording {codec} with OpenCV fallback ({fourcc})")
+        return OpenCVVideoWriter(output_path, fourcc, fps, frame_size)
+    return FFmpegVideoWriter(output_path, codec, fps, frame_size, ffmpeg_path=ffmpeg_path, **options)
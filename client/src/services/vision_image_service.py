@@ -0,0 +1,104 @@
+"""Подготовка изображений перед отправкой в Vision LLM."""
+import logging
+from dataclasses import dataclass
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from client.src.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Кодеки: расширение для cv2.imencode, MIME-тип и параметр качества
+ENCODERS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+RAW_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+
+@dataclass
+class PreparedImage:
+    """Изображение, готовое к отправке в Vision LLM."""
+    data: bytes
+    mime_type: str
+    size: Tuple[int, int] = (0, 0)  # (ширина, высота)
+
+
+class VisionImageService:
+    """
+    Уменьшение и перекодирование изображения ТТН для Vision LLM.
+
+    Vision-модели всё равно приводят картинку к ограниченному разрешению
+    (для gpt-4o: вписать в 2048x2048, затем короткая сторона 768),
+    поэтому отправлять 12 Мп фото или страницу в 300 DPI бессмысленно.
+
+    Кодирование идёт в память за один проход, без потоковой передачи:
+    после уменьшения картинка занимает ~100 КБ, а тело запроса — один
+    JSON с base64-строкой целиком (так его принимает и OpenAI SDK).
+    """
+
+    def __init__(self):
+        config = get_config().get("llm", {}).get("vision", {})
+        self.max_long_side = config.get("max_long_side", 2048)
+        self.max_short_side = config.get("max_short_side", 768)
+        self.grayscale = config.get("grayscale", True)
+        self.format = config.get("format", "jpeg")
+        self.quality = config.get("quality", 80)
+
+        if self.format not in ENCODERS:
+            logger.warning(f"Unknown vision image format '{self.format}'. Using jpeg.")
+            self.format = "jpeg"
+
+    @property
+    def signature(self) -> str:
+        """Параметры подготовки (входят в ключ кэша LLM)."""
+        color = "gray" if self.grayscale else "color"
+        return f"{self.max_long_side}x{self.max_short_side}-{color}-{self.format}{self.quality}"
+
+    def prepare(self, image_bytes: bytes, suffix: str = ".jpg") -> PreparedImage:
+        """
+        Подготовить изображение из байтов файла.
+
+        Если изображение не удалось декодировать, возвращаются исходные байты.
+        """
+        flags = cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flags)
+        if image is None:
+            logger.warning("Failed to decode image for Vision. Sending original bytes.")
+            return PreparedImage(image_bytes, RAW_MIME_TYPES.get(suffix.lower(), "image/jpeg"))
+
+        return self.prepare_array(image)
+
+    def prepare_array(self, image: np.ndarray) -> PreparedImage:
+        """Подготовить изображение из массива OpenCV (BGR или оттенки серого)."""
+        if self.grayscale and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        image = self._downscale(image)
+        extension, mime_type, quality_flag = ENCODERS[self.format]
+        ok, encoded = cv2.imencode(extension, image, [quality_flag, self.quality])
+        if not ok:
+            raise ValueError(f"Failed to encode image as {self.format}")
+
+        height, width = image.shape[:2]
+        logger.debug(f"Vision image prepared: {width}x{height}, {encoded.nbytes} bytes")
+        return PreparedImage(encoded.tobytes(), mime_type, (width, height))
+
+    def _downscale(self, image: np.ndarray) -> np.ndarray:
+        """Уменьшить до полезного для модели разрешения (без увеличения)."""
+        height, width = image.shape[:2]
+        long_side, short_side = max(width, height), min(width, height)
+        scale = min(1.0, self.max_long_side / long_side, self.max_short_side / short_side)
+        if scale >= 1.0:
+            return image
+
+        new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
@@ -13,7 +13,7 @@ from PySide6.QtCore import Qt, QTimer, QSize
 from PySide6.QtGui import QPixmap, QScreen
 
 from client.src.services import (
-    CameraService, ValidatorService, SyncService, StorageService
+    CameraService, ValidatorService, SyncService, StorageService, SegmentUploader
 )
 from client.src.ui.video_widget import VideoWidget
 from common.models import (
@@ -40,6 +40,8 @@ class ControlDialog(QDialog):
         
         self.current_item: Optional[ReceptionItemRead] = None
         self.results: List[ReceptionItemControlUpdate] = []
+        # Сегменты записи загружаются на сервер, пока запись продолжается
+        self.segment_uploader: Optional[SegmentUploader] = None
         
         self._setup_ui()
         self._load_items()
@@ -183,8 +185,11 @@ class ControlDialog(QDialog):
         self._update_reception_info()
         
         self.camera_service.frame_ready.connect(self.video_widget.update_frame)
+        self.camera_service.capture_stats.connect(self.video_widget.update_capture_stats)
+        self.video_widget.display_size_changed.connect(self.camera_service.set_preview_size)
         self.camera_service.recording_started.connect(self._on_recording_started)
         self.camera_service.recording_stopped.connect(self._on_recording_stopped)
+        self.camera_service.segment_finished.connect(self._on_segment_finished)
         self.camera_service.error.connect(self._on_camera_error)
 
     def _update_reception_info(self):
@@ -340,14 +345,37 @@ class ControlDialog(QDialog):
         self.record_btn.setText("⏹ Остановить")
         self.record_btn.setStyleSheet("background-color: #d13438; color: white; font-weight: bold; padding: 8px;")
         self.video_widget.start_recording_info()
+        if self.segment_uploader:
+            self.segment_uploader.shutdown()
+        self.segment_uploader = SegmentUploader(self.sync_service) if self.camera_service.segment_seconds > 0 else None
+
+    def _on_segment_finished(self, path: str, index: int, duration: float):
+        if self.segment_uploader:
+            self.segment_uploader.add(Path(path), index, duration)
 
     def _on_recording_stopped(self, path: str):
         self.record_btn.setText("🔴 Запись")
         self.record_btn.setStyleSheet("")
         self.video_widget.stop_recording_info()
         
+        segments = self.camera_service.recording_segments()
+        if self.current_item and segments and self.segment_uploader:
+            # Сегменты уже на сервере, кроме последнего; локальная копия — после загрузки
+            uploaded = self.segment_uploader.finish(self.reception.id, segments)
+            try:
+                for segment_path, index, _ in segments:
+                    self.storage_service.move_video(
+                        segment_path, self.reception.id, self.reception.ttn_date, segment=index
+                    )
+            except Exception as e:
+                QMessageBox.warning(self, "Ошибка", f"Ошибка сохранения видео: {e}")
+                return
+            if uploaded:
+                QMessageBox.information(self, "Видео", "Видео сохранено и загружено")
+            else:
+                QMessageBox.warning(self, "Видео", "Видео сохранено, но не загружено на сервер")
         # Сохраняем видео
-        if self.current_item:
+        elif self.current_item:
             try:
                 saved_path = self.storage_service.move_video(
                     Path(path), 
@@ -1,19 +1,48 @@
 """Диалог просмотра базы данных товаров."""
+import logging
 from typing import List
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, 
     QHeaderView, QPushButton, QLabel, QHBoxLayout, QLineEdit
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QColor
 
 from common.models import ProductRead
 from client.src.services.sync_service import SyncService
+from client.src.services.product_catalog import get_product_catalog
+
+logger = logging.getLogger(__name__)
+
+# Запущенные загрузки: QThread нельзя уничтожать до завершения run()
+_running_workers: List[QThread] = []
+
+
+class ProductListWorker(QThread):
+    """Загрузка справочника товаров в фоновом потоке."""
+
+    loaded = Signal(object)  # список ProductRead
+
+    def __init__(self, catalog):
+        super().__init__()
+        self.catalog = catalog
+
+    def run(self):
+        try:
+            # Идущую фоновую синхронизацию здесь можно подождать: GUI не блокируется
+            self.catalog.refresh(wait=True)
+            self.loaded.emit(self.catalog.products)
+        except Exception as e:
+            logger.error(f"Failed to load products: {e}")
+            self.loaded.emit([])
+
 
 class DatabaseDialog(QDialog):
-    def __init__(self, sync_service: SyncService, parent=None):
+    def __init__(self, sync_service: SyncService, parent=None, catalog=None):
         super().__init__(parent)
         self.sync_service = sync_service
+        self.catalog = catalog or get_product_catalog()
+        self.products: List[ProductRead] = []
         self.setWindowTitle("База данных товаров")
         self.resize(1000, 600)
         self._setup_ui()
@@ -30,6 +59,9 @@ class DatabaseDialog(QDialog):
         self.search_edit.textChanged.connect(self._filter_data)
         search_layout.addWidget(self.search_edit)
         layout.addLayout(search_layout)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
         
         # Таблица
         self.table = QTableWidget()
@@ -56,8 +88,17 @@ class DatabaseDialog(QDialog):
         layout.addWidget(close_btn)
         
     def _load_data(self):
-        self.products = self.sync_service.get_all_products()
-        self._update_table(self.products)
+        self.status_label.setText("Загрузка справочника...")
+        worker = ProductListWorker(self.catalog)
+        worker.loaded.connect(self._on_loaded)
+        _running_workers[:] = [w for w in _running_workers if not w.isFinished()]
+        _running_workers.append(worker)
+        worker.start()
+
+    def _on_loaded(self, products: List[ProductRead]):
+        self.products = products
+        self.status_label.setText(f"Товаров: {len(products)}")
+        self._filter_data(self.search_edit.text())
         
     def _filter_data(self, text: str):
         text = text.lower()
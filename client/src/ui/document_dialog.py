@@ -2,20 +2,21 @@
 import logging
 from pathlib import Path
 from datetime import date
-from typing import Optional
+from typing import List, Optional, Tuple
 import tempfile
 import os
 
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
     QPushButton, QFileDialog, QLineEdit, QMessageBox,
-    QDateEdit, QScrollArea, QSplitter, QWidget, QGroupBox, QTextEdit, QTableWidgetItem,
+    QDateEdit, QScrollArea, QSplitter, QWidget, QGroupBox, QTextEdit,
     QProgressDialog, QSizePolicy, QTabWidget
 )
 from PySide6.QtCore import Qt, QDate, QTimer, QCoreApplication
-from PySide6.QtGui import QPixmap, QColor
+from PySide6.QtGui import QPixmap
 
-from client.src.services import OCRService, SyncService, CameraService
+from client.src.services import OCRService, SyncService, CameraService, SegmentUploader
+from common.product_matcher import match_status
 from client.src.ui.results_widget import ResultsWidget
 from client.src.ui.video_widget import VideoWidget
 from client.src.ui.database_dialog import DatabaseDialog
@@ -36,9 +37,12 @@ class DocumentDialog(QDialog):
         self.sync_service = SyncService()
         self.current_file: Optional[Path] = None
         self.current_video_path: Optional[str] = None
+        # Сегменты записи (путь, номер, длительность) грузятся на сервер, пока идёт запись
+        self.current_video_segments: List[Tuple[Path, int, float]] = []
+        self.segment_uploader: Optional[SegmentUploader] = None
         self.ocr_result: Optional[OCRResult] = None
         self.verified_items = {}  # {uuid: {'status': 'verified'|'rejected', 'comment': str, 'photos': []}}
-        self.products_cache = {}  # Кеш товаров из БД {article: ProductRead}
+        self._matches_pending_row: Optional[int] = None  # строка, чья панель ждёт поиска в справочнике
         self.camera_service = CameraService()
         self.camera_active = False
         
@@ -119,6 +123,7 @@ class DocumentDialog(QDialog):
         self.results_widget = ResultsWidget()
         self.results_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.results_widget.itemSelectionChanged.connect(self._on_item_selected)
+        self.results_widget.matches_updated.connect(self._on_matches_updated)
         table_layout.addWidget(self.results_widget)
         
         left_vertical_splitter.addWidget(table_container)
@@ -286,8 +291,11 @@ class DocumentDialog(QDialog):
         
         # Подключение сигналов камеры
         self.camera_service.frame_ready.connect(self.video_widget.update_frame)
+        self.camera_service.capture_stats.connect(self.video_widget.update_capture_stats)
+        self.video_widget.display_size_changed.connect(self.camera_service.set_preview_size)
         self.camera_service.recording_started.connect(self._on_recording_started)
         self.camera_service.recording_stopped.connect(self._on_recording_stopped)
+        self.camera_service.segment_finished.connect(self._on_segment_finished)
         self.camera_service.recording_size_updated.connect(self.video_widget.update_video_size)
         self.camera_service.recording_limit_exceeded.connect(self._on_recording_limit_exceeded)
         
@@ -450,14 +458,30 @@ class DocumentDialog(QDialog):
                 progress.setValue(30)
             
             # 3. Загрузка видео (45%)
-            if self.current_video_path and os.path.exists(self.current_video_path):
+            has_video = bool(self.current_video_path and os.path.exists(self.current_video_path))
+            video_sent = False
+            if has_video and self.current_video_segments and self.segment_uploader:
+                # Сегменты загружались во время записи: осталось догрузить последний
+                uploaded = self.segment_uploader.uploaded_count()
+                progress.setLabelText(
+                    f"Шаг 3/7: Загрузка видео (загружено сегментов: {uploaded} из {len(self.current_video_segments)})..."
+                )
+                progress.setValue(35)
+                QCoreApplication.processEvents()
+                
+                logger.info(f"Finishing segmented video upload for reception {reception.id}")
+                video_sent = self.segment_uploader.finish(reception.id, self.current_video_segments)
+                
+                progress.setValue(45)
+                QCoreApplication.processEvents()
+            elif has_video:
                 video_size_mb = os.path.getsize(self.current_video_path) / (1024 * 1024)
                 progress.setLabelText(f"Шаг 3/7: Загрузка видео ({video_size_mb:.1f} МБ)...")
                 progress.setValue(35)
                 QCoreApplication.processEvents()
                 
                 logger.info(f"Uploading video for reception {reception.id}")
-                self.sync_service.upload_video(reception.id, Path(self.current_video_path))
+                video_sent = self.sync_service.upload_video(reception.id, Path(self.current_video_path))
                 
                 progress.setValue(45)
                 QCoreApplication.processEvents()
@@ -581,8 +605,10 @@ class DocumentDialog(QDialog):
                 summary_parts.append(f"✓ Фотографии отправлены ({photos_count} шт.)")
             else:
                 summary_parts.append("○ Фотографии: нет")
-            if self.current_video_path and os.path.exists(self.current_video_path):
+            if video_sent:
                 summary_parts.append("✓ Видео отправлено")
+            elif has_video:
+                summary_parts.append("✗ Видео не отправлено (см. лог)")
             else:
                 summary_parts.append("○ Видео: нет")
             summary_parts.append("✓ Добавлено в список приёмок")
@@ -616,12 +642,19 @@ class DocumentDialog(QDialog):
             error_msg = f"Ошибка при создании приёмки:\n\n{str(e)}"
             QMessageBox.critical(self, "Ошибка", error_msg)
     
+    def _on_matches_updated(self):
+        """Фоновый поиск в справочнике завершён: обновить панель, если она его ждала."""
+        row = self._matches_pending_row
+        if row is not None and self.results_widget.get_matches(row) is not None:
+            self._on_item_selected()
+
     def _on_item_selected(self):
         """Обработка выбора товара в таблице."""
         selected_rows = self.results_widget.selectionModel().selectedRows()
         
         # Показывать кнопку проверки ТОЛЬКО при выбранном товаре
         if not selected_rows:
+            self._matches_pending_row = None
             self.product_info_label.setText("Выберите товар в таблице")
             self.instructions_label.setText("")
             self.mark_verified_btn.setEnabled(False)
@@ -641,11 +674,10 @@ class DocumentDialog(QDialog):
         self.photo_preview_label.setToolTip("Нажмите, чтобы сделать фото")
             
         row = selected_rows[0].row()
-        items = self.results_widget.get_items()
-        if row >= len(items):
+        item = self.results_widget.get_item(row)
+        if item is None:
             return
             
-        item = items[row]
         item_uuid = self.results_widget.get_item_uuid(row)
         
         # Проверяем, уже проверен ли товар
@@ -658,35 +690,21 @@ class DocumentDialog(QDialog):
         product_info.append(f"<b>Количество:</b> {item.quantity} {item.unit}")
         product_info.append("")
         
-        # Получить информацию о товаре из БД (с кешированием только для непустых артикулов)
-        product = None
-        
-        # 1. Поиск по артикулу (с кешированием)
-        if item.article and item.article.strip():
-            if item.article not in self.products_cache:
-                try:
-                    self.products_cache[item.article] = self.sync_service.get_product_by_article(item.article)
-                except Exception as e:
-                    logger.error(f"Error fetching product from DB: {e}")
-                    self.products_cache[item.article] = None
-            product = self.products_cache.get(item.article)
-            
-        # 2. Fallback: поиск по наименованию (без кеширования по пустому ключу)
-        if not product and item.name and item.name.strip():
-            try:
-                all_products = self.sync_service.get_all_products()
-                for p in all_products:
-                    if p.name.lower() in item.name.lower() or item.name.lower() in p.name.lower():
-                        product = p
-                        # Если у товара есть артикул, закешируем его для будущего использования
-                        if item.article and item.article.strip():
-                            self.products_cache[item.article] = p
-                        break
-            except Exception as e:
-                logger.error(f"Error searching product by name: {e}")
+        # Получить информацию о товаре из справочника: по артикулу, затем по наименованию
+        matches = self.results_widget.get_matches(row)
+        # Поиск ещё идёт: панель обновится по matches_updated
+        self._matches_pending_row = row if matches is None else None
+        status = match_status(matches or [])
+        product = matches[0].product if status != "none" else None
         
         # Показать статус БД
-        if product:
+        if matches is None:
+            product_info.append("<b style='color: gray;'>… Поиск в справочнике</b>")
+        elif status == "ambiguous":
+            product_info.append("<b style='color: #b8860b;'>≈ Точного совпадения нет, похожие товары:</b>")
+            for match in matches:
+                product_info.append(f"{match.score:.0%} — {match.product.article}: {match.product.name}")
+        elif product:
             product_info.append("<b style='color: green;'>✅ Товар найден в базе данных</b>")
             if product.requires_control:
                 product_info.append("<b style='color: orange;'>⚠️ Требуется входной контроль</b>")
@@ -829,13 +847,7 @@ class DocumentDialog(QDialog):
         })
         
         # Обновить визуально строку в таблице - добавить статус в колонку "Проверено"
-        status_text = "✓ Принято" if accepted else "✗ Отклонено"
-        status_color = QColor("green") if accepted else QColor("red")
-        
-        verified_item = QTableWidgetItem(status_text)
-        verified_item.setForeground(status_color)
-        verified_item.setFlags(verified_item.flags() ^ Qt.ItemIsEditable)
-        self.results_widget.setItem(row, 6, verified_item)  # Колонка "Проверено"
+        self.results_widget.set_verified(row, accepted)
         
         # Обновить информацию в панели
         self._on_item_selected()
@@ -871,9 +883,9 @@ class DocumentDialog(QDialog):
             
         row = selected_rows[0].row()
         
-        # Получить кадр
-        image = self.video_widget.get_current_frame()
-        if image is None:
+        # Получить кадр в полном разрешении (превью уменьшено под размер виджета)
+        jpeg_data = self.camera_service.take_snapshot()
+        if jpeg_data is None:
             QMessageBox.warning(self, "Ошибка", "Нет изображения с камеры")
             return
             
@@ -883,7 +895,8 @@ class DocumentDialog(QDialog):
             # Используем фиксированное имя для перезаписи (одно фото на товар)
             filename = f"tmc_photo_{date.today()}_{row}_0.jpg"
             path = os.path.join(temp_dir, filename)
-            image.save(path, "JPG")
+            with open(path, "wb") as f:
+                f.write(jpeg_data)
             
             # Добавить в verified_items (перезаписываем список фото)
             item_uuid = self.results_widget.get_item_uuid(row)
@@ -1045,10 +1058,22 @@ class DocumentDialog(QDialog):
         
         self.blink_timer.start(1000)
         self.blink_state = True
+        
+        # Новая запись — новая загрузка сегментов
+        if self.segment_uploader:
+            self.segment_uploader.shutdown()
+        self.current_video_segments = []
+        self.segment_uploader = SegmentUploader(self.sync_service) if self.camera_service.segment_seconds > 0 else None
+    
+    def _on_segment_finished(self, path: str, index: int, duration: float):
+        """Готовый сегмент записи — сразу в фоновую загрузку."""
+        if self.segment_uploader:
+            self.segment_uploader.add(Path(path), index, duration)
     
     def _on_recording_stopped(self, path: str):
         """Обработка остановки записи."""
         self.current_video_path = path  # Сохраняем путь
+        self.current_video_segments = self.camera_service.recording_segments()
         logger.info(f"Recording stopped: {path}")
         
         # Скрыть информацию о записи
@@ -1086,9 +1111,12 @@ class DocumentDialog(QDialog):
         # 2. Очистить данные
         self.current_file = None
         self.current_video_path = None
+        self.current_video_segments = []
+        if self.segment_uploader:
+            self.segment_uploader.shutdown()
+            self.segment_uploader = None
         self.ocr_result = None
         self.verified_items.clear()
-        self.products_cache.clear()
         
         # 3. Сбросить UI элементы
         self.file_path_label.setText("Файл не выбран")
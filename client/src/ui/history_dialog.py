@@ -1,28 +1,206 @@
 """Диалог истории приёмок."""
-from typing import List
+import logging
+from pathlib import Path
+from typing import List, Optional
 
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, 
+    QDialog, QVBoxLayout, QHBoxLayout, QTableView,
     QHeaderView, QPushButton, QMessageBox, QLabel, QAbstractItemView,
-    QFileDialog
+    QFileDialog, QComboBox, QCheckBox, QDateEdit, QLineEdit, QProgressDialog
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QAbstractTableModel, QDate, QModelIndex, QThread, Signal
+from PySide6.QtGui import QColor
 
 from client.src.services import SyncService
 from client.src.ui.reception_detail_dialog import ReceptionDetailDialog
 from common.models import ReceptionShort, ReceptionStatus
 
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["ID", "ТТН", "Дата", "Поставщик", "Статус"]
+PAGE_SIZE = 200
+
+# Запущенные загрузки: QThread нельзя уничтожать до завершения run(),
+# завершённые удаляются при следующем запуске (не из их сигнала finished)
+_running_workers: List[QThread] = []
+
+
+class ReceptionPageWorker(QThread):
+    """Загрузка страницы истории в фоновом потоке."""
+
+    page_ready = Signal(int, object, object)  # поколение, приёмки, всего под фильтрами
+    failed = Signal(int, str)
+
+    def __init__(self, sync_service, generation: int, filters: dict, limit: int, before=None, before_id=None):
+        super().__init__()
+        self.sync_service = sync_service
+        self.generation = generation
+        self.filters = filters
+        self.limit = limit
+        self.before = before
+        self.before_id = before_id
+
+    def run(self):
+        try:
+            page, total = self.sync_service.get_receptions_page(
+                self.limit, before=self.before, before_id=self.before_id, **self.filters
+            )
+            self.page_ready.emit(self.generation, page, total)
+        except Exception as e:
+            logger.error(f"Failed to load receptions page: {e}")
+            self.failed.emit(self.generation, str(e))
+
+
+class ExportWorker(QThread):
+    """Скачивание выгрузки приёмок в фоновом потоке."""
+
+    progress = Signal(int)  # получено байт
+    done = Signal(bool, str)  # успех, путь
+
+    def __init__(self, sync_service, save_path: Path, fmt: str, filters: dict):
+        super().__init__()
+        self.sync_service = sync_service
+        self.save_path = save_path
+        self.fmt = fmt
+        self.filters = filters
+
+    def run(self):
+        try:
+            ok = self.sync_service.export_receptions(
+                self.save_path, self.fmt, progress=self.progress.emit, **self.filters
+            )
+        except Exception as e:
+            logger.error(f"Failed to export receptions: {e}")
+            ok = False
+        self.done.emit(ok, str(self.save_path))
+
+
+class ReceptionHistoryModel(QAbstractTableModel):
+    """
+    История приёмок, подгружаемая страницами по мере прокрутки.
+
+    Страницы запрашиваются в фоне по курсору (created_at, id) последней
+    загруженной приёмки; фильтры применяются на сервере.
+    """
+
+    page_loaded = Signal()
+    load_failed = Signal(str)
+
+    def __init__(self, sync_service, page_size: int = PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.sync_service = sync_service
+        self.page_size = page_size
+        self.filters: dict = {}
+        self.total: Optional[int] = None
+        self._rows: List[ReceptionShort] = []
+        self._generation = 0
+        self._loading = False
+        self._exhausted = True
+
+    def reload(self, filters: Optional[dict] = None):
+        """Начать загрузку заново (с новыми фильтрами); ответы прежних запросов отбрасываются."""
+        if filters is not None:
+            self.filters = filters
+        self.beginResetModel()
+        self._generation += 1
+        self._rows = []
+        self.total = None
+        self._loading = False
+        self._exhausted = False
+        self.endResetModel()
+        self._fetch()
+
+    def reception_at(self, row: int) -> Optional[ReceptionShort]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def is_loading(self) -> bool:
+        return self._loading
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return [str(r.id), r.ttn_number, r.ttn_date.strftime("%d.%m.%Y"), r.supplier, r.status.value][column]
+        if role == Qt.ForegroundRole and column == 4:
+            if r.status == ReceptionStatus.COMPLETED:
+                return QColor(Qt.darkGreen)
+            if r.status == ReceptionStatus.PENDING:
+                return QColor(Qt.darkRed)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self._fetch()
+
+    def _fetch(self):
+        if self._loading or self._exhausted:
+            return
+        self._loading = True
+        last = self._rows[-1] if self._rows else None
+        worker = ReceptionPageWorker(
+            self.sync_service, self._generation, dict(self.filters), self.page_size,
+            before=last.created_at if last else None, before_id=last.id if last else None
+        )
+        worker.page_ready.connect(self._on_page_ready)
+        worker.failed.connect(self._on_failed)
+        _running_workers[:] = [w for w in _running_workers if not w.isFinished()]
+        _running_workers.append(worker)
+        worker.start()
+
+    def _on_page_ready(self, generation: int, page: List[ReceptionShort], total: Optional[int]):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._exhausted = len(page) < self.page_size
+        if total is not None:
+            self.total = total
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+        self.page_loaded.emit()
+
+    def _on_failed(self, generation: int, error: str):
+        if generation != self._generation:
+            return
+        # Повторная попытка — по кнопке «Обновить»
+        self._loading = False
+        self._exhausted = True
+        self.load_failed.emit(error)
+
 
 class HistoryDialog(QDialog):
     """Диалог просмотра истории приёмок."""
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, sync_service=None):
         super().__init__(parent)
         self.setWindowTitle("История приёмок")
         self.resize(800, 600)
         
-        self.sync_service = SyncService()
-        self.receptions: List[ReceptionShort] = []
+        self.sync_service = sync_service or SyncService()
+        self.model = ReceptionHistoryModel(self.sync_service, parent=self)
+        self.model.page_loaded.connect(self._update_counter)
+        self.model.load_failed.connect(self._on_load_failed)
+        self.export_worker: Optional[ExportWorker] = None
+        self.export_progress: Optional[QProgressDialog] = None
         
         self._setup_ui()
         self._load_data()
@@ -30,14 +208,45 @@ class HistoryDialog(QDialog):
     def _setup_ui(self):
         layout = QVBoxLayout(self)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "ТТН", "Дата", "Поставщик", "Статус"
-        ])
+        # Фильтры (применяются на сервере)
+        filter_layout = QHBoxLayout()
+        
+        self.status_combo = QComboBox()
+        self.status_combo.addItem("Все статусы", None)
+        for status in ReceptionStatus:
+            self.status_combo.addItem(status.value, status)
+        self.status_combo.currentIndexChanged.connect(self._load_data)
+        filter_layout.addWidget(self.status_combo)
+        
+        self.period_check = QCheckBox("Дата ТТН с")
+        self.period_check.toggled.connect(self._load_data)
+        filter_layout.addWidget(self.period_check)
+        self.date_from_edit = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.date_from_edit.setCalendarPopup(True)
+        filter_layout.addWidget(self.date_from_edit)
+        filter_layout.addWidget(QLabel("по"))
+        self.date_to_edit = QDateEdit(QDate.currentDate())
+        self.date_to_edit.setCalendarPopup(True)
+        filter_layout.addWidget(self.date_to_edit)
+        
+        self.supplier_edit = QLineEdit()
+        self.supplier_edit.setPlaceholderText("Поставщик")
+        self.supplier_edit.returnPressed.connect(self._load_data)
+        filter_layout.addWidget(self.supplier_edit)
+        
+        search_btn = QPushButton("Найти")
+        search_btn.clicked.connect(self._load_data)
+        filter_layout.addWidget(search_btn)
+        
+        layout.addLayout(filter_layout)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Фиксированная высота строк: представлению не нужно измерять все строки
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
@@ -51,15 +260,18 @@ class HistoryDialog(QDialog):
         
         layout.addWidget(self.table)
         
+        self.counter_label = QLabel("")
+        layout.addWidget(self.counter_label)
+        
         button_layout = QHBoxLayout()
         
         refresh_btn = QPushButton("Обновить")
         refresh_btn.clicked.connect(self._load_data)
         button_layout.addWidget(refresh_btn)
         
-        export_btn = QPushButton("📊 Экспорт в Excel (CSV)")
-        export_btn.clicked.connect(self._export_data)
-        button_layout.addWidget(export_btn)
+        self.export_btn = QPushButton("📊 Экспорт в Excel")
+        self.export_btn.clicked.connect(self._export_data)
+        button_layout.addWidget(self.export_btn)
         
         delete_selected_btn = QPushButton("🗑️ Удалить выбранные")
         delete_selected_btn.clicked.connect(self._delete_selected)
@@ -78,60 +290,75 @@ class HistoryDialog(QDialog):
         close_btn.setProperty("class", "secondary")
         layout.addWidget(close_btn)
 
+    def _filters(self) -> dict:
+        """Текущие фильтры в виде параметров SyncService.get_receptions_page."""
+        filters = {}
+        status = self.status_combo.currentData()
+        if status is not None:
+            filters["status"] = status
+        if self.period_check.isChecked():
+            filters["date_from"] = self.date_from_edit.date().toPython()
+            filters["date_to"] = self.date_to_edit.date().toPython()
+        supplier = self.supplier_edit.text().strip()
+        if supplier:
+            filters["supplier"] = supplier
+        return filters
+
     def _load_data(self):
-        self.table.setRowCount(0)
-        try:
-            self.receptions = self.sync_service.get_receptions(limit=50)
-            self.table.setRowCount(len(self.receptions))
-            
-            for row, r in enumerate(self.receptions):
-                self.table.setItem(row, 0, QTableWidgetItem(str(r.id)))
-                self.table.setItem(row, 1, QTableWidgetItem(r.ttn_number))
-                self.table.setItem(row, 2, QTableWidgetItem(r.ttn_date.strftime("%d.%m.%Y")))
-                self.table.setItem(row, 3, QTableWidgetItem(r.supplier))
-                
-                status_item = QTableWidgetItem(r.status.value)
-                if r.status == ReceptionStatus.COMPLETED:
-                    status_item.setForeground(Qt.darkGreen)
-                elif r.status == ReceptionStatus.PENDING:
-                    status_item.setForeground(Qt.darkRed) # Or orange
-                self.table.setItem(row, 4, status_item)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить историю: {e}")
+        self.counter_label.setText("Загрузка...")
+        self.model.reload(self._filters())
+
+    def _update_counter(self):
+        loaded = self.model.rowCount()
+        total = self.model.total if self.model.total is not None else loaded
+        self.counter_label.setText(f"Показано: {loaded} из {total}")
+
+    def _on_load_failed(self, error: str):
+        self.counter_label.setText("")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить историю: {error}")
 
     def _export_data(self):
-        """Экспорт данных в CSV."""
-        if not self.receptions:
+        """Экспорт позиций всех приёмок под фильтрами (не только загруженных) в XLSX или CSV."""
+        if not self.model.total:
             QMessageBox.warning(self, "Внимание", "Нет данных для экспорта")
             return
             
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Сохранить отчет", "report.csv", "CSV Files (*.csv)"
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Сохранить отчет", "report.xlsx", "Excel (*.xlsx);;CSV Files (*.csv)"
         )
         
         if not path:
             return
-            
-        try:
-            import csv
-            with open(path, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.writer(f, delimiter=";")
-                # Header
-                writer.writerow(["ID", "ТТН", "Дата", "Поставщик", "Статус"])
-                # Data
-                for r in self.receptions:
-                    writer.writerow([
-                        r.id,
-                        r.ttn_number,
-                        r.ttn_date.strftime("%d.%m.%Y"),
-                        r.supplier,
-                        r.status.value
-                    ])
-            
+        fmt = "csv" if path.lower().endswith(".csv") or selected_filter.startswith("CSV") else "xlsx"
+
+        # Выгрузка может быть большой: качается в фоне, окно не блокируется
+        self.export_btn.setEnabled(False)
+        self.export_progress = QProgressDialog("Получение отчёта с сервера...", None, 0, 0, self)
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setCancelButton(None)
+        self.export_progress.show()
+
+        self.export_worker = ExportWorker(self.sync_service, Path(path), fmt, self._filters())
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.done.connect(self._on_export_done)
+        _running_workers[:] = [w for w in _running_workers if not w.isFinished()]
+        _running_workers.append(self.export_worker)
+        self.export_worker.start()
+
+    def _on_export_progress(self, received: int):
+        if self.export_progress:
+            self.export_progress.setLabelText(f"Получение отчёта с сервера... {received / 1024 / 1024:.1f} МБ")
+
+    def _on_export_done(self, ok: bool, path: str):
+        if self.export_progress:
+            self.export_progress.close()
+            self.export_progress = None
+        self.export_btn.setEnabled(True)
+        if ok:
             QMessageBox.information(self, "Успех", f"Отчет сохранен: {path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл: {e}")
+        else:
+            QMessageBox.critical(self, "Ошибка", "Не удалось получить отчёт с сервера")
     
     def _open_detail_dialog(self):
         """Открыть детальный просмотр выбранной приёмки."""
@@ -140,7 +367,7 @@ class HistoryDialog(QDialog):
             return
         
         row = selected_rows[0].row()
-        reception_id = self.receptions[row].id
+        reception_id = self.model.reception_at(row).id
         
         detail_dialog = ReceptionDetailDialog(reception_id, self)
         detail_dialog.exec()
@@ -170,7 +397,7 @@ class HistoryDialog(QDialog):
         
         for selected_row in selected_rows:
             row = selected_row.row()
-            reception_id = self.receptions[row].id
+            reception_id = self.model.reception_at(row).id
             
             try:
                 if self.sync_service.delete_reception(reception_id):
@@ -179,7 +406,7 @@ class HistoryDialog(QDialog):
                     failed_count += 1
             except Exception as e:
                 failed_count += 1
-                print(f"Failed to delete reception {reception_id}: {e}")
+                logger.error(f"Failed to delete reception {reception_id}: {e}")
         
         if success_count > 0:
             QMessageBox.information(
@@ -197,14 +424,14 @@ class HistoryDialog(QDialog):
 
     def _delete_all(self):
         """Очистить всю историю приёмок."""
-        if not self.receptions:
+        if not self.model.total:
             QMessageBox.warning(self, "Внимание", "История пуста")
             return
         
         reply = QMessageBox.question(
             self,
             "Подтверждение",
-            f"ВЫ УВЕРЕНЫ, что хотите удалить ВСЕ приёмки ({len(self.receptions)} шт.)?\n\n"
+            f"ВЫ УВЕРЕНЫ, что хотите удалить ВСЕ приёмки ({self.model.total} шт.)?\n\n"
             "⚠️ ЭТО ДЕЙСТВИЕ НЕЛЬЗЯ ОТМЕНИТЬ!\n"
             "Будут удалены все данные о приёмках!",
             QMessageBox.Yes | QMessageBox.No,
@@ -7,6 +7,7 @@ from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QIcon
 
 from client.src.services import SyncService, CameraService
+from client.src.services.product_catalog import get_product_catalog
 from client.src.ui.styles import STYLES
 from client.src.ui.document_dialog import DocumentDialog
 from client.src.ui.history_dialog import HistoryDialog
@@ -34,6 +35,9 @@ class MainWindow(QMainWindow):
         self._start_health_check()
         self._check_camera()
 
+        # Справочник товаров: догрузка изменений при старте и по интервалу
+        get_product_catalog().start()
+
     def _setup_ui(self):
         """Настроить интерфейс."""
         # Применить стили
@@ -150,4 +154,5 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """Обработка закрытия окна."""
         self.health_timer.stop()
+        get_product_catalog().stop()
         super().closeEvent(event)
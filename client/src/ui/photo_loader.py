@@ -0,0 +1,208 @@
+"""Фоновая загрузка миниатюр фото товаров: пул потоков, кэш в памяти и на диске."""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import requests
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+from client.src.config import get_config
+from client.src.services import SyncService
+
+logger = logging.getLogger(__name__)
+
+# (ID приёмки, ID позиции, индекс фото)
+PhotoKey = Tuple[int, int, int]
+
+THUMBNAIL_SIZE = 150
+
+
+class PhotoDiskCache:
+    """
+    Фото на диске вместе с ETag сервера: повторный показ — условный запрос
+    (304 без тела), а без связи с сервером показывается сохранённая копия.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _base(self, key: PhotoKey) -> Path:
+        return self.directory / "_".join(str(part) for part in key)
+
+    def get(self, key: PhotoKey) -> Tuple[Optional[bytes], Optional[str]]:
+        """(содержимое, ETag) или (None, None), если копии нет."""
+        base = self._base(key)
+        try:
+            etag = base.with_suffix(".etag").read_text(encoding="utf-8")
+            return base.with_suffix(".img").read_bytes(), etag
+        except OSError:
+            return None, None
+
+    def put(self, key: PhotoKey, data: bytes, etag: str):
+        base = self._base(key)
+        try:
+            # Сначала ETag удаляется: копия без ETag не используется,
+            # поэтому прерванная запись не выдаст старый ETag с новым файлом
+            base.with_suffix(".etag").unlink(missing_ok=True)
+            tmp_path = base.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(base.with_suffix(".img"))
+            base.with_suffix(".etag").write_text(etag, encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Photo cache: failed to write {base.name}: {e}")
+
+
+class PixmapCache:
+    """LRU миниатюр с ограничением по объёму пикселей (только из GUI-потока)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[PhotoKey, QPixmap]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: PhotoKey) -> Optional[QPixmap]:
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def put(self, key: PhotoKey, pixmap: QPixmap):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= _pixmap_bytes(old)
+        self._entries[key] = pixmap
+        self.size_bytes += _pixmap_bytes(pixmap)
+        while self.size_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= _pixmap_bytes(evicted)
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * 4
+
+
+def decode_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> QImage:
+    """
+    Миниатюра не больше size x size с сохранением пропорций.
+
+    Размер задаётся декодеру заранее: JPEG уменьшается при декодировании,
+    полноразмерное изображение в памяти не создаётся.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        reader.setScaledSize(original.scaled(size, size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class PhotoLoader(QObject):
+    """
+    Загрузка миниатюр фото товаров в пуле потоков.
+
+    request() сразу возвращает миниатюру из памяти или ставит загрузку
+    в очередь; готовые миниатюры приходят сигналом photo_ready в GUI-поток.
+    Скачивание и декодирование идут в пуле, QPixmap создаётся в GUI-потоке.
+    """
+
+    photo_ready = Signal(object, QPixmap)  # ключ, миниатюра
+    photo_failed = Signal(object, str)  # ключ, ошибка
+    _decoded = Signal(object, object, str)  # ключ, QImage или None, ошибка
+
+    def __init__(self, sync_service=None, cache_dir: Optional[Path] = None, max_workers: int = 4,
+                 memory_bytes: int = 64 * 1024 * 1024, thumbnail_size: int = THUMBNAIL_SIZE, parent=None):
+        super().__init__(parent)
+        self.sync_service = sync_service or SyncService()
+        self.disk = PhotoDiskCache(cache_dir) if cache_dir else None
+        self.memory = PixmapCache(memory_bytes)
+        self.thumbnail_size = thumbnail_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="photo-loader")
+        self._pending: Dict[PhotoKey, Future] = {}
+        # Сигнал из потока пула доставляется в поток объекта (GUI) очередью событий
+        self._decoded.connect(self._on_decoded)
+
+    def request(self, reception_id: int, item_id: int, photo_index: int) -> Optional[QPixmap]:
+        """Миниатюра из памяти или None — тогда она придёт сигналом photo_ready/photo_failed."""
+        key = (reception_id, item_id, photo_index)
+        pixmap = self.memory.get(key)
+        if pixmap is not None:
+            return pixmap
+        if key not in self._pending:
+            self._pending[key] = self._executor.submit(self._load, key)
+        return None
+
+    def cancel_pending(self):
+        """Отменить ещё не начатые загрузки (например, выбран другой товар)."""
+        for key, future in list(self._pending.items()):
+            if future.cancel():
+                del self._pending[key]
+
+    def is_loading(self) -> bool:
+        return bool(self._pending)
+
+    def _load(self, key: PhotoKey):
+        try:
+            image = decode_thumbnail(self._fetch(key), self.thumbnail_size)
+            if image.isNull():
+                raise ValueError("не удалось декодировать изображение")
+            self._decoded.emit(key, image, "")
+        except Exception as e:
+            logger.error(f"Failed to load photo {key}: {e}")
+            self._decoded.emit(key, None, str(e))
+
+    def _fetch(self, key: PhotoKey) -> bytes:
+        cached, etag = self.disk.get(key) if self.disk else (None, None)
+        try:
+            data, new_etag = self.sync_service.get_photo(*key, etag=etag)
+        except requests.RequestException as e:
+            if cached is None:
+                raise
+            logger.warning(f"Server unavailable, showing cached photo {key}: {e}")
+            return cached
+        if data is None:
+            return cached
+        if self.disk and new_etag:
+            self.disk.put(key, data, new_etag)
+        return data
+
+    def _on_decoded(self, key: PhotoKey, image: Optional[QImage], error: str):
+        self._pending.pop(key, None)
+        if image is None:
+            self.photo_failed.emit(key, error)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.memory.put(key, pixmap)
+        self.photo_ready.emit(key, pixmap)
+
+
+_loader: Optional[PhotoLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_photo_loader() -> PhotoLoader:
+    """Общий загрузчик фото (создаётся по конфигу из GUI-потока): кэш живёт между диалогами."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            photos_config = get_config().get("photos", {})
+            cache_dir = photos_config.get("cache_dir")
+            if cache_dir and not Path(cache_dir).is_absolute():
+                cache_dir = Path.cwd() / cache_dir
+            _loader = PhotoLoader(
+                cache_dir=Path(cache_dir) if cache_dir else None,
+                max_workers=photos_config.get("workers", 4),
+                memory_bytes=int(photos_config.get("memory_cache_mb", 64) * 1024 * 1024),
+                thumbnail_size=photos_config.get("thumbnail_size", THUMBNAIL_SIZE),
+            )
+        return _loader
@@ -1,19 +1,19 @@
 """Диалог детального просмотра приёмки."""
 import logging
 import json
-import tempfile
-from typing import Optional
+from typing import Dict, Optional
 from pathlib import Path
 
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QTableWidget, QTableWidgetItem, QHeaderView, QTextEdit,
-    QGroupBox, QSplitter, QScrollArea, QMessageBox, QFileDialog
+    QGroupBox, QSplitter, QScrollArea, QMessageBox, QFileDialog, QWidget
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
 
 from client.src.services import SyncService
+from client.src.ui.photo_loader import PhotoKey, get_photo_loader
 from common.models import ReceptionRead
 
 logger = logging.getLogger(__name__)
@@ -22,15 +22,21 @@ logger = logging.getLogger(__name__)
 class ReceptionDetailDialog(QDialog):
     """Диалог для детального просмотра приёмки."""
     
-    def __init__(self, reception_id: int, parent=None):
+    def __init__(self, reception_id: int, parent=None, sync_service=None, photo_loader=None):
         super().__init__(parent)
         self.setWindowTitle(f"Просмотр приёмки #{reception_id}")
         self.resize(1400, 900)
         
         self.reception_id = reception_id
-        self.sync_service = SyncService()
+        self.sync_service = sync_service or SyncService()
         self.reception: Optional[ReceptionRead] = None
         
+        # Миниатюры фото выбранного товара: заглушки заполняются по мере загрузки
+        self.photo_loader = photo_loader or get_photo_loader()
+        self.photo_loader.photo_ready.connect(self._on_photo_ready)
+        self.photo_loader.photo_failed.connect(self._on_photo_failed)
+        self._photo_labels: Dict[PhotoKey, QLabel] = {}
+        
         self._setup_ui()
         self._load_data()
     
@@ -259,6 +265,8 @@ class ReceptionDetailDialog(QDialog):
     
     def _show_no_photos(self, text: str):
         """Показать сообщение об отсутствии фотографий."""
+        self.photo_loader.cancel_pending()
+        self._photo_labels = {}
         placeholder = QLabel(text)
         placeholder.setAlignment(Qt.AlignCenter)
         placeholder.setStyleSheet("border: 1px solid #ccc; background: #f9f9f9; padding: 10px;")
@@ -266,55 +274,53 @@ class ReceptionDetailDialog(QDialog):
         self.photos_widget = placeholder
     
     def _display_photos(self, photo_paths: list, item_id: int):
-        """Отобразить фотографии товара."""
-        from PySide6.QtWidgets import QWidget, QHBoxLayout
+        """Отобразить фотографии товара: заглушки сразу, миниатюры — по мере загрузки."""
+        # Загрузки фото предыдущего товара, которые ещё не начались, не нужны
+        self.photo_loader.cancel_pending()
         
         count = len(photo_paths)
+        size = self.photo_loader.thumbnail_size
+        
+        photos_container = QWidget()
+        photos_layout = QHBoxLayout(photos_container)
+        photos_layout.setContentsMargins(5, 5, 5, 5)
+        
+        self._photo_labels = {}
+        for i in range(count):
+            key = (self.reception_id, item_id, i)
+            label = QLabel("⏳")
+            label.setAlignment(Qt.AlignCenter)
+            label.setFixedSize(size + 8, size + 8)
+            label.setToolTip(f"Фото {i+1}/{count}")
+            label.setStyleSheet("border: 2px solid #ddd; padding: 2px;")
+            photos_layout.addWidget(label)
+            self._photo_labels[key] = label
+            
+            pixmap = self.photo_loader.request(*key)
+            if pixmap is not None:
+                label.setPixmap(pixmap)
         
-        temp_dir = Path(tempfile.gettempdir()) / f"tmc_photos_{item_id}"
-        temp_dir.mkdir(exist_ok=True)
-        
-        downloaded_count = 0
-        for i, photo_rel_path in enumerate(photo_paths):
-            try:
-                save_path = temp_dir / f"photo_{i}.jpg"
-                if self.sync_service.download_single_photo(
-                    self.reception_id, 
-                    item_id, 
-                    i, 
-                    save_path
-                ):
-                    downloaded_count += 1
-            except Exception as e:
-                logger.error(f"Failed to download photo {i}: {e}")
+        photos_layout.addStretch()
         
-        if downloaded_count > 0:
-            photos_container = QWidget()
-            photos_layout = QHBoxLayout(photos_container)
-            photos_layout.setContentsMargins(5, 5, 5, 5)
-            
-            for i in range(downloaded_count):
-                photo_path = temp_dir / f"photo_{i}.jpg"
-                if photo_path.exists():
-                    pixmap = QPixmap(str(photo_path))
-                    if not pixmap.isNull():
-                        label = QLabel()
-                        scaled = pixmap.scaled(
-                            150, 150, 
-                            Qt.KeepAspectRatio, 
-                            Qt.SmoothTransformation
-                        )
-                        label.setPixmap(scaled)
-                        label.setToolTip(f"Фото {i+1}/{count}")
-                        label.setStyleSheet("border: 2px solid #ddd; padding: 2px;")
-                        photos_layout.addWidget(label)
-            
-            photos_layout.addStretch()
-            
-            self.photos_scroll.setWidget(photos_container)
-            self.photos_widget = photos_container
-        else:
-            self._show_no_photos(f"❌ Не удалось загрузить фотографии ({count} доступно)")
+        self.photos_scroll.setWidget(photos_container)
+        self.photos_widget = photos_container
+    
+    def _on_photo_ready(self, key: PhotoKey, pixmap: QPixmap):
+        label = self._photo_labels.get(key)
+        if label is not None:
+            label.setPixmap(pixmap)
+    
+    def _on_photo_failed(self, key: PhotoKey, error: str):
+        label = self._photo_labels.get(key)
+        if label is not None:
+            label.setText("❌")
+            label.setToolTip(f"Не удалось загрузить фото: {error}")
+    
+    def done(self, result: int):
+        """При закрытии отменить ожидающие загрузки фото."""
+        self.photo_loader.cancel_pending()
+        self._photo_labels = {}
+        super().done(result)
     
     def _download_photos(self):
         """Скачать все фотографии выбранного товара."""
@@ -360,11 +366,16 @@ class ReceptionDetailDialog(QDialog):
     
     def _download_video(self):
         """Скачать видео приёмки."""
+        # Расширение как у файла на сервере (MJPG/AVI, H.264/MP4, VP9/WebM);
+        # несклеенные сегменты (плейлист) сервер отдаёт одним ZIP
+        ext = Path(self.reception.video_path).suffix if self.reception and self.reception.video_path else ".mp4"
+        if ext == ".m3u8":
+            ext = ".zip"
         save_path, _ = QFileDialog.getSaveFileName(
             self,
             "Сохранить видео",
-            f"reception_{self.reception_id}_video.avi",
-            "Video Files (*.avi *.mp4)"
+            f"reception_{self.reception_id}_video{ext}",
+            "Video Files (*.mp4 *.webm *.avi *.zip)"
         )
         
         if not save_path:
@@ -1,34 +1,316 @@
 """Виджет таблицы результатов распознавания."""
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import logging
 import uuid
 from PySide6.QtWidgets import (
-    QTableWidget, QTableWidgetItem, QHeaderView, 
-    QAbstractItemView, QMenu
+    QTableView, QHeaderView, QAbstractItemView, QMenu
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QThread
 from PySide6.QtGui import QColor, QAction
 
 from common.models import ReceptionItemCreate
+from common.product_matcher import ProductMatch, match_status
 
 logger = logging.getLogger(__name__)
 
+COLUMNS = ["Артикул", "Наименование", "Количество", "Ед.изм.", "Статус OCR", "БД", "Проверено"]
+# Редактируемые колонки и соответствующие поля позиции
+EDITABLE_FIELDS = {0: "article", 1: "name", 2: "quantity", 3: "unit"}
+DB_COLUMN = 5
+VERIFIED_COLUMN = 6
+
+SUSPICIOUS_BACKGROUND = QColor("#fff4ce")
+
+# Запущенные поиски: QThread нельзя уничтожать до завершения run(),
+# завершённые удаляются при следующем запуске (не из их сигнала finished)
+_running_workers: List[QThread] = []
+
+
+class ProductMatchWorker(QThread):
+    """Поиск позиций ТТН в справочнике в фоновом потоке (одним пакетом)."""
+
+    matches_ready = Signal(object, object)  # [(uuid, article, name)], кандидаты по позициям
+    failed = Signal(object, str)
+
+    def __init__(self, catalog, rows: List[Tuple[str, Optional[str], Optional[str]]]):
+        super().__init__()
+        self.catalog = catalog
+        self.rows = rows
+
+    def run(self):
+        try:
+            batch = self.catalog.match_many([(article, name) for _, article, name in self.rows])
+            self.matches_ready.emit(self.rows, batch)
+        except Exception as e:
+            logger.error(f"Error checking products in DB: {e}")
+            self.failed.emit(self.rows, str(e))
+
+
+class ResultsModel(QAbstractTableModel):
+    """
+    Позиции ТТН для ResultsWidget.
+
+    Хранит сами ReceptionItemCreate, ячейки вычисляются только для видимых
+    строк по запросу представления. Статус в справочнике загружается в фоне.
+    """
 
-class ResultsWidget(QTableWidget):
-    """Таблица для отображения и редактирования позиций."""
-    
     items_changed = Signal()
+    matches_updated = Signal()  # завершён фоновый поиск части позиций
 
-    def __init__(self, parent=None):
+    def __init__(self, catalog=None, parent=None):
         super().__init__(parent)
-        self._items: List[Tuple[str, ReceptionItemCreate]] = []  # (uuid, item)
-        self._updating = False
-        
-        self.setColumnCount(7)  # Добавили колонку "Проверено"
-        self.setHorizontalHeaderLabels([
-            "Артикул", "Наименование", "Количество", "Ед.изм.", "Статус OCR", "БД", "Проверено"
-        ])
-        
+        self._catalog = catalog
+        self._rows: List[Tuple[str, ReceptionItemCreate]] = []  # (uuid, item)
+        self._row_of: Dict[str, int] = {}
+        self._matches: Dict[str, List[ProductMatch]] = {}  # uuid -> кандидаты из справочника
+        self._errors: Dict[str, str] = {}
+        self._pending: Dict[str, Tuple[Optional[str], Optional[str]]] = {}  # uuid -> искомые (артикул, имя)
+        self._verified: Dict[str, bool] = {}  # uuid -> принято/отклонено
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            # Справочник товаров для проверки БД (общий, загружается один раз)
+            from client.src.services.product_catalog import get_product_catalog
+            self._catalog = get_product_catalog()
+        return self._catalog
+
+    def set_items(self, items: List[ReceptionItemCreate]):
+        """Заменить позиции и запустить их поиск в справочнике."""
+        self.beginResetModel()
+        self._rows = [(str(uuid.uuid4()), item) for item in items]
+        self._reindex()
+        self._matches.clear()
+        self._errors.clear()
+        self._pending.clear()
+        self._verified.clear()
+        self.endResetModel()
+        self._lookup([uid for uid, _ in self._rows])
+
+    def append_item(self, item: ReceptionItemCreate):
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        uid = str(uuid.uuid4())
+        self._rows.append((uid, item))
+        self._row_of[uid] = row
+        self.endInsertRows()
+        self._lookup([uid])
+
+    def remove_rows(self, rows: List[int]):
+        for row in sorted(set(rows), reverse=True):
+            if not 0 <= row < len(self._rows):
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            uid, _ = self._rows.pop(row)
+            for cache in (self._matches, self._errors, self._pending, self._verified):
+                cache.pop(uid, None)
+            self.endRemoveRows()
+        self._reindex()
+
+    def rows(self) -> List[Tuple[str, ReceptionItemCreate]]:
+        return list(self._rows)
+
+    def item_at(self, row: int) -> Optional[Tuple[str, ReceptionItemCreate]]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def matches(self, row: int) -> Optional[List[ProductMatch]]:
+        """
+        Кандидаты для позиции; None — фоновый поиск ещё идёт или не удался.
+
+        Поиск здесь не запускается: при пустом справочнике он идёт на сервер,
+        а это сетевой запрос из GUI-потока. Результат придёт с matches_updated.
+        """
+        entry = self.item_at(row)
+        if entry is None:
+            return []
+        return self._matches.get(entry[0])
+
+    def set_verified(self, row: int, accepted: Optional[bool]):
+        entry = self.item_at(row)
+        if entry is None:
+            return
+        if accepted is None:
+            self._verified.pop(entry[0], None)
+        else:
+            self._verified[entry[0]] = accepted
+        self._emit_row_changed(row, VERIFIED_COLUMN, VERIFIED_COLUMN)
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex):
+        flags = super().flags(index)
+        if index.isValid() and index.column() in EDITABLE_FIELDS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        uid, item = self._rows[index.row()]
+        column = index.column()
+
+        if column in EDITABLE_FIELDS:
+            field = EDITABLE_FIELDS[column]
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                value = getattr(item, field)
+                return str(value) if field == "quantity" else value
+            if role == Qt.BackgroundRole and field in item.suspicious_fields:
+                return SUSPICIOUS_BACKGROUND
+            if role == Qt.ToolTipRole and column == 0 and "article" in item.suspicious_fields:
+                return "Низкая уверенность OCR"
+            return None
+
+        if column == 4:
+            if role == Qt.DisplayRole:
+                return "⚠️ Проверьте" if item.suspicious_fields else "✓ OK"
+            return None
+
+        if column == DB_COLUMN:
+            text, color, tooltip = self._db_status(uid)
+            return {Qt.DisplayRole: text, Qt.ForegroundRole: color, Qt.ToolTipRole: tooltip}.get(role)
+
+        if column == VERIFIED_COLUMN and uid in self._verified:
+            accepted = self._verified[uid]
+            if role == Qt.DisplayRole:
+                return "✓ Принято" if accepted else "✗ Отклонено"
+            if role == Qt.ForegroundRole:
+                return QColor("green") if accepted else QColor("red")
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole) -> bool:
+        """Правка ячейки: меняет позицию на месте и снимает отметку низкой уверенности."""
+        if role != Qt.EditRole or not index.isValid() or index.column() not in EDITABLE_FIELDS:
+            return False
+        uid, item = self._rows[index.row()]
+        field = EDITABLE_FIELDS[index.column()]
+        text = str(value)
+
+        if field == "quantity":
+            try:
+                item.quantity = float(text)
+            except ValueError:
+                return False
+        else:
+            setattr(item, field, text)
+        if field in item.suspicious_fields:
+            item.suspicious_fields.remove(field)
+
+        if field in ("article", "name"):
+            self._matches.pop(uid, None)
+            self._errors.pop(uid, None)
+            self._lookup([uid])
+        self._emit_row_changed(index.row(), 0, len(COLUMNS) - 1)
+        self.items_changed.emit()
+        return True
+
+    # --- Поиск в справочнике ---
+
+    def _lookup(self, uids: List[str]):
+        rows = []
+        for uid in uids:
+            item = self._rows[self._row_of[uid]][1]
+            self._pending[uid] = (item.article, item.name)
+            rows.append((uid, item.article, item.name))
+        if not rows:
+            return
+        worker = ProductMatchWorker(self.catalog, rows)
+        worker.matches_ready.connect(self._on_matches_ready)
+        worker.failed.connect(self._on_matches_failed)
+        _running_workers[:] = [w for w in _running_workers if not w.isFinished()]
+        _running_workers.append(worker)
+        worker.start()
+
+    def _on_matches_ready(self, rows, batch):
+        for (uid, article, name), matches in zip(rows, batch):
+            # Позицию могли удалить или изменить, пока шёл поиск
+            if self._pending.get(uid) == (article, name):
+                del self._pending[uid]
+                self._matches[uid] = matches
+        self._emit_column_changed(DB_COLUMN)
+        self.matches_updated.emit()
+
+    def _on_matches_failed(self, rows, error: str):
+        for uid, article, name in rows:
+            if self._pending.get(uid) == (article, name):
+                del self._pending[uid]
+                self._errors[uid] = error
+        self._emit_column_changed(DB_COLUMN)
+        self.matches_updated.emit()
+
+    def is_loading(self) -> bool:
+        """Идёт ли ещё фоновый поиск позиций в справочнике."""
+        return bool(self._pending)
+
+    def _db_status(self, uid: str) -> Tuple[str, QColor, str]:
+        if uid in self._errors:
+            return "❓", QColor("gray"), f"Ошибка проверки БД: {self._errors[uid]}"
+        matches = self._matches.get(uid)
+        if matches is None:
+            return "...", QColor("gray"), "Поиск в справочнике..."
+
+        status = match_status(matches)
+        if status == "ambiguous":
+            return "≈ Похожие", QColor("#b8860b"), "Точного совпадения нет, похожие товары:\n" + "\n".join(
+                f"{m.score:.0%}  {m.product.article} — {m.product.name}" for m in matches
+            )
+        if status == "none":
+            return "❌ Нет в БД", QColor("red"), "Товар не найден в базе данных"
+
+        product = matches[0].product
+        if product.requires_control:
+            text, color = "⚠️ Контроль", QColor("orange")
+            tooltip = f"Товар требует контроля: {product.control_type or 'не указан'}"
+        else:
+            text, color = "✓ В БД", QColor("green")
+            tooltip = "Товар найден в базе, контроль не требуется"
+        if status == "confident":
+            tooltip += f"\nНайден по наименованию: {product.article} — {product.name} ({matches[0].score:.0%})"
+        return text, color, tooltip
+
+    def _reindex(self):
+        self._row_of = {uid: row for row, (uid, _) in enumerate(self._rows)}
+
+    def _emit_row_changed(self, row: int, first_column: int, last_column: int):
+        self.dataChanged.emit(self.index(row, first_column), self.index(row, last_column))
+
+    def _emit_column_changed(self, column: int):
+        if self._rows:
+            self.dataChanged.emit(self.index(0, column), self.index(len(self._rows) - 1, column))
+
+
+class ResultsWidget(QTableView):
+    """
+    Таблица для отображения и редактирования позиций.
+
+    Представление над ResultsModel: отрисовываются только видимые строки
+    (высота строк фиксирована), выбор и правка строки не зависят от размера ТТН.
+    """
+
+    items_changed = Signal()
+    itemSelectionChanged = Signal()
+    matches_updated = Signal()
+
+    def __init__(self, parent=None, catalog=None):
+        super().__init__(parent)
+        self._model = ResultsModel(catalog, self)
+        self.setModel(self._model)
+        self._model.items_changed.connect(self.items_changed)
+        self._model.matches_updated.connect(self.matches_updated)
+        self.selectionModel().selectionChanged.connect(lambda *_: self.itemSelectionChanged.emit())
+
         # Размеры колонок (фиксированные для стабильности)
         header = self.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Fixed)
@@ -44,196 +326,42 @@ class ResultsWidget(QTableWidget):
         header.resizeSection(5, 110)  # БД статус
         header.setSectionResizeMode(6, QHeaderView.Fixed)
         header.resizeSection(6, 120)  # Проверено
-        
+        # Фиксированная высота строк: представлению не нужно измерять все строки
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
         self.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._show_context_menu)
-        
-        self.itemChanged.connect(self._on_item_changed)
-        self._items: List[Tuple[str, ReceptionItemCreate]] = []
-        self._updating = False
 
     def set_items(self, items: List[ReceptionItemCreate]):
-        """Установить список позиций."""
-        self._updating = True
-        # Generate UUIDs for new items
-        self._items = [(str(uuid.uuid4()), item) for item in items]
-        self.setRowCount(len(items))
-        
-        # Импортируем SyncService для проверки БД
-        from client.src.services import SyncService
-        sync_service = SyncService()
-        
-        for row, (uid, item) in enumerate(self._items):
-            # Артикул
-            art_item = QTableWidgetItem(item.article)
-            if "article" in item.suspicious_fields:
-                art_item.setBackground(QColor("#fff4ce"))
-                art_item.setToolTip("Низкая уверенность OCR")
-            self.setItem(row, 0, art_item)
-            
-            # Наименование
-            name_item = QTableWidgetItem(item.name)
-            if "name" in item.suspicious_fields:
-                name_item.setBackground(QColor("#fff4ce"))
-            self.setItem(row, 1, name_item)
-            
-            # Количество
-            qty_item = QTableWidgetItem(str(item.quantity))
-            if "quantity" in item.suspicious_fields:
-                qty_item.setBackground(QColor("#fff4ce"))
-            self.setItem(row, 2, qty_item)
-            
-            # Ед.изм.
-            unit_item = QTableWidgetItem(item.unit)
-            if "unit" in item.suspicious_fields:
-                unit_item.setBackground(QColor("#fff4ce"))
-            self.setItem(row, 3, unit_item)
-            
-            # Статус OCR
-            ocr_status = "⚠️ Проверьте" if item.suspicious_fields else "✓ OK"
-            ocr_item = QTableWidgetItem(ocr_status)
-            ocr_item.setFlags(ocr_item.flags() ^ Qt.ItemIsEditable)
-            self.setItem(row, 4, ocr_item)
-            
-            # Статус БД - проверяем наличие товара в базе
-            db_status = QTableWidgetItem("...")
-            db_status.setFlags(db_status.flags() ^ Qt.ItemIsEditable)
-            # БД статус - проверка наличия в базе
-            db_status_text = "❓"
-            db_status_color = QColor("gray")
-            db_tooltip = "Ошибка при проверке БД"
-            
-            try:
-                # Если артикул пустой - попробовать найти по наименованию
-                product = None
-                if item.article and item.article.strip():
-                    product = sync_service.get_product_by_article(item.article)
-                
-                # Fallback: поиск по наименованию если артикул пустой
-                if not product and item.name and item.name.strip():
-                    all_products = sync_service.get_all_products()
-                    # Поиск по частичному совпадению наименования
-                    for p in all_products:
-                        if p.name.lower() in item.name.lower() or item.name.lower() in p.name.lower():
-                            product = p
-                            break
-                
-                if product:
-                    if product.requires_control:
-                        db_status_text = "⚠️ Контроль"
-                        db_status_color = QColor("orange")
-                        db_tooltip = f"Товар требует контроля: {product.control_type or 'не указан'}"
-                    else:
-                        db_status_text = "✓ В БД"
-                        db_status_color = QColor("green")
-                        db_tooltip = "Товар найден в базе, контроль не требуется"
-                else:
-                    db_status_text = "❌ Нет в БД"
-                    db_status_color = QColor("red")
-                    db_tooltip = "Товар не найден в базе данных"
-            except Exception as e:
-                logger.error(f"Error checking product in DB: {e}")
-                db_status_text = "❓"
-                db_status_color = QColor("gray")
-                db_tooltip = f"Ошибка проверки БД: {e}"
-
-            db_status.setText(db_status_text)
-            db_status.setForeground(db_status_color)
-            db_status.setToolTip(db_tooltip)
-            self.setItem(row, 5, db_status)
-            
-        self._updating = False
+        """Установить список позиций (статус в справочнике загружается в фоне)."""
+        self._model.set_items(items)
 
     def get_items(self) -> List[ReceptionItemCreate]:
-        """Получить список позиций из таблицы (без UUID)."""
-        # Reconstruct items from table to capture edits
-        return [item for _, item in self.get_items_with_uuids()]
+        """Получить список позиций (без UUID)."""
+        return [item for _, item in self._model.rows()]
 
     def get_items_with_uuids(self) -> List[Tuple[str, ReceptionItemCreate]]:
         """Получить список позиций с их UUID."""
-        items_with_uuids = []
-        for row in range(self.rowCount()):
-            if row >= len(self._items):
-                continue
-                
-            original_uuid, original_item = self._items[row]
-            
-            article = self.item(row, 0).text()
-            name = self.item(row, 1).text()
-            quantity_text = self.item(row, 2).text()
-            unit = self.item(row, 3).text()
-            
-            try:
-                quantity = float(quantity_text)
-            except ValueError:
-                quantity = 0.0
-            
-            # Create new item with updated fields but keep original suspicious_fields
-            # (or update them if user edited, but here we just copy for simplicity)
-            # Ideally we should track if user edited suspicious fields.
-            # In _on_item_changed we update the object in self._items.
-            # So we can just return the object from self._items!
-            # But wait, self._items is updated in _on_item_changed.
-            # So we can just return self._items?
-            # Yes, provided self._items stays in sync with rows.
-            # _delete_selected_row keeps it in sync.
-            # _add_row keeps it in sync.
-            # _on_item_changed updates the object in place.
-            
-            items_with_uuids.append((original_uuid, original_item))
-            
-        return items_with_uuids
+        return self._model.rows()
+
+    def get_item(self, row: int) -> Optional[ReceptionItemCreate]:
+        """Получить позицию по индексу строки."""
+        entry = self._model.item_at(row)
+        return entry[1] if entry else None
 
     def get_item_uuid(self, row: int) -> Optional[str]:
         """Получить UUID товара по индексу строки."""
-        if 0 <= row < len(self._items):
-            return self._items[row][0]
-        return None
+        entry = self._model.item_at(row)
+        return entry[0] if entry else None
 
-    def _on_item_changed(self, item: QTableWidgetItem):
-        """Обработка редактирования ячейки."""
-        if self._updating:
-            return
-            
-        row = item.row()
-        col = item.column()
-        
-        if row < 0 or row >= len(self._items):
-            return
-            
-        _, obj = self._items[row]
-        text = item.text()
-        
-        if col == 0:
-            obj.article = text
-            if "article" in obj.suspicious_fields:
-                obj.suspicious_fields.remove("article")
-                item.setBackground(Qt.white)
-        elif col == 1:
-            obj.name = text
-            if "name" in obj.suspicious_fields:
-                obj.suspicious_fields.remove("name")
-                item.setBackground(Qt.white)
-        elif col == 2:
-            try:
-                obj.quantity = float(text)
-                if "quantity" in obj.suspicious_fields:
-                    obj.suspicious_fields.remove("quantity")
-                    item.setBackground(Qt.white)
-            except ValueError:
-                pass # Вернуть старое значение? Пока оставим как есть
-        elif col == 3:
-            obj.unit = text
-            if "unit" in obj.suspicious_fields:
-                obj.suspicious_fields.remove("unit")
-                item.setBackground(Qt.white)
-                
-        # Обновить статус
-        if not obj.suspicious_fields:
-            self.item(row, 4).setText("OK")
-            
-        self.items_changed.emit()
+    def get_matches(self, row: int) -> Optional[List[ProductMatch]]:
+        """Кандидаты из справочника для позиции (None — поиск ещё не завершён или не удался)."""
+        return self._model.matches(row)
+
+    def set_verified(self, row: int, accepted: Optional[bool]):
+        """Отметить строку в колонке «Проверено» (None — снять отметку)."""
+        self._model.set_verified(row, accepted)
 
     def _show_context_menu(self, position):
         """Контекстное меню."""
@@ -241,26 +369,21 @@ class ResultsWidget(QTableWidget):
         delete_action = QAction("Удалить строку", self)
         delete_action.triggered.connect(self._delete_selected_row)
         menu.addAction(delete_action)
-        
+
         add_action = QAction("Добавить строку", self)
         add_action.triggered.connect(self._add_row)
         menu.addAction(add_action)
-        
+
         menu.exec(self.viewport().mapToGlobal(position))
 
     def _delete_selected_row(self):
         """Удалить выделенную строку."""
-        rows = sorted(set(index.row() for index in self.selectedIndexes()), reverse=True)
-        for row in rows:
-            self.removeRow(row)
-            del self._items[row]
+        self._model.remove_rows([index.row() for index in self.selectionModel().selectedRows()])
         self.items_changed.emit()
 
     def _add_row(self):
         """Добавить новую пустую строку."""
-        new_item = ReceptionItemCreate(
+        self._model.append_item(ReceptionItemCreate(
             article="", name="Новый товар", quantity=1, unit="шт", suspicious_fields=[]
-        )
-        self._items.append((str(uuid.uuid4()), new_item))
-        self.set_items([item for _, item in self._items]) # Перерисовать всё проще
+        ))
         self.items_changed.emit()
@@ -1,11 +1,20 @@
 """Виджет для отображения видео с камеры."""
+from typing import Optional
+
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PySide6.QtCore import Qt, Slot, QTimer, QDateTime
+from PySide6.QtCore import Qt, Signal, Slot, QTimer, QDateTime, QSize
 from PySide6.QtGui import QImage, QPixmap, QPainter, QFont, QColor
 
 
 class VideoWidget(QWidget):
-    """Виджет для отображения видеопотока с фиксированным аспектом."""
+    """
+    Виджет для отображения видеопотока с фиксированным аспектом.
+
+    Размер области показа сообщается сигналом display_size_changed: камера
+    присылает кадры уже этого размера, и масштабировать их не нужно.
+    """
+
+    display_size_changed = Signal(int, int)  # ширина, высота области показа в пикселях
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -74,6 +83,22 @@ class VideoWidget(QWidget):
         self.limit_label.setWordWrap(True)
         self.limit_label.hide()
         
+        # Overlay для фактического FPS и джиттера захвата (слева снизу)
+        self.stats_label = QLabel(self)
+        self.stats_label.setStyleSheet("""
+            QLabel {
+                background-color: rgba(0, 0, 0, 140);
+                color: white;
+                padding: 4px 8px;
+                font-family: monospace;
+                font-size: 11px;
+                border-radius: 4px;
+            }
+        """)
+        self.stats_label.hide()
+        self.capture_fps = 0.0
+        self.capture_jitter_ms = 0.0
+        
         # Таймер для обновления времени записи
         self.update_timer = QTimer(self)
         self.update_timer.timeout.connect(self._update_info)
@@ -82,36 +107,60 @@ class VideoWidget(QWidget):
 
     @Slot(QImage)
     def update_frame(self, image: QImage):
-        """Обновить кадр с сохранением аспекта."""
-        self.current_image = image.copy()
+        """
+        Обновить кадр с сохранением аспекта.
+
+        Кадр не копируется: QImage ссылается на буфер кольца захвата камеры.
+        """
+        self.current_image = image
         
         if image.width() > 0 and image.height() > 0:
             self.video_aspect_ratio = image.width() / image.height()
         
         self._update_display()
     
+    @Slot(float, float)
+    def update_capture_stats(self, fps: float, jitter_ms: float):
+        """Показать фактический FPS и джиттер захвата."""
+        self.capture_fps = fps
+        self.capture_jitter_ms = jitter_ms
+        self.stats_label.setText(f"{fps:.1f} fps · ±{jitter_ms:.1f} мс")
+        self.stats_label.show()
+        self._position_overlays()
+    
     def _update_display(self):
         """Обновить отображение с учетом аспекта."""
-        if not self.current_image:
+        if self.current_image is None:
             return
             
         pixmap = QPixmap.fromImage(self.current_image)
-        scaled = pixmap.scaled(
-            self.image_label.size(),
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        self.image_label.setPixmap(scaled)
+        target = self._display_size()
+        # Кадр уже уменьшен камерой под виджет: масштабируем только пока
+        # после изменения размера не пришли кадры нового размера
+        if not (pixmap.width() <= target.width() and pixmap.height() <= target.height()
+                and (pixmap.width() >= target.width() - 2 or pixmap.height() >= target.height() - 2)):
+            pixmap = pixmap.scaled(target, Qt.KeepAspectRatio, Qt.FastTransformation)
+        pixmap.setDevicePixelRatio(self.image_label.devicePixelRatioF())
+        self.image_label.setPixmap(pixmap)
+
+    def _display_size(self) -> QSize:
+        """Размер области показа в физических пикселях экрана."""
+        ratio = self.image_label.devicePixelRatioF()
+        size = self.image_label.size()
+        return QSize(int(size.width() * ratio), int(size.height() * ratio))
 
     def clear(self):
         """Очистить изображение."""
         self.image_label.clear()
         self.image_label.setText("Нет сигнала")
         self.current_image = None
+        self.stats_label.hide()
 
-    def get_current_frame(self) -> QImage:
-        """Получить текущий кадр."""
-        return self.current_image
+    def get_current_frame(self) -> Optional[QImage]:
+        """Получить копию текущего кадра (буфер камеры переиспользуется)."""
+        if self.current_image is None:
+            return None
+        return self.current_image.copy()
     
     def sizeHint(self):
         """Предложить размер с сохранением aspect ratio 16:9."""
@@ -217,6 +266,11 @@ class VideoWidget(QWidget):
             y = 10
             self.status_label.move(x, y)
         
+        # Stats label - слева снизу
+        if self.stats_label.isVisible():
+            self.stats_label.adjustSize()
+            self.stats_label.move(10, self.height() - self.stats_label.height() - 10)
+        
         # Позиционировать limit_label по центру
         if self.limit_label.isVisible():
             self.limit_label.setMaximumWidth(self.width() - 40)
@@ -256,5 +310,7 @@ class VideoWidget(QWidget):
         """Обработка изменения размера."""
         super().resizeEvent(event)
         self._position_overlays()
-        if self.current_image:
+        size = self._display_size()
+        self.display_size_changed.emit(size.width(), size.height())
+        if self.current_image is not None:
             self._update_display()
@@ -89,6 +89,40 @@ class ProductRead(ProductBase):
     """Модель для чтения товара из API/БД."""
     id: int = Field(..., description="ID товара в БД")
     created_at: datetime = Field(..., description="Дата и время создания записи")
+    updated_at: Optional[datetime] = Field(None, description="Дата и время последнего изменения")
+
+
+class ProductTombstoneRead(BaseModel):
+    """Отметка об удалении товара (для дельта-синхронизации справочника)."""
+    id: int = Field(..., description="ID отметки")
+    product_id: int = Field(..., description="ID удалённого товара")
+    article: str = Field(..., description="Артикул удалённого товара")
+    deleted_at: datetime = Field(..., description="Дата и время удаления")
+
+
+class ProductLookupQuery(BaseModel):
+    """Позиция ТТН для поиска в справочнике."""
+    article: Optional[str] = Field(None, description="Распознанный артикул")
+    name: Optional[str] = Field(None, description="Распознанное наименование")
+
+
+class ProductLookupRequest(BaseModel):
+    """Пакетный поиск позиций ТТН в справочнике."""
+    items: List[ProductLookupQuery] = Field(..., max_length=10000, description="Позиции ТТН")
+    limit: int = Field(5, ge=1, le=20, description="Сколько кандидатов вернуть на позицию")
+
+
+class ProductCandidate(BaseModel):
+    """Товар справочника, подходящий к позиции ТТН."""
+    product: ProductRead
+    score: float = Field(..., description="Оценка похожести 0..1")
+    by_article: bool = Field(False, description="Найден по артикулу")
+
+
+class ProductLookupResult(BaseModel):
+    """Результат поиска одной позиции ТТН."""
+    status: str = Field(..., description="article, confident, ambiguous или none")
+    candidates: List[ProductCandidate] = Field(default_factory=list)
 
 
 class ReceptionItemBase(BaseModel):
@@ -226,6 +260,18 @@ class ReceptionRead(ReceptionBase):
     )
 
 
+class VideoSegment(BaseModel):
+    """Сегмент видеозаписи, загруженный до завершения приёмки."""
+    index: int = Field(..., ge=0, description="Номер сегмента (с 0)")
+    duration: float = Field(..., ge=0, description="Длительность сегмента, секунды")
+
+
+class VideoSegmentsFinalize(BaseModel):
+    """Завершение сегментной загрузки видео: сегменты переносятся в приёмку."""
+    upload_id: str = Field(..., pattern=r"^[0-9a-f]{32}$", description="ID загрузки, выданный клиентом")
+    segments: List[VideoSegment] = Field(..., min_length=1, description="Сегменты по порядку записи")
+
+
 class SyncLogRead(BaseModel):
     """Модель для чтения записей логов синхронизации (опционально)."""
     id: int
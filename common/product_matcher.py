@@ -0,0 +1,175 @@
+"""Нечёткое сопоставление позиций ТТН со справочником товаров."""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from common.models import ProductRead
+
+# Латинские буквы, которые OCR путает с кириллическими (после lower()), и ё -> е
+_HOMOGLYPHS = str.maketrans("aceopxykmthbё", "асеорхукмтнве")
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Ниже MATCH_THRESHOLD товар считается не найденным; совпадение увереннее
+# CONFIDENT_SCORE и с отрывом AMBIGUITY_MARGIN от второго кандидата — однозначное
+MATCH_THRESHOLD = 0.6
+CONFIDENT_SCORE = 0.85
+AMBIGUITY_MARGIN = 0.1
+
+# Сколько вхождений редких триграмм запроса перебирать при отборе кандидатов
+CANDIDATE_BUDGET = 1000
+
+
+def normalize(text: Optional[str]) -> str:
+    """Привести строку к виду для сравнения: регистр, ё, латиница-двойники, пунктуация."""
+    if not text:
+        return ""
+    return " ".join(_NON_WORD.sub(" ", text.lower().translate(_HOMOGLYPHS)).replace("_", " ").split())
+
+
+def name_trigrams(text: Optional[str]) -> Set[str]:
+    """Триграммы слов (с пробелами по краям), порядок слов не важен."""
+    return _trigrams(normalize(text))
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    grams = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(common, size_a, size_b):
+    """
+    Оценка 0..1 по числу общих триграмм (числа или массивы numpy): среднее
+    коэффициента Дайса и доли общих триграмм в меньшей строке — имя товара
+    внутри более длинной строки ТТН тоже хорошее совпадение.
+    """
+    return (2 * common / (size_a + size_b) + common / np.maximum(np.minimum(size_a, size_b), 1)) / 2
+
+
+@dataclass
+class ProductMatch:
+    """Кандидат из справочника для позиции ТТН."""
+    product: ProductRead
+    score: float
+    by_article: bool = False
+
+
+def match_status(matches: List[ProductMatch]) -> str:
+    """
+    Качество сопоставления по ранжированным кандидатам.
+
+    Returns:
+        "article" — найден по артикулу, "confident" — однозначно по наименованию,
+        "ambiguous" — есть похожие, нужна проверка, "none" — не найден
+    """
+    if not matches or matches[0].score < MATCH_THRESHOLD:
+        return "none"
+    if matches[0].by_article:
+        return "article"
+    runner_up = matches[1].score if len(matches) > 1 else 0.0
+    if matches[0].score >= CONFIDENT_SCORE and matches[0].score - runner_up >= AMBIGUITY_MARGIN:
+        return "confident"
+    return "ambiguous"
+
+
+class ProductMatcher:
+    """
+    Неизменяемый индекс справочника: артикулы (точные и нормализованные)
+    и инвертированный триграммный индекс наименований.
+    """
+
+    def __init__(self, products: Iterable[ProductRead]):
+        self.products: List[ProductRead] = list(products)
+        self.by_article: Dict[str, ProductRead] = {}
+        self._by_normalized_article: Dict[str, ProductRead] = {}
+        # Индекс по различным нормализованным наименованиям: у вариантов
+        # одного товара с разными артикулами имя часто совпадает
+        self._name_products: List[List[int]] = []
+        postings: Dict[str, List[int]] = {}
+        sizes: List[int] = []
+
+        name_ids: Dict[str, int] = {}
+        for index, product in enumerate(self.products):
+            self.by_article.setdefault(product.article, product)
+            self._by_normalized_article.setdefault(_article_key(product.article), product)
+            key = normalize(product.name)
+            name_id = name_ids.get(key)
+            if name_id is None:
+                name_id = name_ids[key] = len(sizes)
+                grams = _trigrams(key)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(name_id)
+                sizes.append(len(grams))
+                self._name_products.append([])
+            self._name_products[name_id].append(index)
+
+        self._postings: Dict[str, np.ndarray] = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        self._sizes = np.array(sizes, dtype=np.float32)
+
+    def get_by_article(self, article: Optional[str]) -> Optional[ProductRead]:
+        """Товар по артикулу: точно, затем без учёта регистра, пробелов, дефисов и двойников букв."""
+        if not article or not article.strip():
+            return None
+        return self.by_article.get(article) or self._by_normalized_article.get(_article_key(article))
+
+    def match(self, article: Optional[str], name: Optional[str], k: int = 5,
+              min_score: float = 0.3) -> List[ProductMatch]:
+        """Топ-k кандидатов для позиции ТТН: товар по артикулу первым, затем по наименованию."""
+        product = self.get_by_article(article)
+        matches = [ProductMatch(product, 1.0, by_article=True)] if product else []
+        for candidate in self.match_name(name, k=k, min_score=min_score):
+            if len(matches) >= k:
+                break
+            if product is None or candidate.product.id != product.id:
+                matches.append(candidate)
+        return matches
+
+    def match_name(self, name: Optional[str], k: int = 5, min_score: float = 0.3) -> List[ProductMatch]:
+        """Топ-k товаров по похожести наименования (по убыванию оценки)."""
+        query = name_trigrams(name)
+        postings = sorted((self._postings[gram] for gram in query if gram in self._postings), key=len)
+        if not postings:
+            return []
+
+        # Кандидаты — наименования с редкими триграммами запроса: берём самые
+        # редкие (хотя бы одну), пока суммарно они дают не больше CANDIDATE_BUDGET
+        # вхождений. Частые триграммы вроде « бо» из «болт» кандидатов
+        # не порождают, но учитываются в оценке.
+        count, total = 0, 0
+        for posting in postings:
+            if count and total + len(posting) > CANDIDATE_BUDGET:
+                break
+            count, total = count + 1, total + len(posting)
+        candidates = np.unique(np.concatenate(postings[:count]))
+
+        # Общие триграммы с запросом — одним bincount по всем спискам вхождений
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._sizes))
+        common = shared[candidates]
+
+        scores = similarity(common, self._sizes[candidates], len(query))
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k)[:k]
+            candidates, scores = candidates[top], scores[top]
+        # По убыванию оценки, при равенстве — по порядку в справочнике
+        order = np.lexsort((candidates, -scores))
+
+        matches = []
+        for name_id, score in zip(candidates[order].tolist(), scores[order].tolist()):
+            if score < min_score:
+                break
+            for index in self._name_products[name_id][:k - len(matches)]:
+                matches.append(ProductMatch(self.products[index], score))
+            if len(matches) >= k:
+                break
+        return matches
+
+
+def _article_key(article: str) -> str:
+    return normalize(article).replace(" ", "")
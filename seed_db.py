@@ -2,6 +2,7 @@ import sys
 import os
 import logging
 import json
+from datetime import datetime
 from pathlib import Path
 
 # Add project root to path
@@ -251,7 +252,8 @@ def seed_database():
                     unit=p_data["unit"],
                     requires_control=p_data["requires_control"],
                     control_type=p_data.get("control_type"),
-                    control_params=json.dumps(p_data.get("control_params")) if p_data.get("control_params") else None
+                    control_params=json.dumps(p_data.get("control_params")) if p_data.get("control_params") else None,
+                    updated_at=datetime.now()
                 ).where(Product.id == existing.id)
                 query.execute()
                 logger.info(f"Updated: {p_data['article']} - {p_data['name']}")
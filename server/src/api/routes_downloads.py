@@ -4,15 +4,17 @@ import json
 import zipfile
 import io
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
 from fastapi.responses import FileResponse, StreamingResponse
 
 from common.models import APIError
 from server.src.config import get_config
 from server.src.db.repository import ReceptionRepository
 from server.src.db.models import ReceptionItem
+from server.src.export import iter_zip
+from server.src.video_segments import read_playlist
 
 router = APIRouter(prefix="/receptions", tags=["Downloads"])
 logger = logging.getLogger(__name__)
@@ -93,10 +95,21 @@ def download_video(reception_id: int):
         raise HTTPException(status_code=404, detail="Video file not found on disk")
     
     ext = video_path.suffix.lower()
+    if ext == '.m3u8':
+        # Сегменты без склейки: плейлист и файлы сегментов одним ZIP
+        files = [(video_path, video_path.name)] + [(path, path.name) for path in read_playlist(video_path)]
+        logger.info(f"Sending video playlist as ZIP: {video_path} ({len(files) - 1} segments)")
+        return StreamingResponse(
+            iter_zip(files),
+            media_type="application/zip",
+            headers={"Content-Disposition": f"attachment; filename=reception_{reception_id}_video.zip"}
+        )
+    
     media_type_map = {
         '.avi': 'video/x-msvideo',
         '.mp4': 'video/mp4',
-        '.mov': 'video/quicktime'
+        '.mov': 'video/quicktime',
+        '.webm': 'video/webm'
     }
     media_type = media_type_map.get(ext, 'video/x-msvideo')
     
@@ -172,9 +185,17 @@ def download_item_photos(reception_id: int, item_id: int):
     )
 
 
-@router.get("/{reception_id}/items/{item_id}/photos/{photo_index}", responses={404: {"model": APIError}})
-def download_single_photo(reception_id: int, item_id: int, photo_index: int):
-    """Скачать конкретную фотографию товара по индексу (начиная с 0)."""
+@router.get(
+    "/{reception_id}/items/{item_id}/photos/{photo_index}",
+    responses={304: {"description": "Фото не изменилось"}, 404: {"model": APIError}}
+)
+def download_single_photo(reception_id: int, item_id: int, photo_index: int,
+                          if_none_match: Optional[str] = Header(None)):
+    """
+    Скачать конкретную фотографию товара по индексу (начиная с 0).
+
+    ETag — размер и время изменения файла: клиент с копией в кэше получает 304 без тела.
+    """
     logger.info(f"Single photo download: reception={reception_id}, item={item_id}, index={photo_index}")
     
     item = ReceptionItem.get_or_none(ReceptionItem.id == item_id)
@@ -207,6 +228,11 @@ def download_single_photo(reception_id: int, item_id: int, photo_index: int):
         logger.error(f"Photo file not found: {photo_path}")
         raise HTTPException(status_code=404, detail="Photo file not found on disk")
     
+    stat = photo_path.stat()
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
     ext = photo_path.suffix.lower()
     media_type_map = {
         '.jpg': 'image/jpeg',
@@ -215,10 +241,11 @@ def download_single_photo(reception_id: int, item_id: int, photo_index: int):
     }
     media_type = media_type_map.get(ext, 'image/jpeg')
     
-    logger.info(f"Sending photo: {photo_path} ({photo_path.stat().st_size} bytes)")
+    logger.info(f"Sending photo: {photo_path} ({stat.st_size} bytes)")
     
     return FileResponse(
         path=str(photo_path),
         media_type=media_type,
-        filename=f"item_{item_id}_photo_{photo_index + 1}{ext}"
+        filename=f"item_{item_id}_photo_{photo_index + 1}{ext}",
+        headers={"ETag": etag}
     )
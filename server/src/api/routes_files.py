@@ -4,10 +4,14 @@ import logging
 import mimetypes
 from pathlib import Path
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import Path as PathParam
 
-from common.models import APIError
+from common.models import APIError, VideoSegmentsFinalize
 from server.src.config import get_config
 from server.src.db.repository import ReceptionRepository
+from server.src.video_segments import (
+    PLAYLIST_NAME, cleanup_stale_uploads, find_segment, segment_filename, stitch_segments, write_playlist
+)
 
 router = APIRouter(prefix="/receptions", tags=["Files"])
 logger = logging.getLogger(__name__)
@@ -24,7 +28,8 @@ ALLOWED_VIDEO_TYPES = {
     'video/x-msvideo',  # .avi
     'video/mp4',
     'video/mpeg',
-    'video/quicktime'   # .mov
+    'video/quicktime',  # .mov
+    'video/webm'
 }
 
 
@@ -68,28 +73,31 @@ def _validate_file_type(file: UploadFile, allowed_types: set) -> None:
         )
 
 
-def _save_file(reception_id: int, file: UploadFile, filename: str) -> str:
-    """Сохранить файл и вернуть относительный путь."""
-    logger.info(f"Saving file for reception {reception_id}: {filename}")
-    
-    config = get_config()
-    receipts_root = Path(config["paths"]["receipts_root"])
-    
-    # Получить приёмку
+def _receipts_root() -> Path:
+    """Абсолютный путь к корню хранения файлов приёмок."""
+    receipts_root = Path(get_config()["paths"]["receipts_root"])
+    if not receipts_root.is_absolute():
+        project_root = Path(__file__).parent.parent.parent.parent
+        receipts_root = project_root / receipts_root
+    return receipts_root
+
+
+def _reception_folder(reception_id: int) -> str:
+    """Имя папки приёмки (дата ТТН и ID); 404, если приёмки нет."""
     reception = ReceptionRepository.get_by_id(reception_id)
     if not reception:
         logger.error(f"Reception {reception_id} not found")
         raise HTTPException(status_code=404, detail="Reception not found")
+    return f"{reception.ttn_date.strftime('%Y-%m-%d')}_{reception_id}"
+
+
+def _save_file(reception_id: int, file: UploadFile, filename: str) -> str:
+    """Сохранить файл и вернуть относительный путь."""
+    logger.info(f"Saving file for reception {reception_id}: {filename}")
     
-    date_str = reception.ttn_date.strftime("%Y-%m-%d")
-    folder_name = f"{date_str}_{reception_id}"
-    
-    # Абсолютный путь
-    if not receipts_root.is_absolute():
-        project_root = Path(__file__).parent.parent.parent.parent
-        receipts_root = project_root / receipts_root
-        
-    save_dir = receipts_root / folder_name
+    config = get_config()
+    folder_name = _reception_folder(reception_id)
+    save_dir = _receipts_root() / folder_name
     save_dir.mkdir(parents=True, exist_ok=True)
     
     file_path = save_dir / filename
@@ -154,6 +162,89 @@ def upload_video(reception_id: int, file: UploadFile = File(...)):
     return {"id": reception_id, "video_path": rel_path}
 
 
+# Сегменты видео до создания приёмки: receipts_root/_uploads/<upload_id>/segment_NNNN.ext
+UPLOADS_DIR = "_uploads"
+UPLOAD_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+
+@router.post("/video-uploads/{upload_id}/segments/{index}", responses={413: {"model": APIError}, 415: {"model": APIError}})
+def upload_video_segment(
+    upload_id: str = PathParam(..., pattern=UPLOAD_ID_PATTERN),
+    index: int = PathParam(..., ge=0, le=9999),
+    file: UploadFile = File(...)
+):
+    """Загрузить сегмент видео, пока идёт запись (приёмки может ещё не быть)."""
+    logger.info(f"Video segment upload: {upload_id}/{index}: {file.filename}")
+    
+    _validate_file_size(file)
+    _validate_file_type(file, ALLOWED_VIDEO_TYPES)
+    
+    upload_dir = _receipts_root() / UPLOADS_DIR / upload_id
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    # Повторная загрузка сегмента (ретрай) заменяет прежнюю
+    previous = find_segment(upload_dir, index)
+    if previous:
+        previous.unlink()
+    segment_path = upload_dir / segment_filename(index, Path(file.filename).suffix or ".avi")
+    with open(segment_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    
+    return {"upload_id": upload_id, "index": index, "size": segment_path.stat().st_size}
+
+
+@router.post("/{reception_id}/video/segments", responses={400: {"model": APIError}, 404: {"model": APIError}})
+def finalize_video_segments(reception_id: int, data: VideoSegmentsFinalize):
+    """
+    Прикрепить загруженные сегменты к приёмке: склеить в один файл без
+    перекодирования (если на сервере есть ffmpeg) или сохранить плейлист M3U8.
+    """
+    logger.info(f"Finalizing {len(data.segments)} video segments of {data.upload_id} for reception {reception_id}")
+    
+    config = get_config()
+    folder_name = _reception_folder(reception_id)
+    uploads_root = _receipts_root() / UPLOADS_DIR
+    upload_dir = uploads_root / data.upload_id
+    
+    segments = sorted(data.segments, key=lambda segment: segment.index)
+    paths = {segment.index: find_segment(upload_dir, segment.index) for segment in segments}
+    missing = [index for index, path in paths.items() if path is None]
+    if missing:
+        logger.warning(f"Missing video segments for {data.upload_id}: {missing}")
+        raise HTTPException(status_code=400, detail=f"Missing video segments: {missing}")
+    
+    video_dir = _receipts_root() / folder_name / "video"
+    if video_dir.exists():
+        shutil.rmtree(video_dir)
+    video_dir.mkdir(parents=True)
+    moved = []
+    for segment in segments:
+        source = paths[segment.index]
+        target = video_dir / source.name
+        shutil.move(str(source), str(target))
+        moved.append((target, segment.duration))
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    cleanup_stale_uploads(uploads_root)
+    
+    ext = moved[-1][0].suffix
+    stitched = video_dir / f"video{ext}"
+    ffmpeg_path = config.get("ffmpeg", {}).get("path", "ffmpeg")
+    if stitch_segments([path for path, _ in moved], stitched, ffmpeg_path):
+        for path, _ in moved:
+            path.unlink()
+        filename = stitched.name
+    else:
+        write_playlist(video_dir / PLAYLIST_NAME, [(path.name, duration) for path, duration in moved])
+        filename = PLAYLIST_NAME
+    
+    rel_path = f"{config['paths']['receipts_root']}/{folder_name}/video/{filename}"
+    if not ReceptionRepository.update_video_path(reception_id, rel_path):
+        logger.error(f"Failed to update video path for reception {reception_id}")
+        raise HTTPException(status_code=404, detail="Reception not found")
+    
+    logger.info(f"Video segments attached to reception {reception_id}: {rel_path}")
+    return {"id": reception_id, "video_path": rel_path, "segments": len(moved)}
+
+
 @router.post("/{reception_id}/items/{item_id}/photo", responses={404: {"model": APIError}, 413: {"model": APIError}, 415: {"model": APIError}})
 def upload_item_photo(reception_id: int, item_id: int, file: UploadFile = File(...)):
     """Загрузить фотографию товара."""
@@ -1,20 +1,57 @@
 """Эндпоинты для работы с товарами."""
-from typing import List
-from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 
-from common.models import ProductRead, APIError
+from common.models import ProductLookupRequest, ProductLookupResult, ProductRead, ProductTombstoneRead, APIError
 from server.src.db.repository import ProductRepository
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-@router.get("", response_model=List[ProductRead])
+@router.get("", response_model=List[ProductRead], responses={304: {"description": "Справочник не изменился"}})
 def get_products(
+    response: Response,
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    updated_since: Optional[datetime] = Query(None, description="Только изменённые с этого момента"),
+    after_id: Optional[int] = Query(None, ge=0, description="ID последнего полученного товара (keyset)"),
+    if_none_match: Optional[str] = Header(None)
 ) -> List[ProductRead]:
-    """Получить список товаров."""
-    return ProductRepository.get_all(limit=limit, offset=offset)
+    """
+    Получить список товаров.
+
+    ETag — версия всего справочника (одинаковая для всех страниц): клиент
+    с актуальной копией получает 304 без тела. X-Total-Count — число товаров
+    в справочнике, по нему клиент сверяет свою копию после дельта-синхронизации.
+    """
+    etag = ProductRepository.catalog_etag()
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["X-Total-Count"] = str(ProductRepository.count())
+    return ProductRepository.get_all(limit=limit, offset=offset, updated_since=updated_since, after_id=after_id)
+
+
+@router.get("/tombstones", response_model=List[ProductTombstoneRead])
+def get_product_tombstones(
+    deleted_since: Optional[datetime] = Query(None),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=1000)
+) -> List[ProductTombstoneRead]:
+    """Получить отметки об удалении товаров (для дельта-синхронизации)."""
+    return ProductRepository.get_tombstones(deleted_since=deleted_since, after_id=after_id, limit=limit)
+
+
+@router.post("/lookup", response_model=List[ProductLookupResult])
+def lookup_products(request: ProductLookupRequest) -> List[ProductLookupResult]:
+    """
+    Найти все позиции ТТН одним запросом.
+
+    Для каждой позиции (в том же порядке) — товар по артикулу и похожие
+    по наименованию с оценками, статус: article, confident, ambiguous или none.
+    """
+    return ProductRepository.lookup(request.items, limit=request.limit)
 
 
 @router.get("/{article}", response_model=ProductRead, responses={404: {"model": APIError}})
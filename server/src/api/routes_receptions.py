@@ -1,12 +1,15 @@
 """Эндпоинты для работы с приёмками."""
-from typing import List
-from fastapi import APIRouter, HTTPException, Query, Body
+from datetime import date, datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Body, Response
+from fastapi.responses import StreamingResponse
 
 from common.models import (
     ReceptionCreate, ReceptionRead, ReceptionShort, 
     ReceptionStatus, APIError, ReceptionItemControlUpdate
 )
-from server.src.db.repository import ReceptionRepository
+from server.src.db.repository import EXPORT_COLUMNS, ReceptionRepository
+from server.src.export import export_filename, iter_csv, iter_xlsx
 
 router = APIRouter(prefix="/receptions", tags=["Receptions"])
 
@@ -17,14 +20,63 @@ def create_reception(data: ReceptionCreate) -> ReceptionRead:
     return ReceptionRepository.create(data)
 
 
+@router.post("/bulk", status_code=201)
+def create_receptions_bulk(receptions: List[ReceptionCreate] = Body(...)) -> dict:
+    """Создать несколько приёмок одной транзакцией (пакетная загрузка архива ТТН)."""
+    ids = ReceptionRepository.create_many(receptions)
+    return {"created": len(ids), "ids": ids}
+
+
 @router.get("", response_model=List[ReceptionShort])
 def get_receptions(
+    response: Response,
     status: ReceptionStatus = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    date_from: Optional[date] = Query(None, description="Дата ТТН не раньше"),
+    date_to: Optional[date] = Query(None, description="Дата ТТН не позже"),
+    supplier: Optional[str] = Query(None, description="Часть наименования поставщика"),
+    before: Optional[datetime] = Query(None, description="created_at последней полученной приёмки (keyset)"),
+    before_id: Optional[int] = Query(None, ge=0, description="ID последней полученной приёмки (keyset)")
 ) -> List[ReceptionShort]:
-    """Получить список приёмок."""
-    return ReceptionRepository.get_all(status=status, limit=limit, offset=offset)
+    """
+    Получить список приёмок (новые первыми).
+
+    X-Total-Count — число приёмок под фильтрами. Следующая страница —
+    before/before_id последней полученной приёмки.
+    """
+    filters = dict(status=status, date_from=date_from, date_to=date_to, supplier=supplier)
+    response.headers["X-Total-Count"] = str(ReceptionRepository.count(**filters))
+    return ReceptionRepository.get_all(limit=limit, offset=offset, before=before, before_id=before_id, **filters)
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_receptions(
+    format: Literal["csv", "xlsx"] = Query("csv", description="Формат файла"),
+    date_from: Optional[date] = Query(None, alias="from", description="Дата ТТН не раньше"),
+    date_to: Optional[date] = Query(None, alias="to", description="Дата ТТН не позже"),
+    status: ReceptionStatus = Query(None),
+    supplier: Optional[str] = Query(None, description="Часть наименования поставщика")
+) -> StreamingResponse:
+    """
+    Выгрузить приёмки с позициями (статус и результат контроля) в CSV или XLSX.
+
+    Файл формируется по мере чтения строк из БД и отдаётся частями,
+    поэтому размер выгрузки не ограничен памятью сервера.
+    """
+    rows = ReceptionRepository.iter_export_rows(
+        status=status, date_from=date_from, date_to=date_to, supplier=supplier
+    )
+    if format == "xlsx":
+        content = iter_xlsx(EXPORT_COLUMNS, rows, sheet_name="Приёмки")
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        content = iter_csv(EXPORT_COLUMNS, rows)
+        media_type = "text/csv; charset=utf-8"
+    filename = export_filename("receptions", format, (date_from, date_to, status.value if status else None))
+    return StreamingResponse(
+        content, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{reception_id}", response_model=ReceptionRead, responses={404: {"model": APIError}})
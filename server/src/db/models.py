@@ -35,6 +35,17 @@ def get_database() -> SqliteDatabase:
 database = get_database()
 
 
+def casefold(value):
+    """SQL-функция casefold(): LIKE в SQLite не сворачивает регистр кириллицы."""
+    return value.casefold() if isinstance(value, str) else value
+
+
+# Python-функции SQL: регистрируются в каждом соединении (и в соединениях выгрузки)
+SQL_FUNCTIONS = {"casefold": casefold}
+for _name, _function in SQL_FUNCTIONS.items():
+    database.register_function(_function, _name, 1)
+
+
 class BaseModel(Model):
     """Базовая модель с привязкой к БД."""
     class Meta:
@@ -51,27 +62,43 @@ class Product(BaseModel):
     control_type = CharField(max_length=50, null=True)
     control_params = TextField(null=True)  # JSON
     created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now, index=True)  # Для дельта-синхронизации
 
     class Meta:
         table_name = "products"
 
+    def save(self, *args, **kwargs):
+        self.updated_at = datetime.now()
+        return super().save(*args, **kwargs)
+
     def get_control_params_dict(self) -> dict:
         if self.control_params:
             return json.loads(self.control_params)
         return {}
 
 
+class ProductTombstone(BaseModel):
+    """Удалённый товар (клиенты удаляют его из своей копии справочника)."""
+    id = AutoField()
+    product_id = IntegerField()
+    article = CharField(max_length=50)
+    deleted_at = DateTimeField(default=datetime.now, index=True)
+
+    class Meta:
+        table_name = "product_tombstones"
+
+
 class Reception(BaseModel):
     """Приёмка ТМЦ."""
     id = AutoField()
     ttn_number = CharField(max_length=100)
-    ttn_date = DateField()
+    ttn_date = DateField(index=True)
     supplier = CharField(max_length=255)
     status = CharField(max_length=20, default="pending")
     document_path = CharField(max_length=500, null=True)
     video_path = CharField(max_length=500, null=True)
     ocr_result = TextField(null=True)  # JSON
-    created_at = DateTimeField(default=datetime.now)
+    created_at = DateTimeField(default=datetime.now, index=True)
     completed_at = DateTimeField(null=True)
     synced_at = DateTimeField(null=True)
 
@@ -1,27 +1,77 @@
 """CRUD операции с базой данных."""
+import hashlib
 import json
-from datetime import datetime
-from typing import List, Optional
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from peewee import fn
+from peewee import JOIN, fn
 
-from server.src.db.models import database, Product, Reception, ReceptionItem
+from server.src.db.models import SQL_FUNCTIONS, database, Product, ProductTombstone, Reception, ReceptionItem
 from common.models import (
-    ProductCreate, ProductRead,
+    ProductCandidate, ProductCreate, ProductLookupQuery, ProductLookupResult, ProductRead, ProductTombstoneRead,
     ReceptionCreate, ReceptionRead, ReceptionShort, ReceptionItemRead,
     ReceptionStatus, ControlStatus, ControlType
 )
+from common.product_matcher import ProductMatcher, match_status
+from server.src.export import iter_query
 
 
 class ProductRepository:
     """Репозиторий для работы с товарами."""
 
     @staticmethod
-    def get_all(limit: int = 100, offset: int = 0) -> List[ProductRead]:
-        """Получить список товаров."""
-        query = Product.select().order_by(Product.id.asc()).limit(limit).offset(offset)
+    def get_all(
+        limit: int = 100,
+        offset: int = 0,
+        updated_since: Optional[datetime] = None,
+        after_id: Optional[int] = None
+    ) -> List[ProductRead]:
+        """
+        Получить список товаров.
+
+        С updated_since — только изменённые начиная с этого момента, по порядку
+        (updated_at, id); after_id продолжает выборку после последнего
+        полученного товара с updated_at == updated_since (keyset-пагинация).
+        """
+        query = Product.select()
+        if updated_since is not None:
+            query = _changed_since(query, Product.updated_at, Product.id, updated_since, after_id)
+            query = query.order_by(Product.updated_at.asc(), Product.id.asc())
+        else:
+            query = query.order_by(Product.id.asc())
+        query = query.limit(limit).offset(offset)
         return [ProductRepository._to_read(p) for p in query]
 
+    @staticmethod
+    def count() -> int:
+        """Число товаров в справочнике."""
+        return Product.select().count()
+
+    @staticmethod
+    def catalog_etag() -> str:
+        """Версия справочника целиком (для If-None-Match) по индексам, без чтения всех строк."""
+        products = Product.select(fn.COUNT(Product.id), fn.MAX(Product.id), fn.MAX(Product.updated_at)).tuples()
+        tombstones = ProductTombstone.select(fn.MAX(ProductTombstone.id)).tuples()
+        digest = hashlib.sha1(repr((products.get(), tombstones.get())).encode("utf-8"))
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def get_tombstones(
+        deleted_since: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: int = 1000
+    ) -> List[ProductTombstoneRead]:
+        """Отметки об удалении товаров по порядку (deleted_at, id), пагинация как в get_all."""
+        query = ProductTombstone.select()
+        if deleted_since is not None:
+            query = _changed_since(query, ProductTombstone.deleted_at, ProductTombstone.id, deleted_since, after_id)
+        query = query.order_by(ProductTombstone.deleted_at.asc(), ProductTombstone.id.asc()).limit(limit)
+        return [
+            ProductTombstoneRead(id=t.id, product_id=t.product_id, article=t.article, deleted_at=t.deleted_at)
+            for t in query
+        ]
+
     @staticmethod
     def get_by_article(article: str) -> Optional[ProductRead]:
         """Найти товар по артикулу."""
@@ -30,10 +80,60 @@ class ProductRepository:
             return ProductRepository._to_read(product)
         return None
 
+    @staticmethod
+    def lookup(queries: List[ProductLookupQuery], limit: int = 5) -> List[ProductLookupResult]:
+        """
+        Найти позиции ТТН в справочнике: по артикулу, затем нечётко по наименованию.
+
+        Индекс (ProductMatcher) строится один раз на версию справочника и
+        переиспользуется, пока не изменится ETag.
+        """
+        matcher = _product_matcher()
+        results = []
+        for query in queries:
+            matches = matcher.match(query.article, query.name, k=limit)
+            results.append(ProductLookupResult(
+                status=match_status(matches),
+                candidates=[
+                    ProductCandidate(product=m.product, score=round(m.score, 4), by_article=m.by_article)
+                    for m in matches
+                ]
+            ))
+        return results
+
     @staticmethod
     def create(data: ProductCreate) -> ProductRead:
         """Создать товар."""
-        product = Product.create(
+        product = Product.create(**ProductRepository._fields(data))
+        return ProductRepository._to_read(product)
+
+    @staticmethod
+    def update(article: str, data: ProductCreate) -> Optional[ProductRead]:
+        """Изменить товар (updated_at обновляется в Product.save)."""
+        product = Product.get_or_none(Product.article == article)
+        if not product:
+            return None
+        for name, value in ProductRepository._fields(data).items():
+            setattr(product, name, value)
+        product.save()
+        return ProductRepository._to_read(product)
+
+    @staticmethod
+    def delete(article: str) -> bool:
+        """Удалить товар, оставив отметку об удалении для клиентов."""
+        with database.atomic():
+            product = Product.get_or_none(Product.article == article)
+            if not product:
+                return False
+            # Позиции приёмок сохраняют артикул и наименование, связь со справочником снимается
+            ReceptionItem.update(product=None).where(ReceptionItem.product == product.id).execute()
+            ProductTombstone.create(product_id=product.id, article=product.article)
+            product.delete_instance()
+            return True
+
+    @staticmethod
+    def _fields(data: ProductCreate) -> dict:
+        return dict(
             article=data.article,
             name=data.name,
             unit=data.unit,
@@ -41,7 +141,6 @@ class ProductRepository:
             control_type=data.control_type.value if data.control_type else None,
             control_params=json.dumps(data.control_params) if data.control_params else None
         )
-        return ProductRepository._to_read(product)
 
     @staticmethod
     def _to_read(p: Product) -> ProductRead:
@@ -54,10 +153,41 @@ class ProductRepository:
             requires_control=p.requires_control,
             control_type=ControlType(p.control_type) if p.control_type else None,
             control_params=p.get_control_params_dict() if p.control_params else None,
-            created_at=p.created_at
+            created_at=p.created_at,
+            updated_at=p.updated_at
         )
 
 
+# Индекс нечёткого поиска и версия справочника, по которой он построен
+_matcher_cache: Tuple[Optional[str], Optional[ProductMatcher]] = (None, None)
+_matcher_lock = threading.Lock()
+
+
+def _product_matcher() -> ProductMatcher:
+    global _matcher_cache
+    etag = ProductRepository.catalog_etag()
+    with _matcher_lock:
+        if _matcher_cache[0] != etag:
+            products = [ProductRepository._to_read(p) for p in Product.select().order_by(Product.id.asc())]
+            _matcher_cache = (etag, ProductMatcher(products))
+        return _matcher_cache[1]
+
+
+def _changed_since(query, timestamp_field, id_field, since: datetime, after_id: Optional[int]):
+    """Условие keyset-пагинации по (timestamp, id)."""
+    if after_id is None:
+        return query.where(timestamp_field >= since)
+    return query.where((timestamp_field > since) | ((timestamp_field == since) & (id_field > after_id)))
+
+
+# Колонки выгрузки приёмок (ReceptionRepository.iter_export_rows)
+EXPORT_COLUMNS = [
+    "ID приёмки", "ТТН", "Дата ТТН", "Поставщик", "Статус приёмки", "Создана",
+    "ID позиции", "Артикул", "Наименование", "Количество", "Ед.изм.",
+    "Требуется контроль", "Статус контроля", "Результат контроля", "Комментарий",
+]
+
+
 class ReceptionRepository:
     """Репозиторий для работы с приёмками."""
 
@@ -65,48 +195,84 @@ class ReceptionRepository:
     def create(data: ReceptionCreate) -> ReceptionRead:
         """Создать приёмку с позициями."""
         with database.atomic():
-            reception = Reception.create(
-                ttn_number=data.ttn_number,
-                ttn_date=data.ttn_date,
-                supplier=data.supplier,
-                status=ReceptionStatus.PENDING.value
-            )
+            reception_id = ReceptionRepository._insert(data, ReceptionRepository._products_for([data]))
+            return ReceptionRepository.get_by_id(reception_id)
 
-            for item_data in data.items:
-                # Попробовать найти товар по артикулу
-                product = Product.get_or_none(Product.article == item_data.article)
-                
-                # Определить нужен ли контроль
-                control_required = item_data.control_required
-                if product and product.requires_control:
-                    control_required = True
-
-                ReceptionItem.create(
-                    reception=reception,
-                    product=product,
-                    article=item_data.article,
-                    name=item_data.name,
-                    quantity=item_data.quantity,
-                    unit=item_data.unit,
-                    control_required=control_required,
-                    control_status=ControlStatus.PENDING.value if control_required else None,
-                    notes=item_data.notes,
-                    suspicious_fields=json.dumps(item_data.suspicious_fields) if item_data.suspicious_fields else None
-                )
+    @staticmethod
+    def create_many(receptions: List[ReceptionCreate]) -> List[int]:
+        """Создать несколько приёмок одной транзакцией. Возвращает ID в порядке входа."""
+        with database.atomic():
+            products = ReceptionRepository._products_for(receptions)
+            return [ReceptionRepository._insert(data, products) for data in receptions]
 
-            return ReceptionRepository.get_by_id(reception.id)
+    @staticmethod
+    def _products_for(receptions: List[ReceptionCreate]) -> Dict[str, Product]:
+        """Товары справочника по артикулам всех позиций (один запрос)."""
+        articles = {item.article for data in receptions for item in data.items if item.article}
+        if not articles:
+            return {}
+        return {p.article: p for p in Product.select().where(Product.article.in_(list(articles)))}
+
+    @staticmethod
+    def _insert(data: ReceptionCreate, products: Dict[str, Product]) -> int:
+        """Вставить приёмку и её позиции (вызывается внутри транзакции)."""
+        reception = Reception.create(
+            ttn_number=data.ttn_number,
+            ttn_date=data.ttn_date,
+            supplier=data.supplier,
+            status=ReceptionStatus.PENDING.value
+        )
+
+        for item_data in data.items:
+            # Попробовать найти товар по артикулу
+            product = products.get(item_data.article)
+
+            # Определить нужен ли контроль
+            control_required = item_data.control_required
+            if product and product.requires_control:
+                control_required = True
+
+            ReceptionItem.create(
+                reception=reception,
+                product=product,
+                article=item_data.article,
+                name=item_data.name,
+                quantity=item_data.quantity,
+                unit=item_data.unit,
+                control_required=control_required,
+                control_status=ControlStatus.PENDING.value if control_required else None,
+                notes=item_data.notes,
+                suspicious_fields=json.dumps(item_data.suspicious_fields) if item_data.suspicious_fields else None
+            )
+
+        return reception.id
 
     @staticmethod
     def get_all(
         status: Optional[ReceptionStatus] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier: Optional[str] = None,
+        before: Optional[datetime] = None,
+        before_id: Optional[int] = None
     ) -> List[ReceptionShort]:
-        """Получить список приёмок."""
-        query = Reception.select().order_by(Reception.created_at.desc())
-        if status:
-            query = query.where(Reception.status == status.value)
-        query = query.limit(limit).offset(offset)
+        """
+        Получить список приёмок (новые первыми, по порядку (created_at, id)).
+
+        before/before_id продолжают выборку после последней полученной
+        приёмки (keyset-пагинация): OFFSET не нужен на глубоких страницах.
+        """
+        query = ReceptionRepository._filtered(status, date_from, date_to, supplier)
+        if before is not None:
+            if before_id is None:
+                query = query.where(Reception.created_at < before)
+            else:
+                query = query.where(
+                    (Reception.created_at < before) | ((Reception.created_at == before) & (Reception.id < before_id))
+                )
+        query = query.order_by(Reception.created_at.desc(), Reception.id.desc()).limit(limit).offset(offset)
 
         return [
             ReceptionShort(
@@ -120,6 +286,62 @@ class ReceptionRepository:
             for r in query
         ]
 
+    @staticmethod
+    def count(
+        status: Optional[ReceptionStatus] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier: Optional[str] = None
+    ) -> int:
+        """Число приёмок, подходящих под фильтры."""
+        return ReceptionRepository._filtered(status, date_from, date_to, supplier).count()
+
+    @staticmethod
+    def iter_export_rows(
+        status: Optional[ReceptionStatus] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        supplier: Optional[str] = None
+    ) -> Iterator[tuple]:
+        """
+        Строки выгрузки (EXPORT_COLUMNS): по строке на позицию приёмки под
+        фильтрами, приёмка без позиций — одной строкой. Читаются из курсора
+        SQLite порциями, выборка целиком в памяти не держится.
+        """
+        query = (
+            ReceptionRepository._filtered(status, date_from, date_to, supplier)
+            .select(
+                Reception.id, Reception.ttn_number, Reception.ttn_date, Reception.supplier, Reception.status,
+                Reception.created_at, ReceptionItem.id, ReceptionItem.article, ReceptionItem.name,
+                ReceptionItem.quantity, ReceptionItem.unit, ReceptionItem.control_required,
+                ReceptionItem.control_status, ReceptionItem.control_result, ReceptionItem.notes
+            )
+            .join(ReceptionItem, JOIN.LEFT_OUTER, on=(ReceptionItem.reception == Reception.id))
+            .order_by(Reception.id.asc(), ReceptionItem.id.asc())
+        )
+        sql, params = query.sql()
+        for row in iter_query(database.database, sql, params, functions=SQL_FUNCTIONS):
+            created_at, control_required = row[5], row[11]
+            yield row[:5] + (
+                created_at[:19] if isinstance(created_at, str) else created_at,
+            ) + row[6:11] + (
+                None if control_required is None else ("да" if control_required else "нет"),
+            ) + row[12:]
+
+    @staticmethod
+    def _filtered(status, date_from, date_to, supplier):
+        query = Reception.select()
+        if status:
+            query = query.where(Reception.status == status.value)
+        if date_from:
+            query = query.where(Reception.ttn_date >= date_from)
+        if date_to:
+            query = query.where(Reception.ttn_date <= date_to)
+        if supplier:
+            # Без учёта регистра и для кириллицы (LIKE SQLite сворачивает только ASCII)
+            query = query.where(fn.casefold(Reception.supplier).contains(supplier.casefold()))
+        return query
+
     @staticmethod
     def get_by_id(reception_id: int) -> Optional[ReceptionRead]:
         """Получить приёмку по ID с позициями."""
@@ -0,0 +1,208 @@
+"""Потоковая выгрузка отчётов (CSV, XLSX) прямо из курсора SQLite и файлов (ZIP)."""
+import csv
+import io
+import re
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Сколько строк читать из курсора и сколько форматировать перед отдачей куска ответа
+BATCH_SIZE = 1000
+
+# Лимит строк листа Excel; дальше строки продолжаются на следующем листе
+XLSX_MAX_ROWS = 1048576
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{sheets}</Relationships>'
+)
+_WORKBOOK_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def iter_query(database_path: str, sql: str, params: Sequence = (), batch_size: int = BATCH_SIZE,
+               functions: Optional[Mapping[str, Callable]] = None) -> Iterator[tuple]:
+    """
+    Строки запроса из отдельного соединения только для чтения.
+
+    Ответ отдаётся частями из пула потоков, поэтому соединение своё
+    (не из потоколокального пула peewee); в памяти — одна порция строк.
+    functions — Python-функции SQL (с одним аргументом), которые использует запрос.
+    """
+    uri = Path(database_path).resolve().as_uri() + "?mode=ro"
+    connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    for name, function in (functions or {}).items():
+        connection.create_function(name, 1, function)
+    try:
+        cursor = connection.execute(sql, tuple(params))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        connection.close()
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence], batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """CSV для Excel (UTF-8 с BOM, разделитель «;») кусками по batch_size строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        count += 1
+        if count % batch_size == 0:
+            yield _drain_text(buffer)
+    yield _drain_text(buffer)
+
+
+def iter_xlsx(header: Sequence[str], rows: Iterable[Sequence], sheet_name: str = "Отчёт",
+              batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    XLSX кусками по мере записи: листы пишутся в ZIP потоком (без перемотки),
+    описание книги — в конце, когда известно число листов.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        sheets = 0
+        row_iter = iter(rows)
+        pending = next(row_iter, None)
+        while sheets == 0 or pending is not None:
+            sheets += 1
+            with archive.open(f"xl/worksheets/sheet{sheets}.xml", "w", force_zip64=True) as sheet:
+                sheet.write(_SHEET_START.encode("utf-8"))
+                sheet.write(_xlsx_row(header).encode("utf-8"))
+                lines: List[str] = []
+                written = 1
+                while pending is not None and written < XLSX_MAX_ROWS:
+                    lines.append(_xlsx_row(pending))
+                    written += 1
+                    pending = next(row_iter, None)
+                    if len(lines) >= batch_size:
+                        sheet.write("".join(lines).encode("utf-8"))
+                        lines.clear()
+                        yield sink.drain()
+                sheet.write(("".join(lines) + _SHEET_END).encode("utf-8"))
+            yield sink.drain()
+
+        numbers = range(1, sheets + 1)
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)
+        ))
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(_sheet_title(sheet_name, n))}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers
+        )))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+            sheets="".join(_WORKBOOK_REL.format(n=n) for n in numbers)
+        ))
+    yield sink.drain()
+
+
+def iter_zip(files: Iterable[Tuple[Path, str]], chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    ZIP из файлов (путь, имя в архиве) кусками по мере чтения, без сжатия:
+    видео уже сжато, а архив не собирается целиком ни в памяти, ни на диске.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for path, arcname in files:
+            with open(path, "rb") as source, archive.open(arcname, "w", force_zip64=True) as target:
+                while True:
+                    data = source.read(chunk_size)
+                    if not data:
+                        break
+                    target.write(data)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Поток без перемотки, из которого забираются записанные байты."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _drain_text(buffer: io.StringIO) -> bytes:
+    data = buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _xlsx_row(values: Sequence) -> str:
+    cells = []
+    for value in values:
+        if value is None or value == "":
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            text = _XML_ILLEGAL.sub("", str(value))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def _sheet_title(name: str, number: int) -> str:
+    return name if number == 1 else f"{name} ({number})"
+
+
+def export_filename(prefix: str, fmt: str, parts: Tuple = ()) -> str:
+    """Имя файла выгрузки: prefix_часть1_часть2.fmt (пустые части пропускаются)."""
+    return "_".join([prefix] + [str(part) for part in parts if part]) + f".{fmt}"
@@ -0,0 +1,89 @@
+"""Сегменты видеозаписи: склейка без перекодирования (ffmpeg) или плейлист M3U8."""
+import logging
+import math
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = "video.m3u8"
+
+# Незавершённые загрузки сегментов (приёмка так и не создана) удаляются через сутки
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+
+STITCH_TIMEOUT_SECONDS = 300
+
+
+def segment_filename(index: int, ext: str) -> str:
+    return f"segment_{index:04d}{ext}"
+
+
+def find_segment(directory: Path, index: int) -> Optional[Path]:
+    """Файл сегмента с номером index (расширение любое) или None."""
+    return next(iter(sorted(directory.glob(segment_filename(index, ".*")))), None)
+
+
+def write_playlist(path: Path, segments: Sequence[Tuple[str, float]]):
+    """Плейлист M3U8 (VOD): имена файлов сегментов относительно плейлиста и их длительность."""
+    target = max(1, math.ceil(max(duration for _, duration in segments)))
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{target}",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+    for name, duration in segments:
+        lines += [f"#EXTINF:{duration:.3f},", name]
+    lines.append("#EXT-X-ENDLIST")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_playlist(path: Path) -> List[Path]:
+    """Файлы сегментов из плейлиста (по порядку)."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [path.parent / line for line in lines if line and not line.startswith("#")]
+
+
+def stitch_segments(paths: Sequence[Path], output_path: Path, ffmpeg_path: str = "ffmpeg") -> bool:
+    """
+    Склеить сегменты в один файл без перекодирования (ffmpeg concat, -c copy).
+    False — ffmpeg нет или склейка не удалась (тогда остаётся плейлист).
+    """
+    ffmpeg = shutil.which(ffmpeg_path)
+    if ffmpeg is None:
+        logger.info(f"ffmpeg not found ({ffmpeg_path}), keeping video as playlist")
+        return False
+
+    concat_list = output_path.with_suffix(".concat.txt")
+    concat_list.write_text("".join(f"file '{path.name}'\n" for path in paths), encoding="utf-8")
+    command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-f", "concat", "-safe", "0",
+               "-i", str(concat_list), "-c", "copy"]
+    if output_path.suffix.lower() == ".mp4":
+        command += ["-movflags", "+faststart"]
+    command.append(str(output_path))
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=STITCH_TIMEOUT_SECONDS)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error(f"Failed to stitch video segments into {output_path}: {e}")
+        output_path.unlink(missing_ok=True)
+        return False
+    finally:
+        concat_list.unlink(missing_ok=True)
+    if result.returncode != 0:
+        logger.error(f"ffmpeg concat failed for {output_path}: {result.stderr.decode(errors='replace')[-500:]}")
+        output_path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def cleanup_stale_uploads(uploads_root: Path, max_age: float = STALE_UPLOAD_SECONDS):
+    """Удалить папки загрузок сегментов, которые не менялись дольше max_age секунд."""
+    if not uploads_root.exists():
+        return
+    deadline = time.time() - max_age
+    for directory in uploads_root.iterdir():
+        try:
+            if directory.is_dir() and directory.stat().st_mtime < deadline:
+                shutil.rmtree(directory)
+                logger.info(f"Removed stale video upload {directory.name}")
+        except OSError as e:
+            logger.warning(f"Failed to remove stale upload {directory}: {e}")
@@ -0,0 +1,2 @@
+# tests/benchmarks/__init__.py
+"""Бенчмарки и генераторы данных; запуск из корня проекта: python -m tests.benchmarks.<имя>."""
@@ -0,0 +1,136 @@
+"""
+Бенчмарк пути кадра от захвата до превью (CameraWorker -> VideoWidget).
+
+Сравниваются прежний путь (копия кадра для снапшота, cvtColor в новый RGB-массив,
+QImage.copy() перед отправкой) и кольцо кадров FrameRing с QImage над буфером.
+Кадр с камеры имитируется записью шума в буфер; отправка в интерфейс —
+вызовом слота напрямую (превью сразу подтверждается). Паузы между кадрами
+нет — измеряется предельная скорость пути кадра.
+
+Выделения памяти за кадр: прирост пика tracemalloc (массивы numpy)
+и размер копий QImage, которые выделяет Qt.
+
+С --display превью показывается в области заданного размера: прежний путь
+масштабирует полный кадр в виджете (SmoothTransformation), путь с
+уменьшением получает кадр уже размера виджета из потока захвата.
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen python -m tests.benchmarks.bench_camera_frames --frames 300 --display 640 360
+"""
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QApplication
+
+from client.src.services.camera_service import CameraWorker
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_CAMERA_FRAMES")
+logger.setLevel(logging.INFO)
+
+
+class LegacyPath:
+    """Прежний CameraWorker.run: новый кадр, copy() для снапшота, cvtColor, QImage.copy()."""
+
+    def __init__(self, width: int, height: int, on_frame):
+        self.width = width
+        self.height = height
+        self.on_frame = on_frame
+        self.last_frame = None
+        self.qt_bytes = 0
+
+    def step(self):
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        cv2.randu(frame, 0, 128)
+        self.last_frame = frame.copy()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_frame.shape
+        q_image = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
+        copied = q_image.copy()
+        self.qt_bytes += copied.sizeInBytes()
+        self.on_frame(copied)
+
+
+class RingPath:
+    """Кольцо кадров: захват в слот, QImage над слотом, подтверждение показа."""
+
+    def __init__(self, width: int, height: int, on_frame, preview_size=None):
+        self.worker = CameraWorker(-1, (width, height), 30, preview_size=preview_size)
+        self.worker.frame_ready.connect(lambda image: (on_frame(image), self.worker.frame_consumed()))
+        self.qt_bytes = 0
+
+    def step(self):
+        index = self.worker.ring.acquire()
+        cv2.randu(self.worker.ring.frames[index], 0, 128)
+        self.worker._process_frame(index)
+
+
+def run(name: str, path_class, width: int, height: int, frames: int, display=None, **kwargs):
+    shown = []
+
+    def on_frame(image):
+        # Превью хранит только последний кадр
+        if display:
+            # Как VideoWidget: масштабирование, только если кадр не по размеру области
+            pixmap = QPixmap.fromImage(image)
+            if (pixmap.width(), pixmap.height()) != tuple(display):
+                pixmap = pixmap.scaled(*display, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            image = pixmap
+        shown[:] = [image]
+
+    path = path_class(width, height, on_frame, **kwargs)
+    path.step()
+
+    # Пик выделений numpy сверх уже занятого за каждый кадр (tracemalloc)
+    tracemalloc.start()
+    numpy_bytes = 0
+    for _ in range(min(frames, 30)):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        path.step()
+        numpy_bytes += tracemalloc.get_traced_memory()[1] - current
+    measured = min(frames, 30)
+    tracemalloc.stop()
+    path.qt_bytes = 0
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        path.step()
+    elapsed = time.perf_counter() - start
+
+    per_frame_mb = (numpy_bytes / measured + path.qt_bytes / frames) / 1024 / 1024
+    logger.info(
+        f"{name:>7}: {frames / elapsed:7.0f} кадров/с, выделяется {per_frame_mb:5.2f} МБ/кадр "
+        f"({per_frame_mb * 30:6.1f} МБ/с при 30 fps; numpy {numpy_bytes / measured / 1024 / 1024:.2f}, "
+        f"Qt {path.qt_bytes / frames / 1024 / 1024:.2f})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark camera frame path")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per run")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--display", type=int, nargs=2, metavar=("W", "H"),
+                        help="Size of the preview area (adds the downscaled preview run)")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+    logger.info(f"Кадр {args.width}x{args.height}, {args.frames} кадров")
+    run("прежний", LegacyPath, args.width, args.height, args.frames, args.display)
+    run("кольцо", RingPath, args.width, args.height, args.frames, args.display)
+    if args.display:
+        run("уменьш.", RingPath, args.width, args.height, args.frames, args.display,
+            preview_size=tuple(args.display))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Бенчмарк потоковой выгрузки (server/src/export.py): строки читаются из
+курсора SQLite (iter_query) и сразу пишутся в CSV или XLSX.
+
+База — временный файл SQLite с одной таблицей позиций (по составу колонок
+как выгрузка приёмок). Измеряется скорость и прирост пиковой памяти
+процесса (ru_maxrss) во время выгрузки: он не должен зависеть от числа строк.
+
+Запуск:
+    python -m tests.benchmarks.bench_export --rows 1000000 --format csv xlsx
+"""
+import argparse
+import logging
+import resource
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from server.src.export import iter_csv, iter_query, iter_xlsx
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_EXPORT")
+logger.setLevel(logging.INFO)
+
+HEADER = ["ID приёмки", "ТТН", "Дата ТТН", "Поставщик", "Статус приёмки", "Создана",
+          "ID позиции", "Артикул", "Наименование", "Количество", "Ед.изм.",
+          "Требуется контроль", "Статус контроля", "Результат контроля", "Комментарий"]
+
+
+def make_database(path: Path, rows: int):
+    connection = sqlite3.connect(path)
+    connection.execute(f"CREATE TABLE items ({', '.join(f'c{i}' for i in range(len(HEADER)))})")
+    connection.executemany(
+        f"INSERT INTO items VALUES ({', '.join('?' * len(HEADER))})",
+        (
+            (i // 20, f"ТТН-{i // 20:07d}", "2025-03-14", "ООО Поставщик", "completed", "2025-03-14 10:00:00",
+             i, f"BOLT-M{i % 40}", f"Болт М{i % 40} оцинкованный DIN 933", 10.0 + i % 7, "шт",
+             "да", "passed", '{"passed": true}', None)
+            for i in range(rows)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(database: Path, fmt: str, rows: int):
+    writer = iter_xlsx if fmt == "xlsx" else iter_csv
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    size = 0
+    for chunk in writer(HEADER, iter_query(str(database), "SELECT * FROM items ORDER BY rowid")):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"{fmt:>4}: {rows} строк за {elapsed:.1f} с ({rows / elapsed:,.0f} строк/с), "
+        f"файл {size / 1024 / 1024:.1f} МБ, прирост пиковой памяти {max_rss_mb() - rss_before:.1f} МБ"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming CSV/XLSX export")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of item rows")
+    parser.add_argument("--format", nargs="+", default=["csv", "xlsx"], choices=["csv", "xlsx"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "export.db"
+        logger.info(f"Заполнение базы: {args.rows} строк...")
+        make_database(database, args.rows)
+        for fmt in args.format:
+            run(database, fmt, args.rows)
+
+
+if __name__ == "__main__":
+    main()
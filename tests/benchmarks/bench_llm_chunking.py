@@ -0,0 +1,75 @@
+"""
+Бенчмарк разбора длинных ТТН: один запрос к LLM против параллельных частей.
+
+Fake-сервер ChatBotHub отвечает за время base + per_item * число позиций
+(модель генерирует ответ последовательно), поэтому задержка одного запроса
+растёт с числом страниц, а части обрабатываются параллельно.
+
+Запуск:
+    python -m tests.benchmarks.bench_llm_chunking --pages 1 5 10 20 40
+"""
+import argparse
+import logging
+import sys
+import time
+
+from client.src.services.async_llm_client import AsyncLLMClient
+from client.src.services.llm_cache import LLMResponseCache
+from client.src.services.ocr_service import OCRService
+from tests.fake_llm_server import FakeLLMServer
+from tests.test_llm_chunking import make_fake_parser, make_multipage_ttn_pages
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_LLM_CHUNKING")
+logger.setLevel(logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--rows-per-page", type=int, default=30)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="Fixed model latency, s")
+    parser.add_argument("--per-item", type=float, default=0.01, help="Generation time per item, s")
+    args = parser.parse_args()
+
+    server = FakeLLMServer().start()
+    server.handler = make_fake_parser(args.base_latency, args.per_item)
+
+    service = OCRService()
+    service.llm_provider = "chatbothub"
+    service.hedging_enabled = False
+    hub = service.chatbothub_service
+    hub.base_url = server.url
+    hub.http = AsyncLLMClient("bench", settings={"max_attempts": 1, "attempt_timeout": 300})
+    hub.cache = LLMResponseCache(enabled=False)
+
+    logger.info(f"chunk: {service.chunk_pages} pages, workers: {service._chunk_pool._max_workers}")
+    logger.info(f"{'pages':>5} | {'items':>5} | {'single, s':>9} | {'chunked, s':>10} | {'requests':>8} | speedup")
+    logger.info("-" * 62)
+    for n_pages in args.pages:
+        pages = make_multipage_ttn_pages(n_pages, args.rows_per_page)
+        text = "".join(page + "\n" for page in pages)
+        expected = n_pages * args.rows_per_page
+
+        timings = {}
+        for mode in ("single", "chunked"):
+            service.chunking_enabled = mode == "chunked"
+            server.requests.clear()
+            start = time.perf_counter()
+            result = service._process_text_content(text, pages)
+            timings[mode] = time.perf_counter() - start
+            if len(result.items) != expected:
+                logger.error(f"❌ {mode}: {len(result.items)} items, expected {expected}")
+                sys.exit(1)
+        requests_sent = len(server.requests)
+
+        logger.info(
+            f"{n_pages:>5} | {expected:>5} | {timings['single']:>9.2f} | {timings['chunked']:>10.2f} | "
+            f"{requests_sent:>8} | {timings['single'] / timings['chunked']:>6.2f}x"
+        )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Бенчмарк качества и скорости OCR по движкам: test_data + синтетические ТТН.
+
+Для каждого движка (pdfplumber+таблицы, pdfplumber+regex, Tesseract,
+LLM через fake-сервер) измеряются время по этапам OCRService, пиковый
+RSS процесса и precision/recall по полям против эталонов
+tests/benchmarks/golden/*.json. Каждый движок запускается в отдельном
+процессе, чтобы пиковый RSS не смешивался.
+
+Отчёт пишется в JSON; с --compare сравнивается с отчётом другого коммита,
+при падении точности или замедлении сверх порога код возврата 1.
+
+Mocked LLM отвечает эталоном, поэтому его точность проверяет конвертацию
+ответа, а время — накладные расходы конвейера при заданной задержке модели.
+
+Синтетические ТТН (текстовый PDF и «скан» PNG) генерируются tests/synthetic_ttn.py;
+каталог с документами и эталонами от gen_synthetic_ttn.py можно добавить через --extra-dir.
+
+Запуск:
+    python -m tests.benchmarks.bench_ocr_accuracy --output ocr_report.json
+    python -m tests.benchmarks.bench_ocr_accuracy --synthetic 3 --synthetic-lines 1000 --output big.json
+    python -m tests.benchmarks.bench_ocr_accuracy --output new.json --compare ocr_report.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from common.models import OCRResult
+from tests.ocr_accuracy import golden_fixtures, merge_scores, score_result
+from tests.synthetic_ttn import make_ttn, render_image, render_pdf
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger("BENCH_OCR_ACCURACY")
+
+# Движок -> виды документов, которые он умеет обрабатывать
+ENGINES = {
+    "pdfplumber_tables": ("pdf",),
+    "pdfplumber_regex": ("pdf",),
+    "tesseract": ("pdf", "image"),
+    "llm_mock": ("pdf", "image"),
+}
+ROWS_PER_PAGE = 40
+
+
+def build_cases(data_dir: Path, extra_dirs: List[Path], synthetic: int, synthetic_lines: int,
+                work_dir: Path) -> List[Dict[str, Any]]:
+    """Документы с эталонами: test_data, extra_dirs и сгенерированные ТТН (PDF + PNG первой страницы)."""
+    fixtures = golden_fixtures(data_dir)
+    for extra_dir in extra_dirs:
+        fixtures += golden_fixtures(extra_dir, golden_dir=extra_dir)
+
+    for index in range(synthetic):
+        ttn = make_ttn(synthetic_lines, seed=index)
+        golden = ttn.golden()
+        stem = f"synthetic_{index + 1}_{synthetic_lines}l"
+        fixtures.append((render_pdf(ttn, work_dir / f"{stem}.pdf", rows_per_page=ROWS_PER_PAGE), golden))
+        first_page = golden.model_copy(update={"items": golden.items[:ROWS_PER_PAGE]})
+        fixtures.append((render_image(ttn, work_dir / f"{stem}.png", rows_per_page=ROWS_PER_PAGE, seed=index),
+                         first_page))
+
+    return [
+        {"name": path.name, "kind": "pdf" if path.suffix.lower() == ".pdf" else "image",
+         "path": str(path), "golden": golden.model_dump(mode="json")}
+        for path, golden in fixtures
+    ]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux — килобайты, macOS — байты
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _make_service(engine: str):
+    """OCRService, настроенный на один путь распознавания."""
+    from client.src.services.ocr_service import OCRService
+
+    service = OCRService()
+    service.hedging_enabled = False
+    service.chunking_enabled = False
+    service.table_extraction = engine == "pdfplumber_tables"
+    service.llm_provider = "none"
+    service.llm_service.client = None
+    return service
+
+
+def _setup_llm_mock(service, latency: float):
+    """Направить ChatBotHub на fake-сервер, отвечающий эталоном текущего документа."""
+    from client.src.services.async_llm_client import AsyncLLMClient
+    from client.src.services.llm_cache import LLMResponseCache
+    from tests.fake_llm_server import FakeLLMServer, FakeReply
+
+    current: Dict[str, Any] = {}
+    server = FakeLLMServer().start()
+    server.handler = lambda request: FakeReply(result=current.get("reply"), delay=latency)
+
+    service.llm_provider = "chatbothub"
+    hub = service.chatbothub_service
+    hub.base_url = server.url
+    hub.http = AsyncLLMClient("bench", settings={"max_attempts": 1})
+    hub.cache = LLMResponseCache(enabled=False)
+    return server, current
+
+
+def _llm_reply(golden: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ttn_number": golden["ttn_number"],
+        "ttn_date": golden["ttn_date"],
+        "supplier": golden["supplier"],
+        "items": [{field: item[field] for field in ("article", "name", "quantity", "unit")}
+                  for item in golden["items"]],
+    }
+
+
+def _unavailable_reason(engine: str, service, cases: List[Dict[str, Any]]) -> Optional[str]:
+    if engine != "tesseract":
+        return None
+    import pytesseract
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        return f"tesseract not available: {e}"
+    if any(case["kind"] == "pdf" for case in cases):
+        from pdf2image import pdfinfo_from_path
+        try:
+            pdfinfo_from_path(next(c["path"] for c in cases if c["kind"] == "pdf"), poppler_path=service.poppler_path)
+        except Exception as e:
+            return f"poppler not available: {e}"
+    return None
+
+
+def _process(engine: str, service, case: Dict[str, Any]) -> OCRResult:
+    if engine == "tesseract":
+        # Без LLM и без текстового слоя: растеризация + Tesseract + Regex
+        service.last_timings = {}
+        return service._process_image_content(Path(case["path"]))
+    return service.process_document(Path(case["path"]))
+
+
+def run_engine(engine: str, cases: List[Dict[str, Any]], repeat: int, llm_latency: float) -> Dict[str, Any]:
+    """Прогнать движок по документам (вызывается в отдельном процессе)."""
+    logging.getLogger().setLevel(logging.ERROR)
+    cases = [case for case in cases if case["kind"] in ENGINES[engine]]
+    service = _make_service(engine)
+    report: Dict[str, Any] = {"status": "ok", "documents": {}}
+
+    reason = _unavailable_reason(engine, service, cases)
+    if reason:
+        return {"status": "unavailable", "reason": reason}
+
+    server, current = None, {}
+    if engine == "llm_mock":
+        server, current = _setup_llm_mock(service, llm_latency)
+
+    report["rss_before_mb"] = _peak_rss_mb()
+    scores = []
+    stage_samples: Dict[str, List[float]] = {}
+    started_at = time.perf_counter()
+    try:
+        for case in cases:
+            golden = OCRResult.model_validate(case["golden"])
+            current["reply"] = _llm_reply(case["golden"])
+
+            elapsed, result = [], None
+            for _ in range(repeat):
+                run_started = time.perf_counter()
+                result = _process(engine, service, case)
+                elapsed.append(time.perf_counter() - run_started)
+                for stage, seconds in service.last_timings.items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+
+            document_scores = score_result(golden, result)
+            scores.append(document_scores)
+            report["documents"][case["name"]] = {
+                "kind": case["kind"],
+                "elapsed_median_s": round(statistics.median(elapsed), 4),
+                "timings": {stage: round(seconds, 4) for stage, seconds in service.last_timings.items()},
+                "f1": merge_scores([document_scores])["overall"].to_dict()["f1"],
+            }
+    finally:
+        if server:
+            server.stop()
+
+    total = time.perf_counter() - started_at
+    runs = len(cases) * repeat
+    report["docs_per_second"] = round(runs / total, 2) if total else None
+    report["elapsed_median_s"] = round(statistics.median(
+        d["elapsed_median_s"] for d in report["documents"].values()), 4) if cases else None
+    report["stages"] = {
+        stage: {"calls": len(samples), "total_s": round(sum(samples), 4),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 2)}
+        for stage, samples in stage_samples.items()
+    }
+    report["accuracy"] = {name: score.to_dict() for name, score in merge_scores(scores).items()}
+    report["peak_rss_mb"] = _peak_rss_mb()
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any], max_accuracy_drop: float,
+                    max_slowdown: float) -> List[str]:
+    """Регрессии нового отчёта относительно старого (пустой список — всё в порядке)."""
+    regressions = []
+    logger.info(f"{'engine':<18} | {'F1 old':>7} | {'F1 new':>7} | {'median old, ms':>14} | {'median new, ms':>14}")
+    logger.info("-" * 72)
+    for engine, new_report in new["engines"].items():
+        old_report = old.get("engines", {}).get(engine)
+        if not old_report or old_report.get("status") != "ok" or new_report.get("status") != "ok":
+            continue
+
+        old_f1 = old_report["accuracy"]["overall"]["f1"]
+        new_f1 = new_report["accuracy"]["overall"]["f1"]
+        old_time = old_report["elapsed_median_s"] or 0.0
+        new_time = new_report["elapsed_median_s"] or 0.0
+        logger.info(f"{engine:<18} | {old_f1:>7.3f} | {new_f1:>7.3f} | {old_time * 1000:>14.1f} | {new_time * 1000:>14.1f}")
+
+        if old_f1 - new_f1 > max_accuracy_drop:
+            regressions.append(f"{engine}: F1 {old_f1:.3f} -> {new_f1:.3f}")
+        for field, score in new_report["accuracy"].items():
+            old_score = old_report["accuracy"].get(field)
+            if old_score and old_score["f1"] - score["f1"] > max_accuracy_drop and field != "overall":
+                regressions.append(f"{engine}.{field}: F1 {old_score['f1']:.3f} -> {score['f1']:.3f}")
+        if old_time and new_time > old_time * (1 + max_slowdown):
+            regressions.append(f"{engine}: median {old_time * 1000:.1f} ms -> {new_time * 1000:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, default=Path("test_data"))
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--extra-dir", type=Path, nargs="*", default=[],
+                        help="Каталоги с документами и эталонами <документ>.json")
+    parser.add_argument("--synthetic", type=int, default=2, help="Число синтетических ТТН")
+    parser.add_argument("--synthetic-lines", type=int, default=200, help="Позиций в синтетической ТТН")
+    parser.add_argument("--repeat", type=int, default=3, help="Прогонов каждого документа (время — медиана)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Задержка ответа mocked LLM, с")
+    parser.add_argument("--output", type=Path, default=Path("ocr_benchmark_report.json"))
+    parser.add_argument("--compare", type=Path, help="Отчёт для сравнения (например, с main)")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="Допустимое замедление медианы (доля)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.TemporaryDirectory(prefix="ocr_bench_")
+    cases = build_cases(args.data_dir, args.extra_dir, args.synthetic, args.synthetic_lines, Path(work_dir.name))
+    logger.info(f"Documents with golden results: {len(cases)}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"repeat": args.repeat, "llm_latency_s": args.llm_latency,
+                     "synthetic": args.synthetic, "synthetic_lines": args.synthetic_lines},
+        "engines": {},
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for engine in args.engines:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_engine, (engine, cases, args.repeat, args.llm_latency))
+        report["engines"][engine] = result
+
+        if result["status"] != "ok":
+            logger.info(f"⚠️  {engine}: {result['reason']}")
+            continue
+        accuracy = result["accuracy"]
+        logger.info(
+            f"✅ {engine:<18} docs={len(result['documents']):>3} | {result['docs_per_second']:>7.2f} docs/s | "
+            f"median {result['elapsed_median_s'] * 1000:>8.1f} ms | peak RSS {result['peak_rss_mb']} MB | "
+            f"P={accuracy['overall']['precision']:.3f} R={accuracy['overall']['recall']:.3f} "
+            f"F1={accuracy['overall']['f1']:.3f}"
+        )
+        for field in ("ttn_number", "ttn_date", "supplier", "article", "name", "quantity", "unit", "items"):
+            score = accuracy[field]
+            logger.info(f"     {field:<11} P={score['precision']:.3f} R={score['recall']:.3f} "
+                        f"(tp={score['tp']} fp={score['fp']} fn={score['fn']})")
+
+    work_dir.cleanup()
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"Report written to {args.output}")
+
+    if args.compare:
+        old = json.loads(args.compare.read_text(encoding="utf-8"))
+        logger.info(f"Comparing with {args.compare} (commit {old.get('commit')})")
+        regressions = compare_reports(old, report, args.max_accuracy_drop, args.max_slowdown)
+        for regression in regressions:
+            logger.error(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info("No regressions")
+
+
+if __name__ == "__main__":
+    main()
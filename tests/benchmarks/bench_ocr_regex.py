@@ -0,0 +1,56 @@
+"""
+Бенчмарк Regex-парсера ТТН: скомпилированный движок против старой реализации.
+
+Запуск:
+    python -m tests.benchmarks.bench_ocr_regex --lines 10000 50000 --repeat 5
+"""
+import argparse
+import logging
+import sys
+import time
+
+from client.src.services.ocr_service import OCRService
+from tests.test_ocr_regex import legacy_parse_ttn_regex, make_synthetic_ocr_text
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger("BENCH_OCR_REGEX")
+
+
+def _best_of(func, text: str, repeat: int) -> float:
+    """Лучшее время из repeat прогонов (секунды)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service = OCRService()
+
+    logger.info(f"{'lines':>8} | {'legacy, ms':>11} | {'compiled, ms':>12} | {'speedup':>7} | items")
+    logger.info("-" * 60)
+    for n_lines in args.lines:
+        text = make_synthetic_ocr_text(n_lines, seed=n_lines)
+
+        new_result = service._parse_ttn_regex(text)
+        if new_result != legacy_parse_ttn_regex(text):
+            logger.error(f"❌ Results differ for {n_lines} lines")
+            sys.exit(1)
+
+        legacy_time = _best_of(legacy_parse_ttn_regex, text, args.repeat)
+        new_time = _best_of(service._parse_ttn_regex, text, args.repeat)
+        logger.info(
+            f"{n_lines:>8} | {legacy_time * 1000:>11.1f} | {new_time * 1000:>12.1f} | "
+            f"{legacy_time / new_time:>6.2f}x | {len(new_result.items)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Бенчмарк нечёткого сопоставления позиций ТТН со справочником (ProductMatcher).
+
+Справочник — make_catalog с уникальным кодом в конце каждого наименования,
+чтобы наименования не повторялись. Запросы — наименования случайных товаров:
+точные, с опечаткой (одна замена буквы) и без кода (только базовое имя,
+совпадений много — проверяется скорость, а не точность).
+
+Запуск:
+    python -m tests.benchmarks.bench_product_matching --size 80000 --queries 500
+"""
+import argparse
+import logging
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+from common.models import ProductRead
+from common.product_matcher import ProductMatcher, match_status
+from server.src.db.migrations import SEED_PRODUCTS
+from tests.synthetic_ttn import make_catalog
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_PRODUCT_MATCHING")
+logger.setLevel(logging.INFO)
+
+CODE_LETTERS = "АБВГДЕКМНПРСТХ"
+
+
+def make_products(size: int, seed: int):
+    rng = random.Random(seed)
+    products = []
+    for index, product in enumerate(make_catalog(size, seed=seed)):
+        name = product.name
+        if index >= len(SEED_PRODUCTS):
+            name = f"{name} {rng.choice(CODE_LETTERS)}{rng.choice(CODE_LETTERS)}-{rng.randint(10, 99999)}"
+        products.append(ProductRead(id=index + 1, article=product.article, name=name, unit=product.unit,
+                                    requires_control=product.requires_control, created_at=datetime(2025, 1, 1)))
+    return products
+
+
+def typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice("оаеи") + name[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=80000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    products = make_products(args.size, args.seed)
+
+    start = time.perf_counter()
+    matcher = ProductMatcher(products)
+    logger.info(f"catalog: {len(products)} products, index built in {time.perf_counter() - start:.2f} s")
+
+    sample = rng.sample(products, min(args.queries, len(products)))
+    query_sets = {
+        "exact": [p.name for p in sample],
+        "typo": [typo(p.name, rng) for p in sample],
+        "no code": [p.name.rsplit(" ", 1)[0] for p in sample],
+    }
+
+    logger.info(f"{'queries':>8} | {'ms/item':>7} | {'top-1':>5} | statuses")
+    logger.info("-" * 70)
+    for label, queries in query_sets.items():
+        start = time.perf_counter()
+        results = [matcher.match(None, query) for query in queries]
+        per_item = (time.perf_counter() - start) / len(queries)
+
+        top1 = sum(1 for p, matches in zip(sample, results) if matches and matches[0].product.id == p.id)
+        statuses = Counter(match_status(matches) for matches in results)
+        logger.info(
+            f"{label:>8} | {per_item * 1000:>7.3f} | {top1 / len(queries):>5.2f} | "
+            + ", ".join(f"{status}: {count}" for status, count in statuses.most_common())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Бенчмарк кодеков записи (client/src/services/video_writer.py): размер файла
+и процессорное время на минуту видео для MJPG/AVI (прежняя запись),
+MPEG-4/MP4 средствами OpenCV (замена без ffmpeg), H.264/MP4 и VP9/WebM через ffmpeg.
+
+Видео синтетическое, похожее на съёмку приёмки: неподвижный фон с текстурой,
+движущийся «груз», лёгкий дрейф кадра и шум матрицы. Кадры готовятся заранее
+(цикл по 2 с), поэтому время генерации в замер не входит. Процессорное время —
+своего процесса и дочернего ffmpeg (getrusage), реальное время — для оценки,
+успевает ли кодек за камерой (запас > 1x).
+
+Запуск:
+    python -m tests.benchmarks.bench_video_codecs --seconds 20
+    python -m tests.benchmarks.bench_video_codecs --ffmpeg /usr/bin/ffmpeg --crf 23 28
+"""
+import argparse
+import logging
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from client.src.services.video_writer import (
+    BACKEND_FFMPEG, BACKEND_OPENCV, DEFAULT_PRESET, open_video_writer, resolve_ffmpeg
+)
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_VIDEO_CODECS")
+logger.setLevel(logging.INFO)
+
+
+def make_frames(width: int, height: int, count: int) -> list:
+    """Кадры сцены: фон с текстурой, движущийся прямоугольник, дрейф и шум."""
+    rng = np.random.default_rng(0)
+    background = np.empty((height + 40, width + 40, 3), dtype=np.uint8)
+    cv2.randu(background, 40, 200)
+    background = cv2.GaussianBlur(background, (0, 0), 6)
+    for x in range(0, width, 160):
+        # Стеллажи: вертикальные полосы
+        cv2.rectangle(background, (x, 0), (x + 20, height + 40), (60, 70, 80), -1)
+
+    frames = []
+    for i in range(count):
+        dx, dy = int(4 * np.sin(i / 15)), int(3 * np.cos(i / 20))
+        frame = background[20 + dy:20 + dy + height, 20 + dx:20 + dx + width].copy()
+        x = int((width - 300) * (0.5 + 0.5 * np.sin(i / count * 2 * np.pi)))
+        cv2.rectangle(frame, (x, height // 3), (x + 300, height // 3 + 250), (30, 120, 200), -1)
+        cv2.putText(frame, "BOLT-M10 x 500", (x + 20, height // 3 + 130), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                    (255, 255, 255), 2)
+        noise = rng.normal(0, 2, frame.shape)
+        frames.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run(name: str, path: Path, codec: str, backend: str, frames: list, fps: int, total: int, **options):
+    height, width = frames[0].shape[:2]
+    cpu_before = cpu_seconds()
+    start = time.perf_counter()
+    writer = open_video_writer(path, codec, fps, (width, height), backend, **options)
+    for i in range(total):
+        writer.write(frames[i % len(frames)])
+    writer.release()
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_before
+
+    minutes = total / fps / 60
+    size_mb = path.stat().st_size / 1024 / 1024
+    logger.info(
+        f"{name:>18}: {size_mb / minutes:7.1f} МБ/мин, CPU {cpu / minutes:6.1f} с/мин, "
+        f"запас {total / fps / elapsed:4.1f}x, 5 мин = {size_mb / minutes * 5:6.1f} МБ"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recording codecs: size and CPU per minute")
+    parser.add_argument("--seconds", type=int, default=20, help="Seconds of footage per codec")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="Path to ffmpeg binary")
+    parser.add_argument("--crf", type=int, nargs="+", default=[28], help="CRF values for H.264")
+    parser.add_argument("--preset", default=DEFAULT_PRESET)
+    args = parser.parse_args()
+
+    frames = make_frames(args.width, args.height, args.fps * 2)
+    total = args.fps * args.seconds
+    logger.info(f"Кадр {args.width}x{args.height}, {args.fps} fps, {args.seconds} с видео на кодек, "
+                f"ядер CPU: {os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        run("MJPG/AVI", tmp / "mjpg.avi", "MJPG", BACKEND_OPENCV, frames, args.fps, total)
+        run("mp4v/MP4 (OpenCV)", tmp / "mp4v.mp4", "mp4v", BACKEND_OPENCV, frames, args.fps, total)
+
+        ffmpeg_path = resolve_ffmpeg(args.ffmpeg)
+        if ffmpeg_path is None:
+            logger.info(f"ffmpeg не найден ({args.ffmpeg}): H.264/VP9 через ffmpeg пропущены")
+            return
+        for crf in args.crf:
+            run(f"H.264 crf {crf}", tmp / f"h264_{crf}.mp4", "h264", BACKEND_FFMPEG, frames, args.fps, total,
+                ffmpeg_path=ffmpeg_path, crf=crf, preset=args.preset)
+        run("H.264 1500 кбит/с", tmp / "h264_1500k.mp4", "h264", BACKEND_FFMPEG, frames, args.fps, total,
+            ffmpeg_path=ffmpeg_path, bitrate_kbps=1500, preset=args.preset)
+        run("VP9 crf 32", tmp / "vp9.webm", "vp9", BACKEND_FFMPEG, frames, args.fps, total,
+            ffmpeg_path=ffmpeg_path, crf=32)
+
+
+if __name__ == "__main__":
+    main()
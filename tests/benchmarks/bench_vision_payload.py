@@ -0,0 +1,97 @@
+"""
+Бенчмарк подготовки изображений для Vision LLM: размер запроса и задержка.
+
+Поднимает локальный mock-сервер ChatBotHub (эндпоинт generate_structured_vision),
+который читает тело запроса с ограничением пропускной способности канала,
+и сравнивает отправку исходного файла с подготовленным изображением.
+
+Запуск:
+    python -m tests.benchmarks.bench_vision_payload --bandwidth-mbit 20 --repeat 3
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from client.src.services.async_llm_client import AsyncLLMClient
+from client.src.services.chatbothub_service import ChatBotHubService
+from client.src.services.llm_cache import LLMResponseCache
+from client.src.services.vision_image_service import PreparedImage, RAW_MIME_TYPES
+from tests.fake_llm_server import FakeLLMServer, FakeReply
+from tests.test_vision_image import make_document_photo
+
+logging.basicConfig(level=logging.WARNING, format='%(message)s')
+logger = logging.getLogger("BENCH_VISION_PAYLOAD")
+logger.setLevel(logging.INFO)
+
+
+def make_inputs(directory: Path) -> dict:
+    """Тестовые изображения: фото с телефона, страница 300 DPI, скриншот из test_data."""
+    inputs = {}
+
+    photo = directory / "photo_12mp.jpg"
+    photo.write_bytes(make_document_photo(4000, 3000))
+    inputs["12 MP photo (jpg)"] = photo
+
+    page = cv2.imdecode(np.frombuffer(make_document_photo(2480, 3508), np.uint8), cv2.IMREAD_COLOR)
+    page_path = directory / "page_300dpi.png"
+    cv2.imwrite(str(page_path), page)
+    inputs["A4 @ 300 DPI (png)"] = page_path
+
+    sample = Path("test_data/img.png")
+    if sample.exists():
+        inputs["test_data/img.png"] = sample
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bandwidth-mbit", type=float, default=20.0, help="Uplink bandwidth, Mbit/s")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Simulated model time, s")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(bandwidth_bytes_per_s=args.bandwidth_mbit * 1_000_000 / 8).start()
+    server.handler = lambda request: FakeReply(delay=args.model_latency)
+
+    service = ChatBotHubService()
+    service.base_url = server.url
+    service.http = AsyncLLMClient("bench", settings={"attempt_timeout": 120, "max_attempts": 1})
+    service.cache = LLMResponseCache(enabled=False)
+    prepare = service.image_service.prepare
+
+    def raw_prepare(image_bytes: bytes, suffix: str = ".jpg") -> PreparedImage:
+        return PreparedImage(image_bytes, RAW_MIME_TYPES.get(suffix.lower(), "image/jpeg"))
+
+    logger.info(f"Mock uplink: {args.bandwidth_mbit} Mbit/s, settings: {service.image_service.signature}")
+    logger.info(f"{'input':<22} | {'mode':<8} | {'file, KB':>9} | {'request, KB':>11} | {'latency, ms':>11}")
+    logger.info("-" * 75)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for title, path in make_inputs(Path(tmp)).items():
+            file_kb = path.stat().st_size / 1024
+            for mode, prepare_func in (("raw", raw_prepare), ("prepared", prepare)):
+                service.image_service.prepare = prepare_func
+                best = float("inf")
+                for _ in range(args.repeat):
+                    server.requests.clear()
+                    start = time.perf_counter()
+                    result = service.parse_ttn_image(path)
+                    best = min(best, time.perf_counter() - start)
+                    if not result:
+                        logger.error(f"❌ Mock server returned no result for {title}")
+                        sys.exit(1)
+                logger.info(
+                    f"{title:<22} | {mode:<8} | {file_kb:>9.0f} | {server.requests[-1].size / 1024:>11.0f} | {best * 1000:>11.0f}"
+                )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Генерация синтетических ТТН для нагрузочных тестов.
+
+Для каждой ТТН пишутся: текстовый PDF, «скан» (PNG первой страницы и/или
+многостраничный PDF без текстового слоя), эталон <документ>.json в формате
+OCRResult и payload приёмки <ttn>.reception.json. Дополнительно — каталог
+товаров catalog.json (для бенчмарков справочника).
+
+Запуск:
+    python -m tests.benchmarks.gen_synthetic_ttn --out data/synthetic --count 5 --lines 1000
+    python -m tests.benchmarks.gen_synthetic_ttn --out data/synthetic --lines 2000 --formats scan --dpi 200
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from tests.synthetic_ttn import make_catalog, make_ttn, render_image, render_pdf, render_scan_pdf
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger("GEN_SYNTHETIC_TTN")
+
+FORMATS = ("pdf", "png", "scan", "reception")
+
+
+def _write_json(path: Path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=Path("data/synthetic"))
+    parser.add_argument("--count", type=int, default=3, help="Число ТТН")
+    parser.add_argument("--lines", type=int, default=200, help="Позиций в одной ТТН")
+    parser.add_argument("--rows-per-page", type=int, default=40)
+    parser.add_argument("--catalog-size", type=int, default=1000, help="Размер каталога товаров")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["pdf", "png", "reception"])
+    parser.add_argument("--dpi", type=int, default=150, help="Разрешение «сканов»")
+    parser.add_argument("--noise", type=float, default=8.0, help="СКО гауссова шума сканов")
+    parser.add_argument("--skew", type=float, default=1.5, help="Максимальный наклон сканов, градусы")
+    parser.add_argument("--font", type=Path, help="TTF-шрифт с кириллицей для сканов")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    catalog = make_catalog(args.catalog_size, seed=args.seed)
+    _write_json(args.out / "catalog.json", [product.model_dump(mode="json") for product in catalog])
+    logger.info(f"Catalog: {len(catalog)} products")
+
+    scan_options = {"rows_per_page": args.rows_per_page, "dpi": args.dpi, "noise": args.noise,
+                    "max_skew_degrees": args.skew, "font_path": args.font}
+    started_at = time.perf_counter()
+    for index in range(args.count):
+        ttn = make_ttn(args.lines, seed=args.seed + index, catalog=catalog)
+        stem = f"synthetic_{index + 1:03d}_{args.lines}l"
+        golden = ttn.golden().model_dump(mode="json")
+        written = []
+
+        if "pdf" in args.formats:
+            written.append(render_pdf(ttn, args.out / f"{stem}.pdf", rows_per_page=args.rows_per_page))
+        if "png" in args.formats:
+            written.append(render_image(ttn, args.out / f"{stem}.png", seed=args.seed + index, **scan_options))
+        if "scan" in args.formats:
+            written.append(render_scan_pdf(ttn, args.out / f"{stem}_scan.pdf", seed=args.seed + index,
+                                           **scan_options))
+        for path in written:
+            document_golden = golden
+            if path.suffix == ".png":
+                # На PNG только первая страница
+                document_golden = dict(golden, items=golden["items"][:args.rows_per_page])
+            _write_json(path.with_name(path.name + ".json"), document_golden)
+        if "reception" in args.formats:
+            _write_json(args.out / f"{stem}.reception.json", ttn.to_reception().model_dump(mode="json"))
+
+        sizes = ", ".join(f"{p.name} {p.stat().st_size / 1024:.0f} KB" for p in written)
+        logger.info(f"✅ {stem}: TTN {ttn.ttn_number}, {len(ttn.items)} items" + (f" | {sizes}" if sizes else ""))
+
+    logger.info(f"Generated {args.count} TTNs in {time.perf_counter() - started_at:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
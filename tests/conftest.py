@@ -14,6 +14,28 @@ import pytest
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+# Данные тестов (БД сервера, реплика справочника, файлы приёмок, кэши) —
+# во временной папке, а не в data/ проекта. Конфиги кэшируются при первом
+# чтении, поэтому пути подменяются до импорта модулей сервера и клиента.
+TEST_DATA_DIR = Path(tempfile.mkdtemp(prefix="tmc_tests_"))
+
+
+def _redirect_data_paths(config: dict):
+    config["paths"].update(
+        database=str(TEST_DATA_DIR / "database" / "warehouse.db"),
+        receipts_root=str(TEST_DATA_DIR / "receipts"),
+        logs=str(TEST_DATA_DIR / "logs"),
+    )
+    config.setdefault("catalog", {})["replica_path"] = str(TEST_DATA_DIR / "catalog" / "products.db")
+    config.setdefault("photos", {})["cache_dir"] = str(TEST_DATA_DIR / "cache" / "photos")
+
+
+from client.src.config import get_config as _get_client_config  # noqa: E402
+from server.src.config import get_config as _get_server_config  # noqa: E402
+
+_redirect_data_paths(_get_client_config())
+_redirect_data_paths(_get_server_config())
+
 # Обеспечить headless режим Qt в CI
 if os.environ.get("CI") and not os.environ.get("QT_QPA_PLATFORM"):
     os.environ["QT_QPA_PLATFORM"] = "offscreen"
@@ -231,6 +253,20 @@ def sample_ttn_text() -> str:
     """
 
 
+# ═══════════════════════════════════════════════════════════════════
+# Fixtures для LLM
+# ═══════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def fake_llm_server():
+    """Локальный fake-сервер LLM (ChatBotHub + OpenAI)."""
+    from tests.fake_llm_server import FakeLLMServer
+
+    server = FakeLLMServer().start()
+    yield server
+    server.stop()
+
+
 # ═══════════════════════════════════════════════════════════════════
 # Skip markers
 # ═══════════════════════════════════════════════════════════════════
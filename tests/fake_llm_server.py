@@ -0,0 +1,114 @@
+# tests/fake_llm_server.py
+"""
+Локальный fake-сервер LLM-провайдеров для тестов и бенчмарков.
+
+Отвечает на эндпоинты ChatBotHub (generate_structured, generate_structured_vision)
+и OpenAI (/chat/completions). Поведение задаётся функцией handler, по умолчанию
+сервер возвращает успешный результат с ttn_number="1".
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_RESULT = {"ttn_number": "1", "items": []}
+
+
+@dataclass
+class FakeReply:
+    """Ответ fake-сервера: HTTP-код, JSON-результат и задержка перед ответом."""
+    status: int = 200
+    result: Optional[Dict[str, Any]] = None
+    delay: float = 0.0
+
+
+@dataclass
+class RecordedRequest:
+    path: str
+    body: Dict[str, Any]
+    size: int
+
+
+class FakeLLMServer:
+    """HTTP-сервер в фоновом потоке."""
+
+    def __init__(self, bandwidth_bytes_per_s: float = 0.0):
+        self.requests: List[RecordedRequest] = []
+        self.handler: Callable[[RecordedRequest], FakeReply] = lambda request: FakeReply()
+        self.bandwidth_bytes_per_s = bandwidth_bytes_per_s
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self._read_body(length)
+                request = RecordedRequest(self.path, json.loads(raw or b"{}"), length)
+                with server._lock:
+                    server.requests.append(request)
+
+                reply = server.handler(request)
+                if reply.delay:
+                    time.sleep(reply.delay)
+
+                result = DEFAULT_RESULT if reply.result is None else reply.result
+                if self.path.endswith("/chat/completions"):
+                    body = {
+                        "id": "fake", "object": "chat.completion", "created": 0, "model": "fake",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": json.dumps(result)}}],
+                    }
+                else:
+                    body = {"status": "ok", "data": {"result": result}}
+                if reply.status >= 400:
+                    body = {"status": "error", "message": f"HTTP {reply.status}"}
+
+                encoded = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(reply.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(encoded)))
+                    self.end_headers()
+                    self.wfile.write(encoded)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # клиент уже ушёл по таймауту
+
+            def _read_body(self, length: int) -> bytes:
+                if not server.bandwidth_bytes_per_s:
+                    return self.rfile.read(length)
+                chunks = []
+                received = 0
+                while received < length:
+                    chunk = self.rfile.read(min(65536, length - received))
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    time.sleep(len(chunk) / server.bandwidth_bytes_per_s)
+                return b"".join(chunks)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
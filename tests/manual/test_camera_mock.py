@@ -16,7 +16,7 @@ from client.src.services.camera_service import CameraService
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("CAMERA_TEST")
 
-def test_mock_camera():
+def test_mock_camera(tmp_path):
     app = QApplication(sys.argv)
     
     service = CameraService()
@@ -24,7 +24,7 @@ def test_mock_camera():
     # Force mock mode by setting index to -1 (or ensuring no camera exists)
     # The updated logic automatically switches to mock if index 0 fails
     
-    output_dir = Path("test_video_output")
+    output_dir = tmp_path / "test_video_output"
     if output_dir.exists():
         import shutil
         shutil.rmtree(output_dir)
@@ -67,4 +67,4 @@ def test_mock_camera():
         logger.error("❌ FAILED: No video file created")
 
 if __name__ == "__main__":
-    test_mock_camera()
+    test_mock_camera(Path.cwd())
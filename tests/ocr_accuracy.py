@@ -0,0 +1,169 @@
+# tests/ocr_accuracy.py
+"""
+Оценка качества OCR по полям: precision / recall против эталонных OCRResult.
+
+Реквизиты (номер, дата, поставщик) сравниваются напрямую. Позиции сначала
+сопоставляются (по артикулу, затем по похожести наименования), после чего
+сравниваются поля сопоставленных пар. Лишние позиции дают ложные
+срабатывания по всем заполненным полям, пропущенные — пропуски.
+"""
+import json
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from common.models import OCRItem, OCRResult
+
+GOLDEN_DIR = Path(__file__).parent / "benchmarks" / "golden"
+
+HEADER_FIELDS = ("ttn_number", "ttn_date", "supplier")
+ITEM_FIELDS = ("article", "name", "quantity", "unit")
+NAME_MATCH_THRESHOLD = 0.6
+
+QUOTES_RE = re.compile(r"[«»“”„\"']")
+
+
+@dataclass
+class FieldScore:
+    """Счётчики по одному полю: верно, лишнее/неверное, пропущено."""
+    tp: int = 0
+    fp: int = 0
+    fn: int = 0
+
+    @property
+    def precision(self) -> float:
+        return self.tp / (self.tp + self.fp) if self.tp + self.fp else 1.0
+
+    @property
+    def recall(self) -> float:
+        return self.tp / (self.tp + self.fn) if self.tp + self.fn else 1.0
+
+    @property
+    def f1(self) -> float:
+        p, r = self.precision, self.recall
+        return 2 * p * r / (p + r) if p + r else 0.0
+
+    def add(self, other: "FieldScore"):
+        self.tp += other.tp
+        self.fp += other.fp
+        self.fn += other.fn
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"tp": self.tp, "fp": self.fp, "fn": self.fn,
+                "precision": round(self.precision, 4), "recall": round(self.recall, 4), "f1": round(self.f1, 4)}
+
+
+def load_golden(path: Path) -> OCRResult:
+    """Эталонный результат из JSON (формат OCRResult.model_dump(mode="json"))."""
+    return OCRResult.model_validate(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def golden_fixtures(data_dir: Path, golden_dir: Path = GOLDEN_DIR) -> List[Tuple[Path, OCRResult]]:
+    """Документы data_dir, для которых есть эталон <имя файла>.json."""
+    fixtures = []
+    for golden_path in sorted(golden_dir.glob("*.json")):
+        document = data_dir / golden_path.stem
+        if document.exists():
+            fixtures.append((document, load_golden(golden_path)))
+    return fixtures
+
+
+def normalize(value: Any) -> Optional[str]:
+    """Нормализация для сравнения: регистр, кавычки, пробелы, числа."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        return f"{value:g}"
+    text = QUOTES_RE.sub('"', str(value))
+    text = " ".join(text.split()).casefold()
+    return text or None
+
+
+def _score_value(score: FieldScore, expected: Any, actual: Any):
+    expected, actual = normalize(expected), normalize(actual)
+    if expected is None:
+        if actual is not None:
+            score.fp += 1
+    elif actual is None:
+        score.fn += 1
+    elif actual == expected:
+        score.tp += 1
+    else:
+        # Неверное значение — и ложное срабатывание, и пропуск верного
+        score.fp += 1
+        score.fn += 1
+
+
+def match_items(golden: List[OCRItem], predicted: List[OCRItem]) -> List[Tuple[int, int]]:
+    """Пары (индекс эталона, индекс предсказания): сначала по артикулу, затем по наименованию."""
+    pairs: List[Tuple[int, int]] = []
+    free = set(range(len(predicted)))
+
+    for g_index, item in enumerate(golden):
+        article = normalize(item.article)
+        if not article:
+            continue
+        for p_index in sorted(free):
+            if normalize(predicted[p_index].article) == article:
+                pairs.append((g_index, p_index))
+                free.discard(p_index)
+                break
+
+    matched = {g for g, _ in pairs}
+    for g_index, item in enumerate(golden):
+        if g_index in matched:
+            continue
+        name = normalize(item.name) or ""
+        best, best_ratio = None, NAME_MATCH_THRESHOLD
+        for p_index in sorted(free):
+            ratio = SequenceMatcher(None, name, normalize(predicted[p_index].name) or "").ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = p_index, ratio
+        if best is not None:
+            pairs.append((g_index, best))
+            free.discard(best)
+
+    return sorted(pairs)
+
+
+def score_result(golden: OCRResult, predicted: OCRResult) -> Dict[str, FieldScore]:
+    """Счётчики по полям реквизитов, полям позиций и позициям целиком ("items")."""
+    scores = {name: FieldScore() for name in HEADER_FIELDS + ITEM_FIELDS + ("items",)}
+
+    for name in HEADER_FIELDS:
+        _score_value(scores[name], getattr(golden, name), getattr(predicted, name))
+
+    pairs = match_items(golden.items, predicted.items)
+    for g_index, p_index in pairs:
+        for name in ITEM_FIELDS:
+            _score_value(scores[name], getattr(golden.items[g_index], name), getattr(predicted.items[p_index], name))
+
+    matched_golden = {g for g, _ in pairs}
+    matched_predicted = {p for _, p in pairs}
+    for index, item in enumerate(golden.items):
+        if index not in matched_golden:
+            for name in ITEM_FIELDS:
+                _score_value(scores[name], getattr(item, name), None)
+    for index, item in enumerate(predicted.items):
+        if index not in matched_predicted:
+            for name in ITEM_FIELDS:
+                _score_value(scores[name], None, getattr(item, name))
+
+    scores["items"] = FieldScore(tp=len(pairs), fp=len(predicted.items) - len(pairs),
+                                 fn=len(golden.items) - len(pairs))
+    return scores
+
+
+def merge_scores(per_document: Iterable[Dict[str, FieldScore]]) -> Dict[str, FieldScore]:
+    """Сумма счётчиков по документам и итог "overall" по всем полям (кроме "items")."""
+    total: Dict[str, FieldScore] = {}
+    overall = FieldScore()
+    for scores in per_document:
+        for name, score in scores.items():
+            total.setdefault(name, FieldScore()).add(score)
+            if name != "items":
+                overall.add(score)
+    total["overall"] = overall
+    return total
@@ -0,0 +1,376 @@
+# tests/synthetic_ttn.py
+"""
+Генератор синтетических ТТН для нагрузочных тестов и бенчмарков.
+
+Товары берутся из справочника seed_products (SEED_PRODUCTS) и его
+вариантов, поэтому сгенерированные приёмки сопоставляются с каталогом
+сервера. Для одной ТТН можно получить:
+
+- ReceptionCreate (payload для API / репозитория);
+- эталонный OCRResult (для оценки точности);
+- текстовый PDF с разлинованной таблицей (кириллица, текстовый слой
+  читается pdfplumber);
+- «сканы»: страницы-изображения с шумом, наклоном и размытием
+  (PNG/JPEG или многостраничный PDF без текстового слоя).
+
+Для кириллицы на изображениях нужен TTF-шрифт с кириллицей (DejaVu Sans,
+Liberation Sans, Arial); без него текст рисуется шрифтом Pillow по умолчанию.
+"""
+import logging
+import random
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from common.models import OCRItem, OCRResult, ProductCreate, ReceptionCreate, ReceptionItemCreate
+from server.src.db.migrations import SEED_PRODUCTS
+
+logger = logging.getLogger(__name__)
+
+# Страница A4 в пунктах PDF (1/72 дюйма), отступы и таблица позиций
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 30
+FONT_SIZE = 9
+CHAR_WIDTH = 0.6 * FONT_SIZE  # Courier: 600/1000 em
+ROW_HEIGHT = 16
+COLUMNS = (  # (заголовок, ширина)
+    ("№", 30),
+    ("Артикул", 100),
+    ("Наименование товара", 265),
+    ("Ед. изм.", 55),
+    ("Количество", 85),
+)
+
+SUPPLIERS = (
+    'ООО "МеталлТорг"', 'ООО "СтройМатериалы"', 'АО "ПродуктОпт"', 'ООО "ТехноСнаб"',
+    'ЗАО "Электроника Плюс"', 'ООО "Гамма"', 'ИП Фёдоров А.К.',
+)
+NAME_VARIANTS = ("усиленный", "эконом", "премиум", "тип А", "тип Б", "оцинкованный", "в упаковке 10 шт",
+                 "серия 3", "белый", "чёрный", "импорт", "ГОСТ")
+
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+
+@dataclass
+class SyntheticTTN:
+    """Сгенерированная ТТН: реквизиты и позиции."""
+    ttn_number: str
+    ttn_date: date
+    supplier: str
+    items: List[ReceptionItemCreate] = field(default_factory=list)
+
+    def to_reception(self) -> ReceptionCreate:
+        return ReceptionCreate(ttn_number=self.ttn_number, ttn_date=self.ttn_date, supplier=self.supplier,
+                               items=self.items, ocr_engine="synthetic")
+
+    def golden(self) -> OCRResult:
+        return OCRResult(
+            ttn_number=self.ttn_number, ttn_date=self.ttn_date, supplier=self.supplier,
+            items=[OCRItem(raw_text="", article=i.article, name=i.name, quantity=i.quantity, unit=i.unit)
+                   for i in self.items]
+        )
+
+
+def make_catalog(size: int = 0, seed: int = 0) -> List[ProductCreate]:
+    """Справочник: товары seed_products и (до size) их варианты с уникальными артикулами."""
+    rng = random.Random(seed)
+    catalog = [ProductCreate(article=p["article"], name=p["name"], unit=p["unit"],
+                             requires_control=p["requires_control"], control_type=p["control_type"])
+               for p in SEED_PRODUCTS]
+
+    for index in range(max(0, size - len(catalog))):
+        base = SEED_PRODUCTS[index % len(SEED_PRODUCTS)]
+        catalog.append(ProductCreate(
+            article=f"{base['article']}-{index + 1:05d}",
+            name=f"{base['name']} {rng.choice(NAME_VARIANTS)}",
+            unit=base["unit"],
+            requires_control=base["requires_control"] and rng.random() < 0.3,
+            control_type=base["control_type"],
+        ))
+    return catalog
+
+
+def make_ttn(lines: int, seed: int = 0, catalog: Optional[Sequence[ProductCreate]] = None) -> SyntheticTTN:
+    """ТТН на lines позиций со случайными товарами каталога и количествами."""
+    rng = random.Random(seed)
+    catalog = catalog or make_catalog(max(lines, len(SEED_PRODUCTS)), seed=seed)
+    ttn_date = date(2024, 1, 1) + timedelta(days=rng.randrange(730))
+
+    products = rng.sample(list(catalog), lines) if lines <= len(catalog) else \
+        [rng.choice(catalog) for _ in range(lines)]
+    items = [
+        ReceptionItemCreate(
+            article=product.article,
+            name=product.name,
+            quantity=float(rng.choice((1, 2, 5, 10, 12, 20, 25, 50, 100, 200, 500)) * rng.randint(1, 4)),
+            unit=product.unit,
+        )
+        for product in products
+    ]
+    return SyntheticTTN(
+        ttn_number=f"{rng.randint(100, 99999)}-{ttn_date.year % 100:02d}",
+        ttn_date=ttn_date,
+        supplier=rng.choice(SUPPLIERS),
+        items=items,
+    )
+
+
+def make_receptions(count: int, lines: int, seed: int = 0,
+                    catalog: Optional[Sequence[ProductCreate]] = None) -> List[ReceptionCreate]:
+    """count payload'ов ReceptionCreate по lines позиций."""
+    catalog = catalog or make_catalog(max(lines, len(SEED_PRODUCTS)), seed=seed)
+    return [make_ttn(lines, seed=seed + index, catalog=catalog).to_reception() for index in range(count)]
+
+
+# --- Раскладка страниц -------------------------------------------------------
+
+@dataclass
+class _Page:
+    """Содержимое страницы в пунктах, начало координат — левый верхний угол."""
+    texts: List[Tuple[float, float, str]] = field(default_factory=list)  # (x, базовая линия, текст)
+    lines: List[Tuple[float, float, float, float]] = field(default_factory=list)
+
+
+def _fit(text: str, width: float) -> str:
+    max_chars = int((width - 6) / CHAR_WIDTH)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _format_quantity(quantity: float) -> str:
+    return f"{quantity:g}"
+
+
+def layout_pages(ttn: SyntheticTTN, rows_per_page: int = 40) -> List[_Page]:
+    """Разложить ТТН по страницам: реквизиты на первой, таблица с шапкой на каждой."""
+    chunks = [ttn.items[i:i + rows_per_page] for i in range(0, len(ttn.items), rows_per_page)] or [[]]
+    pages = []
+    row_number = 1
+
+    for page_index, chunk in enumerate(chunks):
+        page = _Page()
+        y = MARGIN + 12
+        if page_index == 0:
+            header = (
+                f"ТОВАРНАЯ НАКЛАДНАЯ № {ttn.ttn_number} от {ttn.ttn_date:%d.%m.%Y}",
+                f"Поставщик: {ttn.supplier}",
+                'Грузополучатель: ООО "ТМЦ Склад", 125130, г. Москва, ул. Складская, д. 1',
+                f"Основание: договор поставки № {ttn.ttn_number}/Д",
+            )
+            for line in header:
+                page.texts.append((MARGIN, y, line))
+                y += ROW_HEIGHT
+            y += 6
+
+        rows = [tuple(title for title, _ in COLUMNS)] + [
+            (str(row_number + i), item.article, item.name, item.unit, _format_quantity(item.quantity))
+            for i, item in enumerate(chunk)
+        ]
+        row_number += len(chunk)
+
+        table_top = y
+        for row in rows:
+            x = MARGIN
+            for (_, width), cell in zip(COLUMNS, row):
+                page.texts.append((x + 3, y + ROW_HEIGHT - 4, _fit(cell, width)))
+                x += width
+            y += ROW_HEIGHT
+
+        table_right = MARGIN + sum(width for _, width in COLUMNS)
+        for row_index in range(len(rows) + 1):
+            row_y = table_top + row_index * ROW_HEIGHT
+            page.lines.append((MARGIN, row_y, table_right, row_y))
+        x = MARGIN
+        for _, width in COLUMNS:
+            page.lines.append((x, table_top, x, y))
+            x += width
+        page.lines.append((table_right, table_top, table_right, y))
+
+        if page_index == len(chunks) - 1:
+            page.texts.append((MARGIN, y + ROW_HEIGHT, f"Всего наименований: {len(ttn.items)}"))
+        page.texts.append((MARGIN, PAGE_HEIGHT - MARGIN, f"Страница {page_index + 1} из {len(chunks)}"))
+        pages.append(page)
+
+    return pages
+
+
+# --- Текстовый PDF ------------------------------------------------------------
+
+def _build_encoding(pages: List[_Page]) -> Dict[str, int]:
+    """Однобайтовая кодировка: ASCII как есть, остальные символы — коды 128..255."""
+    encoding = {chr(code): code for code in range(32, 127)}
+    extra = sorted({ch for page in pages for _, _, text in page.texts for ch in text} - set(encoding))
+    if len(extra) > 128:
+        raise ValueError(f"Too many non-ASCII characters for a single-byte font: {len(extra)}")
+    encoding.update({ch: 128 + index for index, ch in enumerate(extra)})
+    return encoding
+
+
+def _pdf_string(text: str, encoding: Dict[str, int]) -> bytes:
+    raw = bytes(encoding.get(ch, ord("?")) for ch in text)
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _to_unicode_cmap(encoding: Dict[str, int]) -> bytes:
+    entries = [f"<{code:02X}> <{ord(ch):04X}>" for ch, code in sorted(encoding.items(), key=lambda e: e[1])]
+    blocks = []
+    for start in range(0, len(entries), 100):
+        chunk = entries[start:start + 100]
+        blocks.append(f"{len(chunk)} beginbfchar\n" + "\n".join(chunk) + "\nendbfchar")
+    return (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<00> <FF>\nendcodespacerange\n"
+        + "\n".join(blocks)
+        + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+    ).encode("ascii")
+
+
+def render_pdf(ttn: SyntheticTTN, path: Path, rows_per_page: int = 40) -> Path:
+    """
+    Текстовый PDF (Courier, разлинованная таблица).
+
+    Кириллица кодируется однобайтовой кодировкой с /Differences, а /ToUnicode
+    даёт pdfplumber настоящий текст; отрисовка кириллицы зависит от просмотрщика.
+    """
+    pages = layout_pages(ttn, rows_per_page)
+    encoding = _build_encoding(pages)
+    differences = " ".join(f"{code} /uni{ord(ch):04X}" for ch, code in encoding.items() if code >= 128)
+
+    objects: List[bytes] = []
+
+    def add(data: bytes) -> int:
+        objects.append(data)
+        return len(objects)
+
+    def add_stream(data: bytes, extra: str = "") -> int:
+        compressed = zlib.compress(data)
+        return add(f"<< /Length {len(compressed)} /Filter /FlateDecode {extra}>>\nstream\n".encode("ascii")
+                   + compressed + b"\nendstream")
+
+    cmap_id = add_stream(_to_unicode_cmap(encoding))
+    font_id = add(
+        f"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /FirstChar 32 /LastChar 255 "
+        f"/Widths [{' '.join(['600'] * 224)}] "
+        f"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{differences}] >> "
+        f"/ToUnicode {cmap_id} 0 R >>".encode("ascii")
+    )
+
+    pages_id = len(objects) + 1 + 2 * len(pages)  # после потоков и страниц
+    page_ids = []
+    for page in pages:
+        content = [b"0.5 w"]
+        for x1, y1, x2, y2 in page.lines:
+            content.append(f"{x1:.2f} {PAGE_HEIGHT - y1:.2f} m {x2:.2f} {PAGE_HEIGHT - y2:.2f} l S".encode("ascii"))
+        for x, y, text in page.texts:
+            content.append(f"BT /F1 {FONT_SIZE} Tf {x:.2f} {PAGE_HEIGHT - y:.2f} Td ".encode("ascii")
+                           + _pdf_string(text, encoding) + b" Tj ET")
+        content_id = add_stream(b"\n".join(content))
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode("ascii")
+        ))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    assert add(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii")) == pages_id
+    catalog_id = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("ascii"))
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode("ascii") + data + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    output += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+    output += (f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+               f"startxref\n{xref_offset}\n%%EOF\n").encode("ascii")
+
+    path = Path(path)
+    path.write_bytes(bytes(output))
+    return path
+
+
+# --- Изображения («сканы») ----------------------------------------------------
+
+_font_cache: Dict[Tuple[Optional[str], int], ImageFont.ImageFont] = {}
+
+
+def find_font(font_path: Optional[Path] = None) -> Optional[Path]:
+    """TTF-шрифт с кириллицей: явно указанный или первый найденный в системе."""
+    if font_path:
+        return Path(font_path)
+    return next((Path(p) for p in FONT_CANDIDATES if Path(p).exists()), None)
+
+
+def _load_font(font_path: Optional[Path], size: int) -> ImageFont.ImageFont:
+    key = (str(font_path) if font_path else None, size)
+    if key not in _font_cache:
+        if font_path:
+            _font_cache[key] = ImageFont.truetype(str(font_path), size)
+        else:
+            logger.warning("No Cyrillic TTF font found. Text on synthetic scans will not be readable.")
+            _font_cache[key] = ImageFont.load_default(size=size)
+    return _font_cache[key]
+
+
+def render_page_images(ttn: SyntheticTTN, rows_per_page: int = 40, dpi: int = 150, seed: int = 0,
+                       noise: float = 8.0, max_skew_degrees: float = 1.5, blur: bool = True,
+                       font_path: Optional[Path] = None) -> List[np.ndarray]:
+    """Страницы-«сканы» в оттенках серого: шум, наклон и лёгкое размытие."""
+    rng = np.random.default_rng(seed)
+    scale = dpi / 72
+    font = _load_font(find_font(font_path), max(6, round(FONT_SIZE * scale)))
+    size = (round(PAGE_WIDTH * scale), round(PAGE_HEIGHT * scale))
+
+    images = []
+    for page in layout_pages(ttn, rows_per_page):
+        canvas = Image.new("L", size, 255)
+        draw = ImageDraw.Draw(canvas)
+        for x1, y1, x2, y2 in page.lines:
+            draw.line((x1 * scale, y1 * scale, x2 * scale, y2 * scale), fill=0, width=max(1, round(scale / 2)))
+        for x, y, text in page.texts:
+            draw.text((x * scale, y * scale), text, font=font, fill=0, anchor="ls")
+
+        image = np.asarray(canvas, dtype=np.uint8)
+        if max_skew_degrees:
+            angle = rng.uniform(-max_skew_degrees, max_skew_degrees)
+            matrix = cv2.getRotationMatrix2D((size[0] / 2, size[1] / 2), angle, 1.0)
+            image = cv2.warpAffine(image, matrix, size, flags=cv2.INTER_LINEAR, borderValue=255)
+        if blur:
+            image = cv2.GaussianBlur(image, (3, 3), 0)
+        if noise:
+            image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+        images.append(image)
+    return images
+
+
+def render_image(ttn: SyntheticTTN, path: Path, **kwargs) -> Path:
+    """Первая страница «скана» в PNG/JPEG (формат по расширению)."""
+    image = render_page_images(ttn, **kwargs)[0]
+    path = Path(path)
+    if not cv2.imwrite(str(path), image):
+        raise ValueError(f"Failed to write image: {path}")
+    return path
+
+
+def render_scan_pdf(ttn: SyntheticTTN, path: Path, dpi: int = 150, **kwargs) -> Path:
+    """Многостраничный PDF из «сканов» без текстового слоя."""
+    images = [Image.fromarray(image) for image in render_page_images(ttn, dpi=dpi, **kwargs)]
+    path = Path(path)
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+    return path
@@ -0,0 +1,208 @@
+# tests/test_async_llm_client.py
+"""
+Тесты асинхронного LLM-транспорта: ретраи, дедлайны, лимит параллелизма,
+circuit breaker и откат OCRService на Regex. Запросы идут в локальный fake-сервер.
+
+Запуск:
+    pytest tests/test_async_llm_client.py -v
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from client.src.services.async_llm_client import (
+    AsyncLLMClient, CircuitBreaker, CircuitOpenError, RetryableStatusError
+)
+from tests.fake_llm_server import FakeReply
+
+FAST_RETRIES = {"backoff_base": 0.01, "backoff_max": 0.02, "attempt_timeout": 2.0}
+
+
+def make_client(**settings) -> AsyncLLMClient:
+    return AsyncLLMClient("test", settings={**FAST_RETRIES, **settings})
+
+
+class TestCircuitBreaker:
+    """Переходы состояний circuit breaker."""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=60)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.is_open
+        assert not breaker.allow_request()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()  # второй пробный запрос не пускается
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.is_open
+
+
+class TestAsyncLLMClient:
+    """Запросы к fake-серверу."""
+
+    def test_post_json(self, fake_llm_server):
+        client = make_client()
+        data = client.post_json(f"{fake_llm_server.url}/guest/llm/generate_structured", {"user_input": "x"})
+        assert data["data"]["result"]["ttn_number"] == "1"
+
+    def test_retry_on_503(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(
+            status=503 if len(fake_llm_server.requests) < 3 else 200
+        )
+        client = make_client(max_attempts=3)
+        data = client.post_json(f"{fake_llm_server.url}/guest/llm/generate_structured", {})
+        assert data["status"] == "ok"
+        assert len(fake_llm_server.requests) == 3
+
+    def test_client_error_not_retried(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(status=400)
+        client = make_client(max_attempts=3)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.post_json(f"{fake_llm_server.url}/guest/llm/generate_structured", {})
+        assert len(fake_llm_server.requests) == 1
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    def test_attempt_deadline(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(delay=1.0)
+        client = make_client(max_attempts=2, attempt_timeout=0.2)
+
+        start = time.perf_counter()
+        with pytest.raises(Exception):
+            client.post_json(f"{fake_llm_server.url}/guest/llm/generate_structured", {})
+        assert time.perf_counter() - start < 0.9
+        assert len(fake_llm_server.requests) == 2
+
+    def test_total_deadline_caps_attempts_and_backoff(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(delay=1.0)
+        client = make_client(max_attempts=5, attempt_timeout=0.3, total_timeout=0.5)
+
+        start = time.perf_counter()
+        with pytest.raises(Exception):
+            client.post_json(f"{fake_llm_server.url}/guest/llm/generate_structured", {})
+        assert time.perf_counter() - start < 0.8
+        assert len(fake_llm_server.requests) == 2
+
+    def test_vision_attempt_timeout(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(delay=0.4)
+        client = make_client(max_attempts=1, attempt_timeout=0.2, vision_attempt_timeout=2.0)
+        url = f"{fake_llm_server.url}/guest/llm/generate_structured_vision"
+
+        with pytest.raises(Exception):
+            client.post_json(url, {})
+        assert client.post_json(url, {}, attempt_timeout=client.vision_attempt_timeout)["status"] == "ok"
+
+    def test_breaker_opens_and_fails_fast(self, fake_llm_server):
+        fake_llm_server.handler = lambda request: FakeReply(status=502)
+        client = make_client(max_attempts=2, breaker_failure_threshold=2, breaker_recovery_seconds=60)
+        url = f"{fake_llm_server.url}/guest/llm/generate_structured"
+
+        with pytest.raises(RetryableStatusError):
+            client.post_json(url, {})
+        assert client.breaker.is_open
+
+        start = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            client.post_json(url, {})
+        assert time.perf_counter() - start < 0.05
+        assert len(fake_llm_server.requests) == 2
+
+    def test_global_concurrency_limit(self, fake_llm_server):
+        from client.src.config import get_config
+
+        limit = get_config()["llm"]["http"]["max_concurrency"]
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def handler(request):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.15)
+            with lock:
+                active -= 1
+            return FakeReply()
+
+        fake_llm_server.handler = handler
+        clients = [make_client(max_concurrency=limit), make_client(max_concurrency=limit)]
+        url = f"{fake_llm_server.url}/guest/llm/generate_structured"
+
+        with ThreadPoolExecutor(max_workers=limit * 3) as pool:
+            list(pool.map(lambda i: clients[i % 2].post_json(url, {}), range(limit * 3)))
+
+        assert len(fake_llm_server.requests) == limit * 3
+        assert peak <= limit
+
+
+class TestServicesOverFakeServer:
+    """LLM-сервисы поверх нового транспорта."""
+
+    def test_openai_service(self, fake_llm_server, monkeypatch):
+        from client.src.services import llm_service
+        from client.src.services.llm_cache import LLMResponseCache
+
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(llm_service, "get_async_llm_client", lambda name: make_client())
+        fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "A-654"})
+
+        service = llm_service.LLMService()
+        service.client.base_url = fake_llm_server.url
+        service.cache = LLMResponseCache(enabled=False)
+
+        assert service.parse_ttn_text("ТТН № A-654") == {"ttn_number": "A-654"}
+        assert fake_llm_server.requests[0].path.endswith("/chat/completions")
+
+    def test_chatbothub_server_down_returns_empty(self, fake_llm_server):
+        from client.src.services.chatbothub_service import ChatBotHubService
+        from client.src.services.llm_cache import LLMResponseCache
+
+        fake_llm_server.handler = lambda request: FakeReply(status=503)
+        service = ChatBotHubService()
+        service.base_url = fake_llm_server.url
+        service.http = make_client(max_attempts=2)
+        service.cache = LLMResponseCache(enabled=False)
+
+        assert service.parse_ttn_text("текст") == {}
+
+    def test_ocr_skips_llm_when_circuit_open(self, fake_llm_server, sample_ttn_text):
+        from client.src.services.ocr_service import OCRService
+
+        service = OCRService()
+        service.llm_provider = "chatbothub"
+        service.chatbothub_service.base_url = fake_llm_server.url
+        service.chatbothub_service.http = make_client(breaker_failure_threshold=1, breaker_recovery_seconds=60)
+        service.chatbothub_service.http.breaker.record_failure()
+
+        start = time.perf_counter()
+        result = service._process_text_content(sample_ttn_text)
+        assert time.perf_counter() - start < 0.5
+        assert fake_llm_server.requests == []
+        assert result == service._parse_ttn_regex(sample_ttn_text)
@@ -0,0 +1,157 @@
+# tests/test_batch_ocr.py
+"""
+Тесты пакетного распознавания (client.src.batch_ocr).
+
+OCRService подменяется быстрым fake: проверяются обход каталогов,
+JSONL, продолжение после остановки и создание приёмок пачками.
+
+Запуск:
+    pytest tests/test_batch_ocr.py -v
+"""
+import json
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from client.src import batch_ocr
+from client.src.services.ocr_service import OCRService
+from common.models import OCRItem, OCRResult, ReceptionCreate
+
+
+class FakeOCRService:
+    """Распознаёт «документ» по имени файла: bad_* падают, blank_* пустые."""
+
+    calls: List[str] = []
+
+    def __init__(self):
+        self.last_timings = {}
+
+    def process_document(self, file_path: Path) -> OCRResult:
+        FakeOCRService.calls.append(file_path.name)
+        self.last_timings = {"pdf_extract": 0.01, "regex": 0.002}
+        if file_path.name.startswith("bad_"):
+            raise RuntimeError("broken document")
+        if file_path.name.startswith("blank_"):
+            return OCRResult()
+        supplier = None if file_path.name.startswith("nosupplier_") else 'ООО "Тест"'
+        return OCRResult(
+            ttn_number=file_path.stem, ttn_date=date(2025, 1, 15), supplier=supplier,
+            items=[OCRItem(raw_text="Болт", article="BOLT-M10", name="Болт М10", quantity=5, unit="шт",
+                           field_confidence={"article": 0.9, "name": 0.9})]
+        )
+
+    ocr_items_to_reception_items = OCRService.ocr_items_to_reception_items
+
+
+class FakeSync:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches: List[List[ReceptionCreate]] = []
+
+    def create_receptions_bulk(self, receptions: List[ReceptionCreate]) -> Optional[List[int]]:
+        self.batches.append(receptions)
+        if self.fail:
+            return None
+        start = sum(len(b) for b in self.batches[:-1])
+        return list(range(start + 1, start + 1 + len(receptions)))
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_ocr, "OCRService", FakeOCRService)
+    FakeOCRService.calls = []
+
+    root = tmp_path / "archive"
+    (root / "2024" / "q1").mkdir(parents=True)
+    for name in ["ttn_1.pdf", "ttn_2.PDF", "2024/ttn_3.jpg", "2024/q1/ttn_4.png", "2024/notes.txt"]:
+        (root / name).write_bytes(b"x")
+    return root
+
+
+def read_jsonl(path: Path) -> List[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def test_collect_documents_recursive_and_filtered(archive):
+    paths = batch_ocr.collect_documents([archive, archive / "ttn_1.pdf", archive / "missing"])
+    assert [p.name for p in paths] == ["ttn_4.png", "ttn_3.jpg", "ttn_1.pdf", "ttn_2.PDF"]
+
+
+def test_main_writes_jsonl_with_timings(archive, tmp_path):
+    output = tmp_path / "out" / "results.jsonl"
+    assert batch_ocr.main([str(archive), "-o", str(output), "--workers", "0"]) == 0
+
+    records = read_jsonl(output)
+    assert len(records) == 4
+    assert {r["status"] for r in records} == {"ok"}
+    record = records[0]
+    assert record["result"]["items"][0]["article"] == "BOLT-M10"
+    assert set(record["timings"]) == {"pdf_extract", "regex"}
+    assert record["elapsed"] >= 0
+    assert "reception" not in record
+
+
+def test_resume_skips_processed_and_retries_failed(archive, tmp_path):
+    output = tmp_path / "results.jsonl"
+    (archive / "bad_1.pdf").write_bytes(b"x")
+
+    assert batch_ocr.main([str(archive), "-o", str(output), "-w", "0"]) == 1
+    statuses = {Path(r["path"]).name: r["status"] for r in read_jsonl(output)}
+    assert statuses["bad_1.pdf"] == "error"
+
+    # Обрыв последней строки при аварийной остановке
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"path": "/trunc')
+
+    FakeOCRService.calls = []
+    batch_ocr.main([str(archive), "-o", str(output), "-w", "0", "--resume"])
+    assert FakeOCRService.calls == []
+
+    batch_ocr.main([str(archive), "-o", str(output), "-w", "0", "--resume", "--retry-failed"])
+    assert FakeOCRService.calls == ["bad_1.pdf"]
+
+
+def test_stats_report():
+    stats = batch_ocr.BatchStats(total=2)
+    stats.add({"status": "ok", "timings": {"vision": 1.5}, "elapsed": 2.0})
+    stats.add({"status": "empty", "timings": {"tesseract": 0.5}, "elapsed": 0.6})
+
+    assert stats.stage_totals["total"] == pytest.approx(2.6)
+    assert stats.stage_counts["vision"] == 1
+    report = stats.report()
+    assert "docs/s" in report
+    assert "empty=1, ok=1" in report
+    assert "vision" in report and "tesseract" in report
+
+
+def test_create_receptions_in_bulk(archive, tmp_path):
+    (archive / "blank_1.pdf").write_bytes(b"x")
+    (archive / "nosupplier_1.pdf").write_bytes(b"x")
+    output = tmp_path / "results.jsonl"
+    sync = FakeSync()
+
+    stats = batch_ocr.run_batch(batch_ocr.collect_documents([archive]), output,
+                                workers=0, sync=sync, bulk_size=3)
+
+    assert [len(batch) for batch in sync.batches] == [3, 1]
+    assert sync.batches[0][0].items[0].article == "BOLT-M10"
+    assert stats.stage_counts["upload"] == 2
+
+    records = {Path(r["path"]).name: r for r in read_jsonl(output)}
+    assert len(records) == 6
+    assert sorted(r["reception_id"] for r in records.values() if r.get("reception_id")) == [1, 2, 3, 4]
+    assert records["blank_1.pdf"]["status"] == "empty"
+    assert records["nosupplier_1.pdf"]["reception_skipped"] == "missing supplier"
+    assert all("reception" not in r for r in records.values())
+
+
+def test_failed_upload_is_retried_on_resume(archive, tmp_path):
+    output = tmp_path / "results.jsonl"
+    paths = batch_ocr.collect_documents([archive])
+    batch_ocr.run_batch(paths, output, workers=0, sync=FakeSync(fail=True))
+
+    assert {r["status"] for r in read_jsonl(output)} == {"upload_failed"}
+    assert batch_ocr.load_processed(output, retry_failed=True) == set()
+    assert len(batch_ocr.load_processed(output)) == 4
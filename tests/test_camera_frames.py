@@ -0,0 +1,343 @@
+# tests/test_camera_frames.py
+"""
+Тесты пути кадра камеры без копирования: кольцо кадров FrameRing,
+QImage над буфером кольца, ограничение кадров превью в очереди,
+уменьшение и частота превью, кодировщик в отдельном потоке (очередь,
+политики отбрасывания, кадры по меткам времени), расписание кадров
+и замер FPS/джиттера, запись сегментами, захват и запись в режиме
+заглушки (без камеры).
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen pytest tests/test_camera_frames.py -v
+"""
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from client.src.services.camera_service import (
+    DROP_NEWEST, DROP_OLDEST, MAX_PREVIEW_IN_FLIGHT, CameraService, CameraWorker, FrameEncoder, FrameRing,
+    FrameScheduler, FrameStats
+)
+from client.src.ui.video_widget import VideoWidget
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def test_ring_skips_held_slots():
+    ring = FrameRing(8, 4, size=3)
+    assert [ring.acquire() for _ in range(4)] == [0, 1, 2, 0]
+    ring.hold(1)
+    assert [ring.acquire() for _ in range(3)] == [2, 0, 2]
+    ring.hold(0)
+    ring.hold(2)
+    assert ring.acquire() is None
+    ring.release(0)
+    assert ring.acquire() == 0
+
+
+def test_preview_image_shares_ring_memory(app):
+    worker = CameraWorker(-1, (64, 48), 30)
+    images = []
+    worker.frame_ready.connect(images.append)
+
+    index = worker.ring.acquire()
+    worker._read_frame(index)
+    worker._process_frame(index)
+
+    [image] = images
+    assert image.format() == QImage.Format_BGR888
+    assert (image.width(), image.height()) == (64, 48)
+    # Кадр не скопирован: изменение буфера кольца видно в QImage
+    worker.ring.frames[index][0, 0] = (255, 0, 0)
+    assert image.pixel(0, 0) == 0xFF0000FF
+    assert worker.get_last_frame_jpeg().startswith(b"\xff\xd8")
+
+
+def test_preview_frames_in_flight_are_bounded(app):
+    worker = CameraWorker(-1, (64, 48), 30)
+    images = []
+    worker.frame_ready.connect(images.append)
+
+    for _ in range(5):
+        index = worker.ring.acquire()
+        worker._read_frame(index)
+        worker._process_frame(index)
+    assert len(images) == MAX_PREVIEW_IN_FLIGHT
+    assert worker.preview_dropped == 5 - MAX_PREVIEW_IN_FLIGHT
+
+    # Показанные кадры освобождают слоты, следующий кадр снова уходит в превью
+    worker.frame_consumed()
+    worker.frame_consumed()
+    index = worker.ring.acquire()
+    worker._read_frame(index)
+    worker._process_frame(index)
+    assert len(images) == MAX_PREVIEW_IN_FLIGHT + 1
+
+
+def test_preview_is_downscaled_to_widget_size(app, tmp_path):
+    worker = CameraWorker(-1, (640, 480), 30)
+    worker.set_preview_size(200, 200)
+    images = []
+    worker.frame_ready.connect(lambda image: (images.append(image.size().toTuple()), worker.frame_consumed()))
+    worker.start_recording(tmp_path / "video.avi")
+
+    for _ in range(3):
+        index = worker.ring.acquire()
+        worker._read_frame(index)
+        worker._process_frame(index)
+    worker.stop_recording()
+
+    # Превью по размеру виджета с сохранением пропорций, запись и снапшот — в полном разрешении
+    assert images == [(200, 150)] * 3
+    assert worker.recording_stats()["encoded"] == 3
+    snapshot = cv2.imdecode(np.frombuffer(worker.get_last_frame_jpeg(), np.uint8), cv2.IMREAD_COLOR)
+    assert snapshot.shape == (480, 640, 3)
+    # Слоты уменьшенных кадров возвращены
+    assert not any(worker._preview_ring._holds)
+
+    # Виджет больше кадра — кадр уходит как есть, без копии
+    worker.set_preview_size(1920, 1080)
+    index = worker.ring.acquire()
+    worker._read_frame(index)
+    worker._process_frame(index)
+    assert images[-1] == (640, 480)
+
+
+def test_preview_rate_is_independent_of_capture(app):
+    worker = CameraWorker(-1, (64, 48), 30, preview_fps=15)
+    sent = []
+    worker.frame_ready.connect(lambda image: worker.frame_consumed())
+    worker.frame_ready.connect(lambda image: sent.append(frame_number))
+
+    for frame_number in range(30):
+        index = worker.ring.acquire()
+        worker._read_frame(index)
+        worker._process_frame(index, 100.0 + frame_number / 30)
+    # 30 fps захвата -> ровно каждый второй кадр в превью
+    assert sent == list(range(0, 30, 2))
+    assert worker.preview_dropped == 0
+
+
+def test_widget_reports_display_size(app):
+    widget = VideoWidget()
+    sizes = []
+    widget.display_size_changed.connect(lambda width, height: sizes.append((width, height)))
+    widget.resize(400, 300)
+    widget.show()
+    QCoreApplication.sendPostedEvents(widget, 0)
+    assert sizes and sizes[-1] == widget._display_size().toTuple()
+    widget.close()
+
+
+def test_mock_camera_preview(app):
+    service = CameraService()
+    frames = []
+    service.frame_ready.connect(lambda image: frames.append((image.width(), image.height())))
+    service.start_preview(camera_index=-1)
+    try:
+        deadline = time.monotonic() + 5
+        while len(frames) < 5 and time.monotonic() < deadline:
+            QCoreApplication.sendPostedEvents(service, 0)
+            time.sleep(0.01)
+        assert len(frames) >= 5
+        assert set(frames) == {service.resolution}
+        assert service.take_snapshot().startswith(b"\xff\xd8")
+    finally:
+        service.stop_preview()
+
+
+class BlockedWriter:
+    """VideoWriter, который пишет номер кадра и ждёт разрешения на каждый кадр."""
+
+    def __init__(self):
+        self.written = []
+        self.entered = threading.Event()
+        self.unblocked = threading.Event()
+
+    def write(self, frame):
+        self.entered.set()
+        self.unblocked.wait(5)
+        self.written.append(int(frame[0, 0, 0]))
+
+    def release(self):
+        pass
+
+
+def blocked_encoder(tmp_path, ring, **kwargs):
+    encoder = FrameEncoder(tmp_path / "video.avi", "MJPG", 30, (ring.width, ring.height), **kwargs)
+    encoder.writer.release()
+    encoder.writer = BlockedWriter()
+    return encoder
+
+
+def submit_numbered(encoder, ring, number):
+    index = ring.acquire()
+    ring.frames[index][0, 0, 0] = number
+    return encoder.submit(ring, index)
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (DROP_OLDEST, [0, 15, 16, 17, 18, 19]),
+    (DROP_NEWEST, [0, 1, 2, 3, 4, 5]),
+])
+def test_encoder_drop_policies(tmp_path, policy, expected):
+    ring = FrameRing(8, 4, size=10)
+    encoder = blocked_encoder(tmp_path, ring, queue_size=5, drop_policy=policy)
+    submit_numbered(encoder, ring, 0)
+    assert encoder.writer.entered.wait(5)
+
+    for number in range(1, 20):
+        submit_numbered(encoder, ring, number)
+    assert encoder.stats() == {"encoded": 0, "dropped": 14, "queued": 5, "duplicated": 0, "skipped": 0}
+
+    encoder.writer.unblocked.set()
+    encoder.close()
+    assert encoder.writer.written == expected
+    assert encoder.stats() == {"encoded": 6, "dropped": 14, "queued": 0, "duplicated": 0, "skipped": 0}
+    # Все слоты возвращены кольцу
+    assert ring._holds == [0] * 10
+
+
+def test_slow_encoder_does_not_stall_capture(app, tmp_path):
+    worker = CameraWorker(-1, (64, 48), 30, encoder_queue_size=4)
+    worker.frame_ready.connect(lambda image: worker.frame_consumed())
+    worker.start_recording(tmp_path / "video.avi")
+    worker.encoder.writer.release()
+    worker.encoder.writer = writer = BlockedWriter()
+
+    for _ in range(50):
+        index = worker.ring.acquire()
+        assert index is not None
+        worker._read_frame(index)
+        worker._process_frame(index)
+    assert worker.recording_stats()["dropped"] >= 50 - 4 - 1
+
+    writer.unblocked.set()
+    path = worker.stop_recording()
+    assert path == tmp_path / "video.avi"
+    stats = worker.recording_stats()
+    assert stats["encoded"] + stats["dropped"] == 50
+    assert stats["queued"] == 0
+
+
+def test_mock_camera_recording(app, tmp_path):
+    service = CameraService()
+    service.start_preview(camera_index=-1)
+    try:
+        path = service.start_recording(tmp_path)
+        deadline = time.monotonic() + 5
+        while service.recording_stats()["encoded"] < 5 and time.monotonic() < deadline:
+            QCoreApplication.sendPostedEvents(service, 0)
+            time.sleep(0.01)
+        assert service.stop_recording() == path
+    finally:
+        service.stop_preview()
+
+    capture = cv2.VideoCapture(str(path))
+    frames = 0
+    while capture.read()[0]:
+        frames += 1
+    capture.release()
+    assert frames >= 5
+
+
+def test_recording_is_split_into_segments(app, tmp_path):
+    worker = CameraWorker(-1, (64, 48), 10, segment_seconds=1)
+    worker.frame_ready.connect(lambda image: worker.frame_consumed())
+    first = worker.start_recording(tmp_path / "video.mp4")
+    assert first == tmp_path / "video_000.mp4"
+
+    # 2.5 с при 10 fps: сегменты 0-1 с, 1-2 с и остаток
+    for number in range(25):
+        # Следующий сегмент открывается в фоне: дожидаемся его, чтобы границы были точными
+        deadline = time.monotonic() + 5
+        while worker._next_encoder is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        index = worker.ring.acquire()
+        worker._read_frame(index)
+        worker._process_frame(index, 100.0 + number / 10)
+    last = worker.stop_recording()
+
+    segments = worker.recording_segments()
+    assert [(path.name, number) for path, number, _ in segments] == [
+        ("video_000.mp4", 0), ("video_001.mp4", 1), ("video_002.mp4", 2)
+    ]
+    assert last == segments[-1][0]
+    # Открытый заранее четвёртый сегмент не понадобился и удалён
+    assert sorted(path.name for path in tmp_path.iterdir()) == [path.name for path, _, _ in segments]
+    assert [duration for _, _, duration in segments] == pytest.approx([1.0, 1.0, 0.5])
+    for path, _, duration in segments:
+        capture = cv2.VideoCapture(str(path))
+        assert capture.get(cv2.CAP_PROP_FRAME_COUNT) == duration * 10
+        capture.release()
+    # Кодировщики закрытых сегментов вернули слоты кольцу захвата
+    held = worker.last_frame[1]
+    assert [count for i, count in enumerate(worker.ring._holds) if i != held] == [0] * (len(worker.ring) - 1)
+
+
+def test_encoder_places_frames_by_timestamp(tmp_path):
+    ring = FrameRing(8, 4, size=10)
+    encoder = blocked_encoder(tmp_path, ring, queue_size=10)
+    encoder.writer.unblocked.set()
+    # 10 fps: кадр 2 опоздал на два интервала, кадр 3 пришёл в уже занятый интервал
+    for number, timestamp in [(0, 100.0), (1, 100.1), (2, 100.4), (3, 100.42), (4, 100.5)]:
+        index = ring.acquire()
+        ring.frames[index][0, 0, 0] = number
+        encoder.submit(ring, index, timestamp)
+    encoder.fps = 10
+    encoder.close()
+
+    assert encoder.writer.written == [0, 1, 2, 2, 2, 4]
+    stats = encoder.stats()
+    assert (stats["encoded"], stats["duplicated"], stats["skipped"]) == (4, 2, 1)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_scheduler_compensates_processing_time():
+    clock = FakeClock()
+    scheduler = FrameScheduler(20, clock=clock)
+    delays = []
+    for processing in [0.01, 0.03, 0.0, 0.05]:
+        clock.now += processing
+        delay = scheduler.next_delay()
+        delays.append(round(delay, 3))
+        clock.now += delay
+    # Кадры ровно каждые 50 мс, сколько бы ни заняла обработка
+    assert delays == [0.05, 0.02, 0.05, 0.0]
+    assert clock.now == pytest.approx(0.21)
+
+    # Отставание больше чем на кадр не догоняется серией кадров:
+    # следующий кадр сразу, дальше снова через интервал
+    clock.now += 0.5
+    assert scheduler.next_delay() == 0.0
+    assert scheduler.next_delay() == pytest.approx(0.05)
+
+
+def test_frame_stats_and_widget(app):
+    stats = FrameStats(window=10)
+    for i in range(11):
+        stats.add(i * 0.04 + (0.005 if i % 2 else 0))
+    assert stats.fps() == pytest.approx(25)
+    assert stats.jitter_ms() == pytest.approx(5, abs=0.5)
+
+    widget = VideoWidget()
+    widget.update_capture_stats(stats.fps(), stats.jitter_ms())
+    assert widget.stats_label.text() == "25.0 fps · ±5.0 мс"
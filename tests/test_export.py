@@ -0,0 +1,140 @@
+# tests/test_export.py
+"""
+Тесты потоковой выгрузки приёмок: эндпоинт /receptions/export (CSV, XLSX,
+фильтры), перенос строк XLSX на следующий лист, постоянная память
+при формировании файла.
+
+Запуск:
+    pytest tests/test_export.py -v
+"""
+import csv
+import io
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.src import export
+from server.src.db.migrations import reset_db
+from server.src.main_server import app
+
+client = TestClient(app)
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+@pytest.fixture
+def receptions():
+    reset_db()
+    item = {"article": "BOLT-M10", "name": "Болт М10 <оцинк.> & Ко", "quantity": 10, "unit": "шт",
+            "control_required": True}
+    created = [
+        client.post("/api/v1/receptions", json={
+            "ttn_number": "EXP-1", "ttn_date": "2025-01-10", "supplier": "ООО Альфа",
+            "items": [item, {**item, "article": "NUT-M10", "name": "Гайка М10", "control_required": False}],
+        }).json(),
+        client.post("/api/v1/receptions", json={
+            "ttn_number": "EXP-2", "ttn_date": "2025-02-10", "supplier": "Beta LLC", "items": [item],
+        }).json(),
+        client.post("/api/v1/receptions", json={
+            "ttn_number": "EXP-3", "ttn_date": "2025-03-10", "supplier": "Beta LLC", "items": [],
+        }).json(),
+    ]
+    first = created[0]
+    client.post(f"/api/v1/receptions/{first['id']}/control-results", json={"items": [{
+        "id": first["items"][0]["id"], "control_status": "passed",
+        "control_result": {"passed": True}, "notes": "Проверено",
+    }]})
+    return created
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(response.content.decode("utf-8-sig")), delimiter=";"))
+
+
+def read_xlsx(data):
+    """Строки всех листов книги в порядке листов."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+        sheets = []
+        for n in range(1, len(workbook.findall("x:sheets/x:sheet", NS)) + 1):
+            root = ET.fromstring(archive.read(f"xl/worksheets/sheet{n}.xml"))
+            sheets.append([
+                [cell.findtext("x:v", "", NS) or cell.findtext("x:is/x:t", "", NS) for cell in row]
+                for row in root.iter(f"{{{NS['x']}}}row")
+            ])
+        return sheets
+
+
+def test_export_csv_item_rows(receptions):
+    response = client.get("/api/v1/receptions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="receptions.csv"' in response.headers["content-disposition"]
+
+    rows = read_csv(response)
+    assert rows[0][:3] == ["ID приёмки", "ТТН", "Дата ТТН"]
+    # По строке на позицию, приёмка без позиций — одной строкой
+    assert [row[1] for row in rows[1:]] == ["EXP-1", "EXP-1", "EXP-2", "EXP-3"]
+    bolt = rows[1]
+    assert bolt[7:9] == ["BOLT-M10", "Болт М10 <оцинк.> & Ко"]
+    assert bolt[11:] == ["да", "passed", '{"passed": true}', "Проверено"]
+    assert rows[2][11:13] == ["нет", ""]
+    assert rows[4][6:] == [""] * 9
+
+    # Фильтр поставщика без учёта регистра кириллицы
+    rows = read_csv(client.get("/api/v1/receptions/export", params={"supplier": "альфа"}))
+    assert [row[1] for row in rows[1:]] == ["EXP-1", "EXP-1"]
+
+
+def test_export_filters(receptions):
+    response = client.get("/api/v1/receptions/export", params={"from": "2025-02-01", "to": "2025-02-28"})
+    assert [row[1] for row in read_csv(response)[1:]] == ["EXP-2"]
+    assert 'filename="receptions_2025-02-01_2025-02-28.csv"' in response.headers["content-disposition"]
+
+    response = client.get("/api/v1/receptions/export", params={"status": "completed"})
+    assert [row[1] for row in read_csv(response)[1:]] == ["EXP-1", "EXP-1"]
+
+    assert client.get("/api/v1/receptions/export", params={"format": "pdf"}).status_code == 422
+
+
+def test_export_xlsx(receptions):
+    response = client.get("/api/v1/receptions/export", params={"format": "xlsx", "supplier": "beta"})
+    assert response.status_code == 200
+    assert 'filename="receptions.xlsx"' in response.headers["content-disposition"]
+
+    [sheet] = read_xlsx(response.content)
+    assert sheet[0][0] == "ID приёмки"
+    assert [row[1] for row in sheet[1:]] == ["EXP-2", "EXP-3"]
+    assert sheet[1][7:11] == ["BOLT-M10", "Болт М10 <оцинк.> & Ко", "10.0", "шт"]
+
+
+def test_xlsx_rolls_over_to_next_sheet(monkeypatch):
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 4)
+    data = b"".join(export.iter_xlsx(["n", "text"], ((i, f"строка\x01{i}") for i in range(7)), batch_size=2))
+
+    sheets = read_xlsx(data)
+    assert [len(sheet) for sheet in sheets] == [4, 4, 2]
+    assert all(sheet[0] == ["n", "text"] for sheet in sheets)
+    assert [row[0] for sheet in sheets for row in sheet[1:]] == [str(i) for i in range(7)]
+    assert sheets[2][1][1] == "строка6"
+
+
+@pytest.mark.parametrize("writer", [export.iter_csv, export.iter_xlsx])
+def test_memory_does_not_grow_with_rows(writer):
+    def peak(count):
+        rows = ((i, "BOLT-M10", "Болт М10 оцинкованный", 10.5, "шт", "passed") for i in range(count))
+        tracemalloc.start()
+        try:
+            size = sum(len(chunk) for chunk in writer(["id", "a", "b", "c", "d", "e"], rows))
+            return tracemalloc.get_traced_memory()[1], size
+        finally:
+            tracemalloc.stop()
+
+    small_peak, _ = peak(20_000)
+    large_peak, _ = peak(200_000)
+    # Вдесятеро больше строк — пиковая память почти та же
+    assert large_peak < small_peak * 1.5
+    assert large_peak < 8 * 1024 * 1024
@@ -0,0 +1,161 @@
+# tests/test_hedged_ocr.py
+"""
+Тесты хеджированного разбора ТТН: Regex и LLM-провайдеры наперегонки.
+
+Запуск:
+    pytest tests/test_hedged_ocr.py -v
+"""
+import time
+
+import pytest
+
+from client.src.services.async_llm_client import AsyncLLMClient
+from client.src.services.hedged_ocr import HedgeCandidate, HedgedExecutor, LatencyTracker
+from client.src.services.llm_cache import LLMResponseCache
+from common.models import OCRItem, OCRResult
+from tests.fake_llm_server import FakeLLMServer, FakeReply
+
+LLM_RESULT = {
+    "ttn_number": "ТТН-2025-001",
+    "ttn_date": "2025-01-15",
+    "supplier": "ООО \"МеталлТорг\"",
+    "items": [{"article": "BOLT-M10", "name": "Болт М10х50", "quantity": 100, "unit": "шт"}],
+}
+
+
+def make_client() -> AsyncLLMClient:
+    return AsyncLLMClient("test", settings={"max_attempts": 1, "attempt_timeout": 5.0})
+
+
+def valid_result(name: str) -> OCRResult:
+    item = OCRItem(raw_text=name, name=name, quantity=1, field_confidence={"name": 1.0})
+    return OCRResult(ttn_number=name, items=[item])
+
+
+class TestLatencyTracker:
+
+    def test_percentile(self):
+        tracker = LatencyTracker()
+        for value in range(1, 11):
+            tracker.record("p", value / 10)
+        assert tracker.percentile("p", 0.9) == pytest.approx(0.9)
+        assert tracker.percentile("p", 0.0) == pytest.approx(0.1)
+
+    def test_not_enough_samples(self):
+        tracker = LatencyTracker()
+        tracker.record("p", 1.0)
+        assert tracker.percentile("p", 0.9) is None
+
+
+class TestHedgedExecutor:
+
+    def test_first_valid_wins(self):
+        executor = HedgedExecutor()
+        candidates = [
+            HedgeCandidate("slow", lambda: time.sleep(0.5) or valid_result("slow")),
+            HedgeCandidate("fast", lambda: time.sleep(0.05) or valid_result("fast")),
+        ]
+        start = time.perf_counter()
+        winner, _ = executor.race(candidates, lambda r: True, timeout=5)
+        assert winner[0] == "fast"
+        assert time.perf_counter() - start < 0.4
+
+    def test_invalid_result_does_not_win(self):
+        executor = HedgedExecutor()
+        candidates = [
+            HedgeCandidate("local", lambda: OCRResult()),
+            HedgeCandidate("llm", lambda: time.sleep(0.1) or valid_result("llm")),
+        ]
+        winner, completed = executor.race(candidates, lambda r: bool(r.items), timeout=5)
+        assert winner[0] == "llm"
+        assert [name for name, _ in completed] == ["local", "llm"]
+
+    def test_hedge_delay(self):
+        executor = HedgedExecutor()
+        started = {}
+        candidates = [
+            HedgeCandidate("primary", lambda: started.setdefault("primary", time.perf_counter())
+                           and time.sleep(1.0) or valid_result("primary")),
+            HedgeCandidate("secondary", lambda: started.setdefault("secondary", time.perf_counter())
+                           and valid_result("secondary"), delay=0.2),
+        ]
+        winner, _ = executor.race(candidates, lambda r: True, timeout=5)
+        assert winner[0] == "secondary"
+        assert started["secondary"] - started["primary"] >= 0.19
+
+    def test_timeout(self):
+        executor = HedgedExecutor()
+        candidates = [HedgeCandidate("hang", lambda: time.sleep(1.0) or valid_result("hang"))]
+        start = time.perf_counter()
+        winner, completed = executor.race(candidates, lambda r: True, timeout=0.2)
+        assert winner is None and completed == []
+        assert time.perf_counter() - start < 0.5
+
+
+@pytest.fixture
+def openai_server():
+    server = FakeLLMServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def hedged_service(fake_llm_server, openai_server):
+    """OCRService с обоими провайдерами на fake-серверах (ChatBotHub — основной)."""
+    from openai import AsyncOpenAI
+    from client.src.services.ocr_service import OCRService
+
+    service = OCRService()
+    service.hedging_enabled = True
+    service.llm_provider = "chatbothub"
+    service.hedge_initial_delay = 0.3
+    service.hedge_min_delay = 0.1
+
+    hub = service.chatbothub_service
+    hub.base_url = fake_llm_server.url
+    hub.http = make_client()
+    hub.cache = LLMResponseCache(enabled=False)
+
+    llm = service.llm_service
+    llm.http = make_client()
+    llm.client = AsyncOpenAI(api_key="test", base_url=openai_server.url, max_retries=0, http_client=llm.http.http)
+    llm.cache = LLMResponseCache(enabled=False)
+    return service
+
+
+class TestOCRServiceHedging:
+
+    def test_regex_alone_is_not_accepted(self, hedged_service, sample_ttn_text):
+        assert not hedged_service._is_acceptable_result(hedged_service._parse_ttn_regex(sample_ttn_text))
+
+    def test_primary_wins_when_fast(self, hedged_service, fake_llm_server, openai_server, sample_ttn_text,
+                                    monkeypatch):
+        fake_llm_server.handler = lambda request: FakeReply(result=LLM_RESULT)
+        regex_calls = []
+        monkeypatch.setattr(hedged_service, "_parse_ttn_regex", lambda text: regex_calls.append(text))
+
+        result = hedged_service._process_text_content(sample_ttn_text)
+        assert result.ttn_number == "ТТН-2025-001"
+        assert openai_server.requests == []  # хедж не понадобился
+        assert regex_calls == []  # Regex — только запасной вариант, не участник гонки
+
+    def test_secondary_wins_when_primary_degraded(self, hedged_service, fake_llm_server,
+                                                   openai_server, sample_ttn_text, caplog):
+        fake_llm_server.handler = lambda request: FakeReply(result=LLM_RESULT, delay=3.0)
+        openai_server.handler = lambda request: FakeReply(result={**LLM_RESULT, "ttn_number": "from-openai"})
+
+        start = time.perf_counter()
+        result = hedged_service._process_text_content(sample_ttn_text)
+        assert result.ttn_number == "from-openai"
+        assert time.perf_counter() - start < 1.5
+
+        time.sleep(0.2)
+        assert "request cancelled" in caplog.text  # проигравший запрос отменён
+
+    def test_regex_fallback_when_providers_fail(self, hedged_service, fake_llm_server,
+                                                openai_server, sample_ttn_text):
+        fake_llm_server.handler = lambda request: FakeReply(status=400)
+        openai_server.handler = lambda request: FakeReply(status=400)
+
+        result = hedged_service._process_text_content(sample_ttn_text)
+        assert result == hedged_service._parse_ttn_regex(sample_ttn_text)
@@ -0,0 +1,175 @@
+# tests/test_history_dialog.py
+"""
+Тесты истории приёмок (HistoryDialog): постраничная подгрузка по курсору
+в фоне, фильтры на сервере, экспорт под фильтрами в фоне (прерванная
+загрузка не портит прежний файл). Запросы идут
+в тестовую БД через серверный репозиторий.
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen pytest tests/test_history_dialog.py -v
+"""
+import csv
+import sys
+import time
+from datetime import date
+
+import pytest
+import requests
+from PySide6.QtCore import QCoreApplication, QDate
+from PySide6.QtWidgets import QApplication, QFileDialog, QMessageBox
+
+from client.src.services import sync_service as sync_module
+from client.src.services.sync_service import SyncService
+from client.src.ui.history_dialog import HistoryDialog, ReceptionHistoryModel
+from common.models import ReceptionCreate, ReceptionStatus
+from server.src.db.migrations import reset_db
+from server.src.db.repository import EXPORT_COLUMNS, ReceptionRepository
+from server.src.export import iter_csv
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+class RepositorySync(SyncService):
+    """SyncService поверх серверного репозитория: запросы идут в тестовую БД."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def get_receptions_page(self, limit=100, status=None, date_from=None, date_to=None, supplier=None,
+                            before=None, before_id=None):
+        self.requests.append((limit, before_id))
+        filters = dict(status=status, date_from=date_from, date_to=date_to, supplier=supplier)
+        page = ReceptionRepository.get_all(limit=limit, before=before, before_id=before_id, **filters)
+        return page, ReceptionRepository.count(**filters)
+
+    def export_receptions(self, save_path, fmt="csv", progress=None, **filters):
+        self.requests.append(("export", fmt, filters))
+        received = 0
+        with open(save_path, "wb") as f:
+            for chunk in iter_csv(EXPORT_COLUMNS, ReceptionRepository.iter_export_rows(**filters)):
+                f.write(chunk)
+                received += len(chunk)
+                progress(received)
+        return True
+
+
+@pytest.fixture
+def server():
+    reset_db()
+    ReceptionRepository.create_many([
+        ReceptionCreate(ttn_number=f"H-{i:03d}", ttn_date=date(2025, 1, 1 + i % 28),
+                        supplier="ООО Альфа" if i % 3 == 0 else "Beta LLC", items=[])
+        for i in range(95)
+    ])
+    return RepositorySync()
+
+
+def wait_loaded(model, timeout=5):
+    """Дождаться загрузки страницы и доставить модели её результат."""
+    deadline = time.monotonic() + timeout
+    while model.is_loading() and time.monotonic() < deadline:
+        # Только события модели: чужие виджеты других тестов не трогаем
+        QCoreApplication.sendPostedEvents(model, 0)
+        time.sleep(0.01)
+    assert not model.is_loading()
+
+
+def test_pages_are_fetched_on_demand(app, server):
+    model = ReceptionHistoryModel(server, page_size=40)
+    model.reload()
+    wait_loaded(model)
+    assert model.rowCount() == 40
+    assert model.total == 95
+    assert model.canFetchMore()
+
+    while model.canFetchMore():
+        model.fetchMore()
+        wait_loaded(model)
+    assert model.rowCount() == 95
+    assert len({model.reception_at(row).id for row in range(95)}) == 95
+    # Страницы после первой запрашиваются по курсору, а не по смещению
+    assert [before_id for _, before_id in server.requests[1:]] == [
+        model.reception_at(39).id, model.reception_at(79).id
+    ]
+    assert model.data(model.index(0, 1)) == model.reception_at(0).ttn_number
+
+
+def test_reload_with_filters_discards_stale_pages(app, server):
+    model = ReceptionHistoryModel(server, page_size=40)
+    model.reload()
+    model.reload({"supplier": "альфа", "status": ReceptionStatus.PENDING})
+    wait_loaded(model)
+
+    assert model.total == 32
+    assert model.rowCount() == 32
+    assert not model.canFetchMore()
+    assert {model.reception_at(row).supplier for row in range(32)} == {"ООО Альфа"}
+
+
+def test_export_uses_dialog_filters(app, server, tmp_path, monkeypatch):
+    path = tmp_path / "report.csv"
+    monkeypatch.setattr(QFileDialog, "getSaveFileName", lambda *args: (str(path), "CSV Files (*.csv)"))
+    monkeypatch.setattr(QMessageBox, "information", lambda *args: None)
+    dialog = HistoryDialog(sync_service=server)
+    wait_loaded(dialog.model)
+    dialog.supplier_edit.setText("Beta")
+    dialog._export_data()
+    # Выгрузка идёт в фоне, кнопка недоступна до конца
+    assert not dialog.export_btn.isEnabled()
+    assert dialog.export_worker.wait(5000)
+    QCoreApplication.sendPostedEvents(dialog, 0)
+    assert dialog.export_btn.isEnabled()
+    assert dialog.export_progress is None
+
+    assert server.requests[-1] == ("export", "csv", {"supplier": "Beta"})
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    # Приёмки без позиций — по строке на приёмку
+    assert len(rows) == 64
+    assert {row[3] for row in rows[1:]} == {"Beta LLC"}
+
+
+class BrokenStream:
+    """Ответ сервера, оборвавшийся посреди выгрузки."""
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield b"ID;"
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+
+def test_interrupted_export_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "report.csv"
+    path.write_bytes(b"previous report")
+    monkeypatch.setattr(sync_module.requests, "get", lambda *args, **kwargs: BrokenStream())
+
+    assert not SyncService().export_receptions(path, "csv")
+    assert path.read_bytes() == b"previous report"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["report.csv"]
+
+    # Папка недоступна для записи: ошибка, а не исключение в слот Qt
+    assert not SyncService().export_receptions(tmp_path / "missing" / "report.csv", "csv")
+
+
+def test_dialog_filters(app, server):
+    dialog = HistoryDialog(sync_service=server)
+    wait_loaded(dialog.model)
+    assert dialog.model.total == 95
+
+    dialog.period_check.setChecked(True)
+    dialog.date_from_edit.setDate(QDate(2025, 1, 2))
+    dialog.date_to_edit.setDate(QDate(2025, 1, 3))
+    dialog.supplier_edit.setText("beta")
+    dialog._load_data()
+    wait_loaded(dialog.model)
+
+    filters = dialog._filters()
+    assert filters == {"date_from": date(2025, 1, 2), "date_to": date(2025, 1, 3), "supplier": "beta"}
+    assert dialog.model.total == ReceptionRepository.count(**filters)
+    assert dialog.counter_label.text() == f"Показано: {dialog.model.total} из {dialog.model.total}"
@@ -0,0 +1,107 @@
+# tests/test_image_pipeline.py
+"""
+Тесты in-memory конвейера изображений в OCRService._process_image_content:
+страница растеризуется один раз, буфер общий для Vision и Tesseract,
+временные файлы не создаются, кириллические имена файлов читаются.
+
+Запуск:
+    pytest tests/test_image_pipeline.py -v
+"""
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from client.src.services import ocr_service as ocr_module
+from client.src.services.async_llm_client import AsyncLLMClient
+from client.src.services.llm_cache import LLMResponseCache
+from tests.fake_llm_server import FakeReply
+
+
+@pytest.fixture
+def service(fake_llm_server):
+    svc = ocr_module.OCRService()
+    svc.llm_provider = "chatbothub"
+    hub = svc.chatbothub_service
+    hub.base_url = fake_llm_server.url
+    hub.http = AsyncLLMClient("test", settings={"max_attempts": 1})
+    hub.cache = LLMResponseCache(enabled=False)
+    return svc
+
+
+@pytest.fixture
+def fake_rasterizer(monkeypatch):
+    """Подмена pdf2image: 3 страницы, вызовы записываются."""
+    calls = []
+
+    def convert_from_path(path, poppler_path=None, dpi=200, first_page=None, last_page=None):
+        calls.append({"dpi": dpi, "first_page": first_page, "last_page": last_page})
+        pages = [Image.new("RGB", (850, 1100), (255, 255, 255)) for _ in range(3)]
+        start = (first_page or 1) - 1
+        return pages[start:last_page or len(pages)]
+
+    monkeypatch.setattr(ocr_module, "convert_from_path", convert_from_path)
+    return calls
+
+
+def test_pdf_vision_success_rasterizes_first_page_only(service, fake_llm_server, fake_rasterizer, tmp_path):
+    fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "A-654", "items": []})
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 scanned")
+
+    result = service._process_image_content(pdf)
+
+    assert result.ttn_number == "A-654"
+    assert fake_rasterizer == [{"dpi": 300, "first_page": 1, "last_page": 1}]
+    assert fake_llm_server.requests[0].body["user_input"].startswith("data:image/jpeg;base64,")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["scan.pdf"]
+
+
+def test_pdf_tesseract_fallback_reuses_first_page(service, fake_llm_server, fake_rasterizer,
+                                                  tmp_path, monkeypatch):
+    fake_llm_server.handler = lambda request: FakeReply(status=400)
+    vision_inputs = []
+    tesseract_inputs = []
+
+    original = service.chatbothub_service.parse_ttn_image_array
+    monkeypatch.setattr(service.chatbothub_service, "parse_ttn_image_array",
+                        lambda image: vision_inputs.append(image) or original(image))
+    monkeypatch.setattr(service, "_preprocess_image", lambda image: tesseract_inputs.append(image) or image)
+    monkeypatch.setattr(service, "_extract_text_tesseract", lambda image: "Арт. BOLT-M10 Болт М10х50 100 шт")
+
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 scanned")
+    result = service._process_image_content(pdf)
+
+    assert fake_rasterizer == [
+        {"dpi": 300, "first_page": 1, "last_page": 1},
+        {"dpi": 300, "first_page": 2, "last_page": None},
+    ]
+    assert len(tesseract_inputs) == 3
+    assert tesseract_inputs[0] is vision_inputs[0]
+    assert len(result.items) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["scan.pdf"]
+
+
+def test_image_file_decoded_once(service, fake_llm_server, tmp_path, monkeypatch):
+    fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "1", "items": []})
+    photo = tmp_path / "photo.png"
+    cv2.imwrite(str(photo), np.full((600, 400, 3), 255, np.uint8))
+
+    reads = []
+    original_imdecode = cv2.imdecode
+    monkeypatch.setattr(ocr_module.cv2, "imdecode", lambda *args: reads.append(args) or original_imdecode(*args))
+
+    assert service._process_image_content(photo).ttn_number == "1"
+    assert len(reads) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["photo.png"]
+
+
+def test_image_with_cyrillic_file_name(service, fake_llm_server, tmp_path):
+    fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "ТТН-7", "items": []})
+    photo = tmp_path / "ТТН от поставщика.jpg"
+    ok, encoded = cv2.imencode(".jpg", np.full((600, 400, 3), 255, np.uint8))
+    photo.write_bytes(encoded.tobytes())
+
+    assert service._process_image_content(photo).ttn_number == "ТТН-7"
+    assert fake_llm_server.requests[0].body["user_input"].startswith("data:image/jpeg;base64,")
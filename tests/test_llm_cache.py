@@ -0,0 +1,203 @@
+# tests/test_llm_cache.py
+"""
+Тесты кэша ответов LLM и дедупликации одновременных запросов.
+
+Запуск:
+    pytest tests/test_llm_cache.py -v
+"""
+import threading
+import time
+
+import pytest
+
+from client.src.services.async_llm_client import RequestCancelledError
+from client.src.services.llm_cache import LLMResponseCache
+
+
+class TestLLMResponseCache:
+    """Поведение LLMResponseCache."""
+
+    def test_key_depends_on_all_parts(self):
+        base = LLMResponseCache.make_key("openai", "gpt-4o-mini", "text-1", b"abc")
+        assert base == LLMResponseCache.make_key("openai", "gpt-4o-mini", "text-1", b"abc")
+        assert base != LLMResponseCache.make_key("chatbothub", "gpt-4o-mini", "text-1", b"abc")
+        assert base != LLMResponseCache.make_key("openai", "gpt-4o", "text-1", b"abc")
+        assert base != LLMResponseCache.make_key("openai", "gpt-4o-mini", "text-2", b"abc")
+        assert base != LLMResponseCache.make_key("openai", "gpt-4o-mini", "text-1", b"abd")
+
+    def test_hit_after_miss(self):
+        cache = LLMResponseCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"ttn_number": "1"}
+
+        assert cache.get_or_compute("k", compute) == {"ttn_number": "1"}
+        assert cache.get_or_compute("k", compute) == {"ttn_number": "1"}
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_cached_value_is_isolated(self):
+        cache = LLMResponseCache()
+        first = cache.get_or_compute("k", lambda: {"items": []})
+        first["items"].append("mutated")
+        assert cache.get_or_compute("k", lambda: {}) == {"items": []}
+
+    def test_empty_result_not_cached(self):
+        cache = LLMResponseCache()
+        calls = []
+        cache.get_or_compute("k", lambda: calls.append(1) or {})
+        cache.get_or_compute("k", lambda: calls.append(1) or {})
+        assert len(calls) == 2
+
+    def test_ttl_expiry(self):
+        cache = LLMResponseCache(ttl_seconds=0.05)
+        cache.get_or_compute("k", lambda: {"v": 1})
+        time.sleep(0.1)
+        assert cache.get_or_compute("k", lambda: {"v": 2}) == {"v": 2}
+
+    def test_lru_eviction(self):
+        cache = LLMResponseCache(max_entries=2)
+        cache.get_or_compute("a", lambda: {"v": "a"})
+        cache.get_or_compute("b", lambda: {"v": "b"})
+        cache.get_or_compute("a", lambda: {})  # a становится самым свежим
+        cache.get_or_compute("c", lambda: {"v": "c"})
+        assert cache.get_or_compute("a", lambda: {"v": "new"}) == {"v": "a"}
+        assert cache.get_or_compute("b", lambda: {"v": "new"}) == {"v": "new"}
+
+    def test_disk_persistence(self, tmp_path):
+        LLMResponseCache(directory=tmp_path).get_or_compute("k", lambda: {"v": 1})
+        other = LLMResponseCache(directory=tmp_path)
+        assert other.get_or_compute("k", lambda: {"v": 2}) == {"v": 1}
+
+    def test_disk_io_does_not_block_memory_hits(self, tmp_path, monkeypatch):
+        cache = LLMResponseCache(directory=tmp_path)
+        cache.get_or_compute("hot", lambda: {"v": 1})
+        reading = threading.Event()
+        release = threading.Event()
+        original_load = cache._load_from_disk
+
+        def slow_load(key):
+            reading.set()
+            release.wait(2)
+            return original_load(key)
+
+        monkeypatch.setattr(cache, "_load_from_disk", slow_load)
+        cold = threading.Thread(target=lambda: cache.get_or_compute("cold", lambda: {"v": 2}))
+        cold.start()
+        assert reading.wait(1)
+
+        # Пока другой поток читает файл, попадание в память не ждёт
+        started = time.monotonic()
+        assert cache.get_or_compute("hot", lambda: {"v": 3}) == {"v": 1}
+        assert time.monotonic() - started < 0.5
+        release.set()
+        cold.join()
+        assert LLMResponseCache(directory=tmp_path).get_or_compute("cold", lambda: {"v": 4}) == {"v": 2}
+
+    def test_in_flight_deduplication(self):
+        cache = LLMResponseCache()
+        calls = []
+        started = threading.Event()
+
+        def slow_compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"v": 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow_compute)))
+            for _ in range(8)
+        ]
+        threads[0].start()
+        started.wait(1)
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [{"v": 1}] * 8
+
+    def test_in_flight_error_propagates(self):
+        cache = LLMResponseCache()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", fail)
+        assert cache.get_or_compute("k", lambda: {"v": 1}) == {"v": 1}
+
+    def test_cancelled_owner_does_not_answer_waiters(self):
+        cache = LLMResponseCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def cancelled():
+            started.set()
+            release.wait(1)
+            raise RequestCancelledError("lost the race")
+
+        waiter_result = []
+        owner = threading.Thread(target=lambda: pytest.raises(RequestCancelledError, cache.get_or_compute,
+                                                              "k", cancelled))
+        owner.start()
+        started.wait(1)
+        waiter = threading.Thread(target=lambda: waiter_result.append(cache.get_or_compute("k", lambda: {"v": 1})))
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        owner.join()
+        waiter.join()
+
+        # Ожидающий не получил пустой ответ отменённого владельца, а выполнил запрос сам
+        assert waiter_result == [{"v": 1}]
+        assert cache.get_or_compute("k", lambda: {"v": 2}) == {"v": 1}
+
+    def test_disabled(self):
+        cache = LLMResponseCache(enabled=False)
+        calls = []
+        cache.get_or_compute("k", lambda: calls.append(1) or {"v": 1})
+        cache.get_or_compute("k", lambda: calls.append(1) or {"v": 1})
+        assert len(calls) == 2
+
+
+class TestChatBotHubCache:
+    """ChatBotHubService не повторяет HTTP-запрос для того же документа."""
+
+    def test_repeated_text_single_request(self, fake_llm_server):
+        from client.src.services.async_llm_client import AsyncLLMClient
+        from client.src.services.chatbothub_service import ChatBotHubService
+        from tests.fake_llm_server import FakeReply
+
+        fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "A-654"})
+        service = ChatBotHubService()
+        service.base_url = fake_llm_server.url
+        service.http = AsyncLLMClient("chatbothub-test")
+        service.cache = LLMResponseCache()
+
+        assert service.parse_ttn_text("ТТН № A-654") == {"ttn_number": "A-654"}
+        assert service.parse_ttn_text("ТТН № A-654") == {"ttn_number": "A-654"}
+        assert service.parse_ttn_text("ТТН № Б-1287") == {"ttn_number": "A-654"}
+        assert len(fake_llm_server.requests) == 2
+
+    def test_cancelled_request_returns_empty_to_its_caller_only(self, fake_llm_server):
+        from client.src.services.async_llm_client import AsyncLLMClient, CancelToken, cancel_scope
+        from client.src.services.chatbothub_service import ChatBotHubService
+        from tests.fake_llm_server import FakeReply
+
+        fake_llm_server.handler = lambda request: FakeReply(result={"ttn_number": "A-654"})
+        service = ChatBotHubService()
+        service.base_url = fake_llm_server.url
+        service.http = AsyncLLMClient("chatbothub-test")
+        service.cache = LLMResponseCache()
+
+        token = CancelToken()
+        token.cancel()
+        with cancel_scope(token):
+            assert service.parse_ttn_text("ТТН № A-654") == {}
+        assert service.parse_ttn_text("ТТН № A-654") == {"ttn_number": "A-654"}
@@ -0,0 +1,171 @@
+# tests/test_llm_chunking.py
+"""
+Тесты разбора длинных многостраничных ТТН частями (OCRService chunking).
+
+Fake-сервер ChatBotHub «распознаёт» строки таблицы во входном тексте
+и отвечает тем дольше, чем больше позиций в запросе.
+
+Запуск:
+    pytest tests/test_llm_chunking.py -v
+"""
+import re
+import threading
+import time
+from typing import List
+
+import pytest
+
+from client.src.services.async_llm_client import AsyncLLMClient
+from client.src.services.llm_cache import LLMResponseCache
+from tests.fake_llm_server import FakeReply, RecordedRequest
+
+ROW_RE = re.compile(r"^(\d+) \| (\S+) \| (.+?) \| (\d+) шт$", re.MULTILINE)
+HEADER_RE = re.compile(r"НАКЛАДНАЯ № (\S+) от (\d{2})\.(\d{2})\.(\d{4})")
+
+
+def make_multipage_ttn_pages(n_pages: int, rows_per_page: int = 30) -> List[str]:
+    """Синтетическая многостраничная ТТН: реквизиты на первой странице, таблица на всех."""
+    pages = []
+    row = 1
+    for page_number in range(1, n_pages + 1):
+        lines = []
+        if page_number == 1:
+            lines += ["ТОВАРНАЯ НАКЛАДНАЯ № ТТН-2025-777 от 15.01.2025", 'Поставщик: ООО "МеталлТорг"',
+                      "№ | Артикул | Наименование | Кол-во"]
+        for _ in range(rows_per_page):
+            lines.append(f"{row} | ART-{row:05d} | Товар номер {row} | {row % 50 + 1} шт")
+            row += 1
+        lines.append(f"Страница {page_number} из {n_pages}")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def make_fake_parser(base_delay: float = 0.0, per_item_delay: float = 0.0):
+    """Handler fake-сервера: извлекает строки таблицы из user_input."""
+    def handler(request: RecordedRequest) -> FakeReply:
+        text = request.body.get("user_input", "")
+        items = [
+            {"article": article, "name": name, "quantity": float(quantity), "unit": "шт"}
+            for _, article, name, quantity in ROW_RE.findall(text)
+        ]
+        result = {"items": items}
+        header = HEADER_RE.search(text)
+        if header:
+            number, day, month, year = header.groups()
+            result.update(ttn_number=number, ttn_date=f"{year}-{month}-{day}", supplier='ООО "МеталлТорг"')
+        return FakeReply(result=result, delay=base_delay + per_item_delay * len(items))
+    return handler
+
+
+@pytest.fixture
+def chunked_service(fake_llm_server):
+    from client.src.services.ocr_service import OCRService
+
+    service = OCRService()
+    service.llm_provider = "chatbothub"
+    service.chunking_enabled = True
+    service.hedging_enabled = False
+
+    hub = service.chatbothub_service
+    hub.base_url = fake_llm_server.url
+    hub.http = AsyncLLMClient("test", settings={"max_attempts": 1})
+    hub.cache = LLMResponseCache(enabled=False)
+    return service
+
+
+class TestSplitAndMerge:
+
+    def test_split_pages(self, chunked_service):
+        chunked_service.chunk_pages = 2
+        chunked_service.chunk_overlap_lines = 1
+        pages = ["p1-a\np1-b", "p2", "p3", "p4"]
+        assert chunked_service._split_pages(pages) == ["p1-a\np1-b", "p1-b\np2\np3", "p3\np4"]
+
+    def test_merge_removes_boundary_duplicates(self, chunked_service):
+        from common.models import OCRItem
+
+        def item(n):
+            return OCRItem(raw_text=str(n), article=str(n), name=f"Товар {n}", quantity=1, unit="шт")
+
+        chunked_service.chunk_overlap_lines = 2
+        merged = chunked_service._merge_chunk_items([
+            [item(1), item(2), item(3)],
+            [item(2), item(3), item(4), item(2)],  # повтор в середине части не трогаем
+        ], [["2 | Товар 2 | 1 шт", "3 | Товар 3 | 1 шт"]])
+        assert [i.article for i in merged] == ["1", "2", "3", "4", "2"]
+
+    def test_real_duplicate_row_at_page_break_is_kept(self, chunked_service, fake_llm_server):
+        fake_llm_server.handler = make_fake_parser()
+        chunked_service.chunk_pages = 1
+        chunked_service.chunk_overlap_lines = 1
+        # Одна и та же позиция — последняя строка страницы 2 (перекрытие) и первая строка страницы 3
+        row = "99 | DUP-1 | Шайба М10 | 5 шт"
+        pages = make_multipage_ttn_pages(4, rows_per_page=3)
+        pages[1] = pages[1].replace("Страница 2 из 4", row)
+        pages[2] = row + "\n" + pages[2]
+
+        result = chunked_service._process_text_content("".join(p + "\n" for p in pages), pages)
+
+        articles = [i.article for i in result.items]
+        assert articles.count("DUP-1") == 2
+        assert len(articles) == 14
+
+
+class TestChunkedParsing:
+
+    def test_all_items_parsed_once(self, chunked_service, fake_llm_server):
+        fake_llm_server.handler = make_fake_parser()
+        pages = make_multipage_ttn_pages(7, rows_per_page=10)
+        text = "".join(page + "\n" for page in pages)
+
+        result = chunked_service._process_text_content(text, pages)
+
+        assert result.ttn_number == "ТТН-2025-777"
+        assert str(result.ttn_date) == "2025-01-15"
+        assert [i.article for i in result.items] == [f"ART-{n:05d}" for n in range(1, 71)]
+        assert len(fake_llm_server.requests) == 4  # страница 1 + 3 части по 2 страницы
+
+    def test_chunks_sent_concurrently(self, chunked_service, fake_llm_server):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        parse = make_fake_parser()
+
+        def handler(request):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.2)
+            with lock:
+                active -= 1
+            return parse(request)
+
+        fake_llm_server.handler = handler
+        pages = make_multipage_ttn_pages(8, rows_per_page=5)
+        chunked_service._process_text_content("".join(p + "\n" for p in pages), pages)
+        assert peak > 1
+
+    def test_short_document_single_shot(self, chunked_service, fake_llm_server):
+        fake_llm_server.handler = make_fake_parser()
+        pages = make_multipage_ttn_pages(2, rows_per_page=5)
+        result = chunked_service._process_text_content("".join(p + "\n" for p in pages), pages)
+        assert len(result.items) == 10
+        assert len(fake_llm_server.requests) == 1
+
+    def test_failed_chunk_falls_back_to_single_shot(self, chunked_service, fake_llm_server):
+        parse = make_fake_parser()
+        def handler(request):
+            text = request.body["user_input"]
+            # Падает только часть со страницей 4, полный текст разбирается
+            if "Страница 4 из" in text and "НАКЛАДНАЯ" not in text:
+                return FakeReply(status=400)
+            return parse(request)
+
+        fake_llm_server.handler = handler
+        pages = make_multipage_ttn_pages(5, rows_per_page=5)
+        text = "".join(p + "\n" for p in pages)
+
+        result = chunked_service._process_text_content(text, pages)
+        assert len(result.items) == 25
+        assert fake_llm_server.requests[-1].body["user_input"] == text
@@ -0,0 +1,82 @@
+# tests/test_ocr_accuracy.py
+"""
+Тесты оценки точности OCR по полям (tests/ocr_accuracy.py) и регрессия
+табличного пути pdfplumber на эталонах tests/benchmarks/golden.
+
+Запуск:
+    pytest tests/test_ocr_accuracy.py -v
+"""
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from common.models import OCRItem, OCRResult
+from tests.ocr_accuracy import golden_fixtures, match_items, merge_scores, score_result
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+
+def item(article, name, quantity, unit="шт"):
+    return OCRItem(raw_text=name, article=article, name=name, quantity=quantity, unit=unit)
+
+
+GOLDEN = OCRResult(
+    ttn_number="A-654", ttn_date=date(2022, 6, 15), supplier="ООО «Гамма»",
+    items=[item("512", "Ноутбук ASUS", 5), item("513", "Монитор Samsung", 10), item(None, "Кабель HDMI 2м", 200)]
+)
+
+
+class TestScoring:
+
+    def test_perfect_result(self):
+        scores = merge_scores([score_result(GOLDEN, GOLDEN.model_copy(deep=True))])
+        assert scores["overall"].precision == 1.0
+        assert scores["overall"].recall == 1.0
+        assert scores["items"].tp == 3
+
+    def test_normalization_of_quotes_case_and_spaces(self):
+        predicted = GOLDEN.model_copy(deep=True)
+        predicted.supplier = 'ооо  "Гамма"'
+        assert score_result(GOLDEN, predicted)["supplier"].tp == 1
+
+    def test_wrong_value_is_false_positive_and_miss(self):
+        predicted = GOLDEN.model_copy(deep=True)
+        predicted.ttn_number = "654"
+        predicted.supplier = None
+        scores = score_result(GOLDEN, predicted)
+        assert (scores["ttn_number"].tp, scores["ttn_number"].fp, scores["ttn_number"].fn) == (0, 1, 1)
+        assert (scores["supplier"].fp, scores["supplier"].fn) == (0, 1)
+
+    def test_items_matched_by_article_then_name(self):
+        predicted = [item("513", "Монитор", 10), item("999", "Кабель HDMI 2 м", 200), item("512", "Ноутбук ASUS", 5)]
+        assert match_items(GOLDEN.items, predicted) == [(0, 2), (1, 0), (2, 1)]
+
+    def test_extra_and_missing_items(self):
+        predicted = GOLDEN.model_copy(deep=True)
+        predicted.items = [item("512", "Ноутбук ASUS", 4), item(None, "ИНН 7708123434", 7708123434.0)]
+        scores = score_result(GOLDEN, predicted)
+
+        assert (scores["items"].tp, scores["items"].fp, scores["items"].fn) == (1, 1, 2)
+        # Количество у найденной позиции неверное, у лишней — ложное, у пропущенных — пропуск
+        assert (scores["quantity"].tp, scores["quantity"].fp, scores["quantity"].fn) == (0, 2, 3)
+        assert scores["article"].fp == 0
+        assert scores["article"].fn == 1
+
+
+@pytest.mark.skipif(not TEST_DATA.exists(), reason="test_data not found")
+def test_pdf_table_path_matches_golden_items():
+    """Табличный путь pdfplumber без LLM: позиции test_data совпадают с эталоном."""
+    from client.src.services.ocr_service import OCRService
+
+    service = OCRService()
+    service.llm_provider = "none"
+    service.llm_service.client = None
+    service.hedging_enabled = False
+
+    fixtures = [(path, golden) for path, golden in golden_fixtures(TEST_DATA) if path.suffix == ".pdf"]
+    assert fixtures
+    scores = merge_scores(score_result(golden, service.process_document(path)) for path, golden in fixtures)
+
+    for field in ("items", "article", "name", "quantity", "unit", "ttn_date"):
+        assert scores[field].f1 == 1.0, field
@@ -0,0 +1,210 @@
+# tests/test_ocr_regex.py
+"""
+Регрессионные тесты Regex-парсера ТТН (Tesseract fallback).
+
+Скомпилированный движок в OCRService сравнивается с эталонной
+реализацией до оптимизации: OCRResult должен совпадать полностью.
+
+Запуск:
+    pytest tests/test_ocr_regex.py -v
+"""
+import random
+import re
+from datetime import date
+from typing import List
+
+import pytest
+
+from common.models import OCRItem, OCRResult
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Эталонная (старая) реализация
+# ═══════════════════════════════════════════════════════════════════
+
+LEGACY_PATTERNS = {
+    "ttn_number": r"(?:ТТН|накладная|товарн\w*\s*накладн\w*)[^\d]*[№#]?\s*(\d[\d\-/]+)",
+    "date": r"(\d{2})[./](\d{2})[./](\d{2,4})",
+    "supplier": r"(?:поставщик|грузоотправитель|от(?:правитель)?)[:\s]+([А-Яа-яЁё\s\"\-]+(?:ООО|ИП|АО|ЗАО)?[А-Яа-яЁё\s\"\-]*)",
+    "article": r"(?:арт(?:икул)?\.?|art\.?)[:\s]*([A-Za-zА-Яа-я0-9\-]+)",
+    "quantity": r"(\d+(?:[.,]\d+)?)\s*(шт|кг|м|л|уп|ед)?\.?",
+}
+
+
+def _legacy_is_valid_item(item: OCRItem) -> bool:
+    fields_present = sum([
+        bool(item.article and len(item.article) > 0),
+        bool(item.name and len(item.name) > 5),
+        bool(item.quantity and item.quantity > 0)
+    ])
+    return fields_present >= 2
+
+
+def _legacy_extract_items(text: str, skip_patterns: List[str]) -> List[OCRItem]:
+    items = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or len(line) < 5:
+            continue
+        if any(re.search(p, line, re.IGNORECASE) for p in skip_patterns):
+            continue
+
+        item = OCRItem(raw_text=line)
+        confidence = {}
+
+        match = re.search(LEGACY_PATTERNS["article"], line, re.IGNORECASE)
+        if match:
+            item.article = match.group(1).strip()
+            confidence["article"] = 0.7
+
+        match = re.search(LEGACY_PATTERNS["quantity"], line)
+        if match:
+            try:
+                item.quantity = float(match.group(1).replace(",", "."))
+                confidence["quantity"] = 0.8
+            except ValueError:
+                pass
+            if match.group(2):
+                item.unit = match.group(2)
+                confidence["unit"] = 0.9
+
+        if item.article or item.quantity:
+            item.name = line[:100]
+            confidence["name"] = 0.5
+            item.field_confidence = confidence
+            if _legacy_is_valid_item(item):
+                items.append(item)
+    return items
+
+
+def legacy_parse_ttn_regex(text: str) -> OCRResult:
+    """Regex-парсинг ТТН в том виде, в каком он был до прекомпиляции."""
+    from client.src.services.ocr_service import SKIP_PATTERNS
+
+    result = OCRResult()
+
+    match = re.search(LEGACY_PATTERNS["ttn_number"], text, re.IGNORECASE)
+    if match:
+        result.ttn_number = match.group(1).strip()
+
+    match = re.search(LEGACY_PATTERNS["date"], text)
+    if match:
+        day, month, year = match.groups()
+        if len(year) == 2:
+            year = "20" + year
+        try:
+            result.ttn_date = date(int(year), int(month), int(day))
+        except ValueError:
+            pass
+
+    match = re.search(LEGACY_PATTERNS["supplier"], text, re.IGNORECASE)
+    if match:
+        result.supplier = match.group(1).strip()
+    else:
+        alt_match = re.search(r'((?:ООО|ИП|АО|ЗАО)\s+[«"][^»"]+[»"])', text)
+        if alt_match:
+            result.supplier = alt_match.group(1).strip()
+
+    result.items = _legacy_extract_items(text, SKIP_PATTERNS)
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Генератор синтетического OCR-текста
+# ═══════════════════════════════════════════════════════════════════
+
+_ARTICLES = ["BOLT-M10", "NUT-M10", "512", "513", "CEM-500", "BRICK-150", "MILK-32", "арт-77"]
+_NAMES = ["Болт М10х50", "Гайка М10", "Ноутбук ASUS VivoBook", "Цемент М500",
+          "Кирпич красный М150", "Молоко «Простоквашино» 3.2% 1л", "Шайба"]
+_UNITS = ["шт", "кг", "м", "л", "уп", "ед", "мешок", ""]
+_NOISE = [
+    "ИНН 7701234567",
+    "КПП 770101001",
+    "р/с 40702810900000012345",
+    "к/с 30101810400000000225",
+    "123456, г. Москва, ул. Ленина, д. 1",
+    "101000 Москва",
+    "Водитель Иванов И.И.",
+    "Срок доставки 3 дня",
+    "БИК 044525225",
+    "ОГРН 1027700132195",
+    "Адрес: 123456 Москва",
+    "Петров П.П. подпись",
+    "Организация ИНН 7701234567",
+    "«Печать»",
+    "Итого: 3 позиции",
+    "Всего к оплате 12 345,67 руб.",
+    "",
+    "   ",
+    "abc",
+    "Грузополучатель: ООО \"Получатель\"",
+    "Страница 2 из 7",
+    "0 шт",
+    "Лицензия № 12",
+]
+
+
+def make_synthetic_ocr_text(n_lines: int, seed: int = 0) -> str:
+    """Сгенерировать «грязный» текст ТТН заданной длины (как после Tesseract)."""
+    rnd = random.Random(seed)
+    lines = [
+        "ТОВАРНАЯ НАКЛАДНАЯ № ТТН-2025-{:03d} от {:02d}.{:02d}.{}".format(
+            rnd.randint(1, 999), rnd.randint(1, 28), rnd.randint(1, 12), rnd.choice(["2025", "25"])
+        ),
+        rnd.choice(['Поставщик: ООО "МеталлТорг"', 'ООО «Стройбаза» склад', "Грузоотправитель: ИП Сидоров"]),
+    ]
+    while len(lines) < n_lines:
+        kind = rnd.random()
+        if kind < 0.55:
+            qty = rnd.choice([str(rnd.randint(1, 500)), f"{rnd.randint(1, 99)},{rnd.randint(0, 9)}",
+                              f"{rnd.randint(1, 99)}.{rnd.randint(0, 99)}"])
+            art = rnd.choice(_ARTICLES)
+            prefix = rnd.choice(["", "Арт. ", "артикул: ", "art.", "АРТ "])
+            lines.append(f"{rnd.randint(1, 999)} | {prefix}{art} | {rnd.choice(_NAMES)} | {qty} {rnd.choice(_UNITS)}")
+        elif kind < 0.9:
+            lines.append(rnd.choice(_NOISE))
+        else:
+            lines.append(rnd.choice(_NAMES) + " " * rnd.randint(0, 3))
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Тесты
+# ═══════════════════════════════════════════════════════════════════
+
+@pytest.fixture(scope="module")
+def ocr_service():
+    from client.src.services.ocr_service import OCRService
+    return OCRService()
+
+
+class TestSkipPatterns:
+    """Объединённая альтернация мусорных строк."""
+
+    @pytest.mark.parametrize("line", [noise for noise in _NOISE if len(noise.strip()) >= 5])
+    def test_combined_matches_any(self, ocr_service, line):
+        from client.src.services.ocr_service import SKIP_PATTERNS
+
+        expected = any(re.search(p, line, re.IGNORECASE) for p in SKIP_PATTERNS)
+        assert ocr_service._is_metadata_line(line) == expected
+
+
+class TestRegexRegression:
+    """OCRResult нового движка совпадает с эталонным."""
+
+    def test_sample_ttn(self, ocr_service, sample_ttn_text):
+        assert ocr_service._parse_ttn_regex(sample_ttn_text) == legacy_parse_ttn_regex(sample_ttn_text)
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_synthetic_texts(self, ocr_service, seed):
+        text = make_synthetic_ocr_text(300, seed=seed)
+        assert ocr_service._parse_ttn_regex(text) == legacy_parse_ttn_regex(text)
+
+    def test_large_text(self, ocr_service):
+        text = make_synthetic_ocr_text(10_000, seed=42)
+        new = ocr_service._parse_ttn_regex(text)
+        assert len(new.items) > 1000
+        assert new == legacy_parse_ttn_regex(text)
+
+    def test_empty_text(self, ocr_service):
+        assert ocr_service._parse_ttn_regex("") == OCRResult()
@@ -0,0 +1,83 @@
+# tests/test_pdf_tables.py
+"""
+Тесты нативного разбора таблицы позиций в текстовых PDF (PDFTableService).
+
+Запуск:
+    pytest tests/test_pdf_tables.py -v
+"""
+from pathlib import Path
+
+import pytest
+
+from client.src.services.pdf_table_service import PDFTableService
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+TTN_1 = TEST_DATA / "TTN_1_A_654.pdf"
+
+
+@pytest.fixture
+def ocr_service(monkeypatch):
+    """OCRService, в котором любые обращения к LLM считаются ошибкой."""
+    from client.src.services.ocr_service import OCRService
+
+    service = OCRService()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM must not be called for a parsed PDF table")
+
+    monkeypatch.setattr(service.llm_service, "parse_ttn_text", fail)
+    monkeypatch.setattr(service.llm_service, "parse_ttn_image", fail)
+    monkeypatch.setattr(service.chatbothub_service, "parse_ttn_text", fail)
+    monkeypatch.setattr(service.chatbothub_service, "parse_ttn_image", fail)
+    return service
+
+
+class TestColumnMapping:
+    """Сопоставление шапки таблицы полям позиции."""
+
+    def test_garbled_headers(self):
+        header = ["№", "Наименование товара", "Сопроводительные документы на груз",
+                  "Вид упаковкиК", "ол-во мес т", "Масса груза брутто, т"]
+        mapping = PDFTableService._map_columns(header)
+        assert mapping["name"] == 1
+        assert mapping["document"] == 2
+        assert mapping["package"] == 3
+        assert mapping["quantity"] == 4
+
+    def test_article_and_unit_columns(self):
+        header = ["Артикул", "Наименование", "Ед. изм.", "Количество"]
+        assert PDFTableService._map_columns(header) == {
+            "article": 0, "name": 1, "unit": 2, "quantity": 3
+        }
+
+    def test_row_without_header_fields(self):
+        assert PDFTableService()._find_header([["a", "b"], ["c", "d"]]) == (-1, None)
+
+
+@pytest.mark.skipif(not TTN_1.exists(), reason="test_data PDF not found")
+class TestProcessDocument:
+    """Разбор тестовой ТТН без LLM."""
+
+    def test_items_from_table(self, ocr_service):
+        result = ocr_service.process_document(TTN_1)
+
+        assert [i.article for i in result.items] == ["512", "513", "514", "515", "516"]
+        assert [i.quantity for i in result.items] == [5, 10, 50, 100, 200]
+        assert result.items[0].name.startswith("Ноутбук")
+        assert result.items[0].unit == "коробка"
+        assert result.ttn_number == "654"
+
+    def test_field_confidence(self, ocr_service):
+        result = ocr_service.process_document(TTN_1)
+
+        for item in result.items:
+            assert set(item.field_confidence) == {"name", "quantity", "article", "unit"}
+            assert all(0 < v <= 1 for v in item.field_confidence.values())
+
+    def test_disabled_falls_back_to_text(self, ocr_service):
+        ocr_service.table_extraction = False
+        calls = []
+        ocr_service._process_text_content = lambda text, pages=None: calls.append(text)
+
+        ocr_service.process_document(TTN_1)
+        assert len(calls) == 1
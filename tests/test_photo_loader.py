@@ -0,0 +1,192 @@
+# tests/test_photo_loader.py
+"""
+Тесты фоновой загрузки миниатюр (PhotoLoader): параллельные загрузки,
+кэш в памяти, кэш на диске с ETag, работа без сервера, заглушки
+в ReceptionDetailDialog.
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen pytest tests/test_photo_loader.py -v
+"""
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+import requests
+from PySide6.QtCore import QBuffer, QCoreApplication, QIODevice
+from PySide6.QtGui import QColor, QImage, QPixmap
+from PySide6.QtWidgets import QApplication
+
+from client.src.ui.photo_loader import PhotoLoader, PixmapCache, decode_thumbnail
+from client.src.ui.reception_detail_dialog import ReceptionDetailDialog
+from common.models import ReceptionItemRead, ReceptionRead, ReceptionStatus
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def jpeg(width=1600, height=1200):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor("steelblue"))
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "JPEG")
+    return bytes(buffer.data())
+
+
+PHOTO = jpeg()
+
+
+class FakePhotoServer:
+    """get_photo с задержкой: считает запросы и одновременные загрузки."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail = False
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_photo(self, reception_id, item_id, photo_index, etag=None):
+        if self.fail:
+            raise requests.ConnectionError("server is down")
+        with self._lock:
+            self.requests.append(((reception_id, item_id, photo_index), etag))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            current = f'"{photo_index}"'
+            if etag == current:
+                return None, etag
+            return PHOTO, current
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def wait_loaded(loader, timeout=5):
+    """Дождаться загрузок и доставить загрузчику их результаты."""
+    deadline = time.monotonic() + timeout
+    while loader.is_loading() and time.monotonic() < deadline:
+        # Только события загрузчика: чужие виджеты других тестов не трогаем
+        QCoreApplication.sendPostedEvents(loader, 0)
+        time.sleep(0.01)
+    assert not loader.is_loading()
+
+
+def collect(loader):
+    ready, failed = {}, {}
+    loader.photo_ready.connect(lambda key, pixmap: ready.__setitem__(key, pixmap))
+    loader.photo_failed.connect(lambda key, error: failed.__setitem__(key, error))
+    return ready, failed
+
+
+def test_decode_thumbnail_keeps_aspect_ratio(app):
+    image = decode_thumbnail(PHOTO, 150)
+    assert (image.width(), image.height()) == (150, 112)
+    small = decode_thumbnail(jpeg(100, 50), 150)
+    assert (small.width(), small.height()) == (100, 50)
+    assert decode_thumbnail(b"not an image").isNull()
+
+
+def test_photos_load_in_parallel_then_come_from_memory(app):
+    server = FakePhotoServer(delay=0.2)
+    loader = PhotoLoader(server, max_workers=4)
+    ready, failed = collect(loader)
+
+    start = time.monotonic()
+    assert all(loader.request(1, 10, i) is None for i in range(8))
+    # Повторный запрос той же фото, пока она грузится, не дублирует загрузку
+    assert loader.request(1, 10, 0) is None
+    wait_loaded(loader)
+    elapsed = time.monotonic() - start
+
+    assert set(ready) == {(1, 10, i) for i in range(8)} and not failed
+    assert len(server.requests) == 8
+    assert server.max_active == 4
+    assert elapsed < 8 * 0.2
+    assert max(ready[(1, 10, 0)].width(), ready[(1, 10, 0)].height()) == 150
+
+    assert loader.request(1, 10, 3) is not None
+    assert len(server.requests) == 8
+
+
+def test_disk_cache_revalidates_by_etag(app, tmp_path):
+    server = FakePhotoServer()
+    first = PhotoLoader(server, cache_dir=tmp_path)
+    first.request(1, 10, 0)
+    wait_loaded(first)
+    assert server.requests == [((1, 10, 0), None)]
+
+    # Новый загрузчик (перезапуск): в памяти пусто, с диска — условный запрос
+    restarted = PhotoLoader(server, cache_dir=tmp_path)
+    ready, _ = collect(restarted)
+    restarted.request(1, 10, 0)
+    wait_loaded(restarted)
+    assert server.requests[-1] == ((1, 10, 0), '"0"')
+    assert (1, 10, 0) in ready
+
+
+def test_offline_uses_disk_copy(app, tmp_path):
+    server = FakePhotoServer()
+    warm = PhotoLoader(server, cache_dir=tmp_path)
+    warm.request(1, 10, 0)
+    wait_loaded(warm)
+
+    server.fail = True
+    offline = PhotoLoader(server, cache_dir=tmp_path)
+    ready, failed = collect(offline)
+    offline.request(1, 10, 0)
+    offline.request(1, 10, 1)
+    wait_loaded(offline)
+    assert set(ready) == {(1, 10, 0)}
+    assert set(failed) == {(1, 10, 1)}
+
+
+def test_pixmap_cache_evicts_least_recently_used(app):
+    pixmap = QPixmap(10, 10)
+    cache = PixmapCache(max_bytes=3 * 10 * 10 * 4)
+    for i in range(3):
+        cache.put((1, 1, i), pixmap)
+    cache.get((1, 1, 0))
+    cache.put((1, 1, 3), pixmap)
+
+    assert len(cache) == 3
+    assert cache.get((1, 1, 1)) is None
+    assert cache.get((1, 1, 0)) is not None
+    assert cache.size_bytes == 3 * 10 * 10 * 4
+
+
+class FakeReceptionSync(FakePhotoServer):
+
+    def get_reception(self, reception_id):
+        item = ReceptionItemRead(id=10, reception_id=reception_id, article="BOLT-M10", name="Болт М10",
+                                 quantity=5, photos=[f"photos/{i}.jpg" for i in range(3)])
+        return ReceptionRead(id=reception_id, ttn_number="T-1", ttn_date=date(2025, 1, 1), supplier="ООО Альфа",
+                             status=ReceptionStatus.PENDING, created_at=datetime(2025, 1, 1), items=[item])
+
+
+def test_dialog_shows_placeholders_then_thumbnails(app):
+    server = FakeReceptionSync(delay=0.2)
+    loader = PhotoLoader(server)
+    dialog = ReceptionDetailDialog(1, sync_service=server, photo_loader=loader)
+
+    dialog.items_table.selectRow(0)
+    labels = list(dialog._photo_labels.values())
+    assert len(labels) == 3
+    assert all(label.text() == "⏳" and label.pixmap().isNull() for label in labels)
+
+    wait_loaded(loader)
+    assert all(not label.pixmap().isNull() for label in labels)
+
+    # Повторный выбор товара — миниатюры сразу из памяти
+    dialog.items_table.clearSelection()
+    dialog.items_table.selectRow(0)
+    assert all(not label.pixmap().isNull() for label in dialog._photo_labels.values())
+    assert len(server.requests) == 3
+    dialog.done(0)
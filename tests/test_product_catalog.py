@@ -0,0 +1,314 @@
+# tests/test_product_catalog.py
+"""
+Тесты клиентского справочника товаров (ProductCatalog): индексы,
+ревалидация по ETag, дельта-синхронизация с сервером (через репозиторий
+тестовой БД), копия на диске, работа без сервера, поиск во время
+синхронизации и загрузка диалога справочника в фоне.
+
+Запуск:
+    pytest tests/test_product_catalog.py -v
+"""
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import requests
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtWidgets import QApplication
+
+from client.src.services.product_catalog import ProductCatalog
+from client.src.ui.database_dialog import DatabaseDialog
+from common.models import ProductCreate, ProductLookupQuery, ProductRead
+from common.product_matcher import ProductMatch
+from server.src.db.migrations import reset_db
+from server.src.db.models import Product
+from server.src.db.repository import ProductRepository
+
+
+def product(pid, article, name):
+    return ProductRead(id=pid, article=article, name=name, unit="шт", requires_control=False,
+                       created_at=datetime(2025, 1, 1))
+
+
+PRODUCTS = [
+    product(1, "BOLT-M10", "Болт М10"),
+    product(2, "BOLT-M12", "Болт М12 оцинкованный"),
+    product(3, "NUT-M10", "Гайка М10"),
+    product(4, "PAINT-W", "Краска белая"),
+    product(5, "X", "Ёж"),
+]
+
+
+class FakeSync:
+    """Неизменный справочник в памяти."""
+
+    def __init__(self, products):
+        self.products = list(products)
+        self.calls = 0
+
+    def get_products_page(self, limit=1000, offset=0, etag=None, updated_since=None, after_id=None):
+        self.calls += 1
+        if etag == '"v1"':
+            return None, etag, None
+        return self.products[offset:offset + limit], '"v1"', len(self.products)
+
+    def get_product_tombstones(self, deleted_since=None, after_id=None, limit=1000):
+        return []
+
+
+@pytest.fixture
+def sync():
+    return FakeSync(PRODUCTS)
+
+
+class TestLookup:
+
+    def test_by_article(self, sync):
+        catalog = ProductCatalog(sync)
+        assert catalog.get_by_article("NUT-M10").name == "Гайка М10"
+        assert catalog.get_by_article("NONEXISTENT") is None
+        assert catalog.get_by_article("  ") is None
+        assert sync.calls == 1
+
+    def test_name_substring_in_both_directions(self, sync):
+        catalog = ProductCatalog(sync)
+        # Имя товара внутри строки ТТН
+        assert catalog.find_by_name("Гайка М10 (упаковка 100 шт)").article == "NUT-M10"
+        # Строка ТТН внутри имени товара
+        assert catalog.find_by_name("краска").article == "PAINT-W"
+        assert catalog.find_by_name("Шуруп 4x40") is None
+
+    def test_most_similar_name_wins(self, sync):
+        catalog = ProductCatalog(sync)
+        assert catalog.find_by_name("болт м12 оцинкованный").article == "BOLT-M12"
+        assert catalog.find_by_name("болт м1").article == "BOLT-M10"
+
+    def test_short_names_and_queries(self, sync):
+        catalog = ProductCatalog(sync)
+        assert catalog.find_by_name("Ёж морской").article == "X"
+        # Две общие триграммы — ниже порога совпадения
+        assert catalog.find_by_name("ка") is None
+
+    def test_lookup_falls_back_to_name(self, sync):
+        catalog = ProductCatalog(sync)
+        assert catalog.lookup("BOLT-M12", "Гайка").article == "BOLT-M12"
+        assert catalog.lookup(None, "Гайка М10").article == "NUT-M10"
+        assert catalog.lookup("", "") is None
+
+    def test_match_returns_ranked_candidates(self, sync):
+        catalog = ProductCatalog(sync)
+        matches = catalog.match("BOLT-M12", "Болт М10")
+        assert [m.product.article for m in matches[:2]] == ["BOLT-M12", "BOLT-M10"]
+        assert matches[0].by_article and matches[0].score == 1.0
+        assert catalog.match(None, None) == []
+
+
+class RepositorySync:
+    """SyncService поверх серверного репозитория: запросы идут в тестовую БД."""
+
+    def __init__(self):
+        self.fail = False
+        self.requests = []
+        self.downloaded = []
+
+    def get_products_page(self, limit=1000, offset=0, etag=None, updated_since=None, after_id=None):
+        if self.fail:
+            raise requests.ConnectionError("server is down")
+        self.requests.append((updated_since, after_id, etag))
+        current = ProductRepository.catalog_etag()
+        if etag == current:
+            return None, etag, None
+        page = ProductRepository.get_all(limit, offset, updated_since=updated_since, after_id=after_id)
+        self.downloaded.extend(p.article for p in page)
+        return page, current, ProductRepository.count()
+
+    def get_product_tombstones(self, deleted_since=None, after_id=None, limit=1000):
+        return ProductRepository.get_tombstones(deleted_since, after_id, limit)
+
+    def lookup_products(self, queries, limit=5):
+        if self.fail:
+            raise requests.ConnectionError("server is down")
+        self.requests.append(("lookup", len(queries), None))
+        results = ProductRepository.lookup([ProductLookupQuery(article=a, name=n) for a, n in queries], limit)
+        return [[ProductMatch(c.product, c.score, c.by_article) for c in r.candidates] for r in results]
+
+
+class TestDeltaSync:
+
+    @pytest.fixture(autouse=True)
+    def setup_db(self):
+        reset_db()
+        yield
+
+    @pytest.fixture
+    def server(self):
+        return RepositorySync()
+
+    def make_catalog(self, server, **kwargs):
+        kwargs.setdefault("refresh_seconds", 3600)
+        return ProductCatalog(server, overlap_seconds=0, **kwargs)
+
+    def test_full_load_then_not_modified(self, server):
+        catalog = self.make_catalog(server)
+        assert len(catalog.products) == ProductRepository.count()
+        downloaded = len(server.downloaded)
+
+        assert catalog.refresh() is False
+        assert server.requests[-1][2] is not None
+        assert len(server.downloaded) == downloaded
+
+    def test_pagination_by_keyset(self, server):
+        catalog = self.make_catalog(server, page_size=5)
+        assert [p.article for p in catalog.products] == [p.article for p in ProductRepository.get_all(1000)]
+        assert len(server.requests) == ProductRepository.count() // 5 + 1
+        assert all(after_id is not None for _, after_id, _ in server.requests[1:])
+
+    def test_delta_downloads_only_changes(self, server):
+        catalog = self.make_catalog(server)
+        catalog.refresh()
+        server.downloaded.clear()
+
+        ProductRepository.update("NUT-M10", ProductCreate(article="NUT-M10", name="Гайка М10 DIN 934"))
+        ProductRepository.create(ProductCreate(article="NEW-1", name="Шайба М10"))
+        assert catalog.refresh() is True
+
+        # Кроме изменённых — только граничный товар с updated_at == курсору
+        assert {"NUT-M10", "NEW-1"} <= set(server.downloaded)
+        assert len(server.downloaded) <= 3
+        assert catalog.get_by_article("NUT-M10").name == "Гайка М10 DIN 934"
+        assert catalog.find_by_name("шайба").article == "NEW-1"
+
+    def test_tombstones_remove_products(self, server):
+        catalog = self.make_catalog(server)
+        assert catalog.get_by_article("BOLT-M10") is not None
+
+        ProductRepository.delete("BOLT-M10")
+        assert catalog.refresh() is True
+        assert catalog.get_by_article("BOLT-M10") is None
+        assert len(catalog.products) == ProductRepository.count()
+
+    def test_count_mismatch_triggers_full_resync(self, server):
+        catalog = self.make_catalog(server)
+        catalog.refresh()
+        # Удаление мимо репозитория: отметки нет, помогает только сверка числа товаров
+        Product.delete().where(Product.article == "NUT-M10").execute()
+        ProductRepository.create(ProductCreate(article="NEW-1", name="Шайба М10"))
+
+        assert catalog.refresh() is True
+        assert catalog.get_by_article("NUT-M10") is None
+        assert server.requests[-1][0] == datetime(2000, 1, 1)
+
+    def test_replica_survives_restart(self, server, tmp_path):
+        replica = tmp_path / "catalog" / "products.db"
+        self.make_catalog(server, replica_path=replica).refresh()
+        ProductRepository.update("NUT-M10", ProductCreate(article="NUT-M10", name="Гайка М10 DIN 934"))
+        server.downloaded.clear()
+
+        restarted = self.make_catalog(server, replica_path=replica)
+        assert restarted.get_by_article("NUT-M10").name == "Гайка М10 DIN 934"
+        assert len(restarted.products) == ProductRepository.count()
+        assert "NUT-M10" in server.downloaded
+        assert len(server.downloaded) <= 2
+
+    def test_replica_works_offline(self, server, tmp_path):
+        replica = tmp_path / "products.db"
+        self.make_catalog(server, replica_path=replica).refresh()
+
+        server.fail = True
+        offline = self.make_catalog(server, replica_path=replica)
+        assert offline.get_by_article("BOLT-M10") is not None
+        assert offline.refresh() is False
+        assert offline.get_by_article("BOLT-M10") is not None
+
+    def test_match_many_before_first_sync_is_one_request(self, server):
+        catalog = self.make_catalog(server)
+        queries = [("BOLT-M10", "Болт М10"), (None, "Гайка М10"), ("NONEXISTENT", "")]
+
+        results = catalog.match_many(queries)
+        assert server.requests == [("lookup", 3, None)]
+        assert [m[0].product.article for m in results[:2]] == ["BOLT-M10", "NUT-M10"]
+        assert results[0][0].by_article
+        assert results[2] == []
+
+    def test_match_many_uses_loaded_catalog(self, server):
+        catalog = self.make_catalog(server)
+        catalog.refresh()
+        requests_made = len(server.requests)
+
+        results = catalog.match_many([("BOLT-M10", None), (None, "Гайка М10")])
+        assert [m[0].product.article for m in results] == ["BOLT-M10", "NUT-M10"]
+        assert len(server.requests) == requests_made
+        assert catalog.match_many([]) == []
+
+    def test_server_down_on_first_load(self, server):
+        server.fail = True
+        catalog = self.make_catalog(server, retry_seconds=3600)
+        assert catalog.get_by_article("BOLT-M10") is None
+        assert catalog.products == []
+
+    def test_background_sync(self, server):
+        catalog = self.make_catalog(server, refresh_seconds=0.05)
+        catalog.start()
+        try:
+            ProductRepository.create(ProductCreate(article="NEW-1", name="Шайба М10"))
+            deadline = time.monotonic() + 5
+            while catalog.get_by_article("NEW-1") is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert catalog.get_by_article("NEW-1") is not None
+        finally:
+            catalog.stop()
+
+    def test_search_does_not_wait_for_running_sync(self, server):
+        started, release = threading.Event(), threading.Event()
+        download = server.get_products_page
+
+        def slow_page(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return download(*args, **kwargs)
+
+        server.get_products_page = slow_page
+        catalog = self.make_catalog(server)
+        catalog.start()
+        try:
+            assert started.wait(5)
+            start = time.perf_counter()
+            assert catalog.refresh() is False
+            matches = catalog.match("BOLT-M10", None)
+            assert time.perf_counter() - start < 1
+            assert matches[0].product.article == "BOLT-M10"
+            assert ("lookup", 1, None) in server.requests
+        finally:
+            release.set()
+            catalog.stop()
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def test_database_dialog_loads_in_background(app):
+    release = threading.Event()
+    sync = FakeSync(PRODUCTS)
+    download = sync.get_products_page
+
+    def slow_page(*args, **kwargs):
+        release.wait(5)
+        return download(*args, **kwargs)
+
+    sync.get_products_page = slow_page
+    dialog = DatabaseDialog(sync, catalog=ProductCatalog(sync))
+    assert dialog.table.rowCount() == 0  # конструктор не ждёт сервер
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while dialog.table.rowCount() == 0 and time.monotonic() < deadline:
+        QCoreApplication.sendPostedEvents(dialog, 0)
+        time.sleep(0.01)
+    assert dialog.table.rowCount() == len(PRODUCTS)
+
+    dialog.search_edit.setText("болт")
+    assert dialog.table.rowCount() == 2
@@ -0,0 +1,117 @@
+# tests/test_product_matcher.py
+"""
+Тесты нечёткого сопоставления позиций ТТН со справочником (common/product_matcher.py).
+
+Запуск:
+    pytest tests/test_product_matcher.py -v
+"""
+from datetime import datetime
+
+import pytest
+
+from common.models import ProductRead
+from common.product_matcher import (
+    MATCH_THRESHOLD, ProductMatch, ProductMatcher, match_status, name_trigrams, normalize, similarity,
+)
+
+
+def product(pid, article, name):
+    return ProductRead(id=pid, article=article, name=name, unit="шт", requires_control=False,
+                       created_at=datetime(2025, 1, 1))
+
+
+PRODUCTS = [
+    product(1, "BOLT-M10", "Болт М10"),
+    product(2, "BOLT-M12", "Болт М12 оцинкованный"),
+    product(3, "NUT-M10", "Гайка М10"),
+    product(4, "PAINT-W", "Краска белая"),
+    product(5, "PAINT-W-2", "Краска белая"),
+    product(6, "CABLE-3X2.5", "Кабель ВВГнг 3х2,5"),
+]
+
+
+@pytest.fixture
+def matcher():
+    return ProductMatcher(PRODUCTS)
+
+
+class TestNormalize:
+
+    def test_case_punctuation_and_yo(self):
+        assert normalize("  Болт, М10 (ёлка)!! ") == "болт м10 елка"
+        assert normalize(None) == ""
+
+    def test_latin_homoglyphs(self):
+        # OCR путает латинские и кириллические буквы одинакового начертания
+        assert normalize("Бoлт M10") == normalize("Болт М10")
+        assert name_trigrams("Бoлт M10") == name_trigrams("Болт М10")
+
+    def test_word_order_does_not_matter(self):
+        assert name_trigrams("белая краска") == name_trigrams("Краска белая")
+
+    def test_similarity(self):
+        assert similarity(4, 4, 4) == 1.0
+        assert similarity(0, 4, 6) == 0.0
+        # Короткое имя целиком внутри длинной строки
+        assert similarity(4, 4, 12) > similarity(4, 8, 8)
+
+
+class TestMatch:
+
+    def test_exact_name(self, matcher):
+        matches = matcher.match(None, "Гайка М10")
+        assert matches[0].product.article == "NUT-M10"
+        assert matches[0].score == pytest.approx(1.0)
+        assert match_status(matches) == "confident"
+
+    def test_typos_rank_the_right_product_first(self, matcher):
+        assert matcher.match(None, "Болт М12 оцинкованый")[0].product.article == "BOLT-M12"
+        assert matcher.match(None, "Кабель ВВГ-нг 3x2.5")[0].product.article == "CABLE-3X2.5"
+        assert matcher.match(None, "Гаика M10")[0].product.article == "NUT-M10"
+
+    def test_candidates_sorted_by_score(self, matcher):
+        matches = matcher.match(None, "болт м1")
+        scores = [m.score for m in matches]
+        assert scores == sorted(scores, reverse=True)
+        assert [m.product.article for m in matches[:2]] == ["BOLT-M10", "BOLT-M12"]
+
+    def test_article_first_then_names(self, matcher):
+        matches = matcher.match("bolt-m12", "Болт М10")
+        assert matches[0] == ProductMatch(PRODUCTS[1], 1.0, by_article=True)
+        assert matches[1].product.article == "BOLT-M10"
+        assert [m.product.id for m in matches].count(2) == 1
+        assert match_status(matches) == "article"
+
+    def test_normalized_article(self, matcher):
+        assert matcher.get_by_article("BOLT-M10").id == 1
+        assert matcher.get_by_article("bolt m10").id == 1
+        assert matcher.get_by_article("NUT-М10").id == 3  # кириллическая М
+        assert matcher.get_by_article("NOPE") is None
+        assert matcher.get_by_article(" ") is None
+
+    def test_duplicate_names_share_score(self, matcher):
+        matches = matcher.match(None, "краска белая")
+        assert [m.product.article for m in matches[:2]] == ["PAINT-W", "PAINT-W-2"]
+        assert matches[0].score == matches[1].score
+        assert match_status(matches) == "ambiguous"
+
+    def test_k_and_min_score(self, matcher):
+        assert len(matcher.match(None, "болт м10 краска гайка", k=2)) == 2
+        assert matcher.match(None, "Шуруп 4x40") == []
+        assert matcher.match(None, "") == []
+        assert all(m.score >= 0.5 for m in matcher.match(None, "болт", min_score=0.5))
+
+    def test_empty_catalog(self):
+        assert ProductMatcher([]).match("BOLT-M10", "Болт М10") == []
+
+
+class TestMatchStatus:
+
+    def test_statuses(self):
+        p1, p2 = PRODUCTS[0], PRODUCTS[1]
+        assert match_status([]) == "none"
+        assert match_status([ProductMatch(p1, MATCH_THRESHOLD - 0.01)]) == "none"
+        assert match_status([ProductMatch(p1, 1.0, by_article=True)]) == "article"
+        assert match_status([ProductMatch(p1, 0.95), ProductMatch(p2, 0.5)]) == "confident"
+        assert match_status([ProductMatch(p1, 0.95), ProductMatch(p2, 0.9)]) == "ambiguous"
+        assert match_status([ProductMatch(p1, 0.7)]) == "ambiguous"
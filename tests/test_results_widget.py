@@ -0,0 +1,153 @@
+# tests/test_results_widget.py
+"""
+Тесты таблицы позиций ТТН (ResultsWidget / ResultsModel): данные берутся
+из самих позиций, правки меняют их на месте, статус в справочнике
+загружается в фоне одним пакетом.
+
+Запуск:
+    QT_QPA_PLATFORM=offscreen pytest tests/test_results_widget.py -v
+"""
+import sys
+import time
+from datetime import datetime
+
+import pytest
+from PySide6.QtCore import QCoreApplication, Qt
+from PySide6.QtWidgets import QApplication
+
+from client.src.ui.results_widget import DB_COLUMN, VERIFIED_COLUMN, ResultsWidget
+from common.models import ProductRead, ReceptionItemCreate
+from common.product_matcher import ProductMatcher
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+class FakeCatalog:
+    """Справочник в памяти, считает пакетные запросы."""
+
+    def __init__(self):
+        self.matcher = ProductMatcher([
+            ProductRead(id=1, article="BOLT-M10", name="Болт М10", created_at=datetime(2025, 1, 1)),
+            ProductRead(id=2, article="NUT-M10", name="Гайка М10", requires_control=True,
+                        created_at=datetime(2025, 1, 1)),
+        ])
+        self.batches = []
+        self.fail = False
+
+    def match_many(self, queries, k=5):
+        self.batches.append(len(queries))
+        if self.fail:
+            raise RuntimeError("server is down")
+        return [self.matcher.match(article, name, k=k) for article, name in queries]
+
+
+def make_items(count):
+    return [
+        ReceptionItemCreate(article="BOLT-M10" if i % 2 else "UNKNOWN", name=f"Позиция {i}", quantity=i + 1,
+                            unit="шт", suspicious_fields=["quantity"] if i == 0 else [])
+        for i in range(count)
+    ]
+
+
+def wait_loaded(app, widget, timeout=5):
+    """Дождаться фонового поиска и доставить модели его результаты."""
+    model = widget.model()
+    deadline = time.monotonic() + timeout
+    while model.is_loading() and time.monotonic() < deadline:
+        # Только события модели: чужие виджеты других тестов не трогаем
+        QCoreApplication.sendPostedEvents(model, 0)
+        time.sleep(0.01)
+    assert not model.is_loading()
+
+
+def cell(widget, row, column, role=Qt.DisplayRole):
+    model = widget.model()
+    return model.data(model.index(row, column), role)
+
+
+def test_large_ttn_is_looked_up_in_one_batch(app):
+    catalog = FakeCatalog()
+    widget = ResultsWidget(catalog=catalog)
+    items = make_items(5000)
+    widget.set_items(items)
+
+    assert widget.model().rowCount() == 5000
+    assert cell(widget, 1, DB_COLUMN) == "..."
+    wait_loaded(app, widget)
+
+    assert catalog.batches == [5000]
+    assert cell(widget, 1, DB_COLUMN) == "✓ В БД"
+    assert cell(widget, 0, DB_COLUMN) == "❌ Нет в БД"
+    # Позиции отдаются как есть, без пересборки из текста ячеек
+    assert widget.get_item(4999) is items[4999]
+    assert widget.get_items()[:2] == items[:2]
+
+
+def test_edit_updates_item_in_place_and_relooks_up(app):
+    catalog = FakeCatalog()
+    widget = ResultsWidget(catalog=catalog)
+    items = make_items(3)
+    widget.set_items(items)
+    wait_loaded(app, widget)
+    model = widget.model()
+    changed = []
+    widget.items_changed.connect(lambda: changed.append(True))
+
+    assert cell(widget, 0, 4) == "⚠️ Проверьте"
+    assert model.setData(model.index(0, 2), "7.5")
+    assert items[0].quantity == 7.5
+    assert items[0].suspicious_fields == []
+    assert cell(widget, 0, 4) == "✓ OK"
+    assert not model.setData(model.index(0, 2), "abc")
+
+    assert model.setData(model.index(0, 0), "NUT-M10")
+    assert items[0].article == "NUT-M10"
+    # Пока идёт фоновый поиск, кандидаты не ищутся в GUI-потоке
+    updated = []
+    widget.matches_updated.connect(lambda: updated.append(True))
+    assert widget.get_matches(0) is None
+    wait_loaded(app, widget)
+    assert updated
+    assert catalog.batches[-1] == 1
+    assert cell(widget, 0, DB_COLUMN) == "⚠️ Контроль"
+    assert widget.get_matches(0)[0].product.article == "NUT-M10"
+    assert len(changed) == 2
+
+
+def test_lookup_error_and_verified_column(app):
+    catalog = FakeCatalog()
+    catalog.fail = True
+    widget = ResultsWidget(catalog=catalog)
+    widget.set_items(make_items(2))
+    wait_loaded(app, widget)
+    assert cell(widget, 1, DB_COLUMN) == "❓"
+    assert "server is down" in cell(widget, 1, DB_COLUMN, Qt.ToolTipRole)
+
+    widget.set_verified(1, False)
+    assert cell(widget, 1, VERIFIED_COLUMN) == "✗ Отклонено"
+    widget.set_verified(1, None)
+    assert cell(widget, 1, VERIFIED_COLUMN) is None
+
+
+def test_selection_signal_and_row_operations(app):
+    widget = ResultsWidget(catalog=FakeCatalog())
+    widget.set_items(make_items(3))
+    wait_loaded(app, widget)
+    selected = []
+    widget.itemSelectionChanged.connect(lambda: selected.append(True))
+
+    widget.selectRow(1)
+    assert selected
+    uid = widget.get_item_uuid(2)
+    widget._delete_selected_row()
+    assert widget.model().rowCount() == 2
+    assert widget.get_item_uuid(1) == uid
+
+    widget._add_row()
+    assert widget.get_item(2).name == "Новый товар"
+    # UUID существующих позиций сохраняются
+    assert widget.get_item_uuid(1) == uid
+    wait_loaded(app, widget)
@@ -94,3 +94,168 @@ def test_update_control_results():
     data = response.json()
     assert data["status"] == "completed"
     assert data["items"][0]["control_status"] == "passed"
+
+def test_create_receptions_bulk():
+    def payload(number):
+        return {
+            "ttn_number": f"BULK-{number}",
+            "ttn_date": "2025-02-20",
+            "supplier": "Bulk Supplier",
+            "items": [
+                {"article": "BOLT-M10", "name": "Болт М10", "quantity": number, "unit": "шт"},
+                {"article": "UNKNOWN-1", "name": "Неизвестный товар", "quantity": 1, "unit": "шт"}
+            ]
+        }
+
+    response = client.post("/api/v1/receptions/bulk", json=[payload(n) for n in range(1, 4)])
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 3
+    assert len(data["ids"]) == 3
+
+    reception = client.get(f"/api/v1/receptions/{data['ids'][1]}").json()
+    assert reception["ttn_number"] == "BULK-2"
+    assert reception["items"][0]["product_id"] is not None
+    assert reception["items"][1]["product_id"] is None
+
+def test_get_products_etag():
+    from common.models import ProductCreate
+    from server.src.db.repository import ProductRepository
+
+    first = client.get("/api/v1/products", params={"limit": 5})
+    etag = first.headers["ETag"]
+    # ETag одинаковый для всех страниц
+    assert client.get("/api/v1/products", params={"limit": 5, "offset": 5}).headers["ETag"] == etag
+
+    not_modified = client.get("/api/v1/products", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    ProductRepository.update("BOLT-M10", ProductCreate(article="BOLT-M10", name="Болт М10 оцинкованный"))
+    changed = client.get("/api/v1/products", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_get_products_delta_and_tombstones():
+    from common.models import ProductCreate
+    from server.src.db.repository import ProductRepository
+
+    full = client.get("/api/v1/products", params={"limit": 1000})
+    total = int(full.headers["X-Total-Count"])
+    assert total == len(full.json())
+    cursor = max(p["updated_at"] for p in full.json())
+
+    ProductRepository.update("NUT-M10", ProductCreate(article="NUT-M10", name="Гайка М10 DIN 934"))
+    ProductRepository.create(ProductCreate(article="NEW-1", name="Новый товар"))
+    assert ProductRepository.delete("BOLT-M10")
+    assert not ProductRepository.delete("BOLT-M10")
+
+    changed = client.get("/api/v1/products", params={"updated_since": cursor, "after_id": 10**6}).json()
+    assert [p["article"] for p in changed] == ["NUT-M10", "NEW-1"]
+
+    # Keyset-пагинация: следующая страница после последнего полученного товара
+    first = client.get("/api/v1/products", params={"updated_since": cursor, "after_id": 10**6, "limit": 1}).json()
+    rest = client.get("/api/v1/products", params={
+        "updated_since": first[-1]["updated_at"], "after_id": first[-1]["id"]
+    })
+    assert [p["article"] for p in rest.json()] == ["NEW-1"]
+    assert int(rest.headers["X-Total-Count"]) == total
+
+    tombstones = client.get("/api/v1/products/tombstones", params={"deleted_since": cursor}).json()
+    assert [t["article"] for t in tombstones] == ["BOLT-M10"]
+    assert client.get("/api/v1/products/BOLT-M10").status_code == 404
+
+
+def test_lookup_products():
+    from common.models import ProductCreate
+    from server.src.db.repository import ProductRepository
+
+    response = client.post("/api/v1/products/lookup", json={"items": [
+        {"article": "BOLT-M10", "name": "Болт М10"},
+        {"article": None, "name": "Гаика M10"},
+        {"article": "", "name": "Шуруп саморез"},
+        {"name": "Монитор Samsung 27"},
+    ], "limit": 3})
+    assert response.status_code == 200
+    results = response.json()
+    # С опечаткой товар находится, но требует проверки
+    assert [r["status"] for r in results] == ["article", "ambiguous", "none", "confident"]
+    assert results[0]["candidates"][0]["by_article"] is True
+    assert results[1]["candidates"][0]["product"]["article"] == "NUT-M10"
+    assert results[2]["candidates"] == []
+    assert all(len(r["candidates"]) <= 3 for r in results)
+
+    # Индекс перестраивается после изменения справочника
+    ProductRepository.create(ProductCreate(article="SCREW-4", name="Шуруп саморез 4x40"))
+    results = client.post("/api/v1/products/lookup", json={"items": [{"name": "Шуруп саморез"}]}).json()
+    assert results[0]["candidates"][0]["product"]["article"] == "SCREW-4"
+
+    assert client.post("/api/v1/products/lookup", json={"items": [], "limit": 0}).status_code == 422
+
+
+def test_get_receptions_filters_and_cursor():
+    from datetime import date, datetime
+    from common.models import ReceptionCreate
+    from server.src.db.models import Reception
+    from server.src.db.repository import ReceptionRepository
+
+    ids = ReceptionRepository.create_many([
+        ReceptionCreate(ttn_number=f"F-{i}", ttn_date=date(2025, 1, 1 + i), supplier="ООО Альфа" if i % 2 else "Beta LLC",
+                        items=[])
+        for i in range(7)
+    ])
+    # Одинаковое время создания: порядок и курсор держатся на ID
+    Reception.update(created_at=datetime(2025, 3, 1)).where(Reception.id.in_(ids[:5])).execute()
+
+    response = client.get("/api/v1/receptions", params={"limit": 3})
+    assert response.headers["X-Total-Count"] == "7"
+    pages = [response.json()]
+    while len(pages[-1]) == 3:
+        last = pages[-1][-1]
+        pages.append(client.get("/api/v1/receptions", params={
+            "limit": 3, "before": last["created_at"], "before_id": last["id"]
+        }).json())
+    received = [r["id"] for page in pages for r in page]
+    assert sorted(received, reverse=True)[:2] == received[:2]  # новые (без общего времени) первыми
+    assert sorted(received) == sorted(ids)
+
+    response = client.get("/api/v1/receptions", params={
+        "supplier": "beta", "date_from": "2025-01-02", "date_to": "2025-01-06"
+    })
+    assert [r["ttn_number"] for r in response.json()] == ["F-4", "F-2"]
+    assert response.headers["X-Total-Count"] == "2"
+    # Регистр кириллицы не учитывается
+    response = client.get("/api/v1/receptions", params={"supplier": "ооо альфа"})
+    assert response.headers["X-Total-Count"] == "3"
+    assert {r["supplier"] for r in response.json()} == {"ООО Альфа"}
+    assert client.get("/api/v1/receptions", params={"status": "completed"}).headers["X-Total-Count"] == "0"
+
+
+def test_single_photo_etag(tmp_path):
+    import json
+    from server.src.db.models import ReceptionItem
+
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(b"\xff\xd8jpeg")
+    created = client.post("/api/v1/receptions", json={
+        "ttn_number": "PHOTO-1", "ttn_date": "2025-01-10", "supplier": "S",
+        "items": [{"article": "A-1", "name": "Товар", "quantity": 1, "unit": "шт"}],
+    }).json()
+    item_id = created["items"][0]["id"]
+    ReceptionItem.update(photos=json.dumps([str(photo)])).where(ReceptionItem.id == item_id).execute()
+    url = f"/api/v1/receptions/{created['id']}/items/{item_id}/photos/0"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == b"\xff\xd8jpeg"
+    etag = response.headers["etag"]
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    photo.write_bytes(b"\xff\xd8changed")
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
@@ -0,0 +1,106 @@
+# tests/test_synthetic_ttn.py
+"""
+Тесты генератора синтетических ТТН (tests/synthetic_ttn.py).
+
+Запуск:
+    pytest tests/test_synthetic_ttn.py -v
+"""
+import numpy as np
+import pdfplumber
+import pytest
+
+from server.src.db.migrations import SEED_PRODUCTS
+from tests.ocr_accuracy import merge_scores, score_result
+from tests.synthetic_ttn import (
+    layout_pages, make_catalog, make_receptions, make_ttn, render_image, render_page_images, render_pdf,
+    render_scan_pdf,
+)
+
+
+class TestPayloads:
+
+    def test_catalog_extends_seed_products(self):
+        catalog = make_catalog(200, seed=1)
+        articles = [product.article for product in catalog]
+
+        assert len(catalog) == 200
+        assert len(set(articles)) == 200
+        assert articles[:len(SEED_PRODUCTS)] == [p["article"] for p in SEED_PRODUCTS]
+        assert articles[len(SEED_PRODUCTS)].startswith(SEED_PRODUCTS[0]["article"] + "-")
+
+    def test_ttn_is_deterministic_and_uses_catalog(self):
+        catalog = make_catalog(50)
+        first, second = make_ttn(30, seed=7, catalog=catalog), make_ttn(30, seed=7, catalog=catalog)
+
+        assert first == second
+        assert len(first.items) == 30
+        assert {item.article for item in first.items} <= {product.article for product in catalog}
+        assert make_ttn(30, seed=8, catalog=catalog) != first
+
+    def test_lines_beyond_catalog_size(self):
+        ttn = make_ttn(500, seed=1, catalog=make_catalog(20))
+        assert len(ttn.items) == 500
+
+    def test_receptions_and_golden_match(self):
+        receptions = make_receptions(3, lines=10, seed=5)
+        assert len(receptions) == 3
+        assert len({r.ttn_number for r in receptions}) == 3
+
+        ttn = make_ttn(10, seed=5)
+        golden = ttn.golden()
+        assert golden.ttn_number == ttn.to_reception().ttn_number
+        assert [i.article for i in golden.items] == [i.article for i in ttn.items]
+
+
+class TestRendering:
+
+    def test_layout_splits_rows_across_pages(self):
+        pages = layout_pages(make_ttn(95, seed=1), rows_per_page=40)
+        assert len(pages) == 3
+        assert pages[-1].texts[-1][2] == "Страница 3 из 3"
+
+    def test_text_pdf_is_parsed_by_table_path(self, tmp_path):
+        from client.src.services.ocr_service import OCRService
+
+        ttn = make_ttn(60, seed=3)
+        path = render_pdf(ttn, tmp_path / "ttn.pdf", rows_per_page=25)
+
+        with pdfplumber.open(path) as pdf:
+            assert len(pdf.pages) == 3
+            assert f"НАКЛАДНАЯ № {ttn.ttn_number}" in pdf.pages[0].extract_text()
+
+        service = OCRService()
+        service.llm_provider = "none"
+        service.llm_service.client = None
+        service.hedging_enabled = False
+        scores = merge_scores([score_result(ttn.golden(), service.process_document(path))])
+
+        for field in ("items", "article", "name", "quantity", "unit", "ttn_number", "ttn_date"):
+            assert scores[field].f1 == 1.0, field
+
+    def test_scan_images_have_noise_and_skew(self):
+        ttn = make_ttn(50, seed=2)
+        clean = render_page_images(ttn, dpi=72, noise=0, max_skew_degrees=0, blur=False)
+        noisy = render_page_images(ttn, dpi=72, seed=1)
+
+        assert len(clean) == 2
+        assert clean[0].shape == (842, 595)
+        assert set(np.unique(clean[0][:10, :10])) == {255}
+        assert not np.array_equal(clean[0], noisy[0])
+        assert noisy[0].std() > clean[0].std() * 0.5
+
+    def test_image_and_scan_pdf_files(self, tmp_path):
+        ttn = make_ttn(45, seed=4)
+        png = render_image(ttn, tmp_path / "ttn.png", dpi=72)
+        scan = render_scan_pdf(ttn, tmp_path / "scan.pdf", dpi=72)
+
+        assert png.stat().st_size > 0
+        with pdfplumber.open(scan) as pdf:
+            assert len(pdf.pages) == 2
+            assert not pdf.pages[0].extract_text()
+
+    def test_too_many_symbols_for_single_byte_font(self, tmp_path):
+        ttn = make_ttn(5, seed=1)
+        ttn.supplier = "".join(chr(0x4E00 + i) for i in range(200))
+        with pytest.raises(ValueError):
+            render_pdf(ttn, tmp_path / "bad.pdf")
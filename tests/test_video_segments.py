@@ -0,0 +1,187 @@
+# tests/test_video_segments.py
+"""
+Тесты сегментной записи видео: фоновая загрузка сегментов (SegmentUploader),
+приём сегментов сервером до создания приёмки, прикрепление к приёмке
+(плейлист M3U8 или склейка ffmpeg), скачивание плейлиста одним ZIP,
+очистка брошенных загрузок.
+
+Запуск:
+    pytest tests/test_video_segments.py -v
+"""
+import io
+import os
+import shutil
+import time
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from client.src.services.segment_uploader import SegmentUploader
+from server.src.api import routes_files
+from server.src.config import get_config
+from server.src.db.migrations import reset_db
+from server.src.main_server import app
+from server.src.video_segments import cleanup_stale_uploads, read_playlist
+
+client = TestClient(app)
+
+UPLOAD_ID = "0123456789abcdef0123456789abcdef"
+
+
+class FakeSegmentSync:
+    """upload_video_segment/finalize_video_segments: запоминает вызовы, умеет один раз упасть."""
+
+    def __init__(self, fail_once=()):
+        self.uploaded = []
+        self.finalized = None
+        self.fail_once = set(fail_once)
+
+    def upload_video_segment(self, upload_id, index, file_path):
+        if index in self.fail_once:
+            self.fail_once.discard(index)
+            return False
+        self.uploaded.append((upload_id, index, file_path.name))
+        return True
+
+    def finalize_video_segments(self, reception_id, upload_id, segments):
+        self.finalized = (reception_id, upload_id, [(s.index, s.duration) for s in segments])
+        return True
+
+
+def test_segments_upload_in_background_and_finish_sends_the_rest(tmp_path):
+    sync = FakeSegmentSync(fail_once={1})
+    uploader = SegmentUploader(sync)
+    segments = [(tmp_path / f"video_{i:03d}.mp4", i, 30.0 if i < 2 else 7.5) for i in range(3)]
+
+    # Запись идёт: готовые сегменты грузятся сразу
+    for path, index, duration in segments[:2]:
+        uploader.add(path, index, duration)
+    deadline = time.monotonic() + 5
+    while len(sync.uploaded) < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sync.uploaded[0][1] == 0
+
+    # Отправка: полный список, последний сегмент ещё не добавлен, сегмент 1 упал и повторяется
+    assert uploader.finish(42, segments)
+    assert sorted(index for _, index, _ in sync.uploaded) == [0, 1, 2]
+    assert {upload_id for upload_id, _, _ in sync.uploaded} == {uploader.upload_id}
+    assert sync.finalized == (42, uploader.upload_id, [(0, 30.0), (1, 30.0), (2, 7.5)])
+
+
+def test_finish_fails_without_finalize_when_segment_is_lost(tmp_path):
+    sync = FakeSegmentSync()
+    sync.upload_video_segment = lambda upload_id, index, file_path: False
+    uploader = SegmentUploader(sync)
+    assert not uploader.finish(1, [(tmp_path / "video_000.mp4", 0, 30.0)])
+    assert sync.finalized is None
+
+
+@pytest.fixture
+def receipts_root(tmp_path, monkeypatch):
+    """Файлы сервера — во временной папке, ffmpeg на сервере отключён (плейлист)."""
+    reset_db()
+    config = dict(get_config())
+    config["paths"] = dict(config["paths"], receipts_root=str(tmp_path / "receipts"))
+    config["ffmpeg"] = {"path": str(tmp_path / "no-ffmpeg")}
+    monkeypatch.setattr(routes_files, "get_config", lambda: config)
+    return tmp_path / "receipts", config
+
+
+def create_reception():
+    return client.post("/api/v1/receptions", json={
+        "ttn_number": "VIDEO-1", "ttn_date": "2025-01-10", "supplier": "S",
+        "items": [{"article": "A-1", "name": "Товар", "quantity": 1, "unit": "шт"}],
+    }).json()["id"]
+
+
+def upload_segment(index, data=b"segment", upload_id=UPLOAD_ID, name="video.mp4"):
+    return client.post(f"/api/v1/receptions/video-uploads/{upload_id}/segments/{index}",
+                       files={"file": (name, data, "video/mp4")})
+
+
+def test_segments_are_indexed_into_playlist_and_downloaded_as_zip(receipts_root):
+    root, _ = receipts_root
+    # Сегменты загружаются до создания приёмки
+    assert upload_segment(0, b"first").status_code == 200
+    assert upload_segment(1, b"old").status_code == 200
+    assert upload_segment(1, b"second").status_code == 200  # повтор заменяет сегмент
+    reception_id = create_reception()
+
+    response = client.post(f"/api/v1/receptions/{reception_id}/video/segments", json={
+        "upload_id": UPLOAD_ID, "segments": [{"index": 1, "duration": 4.2}, {"index": 0, "duration": 30}],
+    })
+    assert response.status_code == 200
+    video_path = response.json()["video_path"]
+    assert video_path.endswith("/video/video.m3u8")
+    assert response.json()["segments"] == 2
+    assert not (root / "_uploads" / UPLOAD_ID).exists()
+
+    playlist = read_playlist(root / "2025-01-10_{}".format(reception_id) / "video" / "video.m3u8")
+    assert [path.name for path in playlist] == ["segment_0000.mp4", "segment_0001.mp4"]
+    text = playlist[0].parent.joinpath("video.m3u8").read_text()
+    assert "#EXTINF:30.000," in text and "#EXTINF:4.200," in text and "#EXT-X-TARGETDURATION:30" in text
+
+    download = client.get(f"/api/v1/receptions/{reception_id}/video")
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(download.content)) as archive:
+        assert archive.namelist() == ["video.m3u8", "segment_0000.mp4", "segment_0001.mp4"]
+        assert archive.read("segment_0001.mp4") == b"second"
+
+
+def test_finalize_rejects_missing_segments_and_bad_upload_id(receipts_root):
+    upload_segment(0)
+    reception_id = create_reception()
+    response = client.post(f"/api/v1/receptions/{reception_id}/video/segments", json={
+        "upload_id": UPLOAD_ID, "segments": [{"index": 0, "duration": 30}, {"index": 1, "duration": 5}],
+    })
+    assert response.status_code == 400
+    assert "[1]" in response.json()["detail"]
+
+    assert upload_segment(0, upload_id="../../etc").status_code in (404, 422)
+    assert upload_segment(0, upload_id="not-hex").status_code == 422
+    assert upload_segment(0, name="video.exe").status_code == 415
+
+
+def write_segment(path, first, count):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for value in range(first, first + count):
+        writer.write(np.full((48, 64, 3), value * 10, dtype=np.uint8))
+    writer.release()
+    return path.read_bytes()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg не установлен")
+def test_segments_are_stitched_with_ffmpeg(receipts_root, tmp_path):
+    root, config = receipts_root
+    config["ffmpeg"] = {"path": "ffmpeg"}
+    upload_segment(0, write_segment(tmp_path / "a.mp4", 0, 10))
+    upload_segment(1, write_segment(tmp_path / "b.mp4", 10, 5))
+    reception_id = create_reception()
+
+    response = client.post(f"/api/v1/receptions/{reception_id}/video/segments", json={
+        "upload_id": UPLOAD_ID, "segments": [{"index": 0, "duration": 1.0}, {"index": 1, "duration": 0.5}],
+    })
+    assert response.json()["video_path"].endswith("/video/video.mp4")
+    video_dir = root / f"2025-01-10_{reception_id}" / "video"
+    assert [path.name for path in video_dir.iterdir()] == ["video.mp4"]
+
+    capture = cv2.VideoCapture(str(video_dir / "video.mp4"))
+    frames = 0
+    while capture.read()[0]:
+        frames += 1
+    capture.release()
+    assert frames == 15
+
+
+def test_stale_uploads_are_removed(tmp_path):
+    stale, fresh = tmp_path / "stale", tmp_path / "fresh"
+    stale.mkdir()
+    fresh.mkdir()
+    old = time.time() - 2 * 24 * 60 * 60
+    os.utime(stale, (old, old))
+    cleanup_stale_uploads(tmp_path)
+    assert not stale.exists() and fresh.exists()
@@ -0,0 +1,157 @@
+# tests/test_video_writer.py
+"""
+Тесты записи видео (video_writer): командная строка ffmpeg (CRF/битрейт,
+H.264/MP4, VP9/WebM), передача кадров в ffmpeg через канал (подставной
+ffmpeg пишет сырые кадры в файл), ошибки и вывод ffmpeg в stderr, замена на OpenCV без ffmpeg,
+FrameEncoder с ffmpeg. Настоящий ffmpeg проверяется, только если он установлен.
+
+Запуск:
+    pytest tests/test_video_writer.py -v
+"""
+import logging
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from client.src.services.camera_service import FrameEncoder, FrameRing
+from client.src.services.video_writer import (
+    BACKEND_FFMPEG, FFmpegVideoWriter, OpenCVVideoWriter, ffmpeg_command, open_video_writer, resolve_ffmpeg
+)
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="подставной ffmpeg — shell-скрипт")
+
+
+def fake_ffmpeg(tmp_path, body='for last; do :; done\ncat > "$last"\n'):
+    """Скрипт вместо ffmpeg: по умолчанию пишет stdin в последний аргумент (файл видео)."""
+    script = tmp_path / "ffmpeg"
+    script.write_text("#!/bin/sh\n" + body)
+    script.chmod(0o755)
+    return str(script)
+
+
+def frames(count, width=64, height=48):
+    return [np.full((height, width, 3), i, dtype=np.uint8) for i in range(count)]
+
+
+def test_h264_command_uses_crf_and_fragmented_mp4(tmp_path):
+    command = ffmpeg_command(tmp_path / "video.mp4", "h264", 30, (1280, 720))
+    assert command[command.index("-s") + 1] == "1280x720"
+    assert command[command.index("-c:v") + 1] == "libx264"
+    assert command[command.index("-crf") + 1] == "28"
+    assert command[command.index("-preset") + 1] == "ultrafast"
+    assert command[command.index("-g") + 1] == "60"
+    assert "frag_keyframe" in command[command.index("-movflags") + 1]
+    assert command[-1] == str(tmp_path / "video.mp4")
+
+
+def test_bitrate_overrides_crf_and_vp9_uses_webm(tmp_path):
+    command = ffmpeg_command(tmp_path / "video.mp4", "h264", 25, (640, 480), crf=20, bitrate_kbps=800)
+    assert command[command.index("-b:v") + 1] == "800k"
+    assert "-crf" not in command
+
+    command = ffmpeg_command(tmp_path / "video.webm", "vp9", 25, (640, 480))
+    assert command[command.index("-c:v") + 1] == "libvpx-vp9"
+    assert command[command.index("-crf") + 1] == "32"
+    assert command[command.index("-b:v") + 1] == "0"
+    assert command[command.index("-f", command.index("-c:v")) + 1] == "webm"
+
+    with pytest.raises(ValueError):
+        ffmpeg_command(tmp_path / "video.mkv", "hevc", 25, (640, 480))
+
+
+@posix_only
+def test_frames_are_piped_to_ffmpeg(tmp_path):
+    path = tmp_path / "video.mp4"
+    writer = open_video_writer(path, "h264", 30, (64, 48), BACKEND_FFMPEG, ffmpeg_path=fake_ffmpeg(tmp_path), crf=23)
+    assert isinstance(writer, FFmpegVideoWriter)
+    for frame in frames(5):
+        writer.write(frame)
+    writer.release()
+
+    raw = np.frombuffer(path.read_bytes(), dtype=np.uint8).reshape(5, 48, 64, 3)
+    assert [int(frame[0, 0, 0]) for frame in raw] == [0, 1, 2, 3, 4]
+
+
+@posix_only
+def test_ffmpeg_failure_is_logged_not_raised(tmp_path, caplog):
+    ffmpeg_path = fake_ffmpeg(tmp_path, "echo 'Unknown encoder libx264' >&2\nexit 1\n")
+    writer = open_video_writer(tmp_path / "video.mp4", "h264", 30, (640, 480), BACKEND_FFMPEG,
+                               ffmpeg_path=ffmpeg_path)
+    with caplog.at_level(logging.ERROR):
+        # Кадры больше буфера канала: запись упирается в завершившийся ffmpeg
+        for frame in frames(100, 640, 480):
+            writer.write(frame)
+        writer.release()
+    assert writer.broken
+    assert "Unknown encoder libx264" in caplog.text
+
+
+@posix_only
+def test_verbose_ffmpeg_stderr_does_not_stall_recording(tmp_path):
+    # Больше буфера канала в stderr до чтения кадров: без чтения stderr ffmpeg встал бы
+    body = 'for last; do :; done\nhead -c 300000 /dev/zero | tr "\\0" x >&2\ncat > "$last"\n'
+    path = tmp_path / "video.mp4"
+    writer = open_video_writer(path, "h264", 30, (640, 480), BACKEND_FFMPEG, ffmpeg_path=fake_ffmpeg(tmp_path, body))
+
+    def record():
+        for frame in frames(10, 640, 480):
+            writer.write(frame)
+        writer.release()
+
+    thread = threading.Thread(target=record, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert path.stat().st_size == 10 * 640 * 480 * 3
+
+
+def test_opencv_fallback_without_ffmpeg(tmp_path):
+    missing = str(tmp_path / "no-ffmpeg")
+    path = tmp_path / "video.mp4"
+    writer = open_video_writer(path, "h264", 30, (64, 48), BACKEND_FFMPEG, ffmpeg_path=missing)
+    assert isinstance(writer, OpenCVVideoWriter)
+    for frame in frames(5):
+        writer.write(frame)
+    writer.release()
+    assert cv2.VideoCapture(str(path)).get(cv2.CAP_PROP_FRAME_COUNT) == 5
+
+    with pytest.raises(RuntimeError):
+        open_video_writer(tmp_path / "video.webm", "vp9", 30, (64, 48), BACKEND_FFMPEG, ffmpeg_path=missing)
+
+
+@posix_only
+def test_encoder_with_ffmpeg_backend(tmp_path):
+    ring = FrameRing(64, 48, size=4)
+    path = tmp_path / "video.mp4"
+    encoder = FrameEncoder(path, "h264", 10, (64, 48), backend=BACKEND_FFMPEG,
+                           writer_options={"ffmpeg_path": fake_ffmpeg(tmp_path), "crf": 30})
+    # 10 fps, кадр 2 опоздал на интервал — повторяется
+    for number, timestamp in [(0, 1.0), (1, 1.1), (2, 1.3)]:
+        index = ring.acquire()
+        ring.frames[index][:] = number
+        encoder.submit(ring, index, timestamp)
+    encoder.close()
+
+    raw = np.frombuffer(path.read_bytes(), dtype=np.uint8).reshape(-1, 48, 64, 3)
+    assert [int(frame[0, 0, 0]) for frame in raw] == [0, 1, 2, 2]
+    assert not any(ring._holds)
+
+
+@pytest.mark.skipif(resolve_ffmpeg() is None, reason="ffmpeg не установлен")
+@pytest.mark.parametrize("codec, suffix", [("h264", ".mp4"), ("vp9", ".webm")])
+def test_real_ffmpeg_writes_playable_video(tmp_path, codec, suffix):
+    path = tmp_path / f"video{suffix}"
+    writer = open_video_writer(path, codec, 30, (64, 48), BACKEND_FFMPEG)
+    for frame in frames(30):
+        writer.write(frame)
+    writer.release()
+
+    capture = cv2.VideoCapture(str(path))
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    assert count == 30
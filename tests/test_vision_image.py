@@ -0,0 +1,96 @@
+# tests/test_vision_image.py
+"""
+Тесты подготовки изображений для Vision LLM (VisionImageService).
+
+Запуск:
+    pytest tests/test_vision_image.py -v
+"""
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from client.src.services.llm_cache import LLMResponseCache
+from client.src.services.vision_image_service import VisionImageService
+
+
+def make_document_photo(width: int = 4000, height: int = 3000) -> bytes:
+    """Синтетическое «фото» документа: белый лист с текстом и шумом."""
+    rnd = np.random.default_rng(0)
+    image = np.full((height, width, 3), 235, np.uint8)
+    image += rnd.integers(0, 20, image.shape, dtype=np.uint8)
+    for row, y in enumerate(range(150, height - 100, 90)):
+        cv2.putText(image, f"{row + 1}. Bolt M10x50  BOLT-M10  {row * 7} sht", (120, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, (20, 20, 20), 3)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    return encoded.tobytes()
+
+
+@pytest.fixture
+def service():
+    return VisionImageService()
+
+
+class TestPrepare:
+    """Уменьшение и перекодирование."""
+
+    def test_large_photo_downscaled(self, service):
+        raw = make_document_photo()
+        prepared = service.prepare(raw, ".jpg")
+
+        assert prepared.mime_type == "image/jpeg"
+        assert max(prepared.size) <= service.max_long_side
+        assert min(prepared.size) <= service.max_short_side
+        assert len(prepared.data) < len(raw) / 5
+
+        decoded = cv2.imdecode(np.frombuffer(prepared.data, np.uint8), cv2.IMREAD_UNCHANGED)
+        assert decoded.ndim == 2  # оттенки серого
+        assert (decoded.shape[1], decoded.shape[0]) == prepared.size
+
+    def test_aspect_ratio_kept(self, service):
+        prepared = service.prepare(make_document_photo(3000, 4000))
+        width, height = prepared.size
+        assert abs(width / height - 0.75) < 0.01
+
+    def test_small_image_not_upscaled(self, service):
+        ok, encoded = cv2.imencode(".png", np.full((200, 300), 255, np.uint8))
+        assert service.prepare(encoded.tobytes(), ".png").size == (300, 200)
+
+    def test_webp(self, service):
+        service.format = "webp"
+        prepared = service.prepare(make_document_photo(1000, 800))
+        assert prepared.mime_type == "image/webp"
+        assert cv2.imdecode(np.frombuffer(prepared.data, np.uint8), cv2.IMREAD_UNCHANGED) is not None
+
+    def test_undecodable_bytes_passed_through(self, service):
+        prepared = service.prepare(b"not an image", ".png")
+        assert prepared.data == b"not an image"
+        assert prepared.mime_type == "image/png"
+
+    def test_signature_changes_with_settings(self, service):
+        before = service.signature
+        service.quality = 60
+        assert service.signature != before
+
+
+def test_chatbothub_sends_prepared_image(fake_llm_server, tmp_path):
+    """В ChatBotHub уходит уменьшенный JPEG, а не исходный файл."""
+    from client.src.services.async_llm_client import AsyncLLMClient
+    from client.src.services.chatbothub_service import ChatBotHubService
+
+    service = ChatBotHubService()
+    service.base_url = fake_llm_server.url
+    service.http = AsyncLLMClient("chatbothub-test")
+    service.cache = LLMResponseCache(enabled=False)
+
+    photo = tmp_path / "photo.png"
+    raw = make_document_photo()
+    photo.write_bytes(raw)
+
+    assert service.parse_ttn_image(photo)["ttn_number"] == "1"
+    user_input = fake_llm_server.requests[0].body["user_input"]
+    header, payload = user_input.split(",", 1)
+    assert header == "data:image/jpeg;base64"
+    assert len(base64.b64decode(payload)) < len(raw) / 5